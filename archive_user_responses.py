@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import logging
+from datetime import date
+from pathlib import Path
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.database.user_response_partitions import UserResponsePartitions, add_months
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def archive_user_responses(retention_months: int, archive_dir: Path) -> None:
+    """
+    Create upcoming user_response partitions and archive the expired ones.
+
+    Partitions whose whole month is older than the retention period are exported
+    to compressed CSV files in archive_dir, then detached and dropped.
+    """
+    settings = get_settings()
+    older_than = add_months(date.today(), -retention_months)
+
+    async with get_connection() as conn:
+        await UserResponsePartitions.ensure_future_partitions(
+            conn, months_ahead=settings.USER_RESPONSE_PARTITIONS_AHEAD
+        )
+        archived = await UserResponsePartitions.archive_partitions(
+            conn, older_than=older_than, archive_dir=archive_dir
+        )
+    logger.info(f"Archived {len(archived)} partitions older than {older_than}")
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Archive user_response partitions past the retention period"
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=settings.USER_RESPONSE_RETENTION_MONTHS,
+    )
+    parser.add_argument(
+        "--archive-dir", type=Path, default=Path(settings.USER_RESPONSE_ARCHIVE_DIR)
+    )
+    args = parser.parse_args()
+    asyncio.run(archive_user_responses(args.retention_months, args.archive_dir))
@@ -0,0 +1,159 @@
+"""
+Benchmark bulk loading through COPY vs the unnest inserts.
+
+Loads --rows synthetic user interactions (1536-dim vectors) into the real
+tables through:
+- unnest: one INSERT ... SELECT unnest(...) over lists of every row, as
+  AISupportRepository.save_user_responses does
+- copy: binary COPY into a staging table merged batch by batch, streamed from a
+  generator, as the bulk_load_* methods of DumpDataRepository do
+
+FAQ documents are loaded through copy only, as ingestion itself stores them a
+chunk at a time.
+
+Reports rows/sec and, with --memory, the peak memory allocated by Python while
+loading. Each load runs in a transaction that is rolled back, so the tables are
+left untouched.
+
+Usage:
+    python -m benchmarks.bulk_load --rows 100000 --memory
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Iterator
+
+from asyncpg import Connection
+
+from src.application.dump_data_manager import DumpDataManager
+from src.application.interfaces.ai_support_interface import UserResponse
+from src.database.connection import get_connection
+from src.infrastructure.ai_support_repository import AISupportRepository
+from src.infrastructure.dump_data_repository import DumpDataRepository
+from src.infrastructure.embedding_slots import fetch_active_embeddings
+from src.types.documents import FaqCategory, FaqDocument
+from src.types.embeddings import EMBEDDING_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def _vector(rng: random.Random) -> list[float]:
+    return [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+
+
+def make_documents(rows: int) -> Iterator[FaqDocument]:
+    rng = random.Random(0)
+    for index in range(rows):
+        yield FaqDocument(
+            title=f"Document {index}",
+            link=f"https://example.com/faq/{index}",
+            text="Document text. " * 200,
+            llm_summary="A short summary of the document. " * 8,
+            category=FaqCategory.PLATFORM_OVERVIEW,
+            embedding=_vector(rng),
+        )
+
+
+def make_user_responses(rows: int, user_id: int) -> Iterator[UserResponse]:
+    rng = random.Random(0)
+    for index in range(rows):
+        yield UserResponse(
+            user_id=user_id,
+            user_question=f"question {index}",
+            question_embedding=_vector(rng),
+            response="response text " * 50,
+            response_embedding=_vector(rng),
+        )
+
+
+async def rolled_back(
+    conn: Connection, load: Callable[[], Awaitable[object]], memory: bool
+) -> tuple[float, int | None]:
+    """Run a load in a transaction that is rolled back; return seconds and peak bytes."""
+    transaction = conn.transaction()
+    await transaction.start()
+    try:
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        await load()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        return elapsed, peak
+    finally:
+        tracemalloc.stop()
+        await transaction.rollback()
+
+
+async def create_user(conn: Connection, repository: DumpDataRepository) -> int:
+    await repository.dump_user_data([DumpDataManager._create_test_user()])
+    return await conn.fetchval(
+        "SELECT id FROM user_management.user WHERE email = 'test@example.com'"
+    )
+
+
+def report(table: str, mode: str, rows: int, result: tuple[float, int | None]) -> None:
+    elapsed, peak = result
+    line = f"{table} {mode:<6} {rows / elapsed:10.0f} rows/sec"
+    if peak is not None:
+        line += f" {peak / 1_000_000:8.1f} MB allocated (peak)"
+    logger.info(line)
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with get_connection() as conn:
+        embeddings = await fetch_active_embeddings(conn)
+        dump_repository = DumpDataRepository(conn, embeddings)
+        support_repository = AISupportRepository(conn, embeddings=embeddings)
+
+        report(
+            "faq_documents",
+            "copy",
+            args.rows,
+            await rolled_back(
+                conn,
+                lambda: dump_repository.bulk_load_faq_documents(
+                    make_documents(args.rows)
+                ),
+                args.memory,
+            ),
+        )
+
+        async def save_user_responses() -> None:
+            user_id = await create_user(conn, dump_repository)
+            await support_repository.save_user_responses(
+                list(make_user_responses(args.rows, user_id))
+            )
+
+        async def bulk_load_user_responses() -> None:
+            user_id = await create_user(conn, dump_repository)
+            await dump_repository.bulk_load_user_responses(
+                make_user_responses(args.rows, user_id)
+            )
+
+        for mode, load in (
+            ("unnest", save_user_responses),
+            ("copy", bulk_load_user_responses),
+        ):
+            report(
+                "user_response",
+                mode,
+                args.rows,
+                await rolled_back(conn, load, args.memory),
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Trace Python allocations (slows both paths down)",
+    )
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Benchmark building retrieved FAQ documents as pydantic models vs records.
+
+Simulates the per-request work between fetching the similar documents and
+returning the API response, for --documents rows per request:
+- before: full rows (text, embedding, timestamps) validated into FaqDocument,
+  then trimmed into FaqDocumentBaseData
+- after: only the needed columns, built into slotted FaqDocumentRecord
+  instances, with pydantic models created only for the response
+
+Reports time and allocated bytes per request, plus the row payload no longer
+fetched from the database. No database is needed.
+
+Usage:
+    python -m benchmarks.document_records --documents 5
+"""
+
+import argparse
+import logging
+import random
+import timeit
+import tracemalloc
+from array import array
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from src.application.ai_support_manager import AISupportManager
+from src.infrastructure.ai_support_repository import AISupportRepository
+from src.types.documents import FaqCategory, FaqDocument
+from src.types.embeddings import EMBEDDING_DIMENSIONS
+
+logger = logging.getLogger(__name__)
+
+
+def make_rows(documents: int, text_chars: int) -> list[dict[str, Any]]:
+    rng = random.Random(0)
+    return [
+        {
+            "id": index,
+            "title": f"Document {index}",
+            "link": f"https://example.com/faq/{index}",
+            "text": "x" * text_chars,
+            "llm_summary": "A short summary of the document. " * 8,
+            "category": FaqCategory.PLATFORM_OVERVIEW.value,
+            "embedding": array(
+                "f", [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+            ),
+            "created_at": None,
+            "updated_at": datetime.now(),
+        }
+        for index in range(documents)
+    ]
+
+
+def before(rows: list[dict[str, Any]]) -> object:
+    documents = [FaqDocument(**row) for row in rows]
+    return AISupportManager._create_support_response("answer", documents)
+
+
+def after(rows: list[dict[str, Any]]) -> object:
+    documents = [
+        AISupportRepository._convert_to_faq_document_record(row) for row in rows
+    ]
+    return AISupportManager._create_support_response("answer", documents)
+
+
+def allocated_bytes(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure(name: str, func: Callable[[], object], number: int) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    logger.info(
+        f"{name:<8} {seconds * 1_000_000:8.1f} us/request "
+        f"{allocated_bytes(func):8d} bytes allocated (peak)"
+    )
+    return seconds
+
+
+def run(args: argparse.Namespace) -> None:
+    full_rows = make_rows(args.documents, args.text_chars)
+    columns = ("id", "title", "link", "category", "llm_summary")
+    trimmed_rows = [{column: row[column] for column in columns} for row in full_rows]
+
+    baseline = measure("before", lambda: before(full_rows), args.number)
+    current = measure("after", lambda: after(trimmed_rows), args.number)
+    logger.info(f"speedup: {baseline / current:.1f}x")
+
+    skipped = sum(
+        len(row["text"]) + row["embedding"].itemsize * len(row["embedding"])
+        for row in full_rows
+    )
+    logger.info(f"row payload no longer fetched: {skipped} bytes/request")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--text-chars", type=int, default=4000)
+    parser.add_argument("--number", type=int, default=5000)
+    run(parser.parse_args())
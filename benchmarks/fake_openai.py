@@ -0,0 +1,169 @@
+"""
+Fake OpenAI client for load tests, with configurable latency distributions.
+
+Implements the subset of the OpenAI client used by AIGenerationRepository
+(embeddings.create and chat.completions.create), so the real repository code
+runs end to end. Embeddings come from the local AI backend: deterministic per
+text, so repeated queries hit the same documents and canonical answers.
+
+Latency specs (milliseconds):
+    none                 no delay
+    const:50             always 50 ms
+    uniform:20:80        uniformly between 20 and 80 ms
+    lognormal:800:0.5    log-normal with an 800 ms median and sigma 0.5
+"""
+
+import json
+import math
+import random
+import re
+import time
+from dataclasses import dataclass
+
+from openai.types import CompletionUsage, CreateEmbeddingResponse, Embedding
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.create_embedding_response import Usage
+
+from src.infrastructure.local_ai_generation_repository import deterministic_embedding
+from src.infrastructure.token_count import approximate_tokens
+
+DOCUMENT_NUMBER_PATTERN = re.compile(r"^\[(\d+)\] Document: ", re.MULTILINE)
+# Numbers of the retrieved documents when the whole corpus is in the prompt
+RETRIEVED_DOCUMENTS_PATTERN = re.compile(
+    r"^Documents retrieved for this question: (.*)$", re.MULTILINE
+)
+
+
+@dataclass
+class LatencyDistribution:
+    """A latency distribution in milliseconds, parsed from a spec string."""
+
+    kind: str
+    params: tuple[float, ...] = ()
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Parse a spec such as const:50, uniform:20:80 or lognormal:800:0.5."""
+        kind, *params = spec.split(":")
+        expected = {"none": 0, "const": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        return cls(kind=kind, params=tuple(float(param) for param in params))
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in milliseconds."""
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma)
+        return 0.0
+
+
+class _FakeEmbeddings:
+    def __init__(self, client: "FakeOpenAI") -> None:
+        self.client = client
+
+    def create(
+        self, model: str, input: str | list[str], **_: object
+    ) -> CreateEmbeddingResponse:
+        texts = [input] if isinstance(input, str) else input
+        self.client.sleep(self.client.embedding_latency)
+        tokens = sum(approximate_tokens(text) for text in texts)
+        return CreateEmbeddingResponse(
+            data=[
+                Embedding(
+                    embedding=deterministic_embedding(text),
+                    index=index,
+                    object="embedding",
+                )
+                for index, text in enumerate(texts)
+            ],
+            model=model,
+            object="list",
+            usage=Usage(prompt_tokens=tokens, total_tokens=tokens),
+        )
+
+
+class _FakeCompletions:
+    def __init__(self, client: "FakeOpenAI") -> None:
+        self.client = client
+
+    def create(
+        self, model: str, messages: list[dict[str, str]], **_: object
+    ) -> ChatCompletion:
+        self.client.sleep(self.client.chat_latency)
+        prompt = "\n".join(message["content"] for message in messages)
+        content = self._answer(prompt)
+        prompt_tokens = approximate_tokens(prompt)
+        completion_tokens = approximate_tokens(content)
+        return ChatCompletion(
+            id="fake-completion",
+            choices=[
+                Choice(
+                    finish_reason="stop",
+                    index=0,
+                    message=ChatCompletionMessage(role="assistant", content=content),
+                )
+            ],
+            created=int(time.time()),
+            model=model,
+            object="chat.completion",
+            usage=CompletionUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+    def _answer(self, prompt: str) -> str:
+        """Answer in the shape the calling prompt asks for."""
+        if "used_documents" in prompt:
+            retrieved = RETRIEVED_DOCUMENTS_PATTERN.search(prompt)
+            numbers = [
+                int(number)
+                for number in (
+                    re.findall(r"\d+", retrieved.group(1))
+                    if retrieved
+                    else DOCUMENT_NUMBER_PATTERN.findall(prompt)
+                )
+            ]
+            return json.dumps(
+                {
+                    "answer": "Fake answer. " * (self.client.answer_tokens // 3),
+                    "used_documents": numbers[:2],
+                }
+            )
+        if "questions" in prompt and "[topic]" not in prompt:
+            return json.dumps({"questions": []})
+        return "- Fake topic: Fake explanation"
+
+
+class _FakeChat:
+    def __init__(self, client: "FakeOpenAI") -> None:
+        self.completions = _FakeCompletions(client)
+
+
+class FakeOpenAI:
+    """Stand-in for openai.OpenAI that sleeps instead of calling the API."""
+
+    def __init__(
+        self,
+        embedding_latency: LatencyDistribution,
+        chat_latency: LatencyDistribution,
+        answer_tokens: int = 150,
+        seed: int = 0,
+    ) -> None:
+        self.embedding_latency = embedding_latency
+        self.chat_latency = chat_latency
+        self.answer_tokens = answer_tokens
+        self.rng = random.Random(seed)
+        self.embeddings = _FakeEmbeddings(self)
+        self.chat = _FakeChat(self)
+
+    def sleep(self, latency: LatencyDistribution) -> None:
+        # The repository runs client calls in worker threads, so block like the SDK
+        time.sleep(latency.sample(self.rng) / 1000)
@@ -0,0 +1,77 @@
+"""
+Benchmark the time to import the app, as each worker does when it starts.
+
+Imports main in fresh interpreters and reports the minimum, median and maximum
+time, against a startup budget. Importing langchain and the OpenAI SDK at
+startup used to take about 2s on its own; both are now loaded on first use.
+
+No database is needed.
+
+Usage:
+    python -m benchmarks.import_time --runs 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+print(json.dumps(time.perf_counter() - start))
+"""
+
+# Settings required to import the app, unless set in the environment
+REQUIRED_SETTINGS = {
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "postgres",
+    "APP_PORT": "8000",
+    "OPENAI_API_KEY": "test",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def measure_import() -> float:
+    """Seconds to import main in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        env={**REQUIRED_SETTINGS, **os.environ},
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def run(args: argparse.Namespace) -> None:
+    # The first run also compiles the bytecode caches
+    measure_import()
+    seconds = sorted(measure_import() for _ in range(args.runs))
+    median = statistics.median(seconds)
+    logger.info(
+        f"import main: min {seconds[0] * 1000:.0f} ms, "
+        f"median {median * 1000:.0f} ms, max {seconds[-1] * 1000:.0f} ms"
+    )
+    if median > args.budget:
+        logger.warning(f"Median import time exceeds the {args.budget:.1f}s budget")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET_SECONDS)
+    run(parser.parse_args())
@@ -0,0 +1,127 @@
+"""
+Benchmark loading the base data Markdown files sequentially vs concurrently.
+
+Writes a synthetic corpus of --files Markdown documents (front matter, links,
+irregular whitespace, a share of duplicates and of oversized documents) to a
+temporary directory, then loads it:
+- sequential: one blocking open() and read() per file, as init_base_data did
+- normalized: the same loop, normalizing each file as load_faq_documents does
+- preprocessed: load_faq_documents, reading and normalizing batches of files
+  in worker threads, deduplicating and splitting oversized documents
+
+Reports files/sec and what preprocessing kept. Normalization is CPU-bound, so
+the worker threads mostly overlap reads from slow (network or cold) storage
+with it. No database is needed.
+
+Usage:
+    python -m benchmarks.markdown_preprocessing --files 50000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from src.infrastructure.faq_document_loader import (
+    READ_CONCURRENCY,
+    load_faq_documents,
+    normalize_markdown,
+)
+
+logger = logging.getLogger(__name__)
+
+WORDS = [
+    "freelancer",
+    "client",
+    "project",
+    "payment",
+    "profile",
+    "review",
+    "contract",
+    "platform",
+]
+
+
+def make_document(rng: random.Random, index: int, paragraphs: int) -> str:
+    body = "\n\n\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(80))
+        + f"  see  the [guide](https://example.com/guide/{index})   "
+        for _ in range(paragraphs)
+    )
+    return f"---\ntitle: Document {index}\n---\n# Document {index}  \r\n\r\n{body}\n"
+
+
+def write_corpus(
+    directory: Path, files: int, duplicate_rate: float, oversized_rate: float
+) -> list[dict[str, Any]]:
+    """Write the synthetic corpus and return its faq_documents_list entries."""
+    rng = random.Random(0)
+    entries = []
+    for index in range(files):
+        if entries and rng.random() < duplicate_rate:
+            text = Path(rng.choice(entries)["text_path"]).read_text()
+        else:
+            paragraphs = 200 if rng.random() < oversized_rate else 8
+            text = make_document(rng, index, paragraphs)
+        path = directory / f"{index:06d}.md"
+        path.write_text(text)
+        entries.append(
+            {
+                "title": f"Document {index}",
+                "link": f"/faq/{index}",
+                "text_path": str(path),
+                "category": "general",
+            }
+        )
+    return entries
+
+
+def read_sequentially(entries: list[dict[str, Any]], normalize: bool) -> list[str]:
+    texts = []
+    for entry in entries:
+        with open(entry["text_path"]) as f:
+            text = f.read()
+        texts.append(normalize_markdown(text) if normalize else text)
+    return texts
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        entries = write_corpus(
+            Path(directory), args.files, args.duplicate_rate, args.oversized_rate
+        )
+
+        for mode, normalize in (("sequential", False), ("normalized", True)):
+            start = time.perf_counter()
+            read_sequentially(entries, normalize)
+            elapsed = time.perf_counter() - start
+            logger.info(f"{mode:<12} {args.files / elapsed:10.0f} files/sec")
+
+        start = time.perf_counter()
+        report = await load_faq_documents(
+            entries, args.max_tokens, read_concurrency=args.concurrency
+        )
+        preprocessed = time.perf_counter() - start
+        logger.info(f"preprocessed {args.files / preprocessed:10.0f} files/sec")
+        logger.info(
+            f"kept {len(report.documents)} documents ({report.tokens} tokens), "
+            f"{len(report.duplicates)} duplicates, {len(report.rejected)} rejected, "
+            f"{report.split} split"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Each duplicate and oversized document is logged by the loader
+    logging.getLogger("src.infrastructure.faq_document_loader").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--oversized-rate", type=float, default=0.01)
+    parser.add_argument("--max-tokens", type=int, default=6000)
+    parser.add_argument("--concurrency", type=int, default=READ_CONCURRENCY)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,382 @@
+"""
+Replay query traces against the FastAPI app and report latency and throughput.
+
+Queries come from a JSONL trace (one object per line with a "query" field, or
+"title"/"body" as in requests.jsonl) or, without a trace, are synthesized from
+the FAQ document titles in the database. By default the app runs in-process
+with a fake OpenAI backend, so only a local Postgres is needed; --base-url
+targets an already running server instead.
+
+Load models:
+- closed loop (--concurrency N): N clients, each sending its next request as
+  soon as the previous one completes
+- open loop (--rate R): Poisson arrivals at R requests/second, regardless of
+  how fast the server answers
+
+Reports p50/p95/p99 latency, throughput and a per-stage breakdown computed
+from the deltas of the application's Prometheus histograms.
+
+Usage:
+    python -m benchmarks.replay --trace requests.jsonl --concurrency 16
+    python -m benchmarks.replay --rate 20 --requests 500 --chat-latency lognormal:800:0.5
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+from prometheus_client import REGISTRY, generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.fake_openai import FakeOpenAI, LatencyDistribution
+from src.database.connection import close_pool, get_connection
+
+SEARCH_PATH = "/api/ai_system/ai_faq_search"
+BATCH_SEARCH_PATH = "/api/ai_system/ai_faq_search/batch"
+
+# Histograms whose deltas make up the per-stage breakdown
+STAGE_METRICS = {
+    "embedding": "ai_embedding_generation_time_seconds",
+    "document_search": "ai_document_search_time_seconds",
+    "support_response": "ai_support_response_time_seconds",
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HistogramSnapshot:
+    """Cumulative bucket counts, count and sum of one histogram."""
+
+    buckets: dict[float, float] = field(default_factory=dict)
+    count: float = 0.0
+    sum: float = 0.0
+
+    def __sub__(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        return HistogramSnapshot(
+            buckets={
+                bound: value - other.buckets.get(bound, 0.0)
+                for bound, value in self.buckets.items()
+            },
+            count=self.count - other.count,
+            sum=self.sum - other.sum,
+        )
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within buckets."""
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        lower_bound, lower_count = 0.0, 0.0
+        for bound, cumulative in sorted(self.buckets.items()):
+            if cumulative >= rank:
+                if math.isinf(bound):
+                    return lower_bound
+                fraction = (rank - lower_count) / max(cumulative - lower_count, 1e-9)
+                return lower_bound + (bound - lower_bound) * fraction
+            lower_bound, lower_count = bound, cumulative
+        return lower_bound
+
+
+@dataclass
+class RequestResult:
+    """Outcome of one replayed request."""
+
+    latency: float
+    ok: bool
+
+
+def load_trace(path: Path) -> list[dict[str, Any]]:
+    """Load query requests from a JSONL trace."""
+    requests = []
+    with path.open() as trace:
+        for line_number, line in enumerate(trace):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            query = entry.get("query") or entry.get("title") or entry.get("body")
+            if not query:
+                logger.warning(f"Skipping trace line {line_number + 1} without a query")
+                continue
+            requests.append(
+                {
+                    "query": query,
+                    "user_id": entry.get("user_id", 1),
+                    "i_am_a_developer": entry.get("i_am_a_developer", False),
+                }
+            )
+    return requests
+
+
+async def synthesize_trace(users: int, rng: random.Random) -> list[dict[str, Any]]:
+    """Build queries from the FAQ document titles in the database."""
+    async with get_connection() as conn:
+        records = await conn.fetch(
+            "SELECT title FROM platform_information.faq_documents"
+        )
+    templates = ("How do I {}?", "What is {}?", "Can you explain {}?", "{}")
+    return [
+        {
+            "query": template.format(record["title"].lower()),
+            "user_id": rng.randint(1, users),
+            "i_am_a_developer": rng.random() < 0.2,
+        }
+        for record in records
+        for template in templates
+    ]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def parse_stages(metrics_text: str) -> dict[str, HistogramSnapshot]:
+    """Extract the stage histograms from Prometheus text exposition output."""
+    names = {metric: stage for stage, metric in STAGE_METRICS.items()}
+    snapshots = {stage: HistogramSnapshot() for stage in STAGE_METRICS}
+    for family in text_string_to_metric_families(metrics_text):
+        stage = names.get(family.name)
+        if stage is None:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                bound = float(sample.labels["le"])
+                snapshots[stage].buckets[bound] = sample.value
+            elif sample.name.endswith("_count"):
+                snapshots[stage].count = sample.value
+            elif sample.name.endswith("_sum"):
+                snapshots[stage].sum = sample.value
+    return snapshots
+
+
+async def send(
+    client: httpx.AsyncClient, payload: list[dict[str, Any]]
+) -> RequestResult:
+    """Send one request (single query or batch) and time it end to end."""
+    start = time.perf_counter()
+    try:
+        if len(payload) == 1:
+            response = await client.post(SEARCH_PATH, json=payload[0])
+        else:
+            response = await client.post(BATCH_SEARCH_PATH, json={"queries": payload})
+        ok = response.status_code == 200 and '"error":"' not in response.text
+    except httpx.HTTPError as e:
+        logger.debug(f"Request failed: {str(e)}")
+        ok = False
+    return RequestResult(latency=time.perf_counter() - start, ok=ok)
+
+
+async def run_closed_loop(
+    client: httpx.AsyncClient, payloads: list[list[dict[str, Any]]], concurrency: int
+) -> list[RequestResult]:
+    """Each of `concurrency` clients sends its next request when the last one ends."""
+    queue: asyncio.Queue[list[dict[str, Any]]] = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    results: list[RequestResult] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            results.append(await send(client, queue.get_nowait()))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def run_open_loop(
+    client: httpx.AsyncClient,
+    payloads: list[list[dict[str, Any]]],
+    rate: float,
+    rng: random.Random,
+) -> list[RequestResult]:
+    """Send requests with Poisson arrivals at `rate` per second."""
+    tasks = []
+    for payload in payloads:
+        tasks.append(asyncio.create_task(send(client, payload)))
+        await asyncio.sleep(rng.expovariate(rate))
+    return list(await asyncio.gather(*tasks))
+
+
+@asynccontextmanager
+async def app_client(
+    args: argparse.Namespace,
+) -> AsyncIterator[tuple[httpx.AsyncClient, Callable[[], Awaitable[str]]]]:
+    """
+    HTTP client for a running server, or for the in-process app with fake AI.
+
+    Also yields a function returning the current metrics: scraped from /metrics
+    for a running server, read from the process registry for the in-process app.
+    """
+    timeout = httpx.Timeout(args.timeout)
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as client:
+
+            async def scrape_metrics() -> str:
+                response = await client.get("/metrics")
+                response.raise_for_status()
+                return response.text
+
+            yield client, scrape_metrics
+        return
+
+    from main import app
+    from src.infrastructure.ai_generation_repository import get_ai_client
+
+    fake_client = FakeOpenAI(
+        embedding_latency=LatencyDistribution.parse(args.embedding_latency),
+        chat_latency=LatencyDistribution.parse(args.chat_latency),
+        answer_tokens=args.answer_tokens,
+        seed=args.seed,
+    )
+    app.dependency_overrides[get_ai_client] = lambda: fake_client
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(
+                transport=transport, base_url="http://replay", timeout=timeout
+            ) as client,
+        ):
+
+            async def read_metrics() -> str:
+                return generate_latest(REGISTRY).decode()
+
+            yield client, read_metrics
+    finally:
+        app.dependency_overrides.pop(get_ai_client, None)
+        await close_pool()
+
+
+def report(
+    results: list[RequestResult],
+    elapsed: float,
+    batch_size: int,
+    stages: dict[str, HistogramSnapshot],
+) -> dict[str, Any]:
+    """Summarize the run and log it."""
+    latencies = [result.latency * 1000 for result in results]
+    summary: dict[str, Any] = {
+        "requests": len(results),
+        "errors": sum(not result.ok for result in results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(results) / elapsed,
+        "throughput_qps": len(results) * batch_size / elapsed,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies, default=math.nan),
+        },
+        "stages": {
+            stage: {
+                "count": snapshot.count,
+                "mean_ms": snapshot.sum / snapshot.count * 1000
+                if snapshot.count
+                else math.nan,
+                "p95_ms": snapshot.quantile(0.95) * 1000,
+            }
+            for stage, snapshot in stages.items()
+        },
+    }
+
+    latency = summary["latency_ms"]
+    logger.info(
+        f"{summary['requests']} requests, {summary['errors']} errors in {elapsed:.1f}s: "
+        f"{summary['throughput_rps']:.1f} req/s, {summary['throughput_qps']:.1f} queries/s"
+    )
+    logger.info(
+        f"latency p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+        f"p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms"
+    )
+    for stage, values in summary["stages"].items():
+        logger.info(
+            f"  {stage:<17} {values['count']:>7.0f} calls, mean {values['mean_ms']:8.1f} ms, "
+            f"p95 ~{values['p95_ms']:8.1f} ms"
+        )
+    return summary
+
+
+async def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    queries = (
+        load_trace(args.trace)
+        if args.trace
+        else await synthesize_trace(args.users, rng)
+    )
+    if not queries:
+        raise SystemExit("No queries to replay")
+
+    total_queries = args.requests * args.batch_size
+    sampled = [queries[i % len(queries)] for i in range(total_queries)]
+    if args.shuffle:
+        rng.shuffle(sampled)
+    payloads = [
+        sampled[i : i + args.batch_size]
+        for i in range(0, total_queries, args.batch_size)
+    ]
+
+    async with app_client(args) as (client, metrics_text):
+        if args.warmup:
+            await run_closed_loop(client, payloads[: args.warmup], args.concurrency)
+
+        before = parse_stages(await metrics_text())
+        start = time.perf_counter()
+        if args.rate:
+            results = await run_open_loop(client, payloads, args.rate, rng)
+        else:
+            results = await run_closed_loop(client, payloads, args.concurrency)
+        elapsed = time.perf_counter() - start
+        after = parse_stages(await metrics_text())
+
+    summary = report(
+        results,
+        elapsed,
+        args.batch_size,
+        {stage: after[stage] - before[stage] for stage in STAGE_METRICS},
+    )
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2))
+        logger.info(f"Wrote summary to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    # The application logs every query at INFO
+    logging.getLogger("src").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trace", type=Path, help="JSONL trace (default: synthetic)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Closed-loop clients"
+    )
+    parser.add_argument("--rate", type=float, help="Open-loop arrivals per second")
+    parser.add_argument("--batch-size", type=int, default=1, help="Queries per request")
+    parser.add_argument(
+        "--users", type=int, default=50, help="Users in synthetic traces"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=10, help="Untimed warm-up requests"
+    )
+    parser.add_argument("--shuffle", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--base-url", help="Target a running server instead")
+    parser.add_argument("--embedding-latency", default="lognormal:150:0.4")
+    parser.add_argument("--chat-latency", default="lognormal:1500:0.5")
+    parser.add_argument("--answer-tokens", type=int, default=150)
+    parser.add_argument("--output", type=Path, help="Write the summary as JSON")
+    asyncio.run(run(parser.parse_args()))
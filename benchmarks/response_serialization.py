@@ -0,0 +1,151 @@
+"""
+Benchmark JSON serialization of large API responses.
+
+For a support answer and a full history page it compares:
+- render only: FastAPI's jsonable_encoder + json.dumps against a single
+  pydantic-core to_json of the already validated model
+- end to end: an in-process FastAPI route returning the model with
+  response_model (revalidated and serialized by FastAPI) against one returning
+  PydanticJSONResponse
+
+No database is needed.
+
+Usage:
+    python -m benchmarks.response_serialization --answer-chars 8000 --history-items 100
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import timeit
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from src.application.ai_support_manager import SupportResponse
+from src.infrastructure.json_response import PydanticJSONResponse, model_to_json
+from src.types.documents import FaqDocumentBaseData
+from src.types.history import UserQueryHistoryItem, UserQueryHistoryResponse
+
+logger = logging.getLogger(__name__)
+
+
+def make_payloads(args: argparse.Namespace) -> dict[str, BaseModel]:
+    answer = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+    return {
+        "support": SupportResponse(
+            response=(answer * (args.answer_chars // len(answer) + 1))[
+                : args.answer_chars
+            ],
+            docs_used=[
+                FaqDocumentBaseData(
+                    title=f"Document {index}", link=f"https://example.com/{index}"
+                )
+                for index in range(5)
+            ],
+        ),
+        "history": UserQueryHistoryResponse(
+            items=[
+                UserQueryHistoryItem(
+                    id=index,
+                    user_question=f"Question {index}?",
+                    response=answer * (args.answer_chars // len(answer) // 2),
+                    created_at=datetime.now(UTC),
+                )
+                for index in range(args.history_items)
+            ],
+            next_cursor="cursor",
+        ),
+    }
+
+
+def render_default(model: BaseModel) -> bytes:
+    """What JSONResponse does with FastAPI's jsonable_encoder output."""
+    return json.dumps(
+        jsonable_encoder(model),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode()
+
+
+def measure(name: str, func: Callable[[], object], number: int) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+    logger.info(f"  {name:<32} {seconds * 1_000_000:9.1f} us")
+    return seconds
+
+
+def build_app(payload: BaseModel) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response_model", response_model=type(payload))
+    async def with_response_model() -> BaseModel:
+        return payload
+
+    @app.get("/pydantic_json", response_model=type(payload))
+    async def with_pydantic_json() -> PydanticJSONResponse:
+        return PydanticJSONResponse(payload)
+
+    return app
+
+
+async def measure_requests(
+    name: str, client: httpx.AsyncClient, path: str, requests: int
+) -> float:
+    await client.get(path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        (await client.get(path)).raise_for_status()
+    seconds = (time.perf_counter() - start) / requests
+    logger.info(f"  {name:<32} {seconds * 1_000_000:9.1f} us")
+    return seconds
+
+
+async def run(args: argparse.Namespace) -> None:
+    for name, payload in make_payloads(args).items():
+        size = len(model_to_json(payload))
+        logger.info(f"{name} ({size / 1024:.0f} KiB)")
+
+        baseline = measure(
+            "jsonable_encoder + json.dumps",
+            lambda payload=payload: render_default(payload),
+            args.number,
+        )
+        current = measure(
+            "pydantic-core to_json",
+            lambda payload=payload: model_to_json(payload),
+            args.number,
+        )
+        logger.info(f"  render speedup: {baseline / current:.1f}x")
+
+        transport = httpx.ASGITransport(app=build_app(payload))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            baseline = await measure_requests(
+                "request with response_model", client, "/response_model", args.number
+            )
+            current = await measure_requests(
+                "request with PydanticJSONResponse",
+                client,
+                "/pydantic_json",
+                args.number,
+            )
+        logger.info(f"  request speedup: {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--answer-chars", type=int, default=8000)
+    parser.add_argument("--history-items", type=int, default=100)
+    parser.add_argument("--number", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
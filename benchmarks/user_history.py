@@ -0,0 +1,144 @@
+"""
+Benchmark user query history lookups for users with very long histories.
+
+Builds a scratch copy of user_response with heavy users (100k+ interactions each)
+under two index layouts and compares:
+- legacy: index on user_id only, ORDER BY created_at DESC with LIMIT/OFFSET
+- keyset: index on (user_id, created_at DESC, id DESC) with a (created_at, id) cursor
+
+Usage:
+    python -m benchmarks.user_history --rows-per-user 100000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any
+
+from asyncpg import Connection
+
+from src.database.connection import get_connection
+
+SCHEMA = "benchmark_user_history"
+
+logger = logging.getLogger(__name__)
+
+
+async def create_tables(conn: Connection, heavy_users: int, rows_per_user: int) -> None:
+    """Create one table per index layout with identical synthetic histories."""
+    await conn.execute(f"""
+        DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+        CREATE SCHEMA {SCHEMA};
+        CREATE TABLE {SCHEMA}.legacy (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            user_question TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL
+        );
+    """)
+    await conn.execute(
+        f"""
+        INSERT INTO {SCHEMA}.legacy (user_id, user_question, response, created_at)
+        SELECT g % $1, 'question ' || g, repeat('response text ', 150),
+               now() - make_interval(secs => g)
+        FROM generate_series(1, $1 * $2) g
+        """,
+        heavy_users,
+        rows_per_user,
+    )
+    await conn.execute(f"""
+        CREATE TABLE {SCHEMA}.keyset AS SELECT * FROM {SCHEMA}.legacy;
+        CREATE INDEX ON {SCHEMA}.legacy (user_id);
+        CREATE INDEX ON {SCHEMA}.keyset (user_id, created_at DESC, id DESC);
+        VACUUM ANALYZE {SCHEMA}.legacy;
+        VACUUM ANALYZE {SCHEMA}.keyset;
+    """)
+
+
+async def timed(
+    conn: Connection, query: str, args: tuple[Any, ...], repeat: int
+) -> tuple[float, list[Any]]:
+    """Run a query repeatedly and return the mean latency in ms and the last rows."""
+    records: list[Any] = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        records = await conn.fetch(query, *args)
+    return (time.perf_counter() - start) / repeat * 1000, records
+
+
+async def run(args: argparse.Namespace) -> None:
+    legacy_query = f"""
+        SELECT user_id, user_question, response, created_at
+        FROM {SCHEMA}.legacy WHERE user_id = $1
+        ORDER BY created_at DESC LIMIT $2 OFFSET $3
+    """
+    first_page_query = f"""
+        SELECT id, user_id, user_question, left(response, $3) AS response, created_at
+        FROM {SCHEMA}.keyset WHERE user_id = $1
+        ORDER BY created_at DESC, id DESC LIMIT $2
+    """
+    next_page_query = f"""
+        SELECT id, user_id, user_question, left(response, $3) AS response, created_at
+        FROM {SCHEMA}.keyset WHERE user_id = $1 AND (created_at, id) < ($4, $5)
+        ORDER BY created_at DESC, id DESC LIMIT $2
+    """
+
+    async with get_connection() as conn:
+        await create_tables(conn, args.heavy_users, args.rows_per_user)
+        user_id, limit = 1, args.page_size
+
+        latency, _ = await timed(conn, legacy_query, (user_id, limit, 0), args.repeat)
+        logger.info(f"legacy first page: {latency:.2f} ms")
+        latency, records = await timed(
+            conn, first_page_query, (user_id, limit, args.preview_chars), args.repeat
+        )
+        logger.info(f"keyset first page: {latency:.2f} ms")
+
+        # Walk to the deep page with the keyset cursor, then time both layouts there
+        cursor: tuple[datetime, int] = (records[-1]["created_at"], records[-1]["id"])
+        for _ in range(args.deep_page - 1):
+            records = await conn.fetch(
+                next_page_query, user_id, limit, args.preview_chars, *cursor
+            )
+            cursor = (records[-1]["created_at"], records[-1]["id"])
+
+        offset = args.deep_page * limit
+        latency, _ = await timed(
+            conn, legacy_query, (user_id, limit, offset), args.repeat
+        )
+        logger.info(f"legacy page {args.deep_page + 1} (OFFSET): {latency:.2f} ms")
+        latency, _ = await timed(
+            conn,
+            next_page_query,
+            (user_id, limit, args.preview_chars, *cursor),
+            args.repeat,
+        )
+        logger.info(f"keyset page {args.deep_page + 1} (cursor): {latency:.2f} ms")
+
+        for name, query, query_args in (
+            ("legacy", legacy_query, (user_id, limit, 0)),
+            ("keyset", first_page_query, (user_id, limit, args.preview_chars)),
+        ):
+            plan = await conn.fetch(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {query}", *query_args
+            )
+            logger.info(f"{name} plan:\n" + "\n".join(row[0] for row in plan))
+
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--heavy-users", type=int, default=5)
+    parser.add_argument("--rows-per-user", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--deep-page", type=int, default=1_000)
+    parser.add_argument("--preview-chars", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema")
+    asyncio.run(run(parser.parse_args()))
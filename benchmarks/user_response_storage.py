@@ -0,0 +1,250 @@
+"""
+Benchmark full-precision vs halfvec storage for user_response embeddings.
+
+Builds two synthetic copies of user_management.user_response in a scratch schema
+(clustered 1536-dim vectors, identical data in both) and reports:
+- table and index sizes
+- insert throughput through the same INSERT statements the repository uses
+- recall@k and latency of similarity search against an exact full-precision scan
+
+Requires a PostgreSQL with pgvector >= 0.7 configured through the usual settings.
+
+Usage:
+    python -m benchmarks.user_response_storage --rows 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from asyncpg import Connection
+
+from src.database.connection import get_connection
+
+SCHEMA = "benchmark_user_response"
+DIMENSIONS = 1536
+# Binary-quantized candidates fetched per requested result before halfvec rescoring
+HALFVEC_RESCORE_FACTOR = 10
+
+logger = logging.getLogger(__name__)
+
+
+def _noisy(center: list[float], noise: float) -> list[float]:
+    return [value + random.uniform(-noise, noise) for value in center]
+
+
+async def create_tables(conn: Connection, clusters: int) -> list[list[float]]:
+    """Create the scratch schema and the cluster centers used to generate vectors."""
+    await conn.execute(f"""
+        DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+        CREATE SCHEMA {SCHEMA};
+        CREATE TABLE {SCHEMA}.centers (id INTEGER PRIMARY KEY, v REAL[] NOT NULL);
+        CREATE TABLE {SCHEMA}.full_storage (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            user_question TEXT NOT NULL,
+            question_embedding vector({DIMENSIONS}),
+            response TEXT NOT NULL,
+            response_embedding vector({DIMENSIONS}),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE {SCHEMA}.halfvec_storage (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            user_question TEXT NOT NULL,
+            question_embedding_half halfvec({DIMENSIONS}),
+            response TEXT NOT NULL,
+            response_embedding_half halfvec({DIMENSIONS}),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    centers = [
+        [random.uniform(-0.5, 0.5) for _ in range(DIMENSIONS)] for _ in range(clusters)
+    ]
+    await conn.executemany(
+        f"INSERT INTO {SCHEMA}.centers (id, v) VALUES ($1, $2)",
+        [(index, center) for index, center in enumerate(centers)],
+    )
+    return centers
+
+
+async def fill_tables(conn: Connection, rows: int, clusters: int, chunk: int) -> None:
+    """Generate synthetic rows server-side and copy them into both tables."""
+    fill_query = f"""
+        INSERT INTO {SCHEMA}.full_storage
+        (user_id, user_question, question_embedding, response, response_embedding)
+        SELECT g % 1000, 'question ' || g, q.v::vector, 'response ' || g, r.v::vector
+        FROM generate_series($1::int, $2::int) g
+        CROSS JOIN LATERAL (
+            SELECT array_agg(c + (random()::real - 0.5) * 0.3 ORDER BY d) AS v
+            FROM unnest((SELECT v FROM {SCHEMA}.centers WHERE id = g % $3)) WITH ORDINALITY AS t(c, d)
+        ) q
+        CROSS JOIN LATERAL (
+            SELECT array_agg(c + (random()::real - 0.5) * 0.3 ORDER BY d) AS v
+            FROM unnest((SELECT v FROM {SCHEMA}.centers WHERE id = (g + 1) % $3)) WITH ORDINALITY AS t(c, d)
+        ) r
+    """
+    start = time.perf_counter()
+    for first in range(1, rows + 1, chunk):
+        last = min(first + chunk - 1, rows)
+        await conn.execute(fill_query, first, last, clusters)
+        logger.info(
+            f"Generated {last}/{rows} rows ({time.perf_counter() - start:.0f}s)"
+        )
+
+    await conn.execute(f"""
+        INSERT INTO {SCHEMA}.halfvec_storage
+        (id, user_id, user_question, question_embedding_half, response, response_embedding_half)
+        SELECT id, user_id, user_question, question_embedding::halfvec, response, response_embedding::halfvec
+        FROM {SCHEMA}.full_storage
+    """)
+
+
+async def build_indexes(conn: Connection) -> dict[str, float]:
+    """Build the production index layout for each storage mode and time it."""
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    await conn.execute(f"""
+        CREATE INDEX ON {SCHEMA}.full_storage USING ivfflat (question_embedding vector_cosine_ops) WITH (lists = 100);
+        CREATE INDEX ON {SCHEMA}.full_storage USING ivfflat (response_embedding vector_cosine_ops) WITH (lists = 100);
+    """)
+    timings["full"] = time.perf_counter() - start
+    start = time.perf_counter()
+    await conn.execute(f"""
+        CREATE INDEX ON {SCHEMA}.halfvec_storage
+            USING hnsw ((binary_quantize(question_embedding_half)::bit({DIMENSIONS})) bit_hamming_ops);
+    """)
+    timings["halfvec"] = time.perf_counter() - start
+    await conn.execute(
+        f"ANALYZE {SCHEMA}.full_storage; ANALYZE {SCHEMA}.halfvec_storage;"
+    )
+    return timings
+
+
+async def report_sizes(conn: Connection) -> None:
+    for table in ("full_storage", "halfvec_storage"):
+        row = await conn.fetchrow(
+            """
+            SELECT pg_size_pretty(pg_table_size($1::regclass)) AS table_size,
+                   pg_size_pretty(pg_indexes_size($1::regclass)) AS index_size,
+                   pg_size_pretty(pg_total_relation_size($1::regclass)) AS total_size
+            """,
+            f"{SCHEMA}.{table}",
+        )
+        logger.info(
+            f"{table}: table {row['table_size']}, indexes {row['index_size']}, "
+            f"total {row['total_size']}"
+        )
+
+
+async def measure_inserts(
+    conn: Connection, centers: list[list[float]], inserts: int
+) -> None:
+    """Insert rows through the repository's statements and report rows/sec."""
+    rows = [
+        (
+            1,
+            "benchmark question",
+            _noisy(random.choice(centers), 0.15),
+            "benchmark response",
+            _noisy(random.choice(centers), 0.15),
+        )
+        for _ in range(inserts)
+    ]
+    statements = {
+        "full": f"""
+            INSERT INTO {SCHEMA}.full_storage
+            (user_id, user_question, question_embedding, response, response_embedding)
+            VALUES ($1, $2, $3, $4, $5)
+        """,
+        "halfvec": f"""
+            INSERT INTO {SCHEMA}.halfvec_storage
+            (user_id, user_question, question_embedding_half, response, response_embedding_half)
+            VALUES ($1, $2, $3::halfvec, $4, $5::halfvec)
+        """,
+    }
+    for mode, statement in statements.items():
+        start = time.perf_counter()
+        for row in rows:
+            await conn.execute(statement, *row)
+        elapsed = time.perf_counter() - start
+        logger.info(f"{mode}: {inserts / elapsed:.0f} inserts/sec")
+
+
+async def measure_recall(
+    conn: Connection, centers: list[list[float]], queries: int, k: int
+) -> None:
+    """Compare approximate searches against an exact full-precision scan."""
+    exact_query = f"""
+        SELECT id FROM {SCHEMA}.full_storage
+        ORDER BY question_embedding <=> $1::vector LIMIT $2
+    """
+    searches = {
+        "full": (
+            f"""
+            SELECT id FROM {SCHEMA}.full_storage
+            ORDER BY question_embedding <=> $1::vector LIMIT $2
+            """,
+            (k,),
+        ),
+        "halfvec": (
+            f"""
+            WITH candidates AS (
+                SELECT id, question_embedding_half FROM {SCHEMA}.halfvec_storage
+                ORDER BY binary_quantize(question_embedding_half)::bit({DIMENSIONS})
+                    <~> binary_quantize($1::halfvec)
+                LIMIT $3
+            )
+            SELECT id FROM candidates
+            ORDER BY question_embedding_half <=> $1::halfvec LIMIT $2
+            """,
+            (k, k * HALFVEC_RESCORE_FACTOR),
+        ),
+    }
+    recall = dict.fromkeys(searches, 0.0)
+    latency = dict.fromkeys(searches, 0.0)
+    for _ in range(queries):
+        vector = _noisy(random.choice(centers), 0.15)
+        async with conn.transaction():
+            await conn.execute("SET LOCAL enable_indexscan = off")
+            exact = {r["id"] for r in await conn.fetch(exact_query, vector, k)}
+        for mode, (query, args) in searches.items():
+            start = time.perf_counter()
+            found = {r["id"] for r in await conn.fetch(query, vector, *args)}
+            latency[mode] += time.perf_counter() - start
+            recall[mode] += len(found & exact) / k
+
+    for mode in searches:
+        logger.info(
+            f"{mode}: recall@{k} {recall[mode] / queries:.3f}, "
+            f"mean latency {latency[mode] / queries * 1000:.1f} ms"
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with get_connection() as conn:
+        centers = await create_tables(conn, args.clusters)
+        await fill_tables(conn, args.rows, args.clusters, args.chunk)
+        index_timings = await build_indexes(conn)
+        for mode, seconds in index_timings.items():
+            logger.info(f"{mode}: index build {seconds:.1f}s")
+        await report_sizes(conn)
+        await measure_inserts(conn, centers, args.inserts)
+        await measure_recall(conn, centers, args.queries, args.k)
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--chunk", type=int, default=50_000)
+    parser.add_argument("--inserts", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema")
+    asyncio.run(run(parser.parse_args()))
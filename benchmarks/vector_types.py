@@ -0,0 +1,85 @@
+"""
+Micro-benchmark list[float] vs float32 array embeddings.
+
+Compares, per 1536-dim embedding:
+- model construction: the previous `list[float]` field (min/max length 1536)
+  against the Float32Vector field, from a list and from an existing array
+- database encoding: the previous pgvector text format against the binary codec
+- database decoding: parsing the text format against the binary codec
+
+No database is needed.
+
+Usage:
+    python -m benchmarks.vector_types --number 2000
+"""
+
+import argparse
+import json
+import logging
+import random
+import timeit
+from array import array
+from collections.abc import Callable
+
+from pydantic import BaseModel, Field
+
+from src.database.vector_codecs import decode_vector, encode_vector
+from src.types.embeddings import EMBEDDING_DIMENSIONS, Embedding
+
+logger = logging.getLogger(__name__)
+
+
+class ListEmbedding(BaseModel):
+    """The previous embedding model, validating every element as a float."""
+
+    vector: list[float] = Field(
+        ..., min_length=EMBEDDING_DIMENSIONS, max_length=EMBEDDING_DIMENSIONS
+    )
+
+
+def format_text(vector: list[float]) -> str:
+    """The previous pgvector text encoding."""
+    return f"[{', '.join(map(str, vector))}]"
+
+
+def measure(name: str, func: Callable[[], object], number: int) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    logger.info(f"{name:<45} {best * 1_000_000:9.1f} us")
+    return best
+
+
+def run(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    values = [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+    vector = array("f", values)
+    text = format_text(values)
+    binary = encode_vector(vector)
+    number = args.number
+
+    logger.info("Construction")
+    baseline = measure(
+        "list[float] model from list", lambda: ListEmbedding(vector=values), number
+    )
+    current = measure(
+        "Float32Vector model from list", lambda: Embedding(vector=values), number
+    )
+    measure("Float32Vector model from array", lambda: Embedding(vector=vector), number)
+    logger.info(f"speedup: {baseline / current:.1f}x")
+
+    logger.info("Encoding for the database")
+    baseline = measure("text format", lambda: format_text(values), number)
+    current = measure("binary codec from array", lambda: encode_vector(vector), number)
+    logger.info(f"speedup: {baseline / current:.1f}x")
+
+    logger.info("Decoding from the database")
+    baseline = measure("text format (json.loads)", lambda: json.loads(text), number)
+    current = measure("binary codec", lambda: decode_vector(binary), number)
+    logger.info(f"speedup: {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    run(parser.parse_args())
@@ -1,32 +1,47 @@
+import argparse
 import asyncio
 import json
 import logging
 from pathlib import Path
-from typing import Any
 
 from src.application.dump_data_manager import DumpDataManager
+from src.config.settings import get_settings
 from src.infrastructure.ai_generation_repository import get_ai_generation_repository
+from src.infrastructure.budget_guard import get_budget_guard
 from src.infrastructure.dump_data_repository import get_dump_data_repository
+from src.infrastructure.embedding_slots import get_embedding_slots_cache
+from src.infrastructure.faq_document_loader import load_faq_documents
 
 
-async def init_base_data() -> None:
+async def init_base_data(chunk_size: int, max_concurrency: int) -> None:
     """
     Initialize the base data by creating and running the DumpDataManager.
 
     This function:
-    1. Loads FAQ documents from JSON and Markdown files
+    1. Loads FAQ documents from JSON and Markdown files, normalizing them
+       and leaving out duplicates and, if configured, oversized documents
     2. Initializes the DumpDataManager with required repositories
     3. Executes the data dump process
 
+    Documents are checkpointed as they are generated, so an interrupted run
+    resumes where it stopped when started again.
+
+    Args:
+        chunk_size: Documents stored in the live tables per transaction
+        max_concurrency: Documents generated concurrently
+
     Raises:
         Exception: If there's an error during the initialization process
     """
     logger = logging.getLogger(__name__)
 
     try:
+        # Embeddings are generated with the model of the active slot
+        embeddings = await get_embedding_slots_cache().refresh()
+
         # Initialize repositories
-        async with get_dump_data_repository() as dump_data_repository:
-            ai_repository = await get_ai_generation_repository()
+        async with get_dump_data_repository(embeddings) as dump_data_repository:
+            ai_repository = await get_ai_generation_repository(embeddings.model)
 
             # Load FAQ documents from JSON
             json_path = Path("base_data/faq_documents_list.json")
@@ -34,29 +49,35 @@ async def init_base_data() -> None:
                 data = json.load(f)
                 faq_documents = data["faq_documents"]
 
-            # Process each FAQ document
-            base_data: list[dict[str, Any]] = []
-            for doc in faq_documents:
-                # Read the markdown content
-                md_path = Path(doc["text_path"])
-                with open(md_path) as f:
-                    text = f.read()
-
-                # Create document data
-                base_data.append(
-                    {
-                        "title": doc["title"],
-                        "link": doc["link"],
-                        "text": text,
-                        "category": doc["category"],
-                    }
-                )
+            # Read and preprocess the Markdown files before any API call
+            settings = get_settings()
+            report = await load_faq_documents(
+                faq_documents,
+                max_tokens=settings.INGESTION_MAX_DOCUMENT_TOKENS,
+                oversized_policy=settings.INGESTION_OVERSIZED_DOCUMENTS,
+            )
+            logger.info(
+                f"Preprocessed {len(faq_documents)} FAQ documents into "
+                f"{len(report.documents)} ({report.tokens} tokens): "
+                f"{len(report.duplicates)} duplicates, {len(report.rejected)} rejected, "
+                f"{report.split} split"
+            )
 
             logger.info("Initializing DumpDataManager")
-            manager = DumpDataManager(dump_data_repository, ai_repository)
+            manager = DumpDataManager(
+                dump_data_repository,
+                ai_repository,
+                canonical_questions_per_document=settings.CANONICAL_QUESTIONS_PER_DOCUMENT,
+                budget_guard=get_budget_guard(),
+            )
 
             logger.info("Starting data dump process")
-            await manager.dump_data(base_data)
+            await manager.dump_data(
+                (doc.as_base_data() for doc in report.documents),
+                total=len(report.documents),
+                chunk_size=chunk_size,
+                max_concurrency=max_concurrency,
+            )
             logger.info("Base data initialization completed successfully")
 
     except Exception as e:
@@ -71,5 +92,15 @@ if __name__ == "__main__":
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Ingest the base FAQ documents, resuming an interrupted run"
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.INGESTION_CHUNK_SIZE)
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.INGESTION_MAX_CONCURRENCY
+    )
+    args = parser.parse_args()
+
     # Run the initialization
-    asyncio.run(init_base_data())
+    asyncio.run(init_base_data(args.chunk_size, args.concurrency))
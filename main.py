@@ -1,8 +1,55 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from src.admin_router import router as admin_router
 from src.ai_response_router import router as ai_router
 from src.config.settings import get_settings
-from src.infrastructure.prometheus_metrics import setup_prometheus_metrics
+from src.database.connection import close_pool
+from src.health_router import router as health_router
+from src.infrastructure.budget_guard import get_budget_guard
+from src.infrastructure.embedding_slots import get_embedding_slots_cache
+from src.infrastructure.partition_maintenance import get_partition_maintenance
+from src.infrastructure.profiling import EventLoopMonitor
+from src.infrastructure.prometheus_metrics import (
+    mark_worker_stopped,
+    setup_multiprocess_metrics,
+    setup_prometheus_metrics,
+)
+from src.infrastructure.prompt_corpus import get_prompt_corpus_cache
+from src.infrastructure.tracing import setup_tracing
+from src.infrastructure.warmup import warmup_state
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Start the event loop monitor, warm-up, partition maintenance and budget
+    metrics, and release resources on shutdown.
+    """
+    settings = get_settings()
+    monitor = None
+    if settings.EVENT_LOOP_MONITOR_ENABLED:
+        monitor = EventLoopMonitor(
+            stall_threshold=settings.EVENT_LOOP_STALL_THRESHOLD_MS / 1000
+        )
+        monitor.start()
+    # Requests are served while warming up; /ready reports when it is done
+    warmup_state.start()
+    get_partition_maintenance().start()
+    get_budget_guard().start()
+    yield
+    await get_budget_guard().stop()
+    await warmup_state.stop()
+    await get_partition_maintenance().stop()
+    await get_prompt_corpus_cache().stop()
+    await get_embedding_slots_cache().stop()
+    if monitor is not None:
+        await monitor.stop()
+    await close_pool()
+    mark_worker_stopped()
+
 
 app = FastAPI(
     title="AI Support System API",
@@ -10,16 +57,32 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Setup Prometheus metrics
 setup_prometheus_metrics(app)
 
+# Setup request tracing
+setup_tracing(app)
+
 # Include routers
 app.include_router(ai_router, prefix="/api")
+app.include_router(admin_router)
+app.include_router(health_router)
 
 if __name__ == "__main__":
     import uvicorn
 
-    port = get_settings().APP_PORT
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    settings = get_settings()
+    if settings.APP_WORKERS > 1:
+        # Workers import the app themselves; metrics are aggregated across them
+        setup_multiprocess_metrics(settings.PROMETHEUS_MULTIPROC_DIR)
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=settings.APP_PORT,
+            workers=settings.APP_WORKERS,
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=settings.APP_PORT)
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Loaded on first use or during the lifespan warm-up, never when importing
+DEFERRED_MODULES = ("langchain", "langchain_core", "openai")
+
+IMPORT_SCRIPT = """
+import json, sys
+import main
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def test_import_defers_heavy_modules() -> None:
+    """Test that importing the app does not load langchain or the OpenAI SDK."""
+    # Arrange
+    env = {
+        "POSTGRES_HOST": "localhost",
+        "POSTGRES_PORT": "5432",
+        "POSTGRES_USER": "postgres",
+        "POSTGRES_PASSWORD": "postgres",
+        "POSTGRES_DB": "postgres",
+        "APP_PORT": "8000",
+        "OPENAI_API_KEY": "test",
+        **os.environ,
+    }
+
+    # Act
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent,
+        env=env,
+        text=True,
+    )
+    modules = json.loads(result.stdout.splitlines()[-1])
+
+    # Assert
+    loaded = {module.split(".")[0] for module in modules}
+    assert loaded.isdisjoint(DEFERRED_MODULES)
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import logging
+
+from src.application.embedding_refresh_manager import EmbeddingRefreshManager
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.infrastructure.ai_generation_repository import get_ai_generation_repository
+from src.infrastructure.budget_guard import get_budget_guard
+from src.infrastructure.embedding_refresh_repository import EmbeddingRefreshRepository
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def refresh_embeddings(model: str, batch_size: int, activate: bool) -> None:
+    """
+    Re-embed the FAQ documents and canonical answers with another model.
+
+    The embeddings are backfilled into the inactive slot and indexed while the
+    API keeps searching the active one; with activate, the slot is then switched
+    in one transaction and workers follow on their next slot refresh. Run it
+    again to resume an interrupted refresh.
+    """
+    # Workers may search the retired slot until they reload the active one
+    min_retired_seconds = 2 * get_settings().EMBEDDING_SLOTS_REFRESH_SECONDS
+    async with get_connection() as conn:
+        manager = EmbeddingRefreshManager(
+            EmbeddingRefreshRepository(conn),
+            await get_ai_generation_repository(model),
+            batch_size=batch_size,
+            budget_guard=get_budget_guard(),
+        )
+        report = await manager.refresh_embeddings(
+            model, activate=activate, min_retired_seconds=min_retired_seconds
+        )
+    logger.info(
+        f"Refreshed the {report.slot.value} slot with {model} ("
+        + ", ".join(
+            f"{table.value}: {rows}" for table, rows in report.refreshed.items()
+        )
+        + ")"
+        + (", now active" if report.activated else "")
+    )
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Re-embed the FAQ tables with another embedding model"
+    )
+    parser.add_argument("--model", required=True)
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.EMBEDDING_REFRESH_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--no-activate",
+        dest="activate",
+        action="store_false",
+        help="Backfill and index the slot without switching searches to it",
+    )
+    args = parser.parse_args()
+    asyncio.run(refresh_embeddings(args.model, args.batch_size, args.activate))
@@ -0,0 +1,51 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from src.config.settings import get_settings
+from src.infrastructure.profiling import SamplingProfiler
+
+profiler = SamplingProfiler()
+
+
+async def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    """
+    Allow the request only with the configured admin token.
+
+    The admin endpoints are hidden (404) when no ADMIN_TOKEN is configured.
+    """
+    admin_token = get_settings().ADMIN_TOKEN
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)],
+    include_in_schema=False,
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(default=10.0, gt=0, le=120),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+) -> str:
+    """
+    Sample the stacks of every thread of this worker for the given duration.
+
+    Args:
+        seconds: Sampling duration
+        interval_ms: Time between samples
+
+    Returns:
+        Collapsed stacks ("frame;frame;frame count" per line), ready for
+        flamegraph.pl or speedscope
+    """
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return await profiler.profile(seconds, interval_ms / 1000)
@@ -1,17 +1,80 @@
-from fastapi import APIRouter, Depends
+import math
+from collections import Counter
+from collections.abc import AsyncGenerator, Mapping
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from src.application.ai_support_manager import AISupportManager, SupportResponse
-from src.dependencies.fastapi_depends import get_ai_support_manager_dependency
+from src.application.interfaces.ai_generation_interface import AIGenerationInterface
+from src.config.settings import get_settings
+from src.dependencies.fastapi_depends import (
+    ai_support_manager_context,
+    get_active_embeddings_dependency,
+    get_ai_generation_repository_dependency,
+    get_ai_support_manager_dependency,
+)
+from src.infrastructure.budget_guard import BudgetExceededError
+from src.infrastructure.json_response import PydanticJSONResponse, model_to_json
+from src.infrastructure.rate_limiter import RateLimitExceededError, get_rate_limiter
+from src.types.embeddings import ActiveEmbeddings
+from src.types.history import UserQueryHistoryResponse
 from src.types.recommendations import RecommendationResponse
-from src.types.support import QueryRequest
+from src.types.support import BatchQueryRequest, QueryRequest
 
 router = APIRouter(
     prefix="/ai_system",
     tags=["api"],
     responses={404: {"description": "Not found"}},
+    # Routes return validated models wrapped in PydanticJSONResponse, which
+    # FastAPI sends as is instead of revalidating them against response_model
+    default_response_class=PydanticJSONResponse,
 )
 
 
+@asynccontextmanager
+async def rate_limited(
+    endpoint: str, requests_per_user: Mapping[int, int]
+) -> AsyncGenerator[None, None]:
+    """Serve requests within the rate limits, or answer 429 Too Many Requests."""
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        yield
+        return
+    try:
+        async with rate_limiter.limit_batch(endpoint, requests_per_user):
+            yield
+    except RateLimitExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        ) from e
+
+
+# Declared before the other dependencies of their routes, so that throttled
+# requests are answered before they take a database connection
+async def rate_limit_ai_faq_search(request: QueryRequest) -> AsyncGenerator[None, None]:
+    async with rate_limited("ai_faq_search", {request.user_id: 1}):
+        yield
+
+
+async def rate_limit_ai_faq_search_batch(
+    request: BatchQueryRequest,
+) -> AsyncGenerator[None, None]:
+    # Each user pays for their queries, and for their share of the generations;
+    # the dependency exits, and charges them, once the stream is done
+    requests_per_user = Counter(query.user_id for query in request.queries)
+    async with rate_limited("ai_faq_search_batch", requests_per_user):
+        yield
+
+
+async def rate_limit_recommendations(user_id: int) -> AsyncGenerator[None, None]:
+    async with rate_limited("recommendations", {user_id: 1}):
+        yield
+
+
 @router.get("/hello")
 async def hello_world() -> dict[str, str]:
     """Simple hello world endpoint."""
@@ -21,30 +84,73 @@ async def hello_world() -> dict[str, str]:
 @router.post("/ai_faq_search", response_model=SupportResponse)
 async def get_ai_faq_search(
     request: QueryRequest,
+    _: None = Depends(rate_limit_ai_faq_search),
     ai_support_manager: AISupportManager = Depends(get_ai_support_manager_dependency),
-) -> SupportResponse:
+) -> PydanticJSONResponse:
     """
     Process a user query and return an AI-generated response with relevant links.
 
     Args:
-        request: The query request containing the user's question, ID, and developer status
+        request: The query request containing the user's question, ID, developer
+            status and, for follow-ups, the conversation ID
         ai_support_manager: The AI support manager instance (injected by FastAPI)
 
     Returns:
         SupportResponse containing the generated response and relevant links
     """
-    return await ai_support_manager.generate_ai_support_response(
-        query=request.query,
-        user_id=request.user_id,
-        i_am_a_developer=request.i_am_a_developer,
+    return PydanticJSONResponse(
+        await ai_support_manager.generate_ai_support_response(
+            query=request.query,
+            user_id=request.user_id,
+            i_am_a_developer=request.i_am_a_developer,
+            conversation_id=request.conversation_id,
+        )
     )
 
 
+@router.post("/ai_faq_search/batch")
+async def get_ai_faq_search_batch(
+    request: BatchQueryRequest,
+    _: None = Depends(rate_limit_ai_faq_search_batch),
+    ai_generation_repository: AIGenerationInterface = Depends(
+        get_ai_generation_repository_dependency
+    ),
+    embeddings: ActiveEmbeddings = Depends(get_active_embeddings_dependency),
+) -> StreamingResponse:
+    """
+    Process a batch of user queries, streaming one result per query as NDJSON.
+
+    Each line is a BatchSupportResult carrying the index of its query in the
+    request and either the response or the error for that query.
+
+    Args:
+        request: The queries to answer
+        ai_generation_repository: The AI generation repository (injected by FastAPI)
+        embeddings: The embedding slot of the request (injected by FastAPI)
+
+    Returns:
+        StreamingResponse with one JSON result per line, in completion order
+    """
+
+    async def stream_results() -> AsyncGenerator[bytes, None]:
+        async with ai_support_manager_context(
+            ai_generation_repository, embeddings
+        ) as manager:
+            async for result in manager.generate_ai_support_responses_batch(
+                request.queries,
+                max_concurrency=get_settings().BATCH_MAX_CONCURRENCY,
+            ):
+                yield model_to_json(result) + b"\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @router.get("/recommendations/{user_id}", response_model=RecommendationResponse)
 async def get_personal_recommendations(
     user_id: int,
+    _: None = Depends(rate_limit_recommendations),
     ai_support_manager: AISupportManager = Depends(get_ai_support_manager_dependency),
-) -> RecommendationResponse:
+) -> PydanticJSONResponse:
     """
     Get personalized recommendations based on user's query history.
 
@@ -55,6 +161,47 @@ async def get_personal_recommendations(
     Returns:
         RecommendationResponse containing personalized recommendations with explanations
     """
-    return await ai_support_manager.get_personal_recommendation(
-        user_id=user_id,
-    )
+    try:
+        return PydanticJSONResponse(
+            await ai_support_manager.get_personal_recommendation(user_id=user_id)
+        )
+    except BudgetExceededError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        ) from e
+
+
+@router.get("/history/{user_id}", response_model=UserQueryHistoryResponse)
+async def get_user_query_history(
+    user_id: int,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    response_preview_chars: int | None = Query(default=None, ge=1),
+    ai_support_manager: AISupportManager = Depends(get_ai_support_manager_dependency),
+) -> PydanticJSONResponse:
+    """
+    Get a page of the user's query history, most recent first.
+
+    Args:
+        user_id: The ID of the user
+        limit: Maximum number of interactions in the page
+        cursor: The next_cursor of the previous page, omitted for the first page
+        response_preview_chars: If set, truncate responses to this many characters
+        ai_support_manager: AISupportManager instance for handling the request
+
+    Returns:
+        UserQueryHistoryResponse with the interactions and the next page cursor
+    """
+    try:
+        return PydanticJSONResponse(
+            await ai_support_manager.get_user_query_history_page(
+                user_id=user_id,
+                limit=limit,
+                cursor=cursor,
+                response_preview_chars=response_preview_chars,
+            )
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
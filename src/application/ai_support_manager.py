@@ -1,20 +1,40 @@
+import asyncio
 import logging
+from collections.abc import AsyncGenerator, Sequence
 
 from pydantic import BaseModel
 
 from src.application.interfaces.ai_generation_interface import AIGenerationInterface
 from src.application.interfaces.ai_support_interface import (
     AISupportInterface,
+    CanonicalAnswerMatch,
+    HistoryCursor,
     UserResponse,
 )
+from src.infrastructure.budget_guard import BudgetGuard
+from src.infrastructure.conversation_store import (
+    Conversation,
+    ConversationStore,
+    preview_answer,
+)
 from src.infrastructure.prometheus_metrics import (
+    CONVERSATION_RETRIEVALS_TOTAL,
+    record_batch_item,
+    track_canonical_answer_lookup,
     track_document_search_time,
     track_embedding_time,
     track_response_time,
 )
-from src.types.documents import FaqDocument, FaqDocumentBaseData
-from src.types.embeddings import EmbeddingResponse
+from src.infrastructure.tracing import set_span_attributes, traced
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqDocumentBaseData, FaqDocumentRecord
+from src.types.embeddings import EmbeddingResponse, cosine_similarity
+from src.types.history import UserQueryHistoryItem, UserQueryHistoryResponse
 from src.types.recommendations import Recommendation, RecommendationResponse
+from src.types.support import QueryRequest
+
+# The recommender only needs the gist of each past answer
+RECOMMENDATION_HISTORY_PREVIEW_CHARS = 500
 
 
 class SupportResponse(BaseModel):
@@ -24,6 +44,14 @@ class SupportResponse(BaseModel):
     docs_used: list[FaqDocumentBaseData]
 
 
+class BatchSupportResult(BaseModel):
+    """Result for one query of a batch, identified by its position in the request."""
+
+    index: int
+    response: SupportResponse | None = None
+    error: str | None = None
+
+
 class AISupportManager:
     """
     Manager class for AI support operations.
@@ -36,6 +64,9 @@ class AISupportManager:
         self,
         ai_generation_repository: AIGenerationInterface,
         ai_support_repository: AISupportInterface,
+        canonical_answer_max_distance: float | None = None,
+        budget_guard: BudgetGuard | None = None,
+        conversation_store: ConversationStore | None = None,
     ):
         """
         Initialize the AI support manager.
@@ -43,14 +74,24 @@ class AISupportManager:
         Args:
             ai_generation_repository: Repository for AI generation operations
             ai_support_repository: Repository for AI support operations
+            canonical_answer_max_distance: Maximum cosine distance between a query
+                and a canonical question to serve the stored answer
+                (None disables canonical answers)
+            budget_guard: Guard throttling recommendations when the AI budget is
+                nearly exhausted (None disables throttling)
+            conversation_store: Store of the recent turns of conversations
+                (None answers every query on its own)
         """
         self.logger = logging.getLogger(__name__)
         self.ai_generation_repository = ai_generation_repository
         self.ai_support_repository = ai_support_repository
+        self.canonical_answer_max_distance = canonical_answer_max_distance
+        self.budget_guard = budget_guard
+        self.conversation_store = conversation_store
 
     @staticmethod
     def _create_support_response(
-        response: str, context_docs: list[FaqDocument]
+        response: str, context_docs: list[FaqDocumentRecord]
     ) -> SupportResponse:
         """Create a SupportResponse instance from the response and context documents."""
         return SupportResponse(
@@ -61,48 +102,142 @@ class AISupportManager:
             ],
         )
 
+    @staticmethod
+    def _create_canonical_support_response(
+        canonical_answer: CanonicalAnswerMatch,
+    ) -> SupportResponse:
+        """Create a SupportResponse instance from a matched canonical answer."""
+        return SupportResponse(
+            response=canonical_answer.answer,
+            docs_used=[
+                FaqDocumentBaseData(
+                    title=canonical_answer.title, link=canonical_answer.link
+                )
+            ],
+        )
+
+    @traced("generate_response")
     async def _generate_response_with_context(
-        self, query: str, similar_docs: list[FaqDocument]
-    ) -> tuple[str, list[FaqDocument]]:
-        """Generate a response using the query and similar documents."""
+        self,
+        query: str,
+        similar_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+    ) -> tuple[str, list[FaqDocumentRecord]]:
+        """Generate a response using the query, similar documents and prior turns."""
         response, context_docs = await self.ai_generation_repository.generate_response(
-            query, similar_docs
+            query, similar_docs, conversation=conversation
         )
+        set_span_attributes(context_documents=len(context_docs))
         self.logger.debug(f"Generated response using {len(context_docs)} documents")
         return response, context_docs
 
+    @traced("save_interaction")
     async def _save_user_interaction(
         self,
         user_id: int,
         query: str,
-        query_embeddings: list[float],
+        query_embeddings: Sequence[float],
         response: str,
+        response_embeddings: Sequence[float] | None = None,
     ) -> None:
         """Save a user interaction to the database."""
-        self.logger.debug("Generated embeddings for response")
-        response_embeddings = await self._generate_embeddings(response)
+        if response_embeddings is None:
+            self.logger.debug("Generated embeddings for response")
+            response_embeddings = (
+                await self._generate_embeddings(response)
+            ).embedding.vector
 
         user_response = UserResponse(
             user_id=user_id,
             user_question=query,
             question_embedding=query_embeddings,
             response=response,
-            response_embedding=response_embeddings.embedding.vector,
+            response_embedding=response_embeddings,
         )
         await self.ai_support_repository.save_user_response(user_response)
         self.logger.debug("Saved user interaction in database")
 
+    @traced("document_retrieval")
+    async def _retrieve_documents(
+        self,
+        vector: Sequence[float],
+        conversation: Conversation | None,
+        i_am_a_developer: bool = False,
+    ) -> tuple[list[FaqDocumentRecord], bool]:
+        """
+        Find the context documents of a query.
+
+        Follow-ups on the topic of the last retrieval reuse the documents of the
+        conversation; other follow-ups search and keep the previous documents
+        after the new ones.
+
+        Returns:
+            Tuple of the documents and whether they were searched (False when
+            reused from the conversation)
+        """
+        if conversation is None or self.conversation_store is None:
+            similar_docs = await self._find_similar_documents(
+                vector, i_am_a_developer=i_am_a_developer
+            )
+            return similar_docs, True
+        if (
+            conversation.documents
+            and conversation.query_vector is not None
+            and cosine_similarity(vector, conversation.query_vector)
+            >= self.conversation_store.reuse_min_similarity
+        ):
+            CONVERSATION_RETRIEVALS_TOTAL.labels(result="reused").inc()
+            set_span_attributes(reused_documents=len(conversation.documents))
+            return list(conversation.documents), False
+
+        CONVERSATION_RETRIEVALS_TOTAL.labels(result="searched").inc()
+        similar_docs = await self._find_similar_documents(
+            vector, i_am_a_developer=i_am_a_developer
+        )
+        new_ids = {doc.id for doc in similar_docs}
+        merged_docs = similar_docs + [
+            doc for doc in conversation.documents if doc.id not in new_ids
+        ]
+        return merged_docs[: self.conversation_store.max_documents], True
+
+    def _record_turn(
+        self,
+        user_id: int,
+        conversation_id: str | None,
+        turn: ConversationTurn,
+        documents: list[FaqDocumentRecord],
+        query_vector: Sequence[float] | None,
+    ) -> None:
+        """Remember a turn for the follow-ups of the conversation."""
+        if conversation_id is None or self.conversation_store is None:
+            return
+        self.conversation_store.record_turn(
+            user_id, conversation_id, turn, documents, query_vector=query_vector
+        )
+
     @track_response_time
+    @traced("ai_support_response")
     async def generate_ai_support_response(
-        self, query: str, user_id: int, i_am_a_developer: bool = False
+        self,
+        query: str,
+        user_id: int,
+        i_am_a_developer: bool = False,
+        conversation_id: str | None = None,
     ) -> SupportResponse:
         """
         Generate an AI support response for a user query.
 
+        Queries of a conversation are follow-ups of its previous turns: they are
+        embedded together with the previous question, reuse the documents
+        retrieved earlier while they stay on topic, and are answered with the
+        previous turns in the prompt.
+
         Args:
             query: The user's question or query
             user_id: The ID of the user making the query
             i_am_a_developer: If True, include technical documents in the results
+            conversation_id: Client-provided id of the conversation the query
+                belongs to (None for a standalone query)
 
         Returns:
             SupportResponse containing the generated response and relevant documents
@@ -112,16 +247,76 @@ class AISupportManager:
         """
         try:
             self.logger.info(f"Processing query for user {user_id}: {query[:100]}...")
+            set_span_attributes(user_id=user_id, query_chars=len(query))
+            conversation = (
+                self.conversation_store.get(user_id, conversation_id)
+                if conversation_id is not None and self.conversation_store is not None
+                else None
+            )
+            previous_turns = list(conversation.turns) if conversation else []
+            set_span_attributes(previous_turns=len(previous_turns))
 
-            # Generate embeddings and find similar documents
-            query_embeddings = await self._generate_embeddings(query)
-            similar_docs = await self._find_similar_documents(
-                query_embeddings.embedding.vector, i_am_a_developer=i_am_a_developer
+            # Generate embeddings for the query; follow-ups such as "and for
+            # freelancers?" only make sense together with the previous question
+            query_embeddings = await self._generate_embeddings(
+                f"{previous_turns[-1].query}\n{query}" if previous_turns else query
+            )
+
+            # Serve a precomputed answer if the query matches a canonical
+            # question; those answer standalone questions, not follow-ups
+            canonical_answer = (
+                await self._find_canonical_answer(
+                    query_embeddings.embedding.vector,
+                    max_distance=self.canonical_answer_max_distance,
+                    i_am_a_developer=i_am_a_developer,
+                )
+                if self.canonical_answer_max_distance is not None and not previous_turns
+                else None
+            )
+            if canonical_answer is not None:
+                set_span_attributes(canonical_answer=True)
+                self.logger.debug(
+                    f"Serving canonical answer from {canonical_answer.title} "
+                    f"(distance {canonical_answer.distance:.4f})"
+                )
+                await self._save_user_interaction(
+                    user_id=user_id,
+                    query=query,
+                    query_embeddings=query_embeddings.embedding.vector,
+                    response=canonical_answer.answer,
+                    response_embeddings=canonical_answer.answer_embedding,
+                )
+                self._record_turn(
+                    user_id,
+                    conversation_id,
+                    ConversationTurn(query, preview_answer(canonical_answer.answer)),
+                    [],
+                    query_vector=None,
+                )
+                return self._create_canonical_support_response(canonical_answer)
+
+            # Find similar documents, or reuse those of the conversation
+            similar_docs, searched = await self._retrieve_documents(
+                query_embeddings.embedding.vector,
+                conversation,
+                i_am_a_developer=i_am_a_developer,
             )
 
             # Generate response
             response, context_docs = await self._generate_response_with_context(
-                query, similar_docs
+                query, similar_docs, conversation=previous_turns
+            )
+            self._record_turn(
+                user_id,
+                conversation_id,
+                ConversationTurn(
+                    query,
+                    preview_answer(response),
+                    tuple(doc.id for doc in context_docs),
+                ),
+                similar_docs,
+                # Reused documents stay anchored to the search they came from
+                query_vector=query_embeddings.embedding.vector if searched else None,
             )
 
             # Save the interaction
@@ -139,20 +334,228 @@ class AISupportManager:
             self.logger.error(f"Error generating support response: {str(e)}")
             raise
 
+    async def generate_ai_support_responses_batch(
+        self, requests: list[QueryRequest], max_concurrency: int = 8
+    ) -> AsyncGenerator[BatchSupportResult, None]:
+        """
+        Generate AI support responses for a batch of user queries.
+
+        All queries are embedded with one API call and searched with one database
+        query; answers are generated with at most max_concurrency calls in flight
+        and every interaction is saved with one bulk insert at the end.
+
+        Args:
+            requests: The queries to answer
+            max_concurrency: Maximum number of concurrent generation calls
+
+        Yields:
+            BatchSupportResult for each query, in completion order
+        """
+        self.logger.info(f"Processing batch of {len(requests)} queries")
+        # (request, query embedding, response, response embedding if known)
+        interactions: list[
+            tuple[QueryRequest, Sequence[float], str, Sequence[float] | None]
+        ] = []
+        pending = list(range(len(requests)))
+
+        try:
+            query_embeddings = [
+                embedding.embedding.vector
+                for embedding in await self._generate_embeddings_batch(
+                    [request.query for request in requests]
+                )
+            ]
+
+            # Serve precomputed answers for queries matching a canonical question
+            if self.canonical_answer_max_distance is not None:
+                canonical_answers = await self._find_canonical_answers_batch(
+                    query_embeddings,
+                    max_distance=self.canonical_answer_max_distance,
+                    i_am_a_developer=[request.i_am_a_developer for request in requests],
+                )
+                pending = []
+                for index, canonical_answer in enumerate(canonical_answers):
+                    if canonical_answer is None:
+                        pending.append(index)
+                        continue
+                    interactions.append(
+                        (
+                            requests[index],
+                            query_embeddings[index],
+                            canonical_answer.answer,
+                            canonical_answer.answer_embedding,
+                        )
+                    )
+                    record_batch_item("canonical")
+                    yield BatchSupportResult(
+                        index=index,
+                        response=self._create_canonical_support_response(
+                            canonical_answer
+                        ),
+                    )
+
+            similar_docs = (
+                await self._find_similar_documents_batch(
+                    [query_embeddings[index] for index in pending],
+                    i_am_a_developer=[
+                        requests[index].i_am_a_developer for index in pending
+                    ],
+                )
+                if pending
+                else []
+            )
+        except Exception as e:
+            self.logger.error(f"Error preparing batch support responses: {str(e)}")
+            for index in pending:
+                record_batch_item("error")
+                yield BatchSupportResult(index=index, error=str(e))
+            # Canonical answers streamed before the failure are still saved
+            await self._save_user_interactions(interactions)
+            return
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate(
+            index: int, docs: list[FaqDocumentRecord]
+        ) -> tuple[int, SupportResponse | Exception]:
+            async with semaphore:
+                try:
+                    response, context_docs = await self._generate_response_with_context(
+                        requests[index].query, docs
+                    )
+                    return index, self._create_support_response(response, context_docs)
+                except Exception as e:
+                    return index, e
+
+        tasks = [
+            asyncio.create_task(generate(index, docs))
+            for index, docs in zip(pending, similar_docs, strict=True)
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                index, result = await next_result
+                if isinstance(result, Exception):
+                    self.logger.error(
+                        f"Error generating support response {index}: {str(result)}"
+                    )
+                    record_batch_item("error")
+                    yield BatchSupportResult(index=index, error=str(result))
+                    continue
+
+                interactions.append(
+                    (requests[index], query_embeddings[index], result.response, None)
+                )
+                record_batch_item("generated")
+                yield BatchSupportResult(index=index, response=result)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        await self._save_user_interactions(interactions)
+
+    @traced("save_interactions")
+    async def _save_user_interactions(
+        self,
+        interactions: list[
+            tuple[QueryRequest, Sequence[float], str, Sequence[float] | None]
+        ],
+    ) -> None:
+        """Embed the missing responses and save all interactions in one insert."""
+        if not interactions:
+            return
+        try:
+            missing = [
+                response
+                for _, _, response, response_embeddings in interactions
+                if response_embeddings is None
+            ]
+            generated_embeddings = iter(
+                await self._generate_embeddings_batch(missing) if missing else []
+            )
+            user_responses = [
+                UserResponse(
+                    user_id=request.user_id,
+                    user_question=request.query,
+                    question_embedding=query_embeddings,
+                    response=response,
+                    response_embedding=response_embeddings
+                    if response_embeddings is not None
+                    else next(generated_embeddings).embedding.vector,
+                )
+                for request, query_embeddings, response, response_embeddings in (
+                    interactions
+                )
+            ]
+            await self.ai_support_repository.save_user_responses(user_responses)
+            self.logger.debug(f"Saved {len(user_responses)} user interactions")
+        except Exception as e:
+            # The results have already been streamed, so only report the failure
+            self.logger.error(f"Error saving batch user interactions: {str(e)}")
+
+    @traced("embed")
     @track_embedding_time
     async def _generate_embeddings(self, query: str) -> EmbeddingResponse:
         """Generate embeddings for the query."""
         return await self.ai_generation_repository.generate_embeddings(query)
 
+    @traced("embed_batch")
+    @track_embedding_time
+    async def _generate_embeddings_batch(
+        self, texts: list[str]
+    ) -> list[EmbeddingResponse]:
+        """Generate embeddings for several texts with one API call."""
+        return await self.ai_generation_repository.generate_embeddings_batch(texts)
+
+    @traced("canonical_answer_lookup")
+    @track_canonical_answer_lookup
+    async def _find_canonical_answer(
+        self,
+        vector: Sequence[float],
+        max_distance: float,
+        i_am_a_developer: bool = False,
+    ) -> CanonicalAnswerMatch | None:
+        """Find a canonical answer whose question is a near-duplicate of the query."""
+        return await self.ai_support_repository.get_canonical_answer_by_similarity(
+            vector, max_distance=max_distance, i_am_a_developer=i_am_a_developer
+        )
+
+    @traced("canonical_answer_lookup_batch")
+    async def _find_canonical_answers_batch(
+        self,
+        vectors: list[Sequence[float]],
+        max_distance: float,
+        i_am_a_developer: list[bool],
+    ) -> list[CanonicalAnswerMatch | None]:
+        """Find the canonical answer for each query of a batch, if any."""
+        return (
+            await self.ai_support_repository.get_canonical_answers_by_similarity_batch(
+                vectors, max_distance=max_distance, i_am_a_developer=i_am_a_developer
+            )
+        )
+
+    @traced("document_search_batch")
+    @track_document_search_time
+    async def _find_similar_documents_batch(
+        self, vectors: list[Sequence[float]], i_am_a_developer: list[bool]
+    ) -> list[list[FaqDocumentRecord]]:
+        """Find similar documents for each query of a batch with one search."""
+        return await self.ai_support_repository.get_faq_documents_by_similarity_batch(
+            vectors, i_am_a_developer=i_am_a_developer
+        )
+
+    @traced("document_search")
     @track_document_search_time
     async def _find_similar_documents(
-        self, vector: list[float], i_am_a_developer: bool = False
-    ) -> list[FaqDocument]:
+        self, vector: Sequence[float], i_am_a_developer: bool = False
+    ) -> list[FaqDocumentRecord]:
         """Find similar documents using the embedding vector."""
-        return await self.ai_support_repository.get_faq_documents_by_similarity(
+        similar_docs = await self.ai_support_repository.get_faq_documents_by_similarity(
             vector, i_am_a_developer=i_am_a_developer
         )
+        set_span_attributes(documents=len(similar_docs))
+        return similar_docs
 
+    @traced("personal_recommendation")
     async def get_personal_recommendation(
         self,
         user_id: int,
@@ -165,9 +568,17 @@ class AISupportManager:
 
         Returns:
             RecommendationResponse containing personalized recommendations with explanations
+
+        Raises:
+            BudgetExceededError: If recommendations are throttled by the budget guard
         """
+        if self.budget_guard is not None:
+            self.budget_guard.check("recommendation")
+
         # Get user's query history
-        user_history = await self.ai_support_repository.get_user_query_history(user_id)
+        user_history = await self.ai_support_repository.get_user_query_history(
+            user_id, response_preview_chars=RECOMMENDATION_HISTORY_PREVIEW_CHARS
+        )
 
         # Get recommendations from AI
         recommendations_text = await self.ai_generation_repository.get_recommendations(
@@ -187,3 +598,44 @@ class AISupportManager:
                     )
 
         return RecommendationResponse(recommendations=recommendations)
+
+    async def get_user_query_history_page(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: str | None = None,
+        response_preview_chars: int | None = None,
+    ) -> UserQueryHistoryResponse:
+        """
+        Get one page of a user's query history, most recent first.
+
+        Args:
+            user_id: The ID of the user
+            limit: Maximum number of interactions in the page
+            cursor: Opaque cursor returned with the previous page, None for the first
+            response_preview_chars: If set, truncate responses to this many characters
+
+        Returns:
+            UserQueryHistoryResponse with the interactions and the next page cursor
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        page = await self.ai_support_repository.get_user_query_history_page(
+            user_id,
+            limit=limit,
+            cursor=HistoryCursor.decode(cursor) if cursor else None,
+            response_preview_chars=response_preview_chars,
+        )
+        return UserQueryHistoryResponse(
+            items=[
+                UserQueryHistoryItem(
+                    id=item.id,
+                    user_question=item.user_question,
+                    response=item.response,
+                    created_at=item.created_at,
+                )
+                for item in page.items
+            ],
+            next_cursor=page.next_cursor.encode() if page.next_cursor else None,
+        )
@@ -1,13 +1,25 @@
+from array import array
 from datetime import UTC, datetime
 from unittest.mock import AsyncMock
 
 import pytest
-
-from src.application.ai_support_manager import AISupportManager
+from prometheus_client import REGISTRY
+
+from src.application.ai_support_manager import AISupportManager, BatchSupportResult
+from src.application.interfaces.ai_support_interface import (
+    CanonicalAnswerMatch,
+    HistoryCursor,
+    UserQueryHistoryEntry,
+    UserQueryHistoryPage,
+)
 from src.infrastructure.ai_generation_repository import AIGenerationRepository
 from src.infrastructure.ai_support_repository import AISupportRepository
-from src.types.documents import FaqCategory, FaqDocument
+from src.infrastructure.budget_guard import BudgetExceededError, BudgetGuard
+from src.infrastructure.conversation_store import ConversationStore
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqCategory, FaqDocumentRecord
 from src.types.embeddings import Embedding, EmbeddingResponse
+from src.types.support import QueryRequest
 from src.types.user import User
 
 
@@ -45,24 +57,20 @@ def sample_user() -> User:
 
 
 @pytest.fixture
-def sample_faq_documents() -> list[FaqDocument]:
+def sample_faq_documents() -> list[FaqDocumentRecord]:
     """Create sample FAQ documents for testing."""
     return [
-        FaqDocument(
+        FaqDocumentRecord(
             id=1,
             title="Test Document 1",
             link="http://test1.com",
-            text="This is test document 1",
             category=FaqCategory.PLATFORM_OVERVIEW,
-            embedding=[0.1] * 1536,  # OpenAI embeddings are 1536 dimensions
         ),
-        FaqDocument(
+        FaqDocumentRecord(
             id=2,
             title="Test Document 2",
             link="http://test2.com",
-            text="This is test document 2",
             category=FaqCategory.PLATFORM_OVERVIEW,
-            embedding=[0.2] * 1536,  # OpenAI embeddings are 1536 dimensions
         ),
     ]
 
@@ -73,12 +81,12 @@ async def test_generate_ai_support_response(
     mock_ai_repository: AsyncMock,
     mock_ai_support_repository: AsyncMock,
     sample_user: User,
-    sample_faq_documents: list[FaqDocument],
+    sample_faq_documents: list[FaqDocumentRecord],
 ) -> None:
     """Test generate_ai_support_response method."""
     # Arrange
     test_query = "Test question"
-    test_embedding = [0.1] * 1536  # OpenAI embeddings are 1536 dimensions
+    test_embedding = array("f", [0.1] * 1536)  # OpenAI embeddings are 1536 dimensions
     test_response = "Test response"
     test_used_documents = [
         sample_faq_documents[0]
@@ -111,7 +119,7 @@ async def test_generate_ai_support_response(
         mock_ai_repository.generate_embeddings.call_count == 2
     )  # Called for query and response
     mock_ai_repository.generate_response.assert_called_once_with(
-        test_query, sample_faq_documents
+        test_query, sample_faq_documents, conversation=[]
     )
     mock_ai_support_repository.save_user_response.assert_called_once()
     # Verify the UserResponse object passed to save_user_response
@@ -128,13 +136,11 @@ def test_create_support_response() -> None:
     # Arrange
     test_response = "Test response"
     test_documents = [
-        FaqDocument(
+        FaqDocumentRecord(
             id=1,
             title="Test Document 1",
             link="http://test1.com",
-            text="This is test document 1",
             category=FaqCategory.PLATFORM_OVERVIEW,
-            embedding=[0.1] * 1536,  # OpenAI embeddings are 1536 dimensions
         )
     ]
 
@@ -151,7 +157,7 @@ def test_create_support_response() -> None:
 async def test_generate_response_with_context(
     ai_support_manager: AISupportManager,
     mock_ai_repository: AsyncMock,
-    sample_faq_documents: list[FaqDocument],
+    sample_faq_documents: list[FaqDocumentRecord],
 ) -> None:
     """Test _generate_response_with_context method."""
     # Arrange
@@ -218,7 +224,7 @@ async def test_generate_ai_support_response_error_handling(
 async def test_generate_response_with_context_error_handling(
     ai_support_manager: AISupportManager,
     mock_ai_repository: AsyncMock,
-    sample_faq_documents: list[FaqDocument],
+    sample_faq_documents: list[FaqDocumentRecord],
 ) -> None:
     """Test error handling in _generate_response_with_context method."""
     # Arrange
@@ -250,3 +256,403 @@ async def test_save_user_interaction_error_handling(
             sample_user.id, "Test question", [0.1, 0.2, 0.3], "Test response"
         )
     assert str(exc_info.value) == "Database Error"
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_response_serves_canonical_answer(
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+    sample_user: User,
+) -> None:
+    """Test that a canonical answer match skips retrieval and generation."""
+    # Arrange
+    ai_support_manager = AISupportManager(
+        mock_ai_repository,
+        mock_ai_support_repository,
+        canonical_answer_max_distance=0.1,
+    )
+    test_embedding = array("f", [0.1] * 1536)  # OpenAI embeddings are 1536 dimensions
+    answer_embedding = [0.3] * 1536
+    mock_ai_repository.generate_embeddings.return_value = EmbeddingResponse(
+        embedding=Embedding(vector=test_embedding),
+        model="text-embedding-3-small",
+        usage={"prompt_tokens": 2, "total_tokens": 2},
+    )
+    mock_ai_support_repository.get_canonical_answer_by_similarity.return_value = (
+        CanonicalAnswerMatch(
+            faq_document_id=1,
+            title="Test Document 1",
+            link="http://test1.com",
+            answer="Canonical answer",
+            answer_embedding=answer_embedding,
+            distance=0.02,
+        )
+    )
+
+    # Act
+    result = await ai_support_manager.generate_ai_support_response(
+        "Test question", sample_user.id
+    )
+
+    # Assert
+    assert result.response == "Canonical answer"
+    assert result.docs_used[0].title == "Test Document 1"
+    mock_ai_support_repository.get_canonical_answer_by_similarity.assert_called_once_with(
+        test_embedding, max_distance=0.1, i_am_a_developer=False
+    )
+    mock_ai_support_repository.get_faq_documents_by_similarity.assert_not_called()
+    mock_ai_repository.generate_response.assert_not_called()
+    # Only the query is embedded; the stored answer embedding is reused
+    assert mock_ai_repository.generate_embeddings.call_count == 1
+    call_args = mock_ai_support_repository.save_user_response.call_args[0][0]
+    assert call_args.response == "Canonical answer"
+    assert call_args.response_embedding == answer_embedding
+
+
+def conversation_retrievals(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "ai_conversation_retrievals_total", {"result": result}
+        )
+        or 0.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_response_follow_ups(
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+    sample_user: User,
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that follow-ups reuse the conversation's documents while on topic."""
+    # Arrange
+    manager = AISupportManager(
+        mock_ai_repository,
+        mock_ai_support_repository,
+        canonical_answer_max_distance=0.1,
+        conversation_store=ConversationStore(reuse_min_similarity=0.9),
+    )
+    payments = [1.0] + [0.0] * 1535
+    embeddings = {
+        "How do I get paid?": payments,
+        "How do I get paid?\nAnd for freelancers?": [1.0, 0.1] + [0.0] * 1534,
+        "And for freelancers?\nHow do I reset my password?": [0.0, 1.0] + [0.0] * 1534,
+    }
+    mock_ai_repository.generate_embeddings.side_effect = lambda text: EmbeddingResponse(
+        embedding=Embedding(vector=embeddings.get(text, payments)),
+        model="text-embedding-3-small",
+        usage={"prompt_tokens": 2, "total_tokens": 2},
+    )
+    mock_ai_support_repository.get_canonical_answer_by_similarity.return_value = None
+    mock_ai_support_repository.get_faq_documents_by_similarity.side_effect = [
+        sample_faq_documents[:1],
+        sample_faq_documents[1:],
+    ]
+    mock_ai_repository.generate_response.side_effect = [
+        ("Payments are sent weekly.", sample_faq_documents[:1]),
+        ("Freelancers are paid per milestone.", sample_faq_documents[:1]),
+        ("Use the reset link.", sample_faq_documents[1:]),
+    ]
+    reused_before = conversation_retrievals("reused")
+    searched_before = conversation_retrievals("searched")
+
+    # Act
+    for query in (
+        "How do I get paid?",
+        "And for freelancers?",
+        "How do I reset my password?",
+    ):
+        await manager.generate_ai_support_response(
+            query, sample_user.id, conversation_id="conversation-1"
+        )
+
+    # Assert
+    # Canonical answers are only looked up for the first question
+    mock_ai_support_repository.get_canonical_answer_by_similarity.assert_called_once()
+    assert mock_ai_support_repository.get_faq_documents_by_similarity.call_count == 2
+    assert conversation_retrievals("reused") - reused_before == 1
+    assert conversation_retrievals("searched") - searched_before == 1
+    follow_up, off_topic = mock_ai_repository.generate_response.call_args_list[1:]
+    assert follow_up.args == ("And for freelancers?", sample_faq_documents[:1])
+    assert follow_up.kwargs["conversation"] == [
+        ConversationTurn("How do I get paid?", "Payments are sent weekly.", (1,))
+    ]
+    # New documents come first, followed by those retrieved earlier
+    assert off_topic.args[1] == [sample_faq_documents[1], sample_faq_documents[0]]
+    assert len(off_topic.kwargs["conversation"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_response_canonical_answers_disabled(
+    ai_support_manager: AISupportManager,
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+    sample_user: User,
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that canonical answers are not looked up when disabled."""
+    # Arrange
+    mock_ai_repository.generate_embeddings.return_value = EmbeddingResponse(
+        embedding=Embedding(vector=[0.1] * 1536),
+        model="text-embedding-3-small",
+        usage={"prompt_tokens": 2, "total_tokens": 2},
+    )
+    mock_ai_support_repository.get_faq_documents_by_similarity.return_value = (
+        sample_faq_documents
+    )
+    mock_ai_repository.generate_response.return_value = ("Test response", [])
+
+    # Act
+    await ai_support_manager.generate_ai_support_response(
+        "Test question", sample_user.id
+    )
+
+    # Assert
+    mock_ai_support_repository.get_canonical_answer_by_similarity.assert_not_called()
+    mock_ai_repository.generate_response.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_user_query_history_page(
+    ai_support_manager: AISupportManager,
+    mock_ai_support_repository: AsyncMock,
+) -> None:
+    """Test get_user_query_history_page decodes and encodes opaque cursors."""
+    # Arrange
+    created_at = datetime(2025, 1, 1, tzinfo=UTC)
+    cursor = HistoryCursor(created_at=created_at, id=42)
+    next_cursor = HistoryCursor(created_at=created_at, id=41)
+    mock_ai_support_repository.get_user_query_history_page.return_value = (
+        UserQueryHistoryPage(
+            items=[
+                UserQueryHistoryEntry(
+                    id=41,
+                    user_id=1,
+                    user_question="Test question",
+                    response="Test response",
+                    created_at=created_at,
+                )
+            ],
+            next_cursor=next_cursor,
+        )
+    )
+
+    # Act
+    result = await ai_support_manager.get_user_query_history_page(
+        1, limit=1, cursor=cursor.encode()
+    )
+
+    # Assert
+    assert result.items[0].id == 41
+    assert result.next_cursor is not None
+    assert HistoryCursor.decode(result.next_cursor) == next_cursor
+    mock_ai_support_repository.get_user_query_history_page.assert_called_once_with(
+        1, limit=1, cursor=cursor, response_preview_chars=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_user_query_history_page_invalid_cursor(
+    ai_support_manager: AISupportManager,
+) -> None:
+    """Test get_user_query_history_page rejects malformed cursors."""
+    # Act & Assert
+    with pytest.raises(ValueError):
+        await ai_support_manager.get_user_query_history_page(1, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_responses_batch(
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that a batch shares embedding and search calls and reports per-item errors."""
+    # Arrange
+    ai_support_manager = AISupportManager(
+        mock_ai_repository,
+        mock_ai_support_repository,
+        canonical_answer_max_distance=0.1,
+    )
+    requests = [
+        QueryRequest(query="Canonical question", user_id=1),
+        QueryRequest(query="Generated question", user_id=2),
+        QueryRequest(query="Failing question", user_id=3, i_am_a_developer=True),
+    ]
+    answer_embedding = [0.3] * 1536
+    mock_ai_repository.generate_embeddings_batch.side_effect = lambda texts: [
+        EmbeddingResponse(
+            embedding=Embedding(vector=[0.1 * (i + 1)] * 1536),
+            model="text-embedding-3-small",
+            usage={"prompt_tokens": 2, "total_tokens": 2},
+        )
+        for i in range(len(texts))
+    ]
+    mock_ai_support_repository.get_canonical_answers_by_similarity_batch.return_value = [
+        CanonicalAnswerMatch(
+            faq_document_id=1,
+            title="Test Document 1",
+            link="http://test1.com",
+            answer="Canonical answer",
+            answer_embedding=answer_embedding,
+            distance=0.02,
+        ),
+        None,
+        None,
+    ]
+    mock_ai_support_repository.get_faq_documents_by_similarity_batch.return_value = [
+        sample_faq_documents,
+        sample_faq_documents,
+    ]
+
+    async def generate_response(
+        query: str, docs: list[FaqDocumentRecord], **_: object
+    ) -> tuple[str, list[FaqDocumentRecord]]:
+        if query == "Failing question":
+            raise Exception("API Error")
+        return "Generated response", docs[:1]
+
+    mock_ai_repository.generate_response.side_effect = generate_response
+
+    # Act
+    results: list[BatchSupportResult] = [
+        result
+        async for result in ai_support_manager.generate_ai_support_responses_batch(
+            requests, max_concurrency=2
+        )
+    ]
+
+    # Assert
+    results_by_index = {result.index: result for result in results}
+    assert len(results) == 3
+    assert results_by_index[0].response is not None
+    assert results_by_index[0].response.response == "Canonical answer"
+    assert results_by_index[1].response is not None
+    assert results_by_index[1].response.response == "Generated response"
+    assert results_by_index[2].response is None
+    assert results_by_index[2].error == "API Error"
+    mock_ai_repository.generate_embeddings.assert_not_called()
+    search_args = (
+        mock_ai_support_repository.get_faq_documents_by_similarity_batch.call_args
+    )
+    assert len(search_args[0][0]) == 2
+    assert search_args[1]["i_am_a_developer"] == [False, True]
+    # Queries in one call, then only the generated response in a second call
+    assert mock_ai_repository.generate_embeddings_batch.call_count == 2
+    assert mock_ai_repository.generate_embeddings_batch.call_args[0][0] == [
+        "Generated response"
+    ]
+    saved = mock_ai_support_repository.save_user_responses.call_args[0][0]
+    assert [user_response.user_id for user_response in saved] == [1, 2]
+    assert saved[0].response_embedding == answer_embedding
+    mock_ai_support_repository.save_user_response.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_responses_batch_embedding_error(
+    ai_support_manager: AISupportManager,
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+) -> None:
+    """Test that a failed batch embedding call yields an error for every query."""
+    # Arrange
+    requests = [
+        QueryRequest(query="First question", user_id=1),
+        QueryRequest(query="Second question", user_id=1),
+    ]
+    mock_ai_repository.generate_embeddings_batch.side_effect = Exception("API Error")
+
+    # Act
+    results = [
+        result
+        async for result in ai_support_manager.generate_ai_support_responses_batch(
+            requests
+        )
+    ]
+
+    # Assert
+    assert [(result.index, result.error) for result in results] == [
+        (0, "API Error"),
+        (1, "API Error"),
+    ]
+    mock_ai_support_repository.save_user_responses.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generate_ai_support_responses_batch_search_error_saves_canonical(
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+) -> None:
+    """Test that canonical answers streamed before a failed search are saved."""
+    # Arrange
+    ai_support_manager = AISupportManager(
+        mock_ai_repository,
+        mock_ai_support_repository,
+        canonical_answer_max_distance=0.1,
+    )
+    requests = [
+        QueryRequest(query="Canonical question", user_id=1),
+        QueryRequest(query="Other question", user_id=2),
+    ]
+    answer_embedding = [0.3] * 1536
+    mock_ai_repository.generate_embeddings_batch.return_value = [
+        EmbeddingResponse(
+            embedding=Embedding(vector=[0.1] * 1536),
+            model="text-embedding-3-small",
+            usage={"prompt_tokens": 2, "total_tokens": 2},
+        )
+        for _ in requests
+    ]
+    mock_ai_support_repository.get_canonical_answers_by_similarity_batch.return_value = [
+        CanonicalAnswerMatch(
+            faq_document_id=1,
+            title="Test Document 1",
+            link="http://test1.com",
+            answer="Canonical answer",
+            answer_embedding=answer_embedding,
+            distance=0.02,
+        ),
+        None,
+    ]
+    mock_ai_support_repository.get_faq_documents_by_similarity_batch.side_effect = (
+        Exception("Database Error")
+    )
+
+    # Act
+    results = [
+        result
+        async for result in ai_support_manager.generate_ai_support_responses_batch(
+            requests
+        )
+    ]
+
+    # Assert
+    assert [(result.index, result.error) for result in results] == [
+        (0, None),
+        (1, "Database Error"),
+    ]
+    saved = mock_ai_support_repository.save_user_responses.call_args[0][0]
+    assert [user_response.user_id for user_response in saved] == [1]
+    assert saved[0].response == "Canonical answer"
+    assert saved[0].response_embedding == answer_embedding
+
+
+@pytest.mark.asyncio
+async def test_get_personal_recommendation_throttled_by_budget(
+    mock_ai_repository: AsyncMock,
+    mock_ai_support_repository: AsyncMock,
+    sample_user: User,
+) -> None:
+    """Test that recommendations are throttled when the budget is nearly spent."""
+    # Arrange
+    budget_guard = BudgetGuard(max_cost_usd=1.0)
+    budget_guard.record(cost=1.0, tokens=1000)
+    ai_support_manager = AISupportManager(
+        mock_ai_repository, mock_ai_support_repository, budget_guard=budget_guard
+    )
+
+    # Act & Assert
+    with pytest.raises(BudgetExceededError):
+        await ai_support_manager.get_personal_recommendation(sample_user.id)
+    mock_ai_repository.get_recommendations.assert_not_called()
@@ -1,13 +1,66 @@
+import asyncio
+import hashlib
+import itertools
 import logging
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from typing import Any
 
 from src.application.interfaces.ai_generation_interface import AIGenerationInterface
-from src.application.interfaces.dump_data_interface import DumpDataInterface
-from src.types.documents import FaqCategory, FaqDocument
+from src.application.interfaces.dump_data_interface import (
+    DumpDataInterface,
+    StagedDocument,
+)
+from src.infrastructure.budget_guard import BudgetGuard
+from src.types.documents import CanonicalQuestionAnswer, FaqCategory, FaqDocument
 from src.types.user import User
 
 
+def content_hash(doc: dict[str, Any]) -> str:
+    """Hash identifying a source document across ingestion runs."""
+    content = "\0".join(str(doc[key]) for key in ("title", "link", "category", "text"))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@dataclass
+class IngestionProgress:
+    """Documents processed by an ingestion run, with its throughput."""
+
+    total: int | None = None
+    # Documents stored by a previous run
+    skipped: int = 0
+    # Documents generated and checkpointed by this run
+    generated: int = 0
+    # Documents stored in the live tables by this run
+    stored: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def docs_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.generated / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        """Estimated time until every document is stored."""
+        if self.total is None or self.docs_per_second == 0:
+            return None
+        remaining = self.total - self.skipped - self.stored
+        return max(remaining, 0) / self.docs_per_second
+
+    def describe(self) -> str:
+        done = self.skipped + self.stored
+        eta = self.eta_seconds
+        return (
+            f"Stored {done}/{self.total if self.total is not None else '?'} documents "
+            f"({self.skipped} from previous runs), "
+            f"{self.docs_per_second:.2f} docs/s"
+            + (f", ETA {eta:.0f}s" if eta is not None else "")
+        )
+
+
 class DumpDataManager:
     """
     Manager for dumping data into the database.
@@ -20,6 +73,8 @@ class DumpDataManager:
         self,
         dump_data_repository: DumpDataInterface,
         ai_repository: AIGenerationInterface,
+        canonical_questions_per_document: int = 5,
+        budget_guard: BudgetGuard | None = None,
     ):
         """
         Initialize the manager with required repositories.
@@ -27,59 +82,58 @@ class DumpDataManager:
         Args:
             dump_data_repository: Repository for dumping data into the database.
             ai_repository: Repository for AI operations like generating embeddings.
+            canonical_questions_per_document: Number of canonical question/answer
+                pairs to precompute per document (0 disables them).
+            budget_guard: Guard pausing ingestion while the AI budget is nearly
+                exhausted (None disables throttling).
         """
         self.dump_data_repository = dump_data_repository
         self.ai_repository = ai_repository
+        self.canonical_questions_per_document = canonical_questions_per_document
+        self.budget_guard = budget_guard
         self.logger = logging.getLogger(__name__)
 
-    async def dump_data(self, base_data: list[dict[str, Any]]) -> None:
+    async def dump_data(
+        self,
+        base_data: Iterable[dict[str, Any]],
+        total: int | None = None,
+        chunk_size: int = 20,
+        max_concurrency: int = 4,
+    ) -> None:
         """
         Process and dump FAQ documents with their embeddings.
 
-        This function:
-        1. Reads FAQ documents from base data
-        2. Generates a summary for each document
-        3. Generates embeddings for each document's summary
-        4. Creates FaqDocument instances
-        5. Inserts the documents into the database
+        Documents are streamed through the pipeline chunk by chunk:
+        1. Documents stored by a previous run are skipped
+        2. Each other document gets a summary, an embedding of the summary and
+           its canonical question/answer pairs, up to max_concurrency at a time
+        3. Each document is checkpointed in the staging table once generated
+        4. The chunk is stored in the live tables in a single transaction
+
+        A failed run resumes from its checkpoints: running it again only
+        generates the documents that were not staged yet.
 
         Args:
-            base_data: List of dictionaries containing FAQ document data.
-                     Each dict should have: title, link, text, category
+            base_data: FAQ document data, read lazily. Each dict should have:
+                title, link, text, category
+            total: Number of documents, for the progress estimates (optional)
+            chunk_size: Documents stored in the live tables per transaction
+            max_concurrency: Documents generated concurrently
 
         Raises:
             Exception: If there's an error during the process.
         """
         try:
-            self.logger.info(f"Starting to process {len(base_data)} FAQ documents")
-
-            # Process each document and generate embeddings
-            faq_documents = []
-            for doc in base_data:
-                # Generate summary for the document text
-                summary = await self.ai_repository.generate_summary(doc["text"])
-                
-                # Generate embedding for the document summary
-                embedding_response = await self.ai_repository.generate_embeddings(
-                    summary
-                )
-
-                # Create FaqDocument instance
-                faq_document = FaqDocument(
-                    id=None,  # ID will be generated by the database
-                    title=doc["title"],
-                    link=doc["link"],
-                    text=doc["text"],
-                    llm_summary=summary,
-                    category=FaqCategory(doc["category"]),
-                    embedding=embedding_response.embedding.vector,
-                )
-                faq_documents.append(faq_document)
-
-                self.logger.debug(f"Generated summary and embedding for document: {doc['title']}")
+            self.logger.info(
+                f"Starting to process {total if total is not None else 'all'} FAQ documents"
+            )
+            progress = IngestionProgress(total=total)
+            semaphore = asyncio.Semaphore(max_concurrency)
+            documents = iter(base_data)
+            while chunk := list(itertools.islice(documents, chunk_size)):
+                await self._dump_chunk(chunk, semaphore, progress)
+                self.logger.info(progress.describe())
 
-            # Dump all documents into the database
-            await self.dump_data_repository.dump_faq_documents(faq_documents)
             await self.create_test_user()
             self.logger.info("Successfully completed data dump process")
 
@@ -87,6 +141,118 @@ class DumpDataManager:
             self.logger.error(f"Error in dump_data process: {str(e)}")
             raise
 
+    async def _dump_chunk(
+        self,
+        chunk: list[dict[str, Any]],
+        semaphore: asyncio.Semaphore,
+        progress: IngestionProgress,
+    ) -> None:
+        """Generate, checkpoint and store a chunk of documents."""
+        docs_by_hash = {content_hash(doc): doc for doc in chunk}
+        checkpoints = await self.dump_data_repository.get_ingestion_checkpoints(
+            list(docs_by_hash)
+        )
+        progress.skipped += sum(
+            checkpoint.document_id is not None for checkpoint in checkpoints.values()
+        )
+        tasks = [
+            asyncio.create_task(self._generate_document(hash_, doc, semaphore))
+            for hash_, doc in docs_by_hash.items()
+            if hash_ not in checkpoints
+        ]
+        # Documents are checkpointed as they complete; after a failure, the
+        # others are still checkpointed before the error is raised
+        error: Exception | None = None
+        for task in asyncio.as_completed(tasks):
+            try:
+                staged_document = await task
+                await self.dump_data_repository.stage_document(staged_document)
+                progress.generated += 1
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+        document_ids = await self.dump_data_repository.commit_staged_documents(
+            [
+                hash_
+                for hash_ in docs_by_hash
+                if hash_ not in checkpoints or checkpoints[hash_].document_id is None
+            ]
+        )
+        progress.stored += len(document_ids)
+
+    async def _generate_document(
+        self, hash_: str, doc: dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> StagedDocument:
+        """Generate the summary, embedding and canonical answers of a document."""
+        async with semaphore:
+            await self._wait_for_budget()
+
+            # Generate summary for the document text
+            summary = await self.ai_repository.generate_summary(doc["text"])
+
+            # Generate embedding for the document summary
+            embedding_response = await self.ai_repository.generate_embeddings(summary)
+
+            # Create FaqDocument instance
+            faq_document = FaqDocument(
+                id=None,  # ID will be generated by the database
+                title=doc["title"],
+                link=doc["link"],
+                text=doc["text"],
+                llm_summary=summary,
+                category=FaqCategory(doc["category"]),
+                embedding=embedding_response.embedding.vector,
+            )
+            staged_document = StagedDocument(content_hash=hash_, document=faq_document)
+            if self.canonical_questions_per_document > 0:
+                staged_document.canonical_answers = (
+                    await self._generate_canonical_answers(faq_document)
+                )
+
+            self.logger.debug(
+                f"Generated summary and embedding for document: {doc['title']}"
+            )
+            return staged_document
+
+    async def _generate_canonical_answers(
+        self, faq_document: FaqDocument
+    ) -> list[tuple[CanonicalQuestionAnswer, Sequence[float], Sequence[float]]]:
+        """
+        Generate the canonical question/answer pairs of a document.
+
+        Both the questions and the answers are embedded, in a single call, so
+        that user questions can be matched against the questions, and
+        interactions served from a canonical answer can be stored without
+        another embedding call.
+        """
+        questions = await self.ai_repository.generate_canonical_questions(
+            faq_document, max_questions=self.canonical_questions_per_document
+        )
+        if not questions:
+            return []
+        embeddings = await self.ai_repository.generate_embeddings_batch(
+            [
+                text
+                for question in questions
+                for text in (question.question, question.answer)
+            ]
+        )
+        return [
+            (
+                question,
+                embeddings[2 * index].embedding.vector,
+                embeddings[2 * index + 1].embedding.vector,
+            )
+            for index, question in enumerate(questions)
+        ]
+
+    async def _wait_for_budget(self) -> None:
+        """Pause ingestion while the AI budget is nearly exhausted."""
+        if self.budget_guard is not None:
+            await self.budget_guard.wait_for_budget("ingestion")
+
     @staticmethod
     def _create_test_user() -> User:
         """Create a test user instance."""
@@ -2,9 +2,11 @@ from unittest.mock import AsyncMock
 
 import pytest
 
-from src.application.dump_data_manager import DumpDataManager
+from src.application.dump_data_manager import DumpDataManager, content_hash
+from src.application.interfaces.dump_data_interface import IngestionCheckpoint
 from src.infrastructure.ai_generation_repository import AIGenerationRepository
 from src.infrastructure.dump_data_repository import DumpDataRepository
+from src.types.documents import CanonicalQuestionAnswer
 from src.types.embeddings import Embedding, EmbeddingResponse
 from src.types.user import User
 
@@ -12,7 +14,12 @@ from src.types.user import User
 @pytest.fixture
 def mock_dump_data_repository() -> AsyncMock:
     """Create a mock dump data repository."""
-    return AsyncMock(spec=DumpDataRepository)
+    repository = AsyncMock(spec=DumpDataRepository)
+    repository.get_ingestion_checkpoints.return_value = {}
+    repository.commit_staged_documents.side_effect = lambda hashes: list(
+        range(1, len(hashes) + 1)
+    )
+    return repository
 
 
 @pytest.fixture
@@ -48,6 +55,18 @@ def sample_base_data() -> list[dict[str, str]]:
     ]
 
 
+def embedding_responses(texts: list[str]) -> list[EmbeddingResponse]:
+    """Embeddings whose first dimension is the position of each text."""
+    return [
+        EmbeddingResponse(
+            embedding=Embedding(vector=[float(index)] * 1536),
+            model="text-embedding-3-small",
+            usage={"prompt_tokens": 1, "total_tokens": 1},
+        )
+        for index, _ in enumerate(texts)
+    ]
+
+
 @pytest.mark.asyncio
 async def test_dump_data(
     dump_data_manager: DumpDataManager,
@@ -65,6 +84,7 @@ async def test_dump_data(
         model="text-embedding-3-small",
         usage={"prompt_tokens": 2, "total_tokens": 2},
     )
+    mock_ai_repository.generate_canonical_questions.return_value = []
 
     # Act
     await dump_data_manager.dump_data(sample_base_data)
@@ -72,7 +92,143 @@ async def test_dump_data(
     # Assert
     assert mock_ai_repository.generate_summary.call_count == 2
     assert mock_ai_repository.generate_embeddings.call_count == 2
-    mock_dump_data_repository.dump_faq_documents.assert_called_once()
+    assert mock_dump_data_repository.stage_document.call_count == 2
+    mock_dump_data_repository.commit_staged_documents.assert_called_once_with(
+        [content_hash(doc) for doc in sample_base_data]
+    )
+    mock_dump_data_repository.dump_user_data.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_dump_data_with_canonical_answers(
+    mock_dump_data_repository: AsyncMock,
+    mock_ai_repository: AsyncMock,
+    sample_base_data: list[dict[str, str]],
+) -> None:
+    """Test dump_data stages canonical answers with their document."""
+    # Arrange
+    dump_data_manager = DumpDataManager(
+        mock_dump_data_repository,
+        mock_ai_repository,
+        canonical_questions_per_document=2,
+    )
+    mock_ai_repository.generate_summary.return_value = "Test summary"
+    mock_ai_repository.generate_embeddings.return_value = EmbeddingResponse(
+        embedding=Embedding(vector=[0.1] * 1536),
+        model="text-embedding-3-small",
+        usage={"prompt_tokens": 2, "total_tokens": 2},
+    )
+    mock_ai_repository.generate_embeddings_batch.side_effect = embedding_responses
+    mock_ai_repository.generate_canonical_questions.return_value = [
+        CanonicalQuestionAnswer(question="Question 1?", answer="Answer 1"),
+        CanonicalQuestionAnswer(question="Question 2?", answer="Answer 2"),
+    ]
+
+    # Act
+    await dump_data_manager.dump_data(sample_base_data)
+
+    # Assert
+    assert mock_ai_repository.generate_canonical_questions.call_count == 2
+    # The questions and answers of a document are embedded in one call
+    assert mock_ai_repository.generate_embeddings_batch.call_count == 2
+    mock_ai_repository.generate_embeddings_batch.assert_called_with(
+        ["Question 1?", "Answer 1", "Question 2?", "Answer 2"]
+    )
+    staged_document = mock_dump_data_repository.stage_document.call_args[0][0]
+    assert [
+        (answer.question, question_embedding[0], answer_embedding[0])
+        for answer, question_embedding, answer_embedding in (
+            staged_document.canonical_answers
+        )
+    ] == [("Question 1?", 0.0, 1.0), ("Question 2?", 2.0, 3.0)]
+
+
+@pytest.mark.asyncio
+async def test_dump_data_canonical_answers_disabled(
+    mock_dump_data_repository: AsyncMock,
+    mock_ai_repository: AsyncMock,
+    sample_base_data: list[dict[str, str]],
+) -> None:
+    """Test dump_data skips canonical answers when disabled."""
+    # Arrange
+    dump_data_manager = DumpDataManager(
+        mock_dump_data_repository,
+        mock_ai_repository,
+        canonical_questions_per_document=0,
+    )
+    mock_ai_repository.generate_summary.return_value = "Test summary"
+    mock_ai_repository.generate_embeddings.side_effect = lambda text: (
+        embedding_responses([text])[0]
+    )
+
+    # Act
+    await dump_data_manager.dump_data(sample_base_data)
+
+    # Assert
+    mock_ai_repository.generate_canonical_questions.assert_not_called()
+    staged_document = mock_dump_data_repository.stage_document.call_args[0][0]
+    assert staged_document.canonical_answers == []
+
+
+@pytest.mark.asyncio
+async def test_dump_data_resumes_from_checkpoints(
+    dump_data_manager: DumpDataManager,
+    mock_dump_data_repository: AsyncMock,
+    mock_ai_repository: AsyncMock,
+    sample_base_data: list[dict[str, str]],
+) -> None:
+    """Test stored documents are skipped and staged ones stored without generation."""
+    # Arrange
+    base_data = [
+        *sample_base_data,
+        {**sample_base_data[0], "title": "Test Document 3"},
+    ]
+    stored, staged, new = (content_hash(doc) for doc in base_data)
+    mock_dump_data_repository.get_ingestion_checkpoints.return_value = {
+        stored: IngestionCheckpoint(content_hash=stored, document_id=7),
+        staged: IngestionCheckpoint(content_hash=staged),
+    }
+    mock_ai_repository.generate_summary.return_value = "Test summary"
+    mock_ai_repository.generate_embeddings.side_effect = lambda text: (
+        embedding_responses([text])[0]
+    )
+    mock_ai_repository.generate_canonical_questions.return_value = []
+
+    # Act
+    await dump_data_manager.dump_data(iter(base_data), total=len(base_data))
+
+    # Assert
+    mock_ai_repository.generate_summary.assert_called_once_with(base_data[2]["text"])
+    staged_document = mock_dump_data_repository.stage_document.call_args[0][0]
+    assert staged_document.content_hash == new
+    mock_dump_data_repository.commit_staged_documents.assert_called_once_with(
+        [staged, new]
+    )
+
+
+@pytest.mark.asyncio
+async def test_dump_data_commits_in_chunks(
+    dump_data_manager: DumpDataManager,
+    mock_dump_data_repository: AsyncMock,
+    mock_ai_repository: AsyncMock,
+    sample_base_data: list[dict[str, str]],
+) -> None:
+    """Test documents are stored in one transaction per chunk."""
+    # Arrange
+    mock_ai_repository.generate_summary.return_value = "Test summary"
+    mock_ai_repository.generate_embeddings.side_effect = lambda text: (
+        embedding_responses([text])[0]
+    )
+    mock_ai_repository.generate_canonical_questions.return_value = []
+
+    # Act
+    await dump_data_manager.dump_data(sample_base_data, chunk_size=1)
+
+    # Assert
+    assert [
+        call.args[0]
+        for call in mock_dump_data_repository.commit_staged_documents.call_args_list
+    ] == [[content_hash(doc)] for doc in sample_base_data]
 
 
 @pytest.mark.asyncio
@@ -102,17 +258,21 @@ def test_create_test_user_static() -> None:
 @pytest.mark.asyncio
 async def test_dump_data_error_handling(
     dump_data_manager: DumpDataManager,
+    mock_dump_data_repository: AsyncMock,
     mock_ai_repository: AsyncMock,
     sample_base_data: list[dict[str, str]],
 ) -> None:
     """Test error handling in dump_data method."""
     # Arrange
+    mock_ai_repository.generate_summary.return_value = "Test summary"
     mock_ai_repository.generate_embeddings.side_effect = Exception("API Error")
 
     # Act & Assert
     with pytest.raises(Exception) as exc_info:
         await dump_data_manager.dump_data(sample_base_data)
     assert str(exc_info.value) == "API Error"
+    # Nothing is stored in the live tables for a failed chunk
+    mock_dump_data_repository.commit_staged_documents.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,145 @@
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from src.application.interfaces.ai_generation_interface import AIGenerationInterface
+from src.application.interfaces.embedding_refresh_interface import (
+    EmbeddedTable,
+    EmbeddingRefreshInterface,
+)
+from src.infrastructure.budget_guard import BudgetGuard
+from src.types.embeddings import EMBEDDING_DIMENSIONS, EmbeddingSlot
+
+# Backfill passes before giving up on activating a slot that ingestion keeps
+# writing rows to
+MAX_ACTIVATION_ATTEMPTS = 3
+
+
+@dataclass
+class EmbeddingRefreshReport:
+    """Outcome of an embedding refresh."""
+
+    slot: EmbeddingSlot
+    model: str
+    # Rows embedded by this run, by table
+    refreshed: dict[EmbeddedTable, int] = field(default_factory=dict)
+    activated: bool = False
+
+
+class EmbeddingRefreshManager:
+    """
+    Manager re-embedding the FAQ tables with another model.
+
+    Embeddings are backfilled into the inactive slot while searches keep using
+    the active one; the slot is then indexed and activated in one transaction.
+    Interrupted refreshes resume where they stopped when run again.
+    """
+
+    def __init__(
+        self,
+        embedding_refresh_repository: EmbeddingRefreshInterface,
+        ai_repository: AIGenerationInterface,
+        batch_size: int = 100,
+        budget_guard: BudgetGuard | None = None,
+    ):
+        """
+        Initialize the manager with required repositories.
+
+        Args:
+            embedding_refresh_repository: Repository backfilling embedding slots.
+            ai_repository: Repository generating embeddings with the new model.
+            batch_size: Rows read and embedded per embeddings API call.
+            budget_guard: Guard pausing the refresh while the AI budget is nearly
+                exhausted (None disables throttling).
+        """
+        self.embedding_refresh_repository = embedding_refresh_repository
+        self.ai_repository = ai_repository
+        self.batch_size = batch_size
+        self.budget_guard = budget_guard
+        self.logger = logging.getLogger(__name__)
+
+    async def refresh_embeddings(
+        self, model: str, activate: bool = True, min_retired_seconds: float = 60.0
+    ) -> EmbeddingRefreshReport:
+        """
+        Backfill, index and (optionally) activate the embeddings of a model.
+
+        Args:
+            model: The embedding model; ai_repository must generate its embeddings
+            activate: Whether to switch searches to the slot once it is ready
+            min_retired_seconds: Time after a switch before the retired slot is
+                reused, so that workers have stopped searching it
+
+        Returns:
+            EmbeddingRefreshReport with the slot and the rows embedded
+
+        Raises:
+            ValueError: If the model does not embed into EMBEDDING_DIMENSIONS
+                dimensions, or the slot cannot be refreshed (see prepare_slot)
+            RuntimeError: If rows kept being ingested while activating the slot
+        """
+        await self._check_dimensions(model)
+        slot = await self.embedding_refresh_repository.prepare_slot(
+            model, min_retired_seconds
+        )
+        report = EmbeddingRefreshReport(slot=slot, model=model)
+        for _ in range(MAX_ACTIVATION_ATTEMPTS):
+            for table in EmbeddedTable:
+                report.refreshed[table] = report.refreshed.get(
+                    table, 0
+                ) + await self._backfill(table, slot, model)
+            await self.embedding_refresh_repository.build_indexes(slot)
+            if not activate:
+                return report
+            report.activated = await self.embedding_refresh_repository.activate_slot(
+                slot, model
+            )
+            if report.activated:
+                return report
+        raise RuntimeError(
+            f"Could not activate the {slot.value} slot: rows kept being ingested"
+        )
+
+    async def _check_dimensions(self, model: str) -> None:
+        """Embed a probe text, so that a model not fitting the slots is never assigned."""
+        try:
+            await self.ai_repository.generate_embeddings("Embedding dimensions check")
+        except ValueError as e:
+            raise ValueError(
+                f"{model} does not embed into the {EMBEDDING_DIMENSIONS} "
+                f"dimensions of the embedding slots: {str(e)}"
+            ) from e
+
+    async def _backfill(
+        self, table: EmbeddedTable, slot: EmbeddingSlot, model: str
+    ) -> int:
+        """Embed the rows of a table missing from the slot, batch by batch."""
+        refreshed = 0
+        after_id = 0
+        while True:
+            rows = await self.embedding_refresh_repository.fetch_rows_to_refresh(
+                table, slot, model, after_id, self.batch_size
+            )
+            if not rows:
+                return refreshed
+            if self.budget_guard is not None:
+                await self.budget_guard.wait_for_budget("ingestion")
+
+            # All the texts of the batch are embedded with a single API call
+            responses = iter(
+                await self.ai_repository.generate_embeddings_batch(
+                    [text for row in rows for text in row.texts]
+                )
+            )
+            embeddings: dict[int, list[Sequence[float]]] = {
+                row.id: [next(responses).embedding.vector for _ in row.texts]
+                for row in rows
+            }
+            await self.embedding_refresh_repository.save_refreshed_embeddings(
+                table, slot, model, embeddings
+            )
+            refreshed += len(rows)
+            after_id = rows[-1].id
+            self.logger.info(
+                f"Refreshed {refreshed} rows of {table.value} (up to ID {after_id})"
+            )
@@ -0,0 +1,159 @@
+from unittest.mock import AsyncMock, call
+
+import pytest
+
+from src.application.embedding_refresh_manager import (
+    MAX_ACTIVATION_ATTEMPTS,
+    EmbeddingRefreshManager,
+)
+from src.application.interfaces.embedding_refresh_interface import (
+    EmbeddedTable,
+    EmbeddingRefreshRow,
+)
+from src.infrastructure.ai_generation_repository import AIGenerationRepository
+from src.infrastructure.embedding_refresh_repository import EmbeddingRefreshRepository
+from src.types.embeddings import Embedding, EmbeddingResponse, EmbeddingSlot
+
+
+def embedding_responses(texts: list[str]) -> list[EmbeddingResponse]:
+    """Embeddings whose first dimension is the position of each text."""
+    return [
+        EmbeddingResponse(
+            embedding=Embedding(vector=[float(index)] * 1536),
+            model="text-embedding-3-large",
+            usage={"prompt_tokens": 1, "total_tokens": 1},
+        )
+        for index, _ in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def mock_refresh_repository() -> AsyncMock:
+    """Create a mock embedding refresh repository."""
+    repository = AsyncMock(spec=EmbeddingRefreshRepository)
+    repository.prepare_slot.return_value = EmbeddingSlot.SECONDARY
+    repository.activate_slot.return_value = True
+    return repository
+
+
+@pytest.fixture
+def mock_ai_repository() -> AsyncMock:
+    """Create a mock AI repository."""
+    repository = AsyncMock(spec=AIGenerationRepository)
+    repository.generate_embeddings_batch.side_effect = embedding_responses
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_refresh_embeddings_in_keyset_batches(
+    mock_refresh_repository: AsyncMock, mock_ai_repository: AsyncMock
+) -> None:
+    """Test that rows are embedded one batch per API call and the slot activated."""
+    # Arrange
+    pages = {
+        EmbeddedTable.FAQ_DOCUMENTS: [
+            [
+                EmbeddingRefreshRow(id=1, texts=["a"]),
+                EmbeddingRefreshRow(id=4, texts=["b"]),
+            ],
+            [EmbeddingRefreshRow(id=7, texts=["c"])],
+            [],
+        ],
+        EmbeddedTable.FAQ_CANONICAL_ANSWERS: [
+            [EmbeddingRefreshRow(id=2, texts=["question", "answer"])],
+            [],
+        ],
+    }
+
+    def next_page(table: EmbeddedTable, *_: object) -> list[EmbeddingRefreshRow]:
+        return pages[table].pop(0)
+
+    mock_refresh_repository.fetch_rows_to_refresh.side_effect = next_page
+    manager = EmbeddingRefreshManager(
+        mock_refresh_repository, mock_ai_repository, batch_size=2
+    )
+
+    # Act
+    report = await manager.refresh_embeddings("text-embedding-3-large")
+
+    # Assert
+    assert report.activated
+    assert report.refreshed == {
+        EmbeddedTable.FAQ_DOCUMENTS: 3,
+        EmbeddedTable.FAQ_CANONICAL_ANSWERS: 1,
+    }
+    assert mock_refresh_repository.fetch_rows_to_refresh.call_args_list[:3] == [
+        call(
+            EmbeddedTable.FAQ_DOCUMENTS,
+            EmbeddingSlot.SECONDARY,
+            "text-embedding-3-large",
+            0,
+            2,
+        ),
+        call(
+            EmbeddedTable.FAQ_DOCUMENTS,
+            EmbeddingSlot.SECONDARY,
+            "text-embedding-3-large",
+            4,
+            2,
+        ),
+        call(
+            EmbeddedTable.FAQ_DOCUMENTS,
+            EmbeddingSlot.SECONDARY,
+            "text-embedding-3-large",
+            7,
+            2,
+        ),
+    ]
+    assert mock_ai_repository.generate_embeddings_batch.await_count == 3
+    table, slot, model, embeddings = (
+        mock_refresh_repository.save_refreshed_embeddings.call_args_list[-1].args
+    )
+    assert (table, slot, model) == (
+        EmbeddedTable.FAQ_CANONICAL_ANSWERS,
+        EmbeddingSlot.SECONDARY,
+        "text-embedding-3-large",
+    )
+    assert [vector[0] for vector in embeddings[2]] == [0.0, 1.0]
+    mock_refresh_repository.build_indexes.assert_awaited_once_with(
+        EmbeddingSlot.SECONDARY
+    )
+    mock_refresh_repository.activate_slot.assert_awaited_once_with(
+        EmbeddingSlot.SECONDARY, "text-embedding-3-large"
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_embeddings_retries_activation(
+    mock_refresh_repository: AsyncMock, mock_ai_repository: AsyncMock
+) -> None:
+    """Test that rows ingested during the backfill are embedded before activating."""
+    # Arrange
+    mock_refresh_repository.fetch_rows_to_refresh.return_value = []
+    mock_refresh_repository.activate_slot.return_value = False
+    manager = EmbeddingRefreshManager(mock_refresh_repository, mock_ai_repository)
+
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        await manager.refresh_embeddings("text-embedding-3-large")
+    assert mock_refresh_repository.activate_slot.await_count == MAX_ACTIVATION_ATTEMPTS
+    assert mock_refresh_repository.fetch_rows_to_refresh.await_count == (
+        MAX_ACTIVATION_ATTEMPTS * len(EmbeddedTable)
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_embeddings_rejects_model_of_other_dimensions(
+    mock_refresh_repository: AsyncMock, mock_ai_repository: AsyncMock
+) -> None:
+    """Test that a model not embedding into the slot dimensions is never assigned."""
+    # Arrange
+    mock_ai_repository.generate_embeddings.side_effect = lambda _: Embedding(
+        vector=[0.1] * 3072
+    )
+    manager = EmbeddingRefreshManager(mock_refresh_repository, mock_ai_repository)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="1536 dimensions"):
+        await manager.refresh_embeddings("text-embedding-other")
+    mock_refresh_repository.prepare_slot.assert_not_called()
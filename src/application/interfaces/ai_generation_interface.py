@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
 from src.application.interfaces.ai_support_interface import UserQueryHistory
-from src.types.documents import FaqDocument
+from src.types.conversation import ConversationTurn
+from src.types.documents import (
+    CanonicalQuestionAnswer,
+    FaqDocument,
+    FaqDocumentRecord,
+)
 from src.types.embeddings import EmbeddingResponse
 
 
@@ -51,21 +57,44 @@ class AIGenerationInterface(ABC):
         """
         ...
 
+    @abstractmethod
+    async def generate_embeddings_batch(
+        self, texts: list[str]
+    ) -> list[EmbeddingResponse]:
+        """
+        Generate embeddings for several texts with a single API call.
+
+        Args:
+            texts: The texts to generate embeddings for
+
+        Returns:
+            One EmbeddingResponse per text, in the same order as texts
+
+        Raises:
+            Exception: If there's an error during the embedding generation process
+        """
+        ...
+
     @abstractmethod
     async def generate_response(
-        self, query: str, context_docs: list[FaqDocument]
-    ) -> tuple[str, list[FaqDocument]]:
+        self,
+        query: str,
+        context_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+    ) -> tuple[str, list[FaqDocumentRecord]]:
         """
         Generate a response to a user query using the provided context documents.
 
         Args:
             query: The user's question or query
             context_docs: List of FAQ documents to use as context
+            conversation: Previous turns of the conversation, oldest first
+                (empty for a standalone query)
 
         Returns:
             Tuple containing:
                 - str: The generated response
-                - list[FaqDocument]: List of documents used in the response
+                - list[FaqDocumentRecord]: List of documents used in the response
                     (empty list if no documents were relevant)
 
         Raises:
@@ -73,6 +102,25 @@ class AIGenerationInterface(ABC):
         """
         ...
 
+    @abstractmethod
+    async def generate_canonical_questions(
+        self, document: FaqDocument, max_questions: int = 5
+    ) -> list[CanonicalQuestionAnswer]:
+        """
+        Generate canonical question/answer pairs that a FAQ document answers.
+
+        Args:
+            document: The FAQ document to derive questions from
+            max_questions: Maximum number of question/answer pairs to generate
+
+        Returns:
+            List of CanonicalQuestionAnswer, each answer based only on the document
+
+        Raises:
+            Exception: If there's an error during the generation process
+        """
+        ...
+
     @abstractmethod
     async def get_recommendations(
         self,
@@ -1,8 +1,10 @@
+import base64
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 
-from src.types.documents import FaqDocument
+from src.types.documents import FaqDocument, FaqDocumentRecord
 
 
 @dataclass
@@ -11,9 +13,11 @@ class UserResponse:
 
     user_id: int
     user_question: str
-    question_embedding: list[float]
+    question_embedding: Sequence[float]
     response: str
-    response_embedding: list[float]
+    response_embedding: Sequence[float]
+    # Set when backfilling past interactions; new ones are stored as of now
+    created_at: datetime | None = None
 
 
 @dataclass
@@ -26,6 +30,65 @@ class UserQueryHistory:
     created_at: datetime
 
 
+@dataclass
+class UserQueryHistoryEntry:
+    """Stored interaction of a user's history page, with its id for the cursor."""
+
+    id: int
+    user_id: int
+    user_question: str
+    response: str
+    created_at: datetime
+
+
+@dataclass
+class HistoryCursor:
+    """Keyset position in a user's history: the last (created_at, id) returned."""
+
+    created_at: datetime
+    id: int
+
+    def encode(self) -> str:
+        """Encode the cursor as an opaque URL-safe string."""
+        raw = f"{self.created_at.isoformat()}|{self.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "HistoryCursor":
+        """
+        Decode a cursor produced by encode.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, id_ = raw.split("|")
+            return cls(created_at=datetime.fromisoformat(created_at), id=int(id_))
+        except Exception as e:
+            raise ValueError(f"Invalid history cursor: {cursor}") from e
+
+
+@dataclass
+class UserQueryHistoryPage:
+    """A page of user query history and the cursor for the next page."""
+
+    items: list[UserQueryHistoryEntry] = field(default_factory=list)
+    next_cursor: HistoryCursor | None = None
+
+
+@dataclass
+class CanonicalAnswerMatch:
+    """Canonical answer matched to a user question, with its source document."""
+
+    faq_document_id: int
+    title: str
+    link: str
+    answer: str
+    answer_embedding: Sequence[float] | None
+    distance: float
+
+
 class AISupportInterface(ABC):
     """
     Interface for AI support operations.
@@ -38,10 +101,10 @@ class AISupportInterface(ABC):
     @abstractmethod
     async def get_faq_documents_by_similarity(
         self,
-        embeddings: list[float],
+        embeddings: Sequence[float],
         max_documents: int = 5,
         i_am_a_developer: bool = False,
-    ) -> list[FaqDocument]:
+    ) -> list[FaqDocumentRecord]:
         """
         Retrieve FAQ documents that are semantically similar to the provided embeddings.
 
@@ -51,7 +114,7 @@ class AISupportInterface(ABC):
             i_am_a_developer: If True, include technical documents in the results
 
         Returns:
-            List of FaqDocument objects ordered by similarity to the query
+            List of FaqDocumentRecord objects ordered by similarity to the query
 
         Raises:
             ValueError: If embeddings list is empty or invalid
@@ -59,6 +122,91 @@ class AISupportInterface(ABC):
             Exception: For any other unexpected errors during document retrieval
         """
 
+    @abstractmethod
+    async def get_faq_documents(
+        self, i_am_a_developer: bool = False
+    ) -> list[FaqDocumentRecord]:
+        """
+        Retrieve every FAQ document with a summary, ordered by ID.
+
+        Args:
+            i_am_a_developer: If True, include technical documents
+
+        Returns:
+            List of FaqDocumentRecord objects
+
+        Raises:
+            DatabaseError: If there's an error accessing the database
+        """
+
+    @abstractmethod
+    async def get_faq_documents_by_similarity_batch(
+        self,
+        embeddings: list[Sequence[float]],
+        i_am_a_developer: list[bool],
+        max_documents: int = 5,
+    ) -> list[list[FaqDocumentRecord]]:
+        """
+        Retrieve similar FAQ documents for several query embeddings in one query.
+
+        Args:
+            embeddings: One query embedding per query
+            i_am_a_developer: Per query, whether to include technical documents
+            max_documents: Maximum number of documents per query (default: 5)
+
+        Returns:
+            One list of FaqDocumentRecord per query, in the same order as embeddings,
+            each ordered by similarity to its query
+
+        Raises:
+            DatabaseError: If there's an error accessing the database
+        """
+
+    @abstractmethod
+    async def get_canonical_answer_by_similarity(
+        self,
+        embeddings: Sequence[float],
+        max_distance: float,
+        i_am_a_developer: bool = False,
+    ) -> CanonicalAnswerMatch | None:
+        """
+        Retrieve the canonical answer whose question is closest to the query embedding.
+
+        Args:
+            embeddings: List of float values representing the query embedding
+            max_distance: Maximum cosine distance for a question to count as a match
+            i_am_a_developer: If True, include answers from technical documents
+
+        Returns:
+            CanonicalAnswerMatch for the nearest canonical question, or None if no
+            canonical question is within max_distance
+
+        Raises:
+            DatabaseError: If there's an error accessing the database
+        """
+
+    @abstractmethod
+    async def get_canonical_answers_by_similarity_batch(
+        self,
+        embeddings: list[Sequence[float]],
+        max_distance: float,
+        i_am_a_developer: list[bool],
+    ) -> list[CanonicalAnswerMatch | None]:
+        """
+        Retrieve the nearest canonical answer for several query embeddings in one query.
+
+        Args:
+            embeddings: One query embedding per query
+            max_distance: Maximum cosine distance for a question to count as a match
+            i_am_a_developer: Per query, whether to include technical documents
+
+        Returns:
+            One CanonicalAnswerMatch or None per query, in the same order as embeddings
+
+        Raises:
+            DatabaseError: If there's an error accessing the database
+        """
+
     @abstractmethod
     async def save_user_response(self, user_response: UserResponse) -> None:
         """
@@ -79,12 +227,31 @@ class AISupportInterface(ABC):
         """
 
     @abstractmethod
-    async def get_user_query_history(self, user_id: int) -> list[UserQueryHistory]:
+    async def save_user_responses(self, user_responses: list[UserResponse]) -> None:
+        """
+        Save several user questions and their AI responses with one bulk insert.
+
+        Args:
+            user_responses: UserResponse objects to store
+
+        Raises:
+            DatabaseError: If there's an error saving to the database
+        """
+
+    @abstractmethod
+    async def get_user_query_history(
+        self,
+        user_id: int,
+        limit: int = 10,
+        response_preview_chars: int | None = None,
+    ) -> list[UserQueryHistory]:
         """
         Retrieve the user's query history.
 
         Args:
             user_id: The ID of the user
+            limit: Maximum number of interactions to return (default: 10)
+            response_preview_chars: If set, truncate responses to this many characters
 
         Returns:
             List of UserQueryHistory objects representing the user's query history,
@@ -95,6 +262,31 @@ class AISupportInterface(ABC):
             DatabaseError: If there's an error accessing the database
         """
 
+    @abstractmethod
+    async def get_user_query_history_page(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: HistoryCursor | None = None,
+        response_preview_chars: int | None = None,
+    ) -> UserQueryHistoryPage:
+        """
+        Retrieve one page of the user's query history, most recent first.
+
+        Args:
+            user_id: The ID of the user
+            limit: Maximum number of interactions in the page (default: 20)
+            cursor: Position after which to continue, None for the first page
+            response_preview_chars: If set, truncate responses to this many characters
+
+        Returns:
+            UserQueryHistoryPage with the interactions and the cursor of the next
+            page (None if this is the last page)
+
+        Raises:
+            DatabaseError: If there's an error accessing the database
+        """
+
     @abstractmethod
     async def get_faq_document(self, document_id: int) -> FaqDocument | None:
         """
@@ -1,12 +1,62 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
 
-from src.types.documents import FaqDocument
+from src.application.interfaces.ai_support_interface import UserResponse
+from src.types.documents import (
+    CanonicalQuestionAnswer,
+    FaqDocument,
+)
 from src.types.user import User
 
 
+@dataclass
+class StagedDocument:
+    """FAQ document with everything generated for it, ready to be stored."""
+
+    content_hash: str
+    # Document with its summary and embedding
+    document: FaqDocument
+    # Canonical answers with the embeddings of their question and answer
+    canonical_answers: list[
+        tuple[CanonicalQuestionAnswer, Sequence[float], Sequence[float]]
+    ] = field(default_factory=list)
+
+
+@dataclass
+class IngestionCheckpoint:
+    """Progress of a document in a previous ingestion."""
+
+    content_hash: str
+    # ID in faq_documents once stored, None while only staged
+    document_id: int | None = None
+
+
 class DumpDataInterface(ABC):
     @abstractmethod
-    async def dump_faq_documents(self, faq_documents: list[FaqDocument]) -> None:
+    async def bulk_load_faq_documents(
+        self, faq_documents: Iterable[FaqDocument]
+    ) -> int:
+        pass
+
+    @abstractmethod
+    async def bulk_load_user_responses(
+        self, user_responses: Iterable[UserResponse]
+    ) -> int:
+        pass
+
+    @abstractmethod
+    async def get_ingestion_checkpoints(
+        self, content_hashes: list[str]
+    ) -> dict[str, IngestionCheckpoint]:
+        pass
+
+    @abstractmethod
+    async def stage_document(self, staged_document: StagedDocument) -> None:
+        pass
+
+    @abstractmethod
+    async def commit_staged_documents(self, content_hashes: list[str]) -> list[int]:
         pass
 
     @abstractmethod
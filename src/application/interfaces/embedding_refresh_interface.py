@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import Enum
+
+from src.types.embeddings import EmbeddingSlot
+
+
+class EmbeddedTable(str, Enum):
+    """Tables whose embeddings are stored in embedding slots."""
+
+    FAQ_DOCUMENTS = "faq_documents"
+    FAQ_CANONICAL_ANSWERS = "faq_canonical_answers"
+
+
+@dataclass
+class EmbeddingRefreshRow:
+    """Row whose embeddings are missing or outdated in a slot."""
+
+    id: int
+    # Texts embedded into the row's embedding columns, in column order
+    texts: list[str]
+
+
+class EmbeddingRefreshInterface(ABC):
+    @abstractmethod
+    async def prepare_slot(
+        self, model: str, min_retired_seconds: float
+    ) -> EmbeddingSlot:
+        pass
+
+    @abstractmethod
+    async def fetch_rows_to_refresh(
+        self,
+        table: EmbeddedTable,
+        slot: EmbeddingSlot,
+        model: str,
+        after_id: int,
+        limit: int,
+    ) -> list[EmbeddingRefreshRow]:
+        pass
+
+    @abstractmethod
+    async def save_refreshed_embeddings(
+        self,
+        table: EmbeddedTable,
+        slot: EmbeddingSlot,
+        model: str,
+        embeddings: dict[int, list[Sequence[float]]],
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def build_indexes(self, slot: EmbeddingSlot) -> None:
+        pass
+
+    @abstractmethod
+    async def activate_slot(self, slot: EmbeddingSlot, model: str) -> bool:
+        pass
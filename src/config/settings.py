@@ -4,6 +4,11 @@ from functools import lru_cache
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from src.types.ai_backend import AIBackend
+from src.types.documents import OversizedDocumentPolicy
+from src.types.embeddings import EmbeddingStorage
+from src.types.rate_limits import RateLimitBackend
+
 
 class Settings(BaseSettings):
     """
@@ -21,9 +26,245 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = Field(description="PostgreSQL password")
     POSTGRES_DB: str = Field(description="PostgreSQL database name")
     INIT_BASE_DATA: bool = Field(default=False, description="Initialize base data")
+    USER_RESPONSE_EMBEDDING_STORAGE: EmbeddingStorage = Field(
+        default=EmbeddingStorage.FULL,
+        description="Storage mode for user_response embeddings (full or halfvec)",
+    )
+    DB_CONNECTION_BUDGET: int = Field(
+        default=20,
+        ge=1,
+        description="Connections shared by all workers; each pool gets its share",
+    )
+    DB_POOL_MIN_SIZE: int = Field(
+        default=5, ge=0, description="Minimum connections kept open per worker pool"
+    )
+    USER_RESPONSE_PARTITIONS_AHEAD: int = Field(
+        default=3, description="Future monthly user_response partitions to keep created"
+    )
+    USER_RESPONSE_PARTITION_MAINTENANCE_SECONDS: float = Field(
+        default=3600.0,
+        gt=0.0,
+        description="Interval between checks of the future user_response partitions",
+    )
+    USER_RESPONSE_RETENTION_MONTHS: int = Field(
+        default=12, description="Months of user_response kept before archival"
+    )
+    USER_RESPONSE_ARCHIVE_DIR: str = Field(
+        default="archive/user_response",
+        description="Directory for archived user_response partitions",
+    )
+
+    # AI backend settings
+    AI_BACKEND: AIBackend = Field(
+        default=AIBackend.OPENAI,
+        description="AI generation backend (openai, or local for offline benchmarks)",
+    )
+    LOCAL_AI_EMBEDDING_LATENCY_MS: float = Field(
+        default=0.0, description="Artificial latency of local embedding calls"
+    )
+    LOCAL_AI_GENERATION_LATENCY_MS: float = Field(
+        default=0.0, description="Artificial latency of local generation calls"
+    )
+    LOCAL_AI_ERROR_RATE: float = Field(
+        default=0.0, ge=0.0, le=1.0, description="Fraction of local AI calls that fail"
+    )
+    LOCAL_AI_SEED: int | None = Field(
+        default=None, description="Seed for local error injection (unset: random)"
+    )
 
     # OpenAI settings
-    OPENAI_API_KEY: str = Field(description="OpenAI API key")
+    OPENAI_API_KEY: str = Field(
+        default="", description="OpenAI API key (required with the openai backend)"
+    )
+    OPENAI_CHAT_MODEL: str = Field(
+        default="gpt-4",
+        description="Chat model for answers (JSON mode is used when it supports it)",
+    )
+    OPENAI_REFORMAT_MODEL: str | None = Field(
+        default="gpt-4o-mini",
+        description="Cheap model reformatting unparseable outputs (unset disables it)",
+    )
+
+    # Embedding settings (the model is that of the active slot, see refresh_embeddings)
+    EMBEDDING_SLOTS_REFRESH_SECONDS: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Interval between reloads of the active embedding slot",
+    )
+    EMBEDDING_REFRESH_BATCH_SIZE: int = Field(
+        default=100,
+        ge=1,
+        le=2048,
+        description="Rows re-embedded per embeddings API call by refresh_embeddings",
+    )
+
+    # Prompt settings
+    PROMPT_CORPUS_MAX_TOKENS: int = Field(
+        default=4000,
+        ge=0,
+        description="Put all FAQ summaries in the cached prompt prefix when they fit in this many tokens (0 disables it)",
+    )
+    PROMPT_CORPUS_REFRESH_SECONDS: float = Field(
+        default=300.0, gt=0.0, description="Interval between prompt corpus reloads"
+    )
+
+    # Canonical answer settings
+    CANONICAL_QUESTIONS_PER_DOCUMENT: int = Field(
+        default=5,
+        description="Canonical question/answer pairs precomputed per FAQ document during ingestion",
+    )
+    INGESTION_CHUNK_SIZE: int = Field(
+        default=20,
+        ge=1,
+        description="FAQ documents stored in the live tables per transaction during ingestion",
+    )
+    INGESTION_MAX_CONCURRENCY: int = Field(
+        default=4,
+        ge=1,
+        description="FAQ documents generated concurrently during ingestion",
+    )
+    INGESTION_MAX_DOCUMENT_TOKENS: int = Field(
+        default=6000,
+        ge=100,
+        description="Largest FAQ document, in tokens, sent to the API during ingestion",
+    )
+    INGESTION_OVERSIZED_DOCUMENTS: OversizedDocumentPolicy = Field(
+        default=OversizedDocumentPolicy.SPLIT,
+        description="Whether larger FAQ documents are split or rejected (split or reject)",
+    )
+    CANONICAL_ANSWER_MAX_DISTANCE: float | None = Field(
+        default=0.08,
+        description="Maximum cosine distance to serve a canonical answer (unset disables lookups)",
+    )
+
+    # Batch search settings
+    BATCH_MAX_CONCURRENCY: int = Field(
+        default=8, description="Maximum concurrent generation calls per batch request"
+    )
+
+    # Conversation settings (follow-ups reuse the documents retrieved earlier)
+    CONVERSATION_MAX_CONVERSATIONS: int = Field(
+        default=10_000, ge=1, description="Maximum conversations kept per worker"
+    )
+    CONVERSATION_MAX_TURNS: int = Field(
+        default=3, ge=1, description="Previous turns included in follow-up prompts"
+    )
+    CONVERSATION_MAX_DOCUMENTS: int = Field(
+        default=8, ge=1, description="Maximum retrieved documents kept per conversation"
+    )
+    CONVERSATION_TTL_SECONDS: float = Field(
+        default=1800.0, gt=0.0, description="Idle time after which a conversation ends"
+    )
+    CONVERSATION_REUSE_MIN_SIMILARITY: float = Field(
+        default=0.85,
+        description="Minimum cosine similarity to the last retrieval for a follow-up to reuse its documents",
+    )
+
+    # AI budget settings (non-critical work is throttled near the limits)
+    AI_BUDGET_WINDOW_SECONDS: float = Field(
+        default=3600.0, description="Rolling window of the AI spend budget"
+    )
+    AI_BUDGET_MAX_COST_USD: float | None = Field(
+        default=None,
+        description="Estimated OpenAI spend allowed per window (unset: no limit)",
+    )
+    AI_BUDGET_MAX_TOKENS_PER_MINUTE: int | None = Field(
+        default=None,
+        description="OpenAI tokens-per-minute rate limit (unset: no limit)",
+    )
+    AI_BUDGET_THROTTLE_RATIO: float = Field(
+        default=0.8,
+        gt=0.0,
+        le=1.0,
+        description="Fraction of a limit at which recommendations and ingestion are throttled",
+    )
+
+    # Rate limiting settings of the AI endpoints (token buckets, in cost units)
+    RATE_LIMIT_ENABLED: bool = Field(
+        default=True,
+        description="Rate limit the AI search and recommendation endpoints",
+    )
+    RATE_LIMIT_BACKEND: RateLimitBackend = Field(
+        default=RateLimitBackend.MEMORY,
+        description="Store of the token buckets (memory or postgres)",
+    )
+    RATE_LIMIT_USER_CAPACITY: float = Field(
+        default=20.0, gt=0.0, description="Burst of cost units allowed per user"
+    )
+    RATE_LIMIT_USER_REFILL_PER_SECOND: float = Field(
+        default=0.2, gt=0.0, description="Cost units a user regains per second"
+    )
+    RATE_LIMIT_ENDPOINT_CAPACITY: float = Field(
+        default=200.0, gt=0.0, description="Burst of cost units allowed per endpoint"
+    )
+    RATE_LIMIT_ENDPOINT_REFILL_PER_SECOND: float = Field(
+        default=5.0, gt=0.0, description="Cost units an endpoint regains per second"
+    )
+    RATE_LIMIT_REQUEST_COST: float = Field(
+        default=1.0, gt=0.0, description="Cost units taken to admit a request"
+    )
+    RATE_LIMIT_GENERATION_COST: float = Field(
+        default=4.0,
+        ge=0.0,
+        description="Cost units charged per chat completion made for a request",
+    )
+    RATE_LIMIT_MAX_BUCKETS: int = Field(
+        default=100_000, ge=1, description="Buckets kept per worker by the memory store"
+    )
+
+    # Tracing settings
+    TRACING_ENABLED: bool = Field(default=False, description="Enable request tracing")
+    TRACING_EXPORT_PATH: str | None = Field(
+        default="traces/spans.jsonl",
+        description="JSONL file spans are exported to (suffixed with the process id)",
+    )
+    TRACING_OTLP_ENDPOINT: str | None = Field(
+        default=None, description="OTLP/HTTP collector base URL spans are sent to"
+    )
+    TRACING_SAMPLE_RATE: float = Field(
+        default=1.0, ge=0.0, le=1.0, description="Fraction of traces exported"
+    )
+    TRACING_SLOW_REQUEST_MS: float | None = Field(
+        default=5000.0,
+        description="Requests slower than this log their full span tree (unset disables)",
+    )
+    TRACING_SLOW_REQUEST_SAMPLE_RATE: float = Field(
+        default=1.0, ge=0.0, le=1.0, description="Fraction of slow requests logged"
+    )
+
+    # Admin and profiling settings
+    ADMIN_TOKEN: str | None = Field(
+        default=None,
+        description="Token required by the /admin endpoints (unset disables them)",
+    )
+    EVENT_LOOP_MONITOR_ENABLED: bool = Field(
+        default=True, description="Measure event loop lag and report blocking steps"
+    )
+    EVENT_LOOP_STALL_THRESHOLD_MS: float = Field(
+        default=250.0,
+        description="Log the loop thread's stack when a step blocks longer than this",
+    )
+
+    # Deployment settings
+    APP_WORKERS: int = Field(
+        default=1, ge=1, description="Number of uvicorn worker processes"
+    )
+    PROMETHEUS_MULTIPROC_DIR: str = Field(
+        default=".prometheus_multiproc",
+        description="Directory for Prometheus metrics shared by multiple workers",
+    )
+    SHARED_CACHE_PATH: str | None = Field(
+        default=None,
+        description="SQLite file of the cache shared by all workers (unset disables it)",
+    )
+    SHARED_CACHE_MAX_ENTRIES: int = Field(
+        default=100_000, ge=1, description="Maximum entries kept in the shared cache"
+    )
+    ANSWER_CACHE_TTL_SECONDS: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="How long generated answers are reused (0 caches embeddings only)",
+    )
 
     # Optional settings with defaults
     DEBUG: bool = Field(default=False, description="Debug mode")
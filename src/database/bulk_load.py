@@ -0,0 +1,79 @@
+"""
+Bulk loading through COPY into a temporary staging table.
+
+Records are streamed from an iterable in batches: each batch is sent with the
+binary COPY protocol into a staging table, then merged into the target with one
+set-based statement, and the staging table is emptied again. Only one batch is
+held in memory at a time, whatever the number of records, and the values never
+go through the text formatting of array parameters.
+
+COPY needs a binary codec for every column type, so vector columns require the
+codecs of src.database.vector_codecs, which the pool registers.
+"""
+
+import itertools
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+
+from asyncpg import Connection
+
+BULK_LOAD_BATCH_SIZE = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class StagingTable:
+    """Temporary table records are copied into before being merged."""
+
+    name: str
+    # Column names and their SQL types, in the order of the record values
+    columns: dict[str, str]
+
+    @property
+    def definition(self) -> str:
+        return ", ".join(f"{name} {type_}" for name, type_ in self.columns.items())
+
+
+async def copy_and_merge(
+    conn: Connection,
+    staging: StagingTable,
+    records: Iterable[tuple[object, ...]],
+    merge: Callable[[], Awaitable[object]],
+    batch_size: int = BULK_LOAD_BATCH_SIZE,
+) -> int:
+    """
+    Load records into a table through a staging table, one batch at a time.
+
+    Runs in a transaction (a savepoint within the caller's), so either every
+    record is merged or none is.
+
+    Args:
+        conn: The database connection to use.
+        staging: Staging table the records are copied into.
+        records: Record tuples, read lazily, with values in column order.
+        merge: Merges the rows of the staging table into the target.
+        batch_size: Records copied and merged per batch.
+
+    Returns:
+        The number of records loaded.
+    """
+    loaded = 0
+    rows = iter(records)
+    async with conn.transaction():
+        await conn.execute(
+            f"CREATE TEMPORARY TABLE {staging.name} ({staging.definition}) ON COMMIT DROP"
+        )
+        while batch := list(itertools.islice(rows, batch_size)):
+            await conn.copy_records_to_table(
+                staging.name, records=batch, columns=list(staging.columns)
+            )
+            await merge()
+            await conn.execute(f"TRUNCATE {staging.name}")
+            loaded += len(batch)
+            logger.debug(f"Loaded {loaded} records through {staging.name}")
+        # Dropped now rather than on commit, so that the caller's transaction
+        # can load through the same staging table again
+        await conn.execute(f"DROP TABLE {staging.name}")
+    return loaded
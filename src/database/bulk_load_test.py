@@ -0,0 +1,68 @@
+from collections.abc import Iterator
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.database.bulk_load import StagingTable, copy_and_merge
+
+STAGING = StagingTable(name="items_staging", columns={"id": "INTEGER", "name": "TEXT"})
+
+
+@pytest.mark.asyncio
+async def test_copy_and_merge_streams_batches() -> None:
+    """Test records are copied and merged one batch at a time from a generator."""
+    # Arrange
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    merge = AsyncMock()
+    pulled: list[int] = []
+
+    def records() -> Iterator[tuple[int, str]]:
+        for index in range(5):
+            pulled.append(index)
+            yield (index, f"item {index}")
+
+    batches: list[list[tuple[object, ...]]] = []
+
+    async def copy_records_to_table(
+        _: str, records: list[tuple[object, ...]], **__: object
+    ) -> None:
+        # Only the batch being copied has been read from the generator
+        assert len(pulled) == sum(map(len, batches)) + len(records)
+        batches.append(records)
+
+    conn.copy_records_to_table.side_effect = copy_records_to_table
+
+    # Act
+    loaded = await copy_and_merge(conn, STAGING, records(), merge, batch_size=2)
+
+    # Assert
+    assert loaded == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert merge.await_count == 3
+    conn.copy_records_to_table.assert_called_with(
+        "items_staging", records=[(4, "item 4")], columns=["id", "name"]
+    )
+    statements = [call.args[0] for call in conn.execute.call_args_list]
+    assert statements[0] == (
+        "CREATE TEMPORARY TABLE items_staging (id INTEGER, name TEXT) ON COMMIT DROP"
+    )
+    assert statements.count("TRUNCATE items_staging") == 3
+    assert statements[-1] == "DROP TABLE items_staging"
+
+
+@pytest.mark.asyncio
+async def test_copy_and_merge_without_records() -> None:
+    """Test nothing is copied or merged when there are no records."""
+    # Arrange
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    merge = AsyncMock()
+
+    # Act
+    loaded = await copy_and_merge(conn, STAGING, iter([]), merge)
+
+    # Assert
+    assert loaded == 0
+    conn.copy_records_to_table.assert_not_called()
+    merge.assert_not_called()
@@ -4,11 +4,25 @@ from contextlib import asynccontextmanager
 from asyncpg import Connection, Pool, create_pool
 
 from src.config.settings import get_settings
+from src.database.vector_codecs import register_vector_codecs
+from src.infrastructure.tracing import span
 
 pool_singleton: dict[str, Pool] = {}
 DEFAULT_CONNECTION_NAME: str = "default_connection"
 
 
+def get_pool_size() -> tuple[int, int]:
+    """
+    Get the (min_size, max_size) of this worker's connection pool.
+
+    Every worker gets an equal share of DB_CONNECTION_BUDGET, so adding workers
+    never exceeds the connections the database was sized for.
+    """
+    settings = get_settings()
+    max_size = max(1, settings.DB_CONNECTION_BUDGET // settings.APP_WORKERS)
+    return min(settings.DB_POOL_MIN_SIZE, max_size), max_size
+
+
 async def get_pool(connection_name: str = DEFAULT_CONNECTION_NAME) -> Pool:
     """
     Get or create the database connection pool.
@@ -17,14 +31,16 @@ async def get_pool(connection_name: str = DEFAULT_CONNECTION_NAME) -> Pool:
     pool = pool_singleton.get(connection_name)
     if pool is None:
         settings = get_settings()
+        min_size, max_size = get_pool_size()
         pool = await create_pool(
             host=settings.POSTGRES_HOST,
             port=settings.POSTGRES_PORT,
             user=settings.POSTGRES_USER,
             password=settings.POSTGRES_PASSWORD,
             database=settings.POSTGRES_DB,
-            min_size=5,
-            max_size=20,
+            min_size=min_size,
+            max_size=max_size,
+            init=register_vector_codecs,
         )
         pool_singleton[connection_name] = pool
     return pool
@@ -37,8 +53,12 @@ async def get_connection() -> AsyncGenerator[Connection, None]:
     This is a context manager that will automatically release the connection back to the pool.
     """
     pool = await get_pool()
-    async with pool.acquire() as connection:
+    with span("db.pool_acquire"):
+        connection = await pool.acquire()
+    try:
         yield connection
+    finally:
+        await pool.release(connection)
 
 
 async def close_pool(connection_name: str = DEFAULT_CONNECTION_NAME) -> None:
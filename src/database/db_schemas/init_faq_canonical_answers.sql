@@ -0,0 +1,33 @@
+-- Create faq_canonical_answers table
+CREATE TABLE IF NOT EXISTS platform_information.faq_canonical_answers (
+    id SERIAL PRIMARY KEY,
+    faq_document_id INTEGER NOT NULL REFERENCES platform_information.faq_documents(id) ON DELETE CASCADE,
+    question TEXT NOT NULL,
+    question_embedding vector(1536) NOT NULL,  -- OpenAI embeddings are 1536 dimensions
+    answer TEXT NOT NULL,
+    answer_embedding vector(1536),  -- OpenAI embeddings are 1536 dimensions
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for faster lookups
+CREATE INDEX IF NOT EXISTS idx_faq_canonical_answers_faq_document_id ON platform_information.faq_canonical_answers(faq_document_id);
+-- HNSW instead of ivfflat: the table is small and filled after creation, so ivfflat lists would be built empty
+CREATE INDEX IF NOT EXISTS idx_faq_canonical_answers_question_embedding ON platform_information.faq_canonical_answers USING hnsw (question_embedding vector_cosine_ops);
+
+-- Add comments to table and columns
+COMMENT ON TABLE platform_information.faq_canonical_answers IS 'Stores vetted canonical question/answer pairs generated offline from FAQ documents';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.id IS 'Unique identifier for the canonical answer';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.faq_document_id IS 'Reference to the FAQ document the answer was generated from';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.question IS 'Canonical form of a common user question';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.question_embedding IS 'Vector embedding of the canonical question for near-duplicate matching';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.answer IS 'Vetted answer returned when a user question matches the canonical question';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.answer_embedding IS 'Vector embedding of the answer, stored with user interactions served from this row';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.created_at IS 'Timestamp when the canonical answer was created';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.updated_at IS 'Timestamp when the canonical answer was last updated';
+
+-- Create trigger for updated_at
+CREATE TRIGGER update_faq_canonical_answers_updated_at
+    BEFORE UPDATE ON platform_information.faq_canonical_answers
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
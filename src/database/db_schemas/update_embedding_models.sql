@@ -0,0 +1,56 @@
+-- Record the model of stored embeddings, and add a secondary embedding slot to the FAQ tables
+-- Embeddings of a new model are backfilled into the inactive slot while searches keep using the
+-- active one, which is then switched in a single transaction (see refresh_embeddings.py)
+
+-- Slots of the FAQ tables and the model their embeddings are generated with; exactly one is active
+CREATE TABLE IF NOT EXISTS platform_information.embedding_slots (
+    slot VARCHAR(20) PRIMARY KEY CHECK (slot IN ('primary', 'secondary')),
+    model VARCHAR(100),
+    active BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO platform_information.embedding_slots (slot, model, active)
+VALUES ('primary', 'text-embedding-3-small', true), ('secondary', NULL, false)
+ON CONFLICT (slot) DO NOTHING;
+
+ALTER TABLE platform_information.faq_documents
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS embedding_secondary vector(1536),
+    ADD COLUMN IF NOT EXISTS embedding_model_secondary VARCHAR(100);
+
+UPDATE platform_information.faq_documents
+SET embedding_model = 'text-embedding-3-small'
+WHERE embedding IS NOT NULL AND embedding_model IS NULL;
+
+-- Rows written while the secondary slot is active have no primary embeddings
+ALTER TABLE platform_information.faq_canonical_answers
+    ALTER COLUMN question_embedding DROP NOT NULL,
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100),
+    ADD COLUMN IF NOT EXISTS question_embedding_secondary vector(1536),
+    ADD COLUMN IF NOT EXISTS answer_embedding_secondary vector(1536),
+    ADD COLUMN IF NOT EXISTS embedding_model_secondary VARCHAR(100);
+
+UPDATE platform_information.faq_canonical_answers
+SET embedding_model = 'text-embedding-3-small'
+WHERE embedding_model IS NULL;
+
+-- Adding a column with a constant default only updates the catalog, not every partition's rows;
+-- dropping the default afterwards keeps it for the existing rows
+ALTER TABLE user_management.user_response
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100) DEFAULT 'text-embedding-3-small';
+ALTER TABLE user_management.user_response ALTER COLUMN embedding_model DROP DEFAULT;
+
+-- Indexes of the secondary slot are built concurrently once it is backfilled
+
+-- Add comments to table and columns
+COMMENT ON TABLE platform_information.embedding_slots IS 'Embedding slots of the FAQ tables; searches use the active one';
+COMMENT ON COLUMN platform_information.embedding_slots.model IS 'Model the embeddings of the slot are generated with';
+COMMENT ON COLUMN platform_information.faq_documents.embedding_model IS 'Model that generated embedding';
+COMMENT ON COLUMN platform_information.faq_documents.embedding_secondary IS 'Vector embedding of the secondary slot';
+COMMENT ON COLUMN platform_information.faq_documents.embedding_model_secondary IS 'Model that generated embedding_secondary';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.embedding_model IS 'Model that generated question_embedding and answer_embedding';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.question_embedding_secondary IS 'Vector embedding of the canonical question in the secondary slot';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.answer_embedding_secondary IS 'Vector embedding of the answer in the secondary slot';
+COMMENT ON COLUMN platform_information.faq_canonical_answers.embedding_model_secondary IS 'Model that generated the secondary embeddings';
+COMMENT ON COLUMN user_management.user_response.embedding_model IS 'Model that generated question_embedding and response_embedding';
@@ -0,0 +1,32 @@
+-- Staging tables checkpointing ingestion: each document is staged with its summary, embedding and
+-- canonical answers as soon as they are generated, and moved to the live tables chunk by chunk.
+-- A failed ingestion resumes from the staged documents instead of generating them again.
+CREATE TABLE IF NOT EXISTS platform_information.faq_ingestion_documents (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    link VARCHAR(512) NOT NULL,
+    text TEXT NOT NULL,
+    llm_summary TEXT NOT NULL,
+    category platform_information.faq_category NOT NULL,
+    embedding vector(1536) NOT NULL,
+    embedding_model VARCHAR(100) NOT NULL,
+    document_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS platform_information.faq_ingestion_canonical_answers (
+    content_hash VARCHAR(64) NOT NULL REFERENCES platform_information.faq_ingestion_documents(content_hash) ON DELETE CASCADE,
+    position SMALLINT NOT NULL,
+    question TEXT NOT NULL,
+    question_embedding vector(1536) NOT NULL,
+    answer TEXT NOT NULL,
+    answer_embedding vector(1536) NOT NULL,
+    PRIMARY KEY (content_hash, position)
+);
+
+-- Add comments to tables and columns
+COMMENT ON TABLE platform_information.faq_ingestion_documents IS 'FAQ documents generated by ingestion, staged until they are stored in faq_documents';
+COMMENT ON COLUMN platform_information.faq_ingestion_documents.content_hash IS 'SHA-256 of the title, link, category and text of the source document';
+COMMENT ON COLUMN platform_information.faq_ingestion_documents.embedding_model IS 'Model that generated the staged embeddings';
+COMMENT ON COLUMN platform_information.faq_ingestion_documents.document_id IS 'ID of the document in faq_documents once stored (NULL while staged)';
+COMMENT ON TABLE platform_information.faq_ingestion_canonical_answers IS 'Canonical answers generated for staged documents, stored with them';
@@ -0,0 +1,14 @@
+-- Token buckets of the AI endpoints rate limiter, shared by all workers when RATE_LIMIT_BACKEND=postgres.
+-- Unlogged: the buckets are refilled continuously, so losing them on a crash only resets the limits.
+CREATE UNLOGGED TABLE IF NOT EXISTS platform_information.rate_limit_buckets (
+    key VARCHAR(255) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    capacity DOUBLE PRECISION NOT NULL,
+    refill_per_second DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add comments to tables and columns
+COMMENT ON TABLE platform_information.rate_limit_buckets IS 'Token buckets of the rate limiter; rows of idle keys are full buckets and can be deleted at any time';
+COMMENT ON COLUMN platform_information.rate_limit_buckets.key IS 'Bucket key, user:<user_id> or endpoint:<endpoint>';
+COMMENT ON COLUMN platform_information.rate_limit_buckets.tokens IS 'Tokens left at updated_at, negative while requests charged after admission are paid back';
@@ -0,0 +1,3 @@
+-- Nothing searches user_response by similarity, so the binary-quantized index of the halfvec columns was only
+-- maintained on every insert. Dropping it on the parent drops it on every partition
+DROP INDEX IF EXISTS user_management.idx_user_response_question_embedding_binary;
@@ -0,0 +1,12 @@
+-- Compact embedding storage for user_response, used when USER_RESPONSE_EMBEDDING_STORAGE=halfvec
+-- halfvec stores 2 bytes per dimension instead of 4 (~6 KB per row instead of ~12 KB)
+ALTER TABLE user_management.user_response
+    ADD COLUMN IF NOT EXISTS question_embedding_half halfvec(1536),
+    ADD COLUMN IF NOT EXISTS response_embedding_half halfvec(1536);
+
+-- Rows written in full-precision mode are converted by init_db only when halfvec storage is enabled
+-- (UserResponseEmbeddings.backfill_halfvec), so full-precision deployments never pay for the columns
+
+-- Add comments to columns
+COMMENT ON COLUMN user_management.user_response.question_embedding_half IS 'Half-precision embedding of the user question (halfvec storage mode)';
+COMMENT ON COLUMN user_management.user_response.response_embedding_half IS 'Half-precision embedding of the AI response (halfvec storage mode)';
@@ -0,0 +1,8 @@
+-- Index for keyset pagination of a user's history on (created_at, id)
+-- id breaks ties between rows sharing a created_at, so every cursor position is unique.
+-- It covers the filter, sort and cursor columns; the text columns are read from the heap for
+-- the page rows only (INCLUDE-ing them would exceed the btree tuple size limit for long responses).
+CREATE INDEX IF NOT EXISTS idx_user_response_user_history ON user_management.user_response(user_id, created_at DESC, id DESC);
+
+-- Superseded by idx_user_response_user_history
+DROP INDEX IF EXISTS user_management.idx_user_response_user_id_created_at;
@@ -0,0 +1,47 @@
+-- Creating a monthly partition fails while the default partition holds rows of that month, which happens
+-- once inserts outlive the partitions created ahead. Such rows are now moved into the new partition, in the
+-- transaction of the statement creating it. Creations are serialized, as every worker runs them periodically.
+CREATE OR REPLACE FUNCTION user_management.create_user_response_partition(partition_date DATE)
+RETURNS TEXT AS $$
+DECLARE
+    range_start DATE := date_trunc('month', partition_date)::DATE;
+    range_end DATE := (date_trunc('month', partition_date) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'user_response_' || to_char(range_start, 'YYYY_MM');
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('user_management.create_user_response_partition'));
+
+    IF to_regclass(format('user_management.%I', partition_name)) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF EXISTS (
+        SELECT 1 FROM user_management.user_response_default
+        WHERE created_at >= range_start AND created_at < range_end
+    ) THEN
+        CREATE TEMPORARY TABLE user_response_default_rows
+            (LIKE user_management.user_response) ON COMMIT DROP;
+        WITH moved AS (
+            DELETE FROM user_management.user_response_default
+            WHERE created_at >= range_start AND created_at < range_end
+            RETURNING *
+        )
+        INSERT INTO user_response_default_rows SELECT * FROM moved;
+
+        EXECUTE format(
+            'CREATE TABLE user_management.%I PARTITION OF user_management.user_response FOR VALUES FROM (%L) TO (%L)',
+            partition_name, range_start, range_end
+        );
+        INSERT INTO user_management.user_response SELECT * FROM user_response_default_rows;
+        DROP TABLE user_response_default_rows;
+        RAISE NOTICE 'Moved rows of % out of the default user_response partition', partition_name;
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE user_management.%I PARTITION OF user_management.user_response FOR VALUES FROM (%L) TO (%L)',
+            partition_name, range_start, range_end
+        );
+    END IF;
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+COMMENT ON FUNCTION user_management.create_user_response_partition(DATE) IS 'Creates the monthly user_response partition containing the given date, moving its rows out of the default partition';
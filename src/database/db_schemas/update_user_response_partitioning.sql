@@ -0,0 +1,103 @@
+-- Range-partition user_response by created_at into monthly partitions
+
+-- Keep the existing table aside; its rows are copied into the partitioned table below
+ALTER TABLE user_management.user_response RENAME TO user_response_unpartitioned;
+ALTER TABLE user_management.user_response_unpartitioned RENAME CONSTRAINT user_response_pkey TO user_response_unpartitioned_pkey;
+ALTER TABLE user_management.user_response_unpartitioned RENAME CONSTRAINT user_response_user_id_fkey TO user_response_unpartitioned_user_id_fkey;
+DROP INDEX IF EXISTS user_management.idx_user_response_user_id;
+DROP INDEX IF EXISTS user_management.idx_user_response_question_embedding;
+DROP INDEX IF EXISTS user_management.idx_user_response_response_embedding;
+DROP INDEX IF EXISTS user_management.idx_user_response_question_embedding_binary;
+
+-- Create partitioned user_response table (the partition key must be part of the primary key)
+CREATE TABLE user_management.user_response (
+    id INTEGER NOT NULL DEFAULT nextval('user_management.user_response_id_seq'),
+    user_id INTEGER NOT NULL REFERENCES user_management.user(id),
+    user_question TEXT NOT NULL,
+    question_embedding vector(1536),  -- OpenAI embeddings are 1536 dimensions
+    response TEXT NOT NULL,
+    response_embedding vector(1536),  -- OpenAI embeddings are 1536 dimensions
+    question_embedding_half halfvec(1536),
+    response_embedding_half halfvec(1536),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE user_management.user_response_id_seq OWNED BY user_management.user_response.id;
+
+-- Rows outside every monthly partition land here; it stays empty while future partitions exist
+CREATE TABLE IF NOT EXISTS user_management.user_response_default
+    PARTITION OF user_management.user_response DEFAULT;
+
+-- Create function that creates the monthly partition containing a date
+CREATE OR REPLACE FUNCTION user_management.create_user_response_partition(partition_date DATE)
+RETURNS TEXT AS $$
+DECLARE
+    range_start DATE := date_trunc('month', partition_date)::DATE;
+    range_end DATE := (date_trunc('month', partition_date) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := 'user_response_' || to_char(range_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS user_management.%I PARTITION OF user_management.user_response FOR VALUES FROM (%L) TO (%L)',
+        partition_name, range_start, range_end
+    );
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
+
+-- Create partitions covering the existing rows and the next months
+DO $$
+DECLARE
+    partition_month DATE := date_trunc(
+        'month',
+        COALESCE(
+            (SELECT min(created_at) FROM user_management.user_response_unpartitioned),
+            CURRENT_TIMESTAMP
+        )
+    )::DATE;
+BEGIN
+    WHILE partition_month <= (date_trunc('month', CURRENT_TIMESTAMP) + INTERVAL '3 months')::DATE LOOP
+        PERFORM user_management.create_user_response_partition(partition_month);
+        partition_month := (partition_month + INTERVAL '1 month')::DATE;
+    END LOOP;
+END $$;
+
+-- Copy existing rows and drop the old table
+INSERT INTO user_management.user_response
+(id, user_id, user_question, question_embedding, response, response_embedding,
+ question_embedding_half, response_embedding_half, created_at, updated_at)
+SELECT id, user_id, user_question, question_embedding, response, response_embedding,
+       question_embedding_half, response_embedding_half,
+       COALESCE(created_at, CURRENT_TIMESTAMP), updated_at
+FROM user_management.user_response_unpartitioned;
+
+DROP TABLE user_management.user_response_unpartitioned;
+
+-- Create indexes (created on every partition, present and future)
+-- The history lookup reads the latest rows per user, so user_id is paired with created_at
+CREATE INDEX IF NOT EXISTS idx_user_response_user_id_created_at ON user_management.user_response(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_user_response_question_embedding ON user_management.user_response USING ivfflat (question_embedding vector_cosine_ops)
+    WITH (lists = 100);  -- Adjust lists based on your data size
+CREATE INDEX IF NOT EXISTS idx_user_response_response_embedding ON user_management.user_response USING ivfflat (response_embedding vector_cosine_ops)
+    WITH (lists = 100);  -- Adjust lists based on your data size
+
+-- Add comments to table and function
+COMMENT ON TABLE user_management.user_response IS 'Stores user questions and AI responses with their vector embeddings, partitioned by month of created_at';
+COMMENT ON COLUMN user_management.user_response.id IS 'Unique identifier for the user response record';
+COMMENT ON COLUMN user_management.user_response.user_id IS 'Reference to the user who asked the question';
+COMMENT ON COLUMN user_management.user_response.user_question IS 'The question asked by the user';
+COMMENT ON COLUMN user_management.user_response.question_embedding IS 'Vector embedding of the user question for semantic search';
+COMMENT ON COLUMN user_management.user_response.response IS 'The AI-generated response';
+COMMENT ON COLUMN user_management.user_response.response_embedding IS 'Vector embedding of the AI response for semantic search';
+COMMENT ON COLUMN user_management.user_response.question_embedding_half IS 'Half-precision embedding of the user question (halfvec storage mode)';
+COMMENT ON COLUMN user_management.user_response.response_embedding_half IS 'Half-precision embedding of the AI response (halfvec storage mode)';
+COMMENT ON COLUMN user_management.user_response.created_at IS 'Timestamp when the record was created (partition key)';
+COMMENT ON COLUMN user_management.user_response.updated_at IS 'Timestamp when the record was last updated';
+COMMENT ON FUNCTION user_management.create_user_response_partition(DATE) IS 'Creates the monthly user_response partition containing the given date';
+
+-- Create trigger for updated_at
+CREATE TRIGGER update_user_response_updated_at
+    BEFORE UPDATE ON user_management.user_response
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
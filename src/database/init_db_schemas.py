@@ -8,6 +8,15 @@ SCHEMA_FILES = [
     "init_user.sql",
     "init_faq_documents.sql",
     "init_user_response.sql",
+    "init_faq_canonical_answers.sql",
+    "update_user_response_halfvec.sql",
+    "update_user_response_partitioning.sql",
+    "update_user_response_history_index.sql",
+    "update_embedding_models.sql",
+    "update_faq_ingestion_staging.sql",
+    "update_rate_limit_buckets.sql",
+    "update_user_response_partition_default_rows.sql",
+    "update_user_response_drop_binary_index.sql",
     # Add more schema files here in the order they should be executed
 ]
 
@@ -1,8 +1,12 @@
 import asyncio
 import logging
 
+from src.config.settings import get_settings
 from src.database.connection import get_connection
 from src.database.updates_store import UpdatesStore
+from src.database.user_response_embeddings import UserResponseEmbeddings
+from src.database.user_response_partitions import UserResponsePartitions
+from src.types.embeddings import EmbeddingStorage
 
 # Setup logging
 logging.basicConfig(
@@ -18,6 +22,13 @@ async def init_db() -> None:
         async with get_connection() as conn:
             # Get database connection            # Run updates
             await UpdatesStore.run_updates(conn)
+            settings = get_settings()
+            await UserResponsePartitions.ensure_future_partitions(
+                conn, months_ahead=settings.USER_RESPONSE_PARTITIONS_AHEAD
+            )
+            # Converts the rows written before halfvec storage was enabled
+            if settings.USER_RESPONSE_EMBEDDING_STORAGE == EmbeddingStorage.HALFVEC:
+                await UserResponseEmbeddings.backfill_halfvec(conn)
         logger.info("Database initialization completed successfully!")
 
     except Exception as e:
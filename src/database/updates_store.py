@@ -1,4 +1,8 @@
+import asyncio
 import logging
+import re
+import time
+from dataclasses import dataclass
 from pathlib import Path
 
 from asyncpg import Connection
@@ -7,6 +11,98 @@ from src.database.init_db_schemas import get_schema_paths
 
 logger = logging.getLogger(__name__)
 
+# Held while updates run, so that replicas starting together apply them once
+UPDATES_LOCK_ID = 4_815_162_342
+
+# Header line of update files that cannot run in a transaction, e.g. for
+# CREATE INDEX CONCURRENTLY
+NO_TRANSACTION_DIRECTIVE = "-- no-transaction"
+
+# Opening of a dollar-quoted string: $$ or $tag$
+DOLLAR_QUOTE_PATTERN = re.compile(r"\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$")
+
+
+@dataclass(frozen=True, slots=True)
+class Update:
+    """Schema update file."""
+
+    update_file: str
+    sql: str
+    # Whether the statements run one by one outside a transaction
+    no_transaction: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class AppliedUpdate:
+    """Schema update applied by a run, with how long it took."""
+
+    update_file: str
+    seconds: float
+
+
+def _is_escape_string(sql: str, quote: int) -> bool:
+    """Whether the quote at index quote opens an E'...' string."""
+    return (
+        quote > 0
+        and sql[quote - 1] in "eE"
+        and (quote == 1 or not (sql[quote - 2].isalnum() or sql[quote - 2] == "_"))
+    )
+
+
+def _escape_string_end(sql: str, start: int) -> int:
+    """Index after the closing quote of an E'...' string whose body starts at start."""
+    index = start
+    while index < len(sql):
+        if sql[index] == "\\":
+            index += 2
+        elif sql[index] == "'":
+            return index + 1
+        else:
+            index += 1
+    return len(sql)
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a SQL script into its statements.
+
+    Semicolons inside quotes (including backslash escapes of E'...' strings),
+    dollar-quoted bodies and comments do not end a statement.
+    """
+    statements: list[str] = []
+    start = index = 0
+    while index < len(sql):
+        char = sql[index]
+        if sql.startswith("--", index):
+            end = sql.find("\n", index)
+            index = len(sql) if end == -1 else end
+        elif sql.startswith("/*", index):
+            end = sql.find("*/", index + 2)
+            index = len(sql) if end == -1 else end + 2
+        elif char == "'" and _is_escape_string(sql, index):
+            index = _escape_string_end(sql, index + 1)
+        elif char in "'\"":
+            end = sql.find(char, index + 1)
+            index = len(sql) if end == -1 else end + 1
+        elif char == "$" and (tag := DOLLAR_QUOTE_PATTERN.match(sql, index)):
+            end = sql.find(tag.group(), tag.end())
+            index = len(sql) if end == -1 else end + len(tag.group())
+        elif char == ";":
+            statements.append(sql[start:index].strip())
+            start = index = index + 1
+        else:
+            index += 1
+    statements.append(sql[start:].strip())
+    # Drop empty statements and ones made only of comments
+    return [
+        statement
+        for statement in statements
+        if any(
+            line.strip() and not line.strip().startswith("--")
+            for line in statement.splitlines()
+        )
+    ]
+
 
 class UpdatesStore:
     @staticmethod
@@ -17,49 +113,106 @@ class UpdatesStore:
                 update_file VARCHAR PRIMARY KEY,
                 applied_at TIMESTAMP NOT NULL DEFAULT NOW()
             );
+            ALTER TABLE updates ADD COLUMN IF NOT EXISTS duration_ms INTEGER;
         """)
         logger.info("Updates table initialized")
 
     @staticmethod
-    async def exists(conn: Connection, update_file: str) -> bool:
-        """Check if an update has already been applied."""
-        result = await conn.fetchval(
-            "SELECT EXISTS(SELECT 1 FROM updates WHERE update_file = $1)", update_file
-        )
-        return bool(result)
+    async def applied(conn: Connection) -> set[str]:
+        """Get the updates already applied."""
+        records = await conn.fetch("SELECT update_file FROM updates")
+        return {record["update_file"] for record in records}
 
     @staticmethod
-    async def add(conn: Connection, update_file: str) -> None:
+    async def add(conn: Connection, update_file: str, seconds: float) -> None:
         """Mark an update as applied."""
-        await conn.execute("INSERT INTO updates (update_file) VALUES ($1)", update_file)
+        await conn.execute(
+            "INSERT INTO updates (update_file, duration_ms) VALUES ($1, $2)",
+            update_file,
+            round(seconds * 1000),
+        )
 
     @staticmethod
-    def load_update(update_path: Path) -> str:
+    def load_update(update_path: Path) -> Update:
         """Load SQL content from an update file."""
         with open(update_path) as f:
-            return f.read().strip()
+            sql = f.read().strip()
+        header = sql.split("\n", 1)[0].strip().lower()
+        return Update(
+            update_file=update_path.name,
+            sql=sql,
+            no_transaction=header == NO_TRANSACTION_DIRECTIVE,
+        )
 
     @staticmethod
-    async def run_updates(conn: Connection) -> None:
-        """Run all pending database updates."""
-        # Initialize updates table
-        await UpdatesStore.init(conn)
-
-        # Get schema paths
-        schema_paths = get_schema_paths()
+    async def apply(conn: Connection, update: Update) -> AppliedUpdate:
+        """
+        Apply an update and mark it as applied.
 
-        # Apply updates
-        for schema_path in schema_paths:
-            update_file = schema_path.name
+        Updates run in a transaction with their marking, unless flagged with
+        NO_TRANSACTION_DIRECTIVE: their statements then run one by one, as
+        PostgreSQL runs a multi-statement query in a transaction too. Such an
+        update is marked once all its statements succeeded, so it must be safe
+        to run again after a failure (e.g. drop an index left invalid by a failed
+        CREATE INDEX CONCURRENTLY before creating it again).
+        """
+        start = time.perf_counter()
+        if update.no_transaction:
+            for statement in split_statements(update.sql):
+                await conn.execute(statement)
+            await UpdatesStore.add(
+                conn, update.update_file, time.perf_counter() - start
+            )
+        else:
             async with conn.transaction():
-                if await UpdatesStore.exists(conn, update_file):
-                    logger.info(f"Update already applied: {update_file}")
-                    continue
+                if update.sql:
+                    await conn.execute(update.sql)
+                await UpdatesStore.add(
+                    conn, update.update_file, time.perf_counter() - start
+                )
+        return AppliedUpdate(update.update_file, time.perf_counter() - start)
+
+    @staticmethod
+    async def run_updates(conn: Connection) -> list[AppliedUpdate]:
+        """
+        Run all pending database updates.
+
+        Returns:
+            The updates applied by this run, in order, with their duration.
+        """
+        # Replicas starting at the same time wait here for the first one, then
+        # find its updates applied
+        await conn.execute("SELECT pg_advisory_lock($1)", UPDATES_LOCK_ID)
+        try:
+            # Initialize updates table
+            await UpdatesStore.init(conn)
+
+            applied = await UpdatesStore.applied(conn)
+            pending_paths = [
+                path for path in get_schema_paths() if path.name not in applied
+            ]
+            logger.info(
+                f"{len(applied)} updates already applied, {len(pending_paths)} pending"
+            )
+            updates = await asyncio.gather(
+                *(
+                    asyncio.to_thread(UpdatesStore.load_update, path)
+                    for path in pending_paths
+                )
+            )
 
-                update_sql = UpdatesStore.load_update(schema_path)
-                if update_sql:
-                    await conn.execute(update_sql)
-                await UpdatesStore.add(conn, update_file)
-                logger.info(f"Applied update: {update_file}")
+            applied_updates = []
+            for update in updates:
+                applied_update = await UpdatesStore.apply(conn, update)
+                applied_updates.append(applied_update)
+                logger.info(
+                    f"Applied update: {update.update_file} "
+                    f"({applied_update.seconds:.2f}s"
+                    + (", no transaction" if update.no_transaction else "")
+                    + ")"
+                )
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", UPDATES_LOCK_ID)
 
         logger.info("All updates applied successfully")
+        return applied_updates
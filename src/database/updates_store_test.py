@@ -0,0 +1,118 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.database.updates_store import (
+    UPDATES_LOCK_ID,
+    UpdatesStore,
+    split_statements,
+)
+
+
+def test_split_statements() -> None:
+    """Test semicolons in quotes, escape strings, dollar quotes and comments are kept."""
+    # Arrange
+    sql = """
+        -- Build the index; without locking writes
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx ON t (c);
+        INSERT INTO t (c) VALUES ('a;b'), ("x;y");
+        INSERT INTO t (c) VALUES (E'it\\'s; escaped'), (e'\\\\');
+        CREATE FUNCTION f() RETURNS TEXT AS $body$ SELECT ';'; $body$ LANGUAGE sql;
+        DO $$ BEGIN PERFORM 1; END $$; /* trailing; comment */
+    """
+
+    # Act
+    statements = split_statements(sql)
+
+    # Assert
+    assert statements == [
+        "-- Build the index; without locking writes\n"
+        "        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx ON t (c)",
+        """INSERT INTO t (c) VALUES ('a;b'), ("x;y")""",
+        r"INSERT INTO t (c) VALUES (E'it\'s; escaped'), (e'\\')",
+        "CREATE FUNCTION f() RETURNS TEXT AS $body$ SELECT ';'; $body$ LANGUAGE sql",
+        "DO $$ BEGIN PERFORM 1; END $$",
+        "/* trailing; comment */",
+    ]
+
+
+def test_load_update_reads_no_transaction_directive(tmp_path: Path) -> None:
+    """Test updates are flagged by a no-transaction header line."""
+    # Arrange
+    flagged = tmp_path / "update_index.sql"
+    flagged.write_text("-- no-transaction\nCREATE INDEX CONCURRENTLY idx ON t (c);\n")
+    regular = tmp_path / "update_table.sql"
+    regular.write_text("-- Adds a column\nALTER TABLE t ADD COLUMN c INTEGER;\n")
+
+    # Act & Assert
+    assert UpdatesStore.load_update(flagged).no_transaction
+    assert not UpdatesStore.load_update(regular).no_transaction
+
+
+@pytest.mark.asyncio
+async def test_run_updates_applies_pending_updates(tmp_path: Path) -> None:
+    """Test only pending updates run, under the advisory lock, with durations."""
+    # Arrange
+    paths = [tmp_path / name for name in ("a.sql", "b.sql", "c.sql")]
+    paths[0].write_text("CREATE TABLE a (id INTEGER);")
+    paths[1].write_text("CREATE TABLE b (id INTEGER);")
+    paths[2].write_text(
+        "-- no-transaction\n"
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_b;\n"
+        "CREATE INDEX CONCURRENTLY idx_b ON b (id);\n"
+    )
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    conn.fetch.return_value = [{"update_file": "a.sql"}]
+
+    # Act
+    with patch("src.database.updates_store.get_schema_paths", return_value=paths):
+        applied = await UpdatesStore.run_updates(conn)
+
+    # Assert
+    assert [update.update_file for update in applied] == ["b.sql", "c.sql"]
+    assert all(update.seconds >= 0 for update in applied)
+    # Applied versions are loaded in a single query
+    conn.fetch.assert_called_once()
+    statements = [call.args[0] for call in conn.execute.call_args_list]
+    assert statements[0] == "SELECT pg_advisory_lock($1)"
+    assert statements[-1] == "SELECT pg_advisory_unlock($1)"
+    assert conn.execute.call_args_list[-1].args[1] == UPDATES_LOCK_ID
+    assert "CREATE TABLE a (id INTEGER);" not in statements
+    assert "CREATE TABLE b (id INTEGER);" in statements
+    # Only the regular update runs in a transaction
+    assert conn.transaction.call_count == 1
+    assert "-- no-transaction\nDROP INDEX CONCURRENTLY IF EXISTS idx_b" in statements
+    assert "CREATE INDEX CONCURRENTLY idx_b ON b (id)" in statements
+    inserted = [
+        call.args[1]
+        for call in conn.execute.call_args_list
+        if call.args[0].startswith("INSERT INTO updates")
+    ]
+    assert inserted == ["b.sql", "c.sql"]
+
+
+@pytest.mark.asyncio
+async def test_run_updates_releases_lock_on_failure(tmp_path: Path) -> None:
+    """Test the advisory lock is released when an update fails."""
+    # Arrange
+    path = tmp_path / "a.sql"
+    path.write_text("CREATE TABLE a (id INTEGER);")
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    conn.fetch.return_value = []
+
+    async def execute(statement: str, *_: object) -> None:
+        if statement.startswith("CREATE TABLE a"):
+            raise RuntimeError("Update failed")
+
+    conn.execute.side_effect = execute
+
+    # Act & Assert
+    with (
+        patch("src.database.updates_store.get_schema_paths", return_value=[path]),
+        pytest.raises(RuntimeError),
+    ):
+        await UpdatesStore.run_updates(conn)
+    assert conn.execute.call_args_list[-1].args[0] == "SELECT pg_advisory_unlock($1)"
@@ -0,0 +1,49 @@
+import logging
+
+from asyncpg import Connection
+
+logger = logging.getLogger(__name__)
+
+# Rows converted per statement, so that each batch commits on its own instead of
+# rewriting the whole table in one transaction
+HALFVEC_BACKFILL_BATCH_SIZE = 10_000
+
+
+class UserResponseEmbeddings:
+    @staticmethod
+    async def backfill_halfvec(
+        conn: Connection, batch_size: int = HALFVEC_BACKFILL_BATCH_SIZE
+    ) -> int:
+        """
+        Fill the halfvec columns of the rows written in full-precision mode.
+
+        Only needed with USER_RESPONSE_EMBEDDING_STORAGE=halfvec, whose searches
+        skip rows without halfvec embeddings. Rows already converted are left as
+        is, so it is safe to run on every start.
+
+        Returns:
+            The number of rows converted.
+        """
+        converted = 0
+        while True:
+            status = await conn.execute(
+                """
+                UPDATE user_management.user_response
+                SET question_embedding_half = question_embedding::halfvec(1536),
+                    response_embedding_half = response_embedding::halfvec(1536)
+                WHERE id IN (
+                    SELECT id FROM user_management.user_response
+                    WHERE question_embedding_half IS NULL
+                        AND question_embedding IS NOT NULL
+                    LIMIT $1
+                )
+                """,
+                batch_size,
+            )
+            # Status of an UPDATE is "UPDATE <rows>"
+            rows = int(status.split()[-1])
+            converted += rows
+            if rows < batch_size:
+                break
+        logger.info(f"Backfilled halfvec embeddings of {converted} user responses")
+        return converted
@@ -0,0 +1,21 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.database.user_response_embeddings import UserResponseEmbeddings
+
+
+@pytest.mark.asyncio
+async def test_backfill_halfvec_converts_in_batches() -> None:
+    """Test rows are converted batch by batch until a batch comes up short."""
+    # Arrange
+    conn = AsyncMock()
+    conn.execute.side_effect = ["UPDATE 2", "UPDATE 2", "UPDATE 1"]
+
+    # Act
+    converted = await UserResponseEmbeddings.backfill_halfvec(conn, batch_size=2)
+
+    # Assert
+    assert converted == 5
+    assert conn.execute.call_count == 3
+    assert conn.execute.call_args.args[1] == 2
@@ -0,0 +1,135 @@
+import gzip
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from asyncpg import Connection
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SCHEMA = "user_management"
+PARTITION_NAME_PATTERN = re.compile(r"^user_response_(\d{4})_(\d{2})$")
+
+
+@dataclass
+class UserResponsePartition:
+    """A monthly user_response partition covering [range_start, range_end)."""
+
+    name: str
+    range_start: date
+    range_end: date
+
+
+def add_months(month: date, months: int) -> date:
+    """Return the first day of the month `months` after the month of `month`."""
+    month_index = month.year * 12 + month.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def parse_partition_name(name: str) -> UserResponsePartition | None:
+    """Parse a monthly partition name (user_response_YYYY_MM) into its range."""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if match is None:
+        return None
+    range_start = date(int(match.group(1)), int(match.group(2)), 1)
+    return UserResponsePartition(
+        name=name, range_start=range_start, range_end=add_months(range_start, 1)
+    )
+
+
+class UserResponsePartitions:
+    @staticmethod
+    async def ensure_future_partitions(
+        conn: Connection, months_ahead: int = 3
+    ) -> list[str]:
+        """Create the partitions for the current month and the next months_ahead."""
+        records = await conn.fetch(
+            """
+            SELECT user_management.create_user_response_partition(
+                (date_trunc('month', CURRENT_TIMESTAMP) + make_interval(months => m))::DATE
+            ) AS partition_name
+            FROM generate_series(0, $1) AS m
+            """,
+            months_ahead,
+        )
+        partition_names = [record["partition_name"] for record in records]
+        logger.info(f"Ensured user_response partitions: {', '.join(partition_names)}")
+        return partition_names
+
+    @staticmethod
+    async def list_partitions(conn: Connection) -> list[UserResponsePartition]:
+        """List the attached monthly partitions, oldest first."""
+        records = await conn.fetch(
+            """
+            SELECT child.relname AS partition_name
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+            WHERE ns.nspname = $1 AND parent.relname = 'user_response'
+            """,
+            PARTITION_SCHEMA,
+        )
+        partitions = [
+            partition
+            for record in records
+            if (partition := parse_partition_name(record["partition_name"])) is not None
+        ]
+        return sorted(partitions, key=lambda partition: partition.range_start)
+
+    @staticmethod
+    async def export_partition(
+        conn: Connection, partition: UserResponsePartition, archive_dir: Path
+    ) -> Path:
+        """Export a partition to a gzip-compressed CSV file in archive_dir."""
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        archive_path = archive_dir / f"{partition.name}.csv.gz"
+        partial_path = archive_path.with_name(archive_path.name + ".partial")
+
+        with gzip.open(partial_path, "wb") as archive:
+
+            async def write_chunk(chunk: bytes) -> None:
+                archive.write(chunk)
+
+            await conn.copy_from_table(
+                partition.name,
+                schema_name=PARTITION_SCHEMA,
+                output=write_chunk,
+                format="csv",
+                header=True,
+            )
+
+        # Only a complete export gets the final name
+        partial_path.rename(archive_path)
+        return archive_path
+
+    @staticmethod
+    async def archive_partitions(
+        conn: Connection, older_than: date, archive_dir: Path
+    ) -> list[Path]:
+        """
+        Archive and remove every partition that ends on or before older_than.
+
+        Each partition is exported first and only detached and dropped once its
+        archive file is complete, so a failed run can simply be retried.
+        """
+        archived: list[Path] = []
+        for partition in await UserResponsePartitions.list_partitions(conn):
+            if partition.range_end > older_than:
+                continue
+
+            archive_path = await UserResponsePartitions.export_partition(
+                conn, partition, archive_dir
+            )
+            async with conn.transaction():
+                await conn.execute(
+                    f"ALTER TABLE {PARTITION_SCHEMA}.user_response "
+                    f'DETACH PARTITION {PARTITION_SCHEMA}."{partition.name}"'
+                )
+                await conn.execute(f'DROP TABLE {PARTITION_SCHEMA}."{partition.name}"')
+            archived.append(archive_path)
+            logger.info(f"Archived partition {partition.name} to {archive_path}")
+
+        return archived
@@ -0,0 +1,65 @@
+import gzip
+from collections.abc import Awaitable, Callable
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.database.user_response_partitions import (
+    UserResponsePartitions,
+    add_months,
+    parse_partition_name,
+)
+
+
+def test_add_months() -> None:
+    """Test add_months returns the first day of the shifted month."""
+    assert add_months(date(2025, 1, 31), 1) == date(2025, 2, 1)
+    assert add_months(date(2025, 11, 15), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -12) == date(2024, 1, 1)
+
+
+def test_parse_partition_name() -> None:
+    """Test parse_partition_name reads monthly ranges and ignores other tables."""
+    # Act
+    partition = parse_partition_name("user_response_2025_12")
+
+    # Assert
+    assert partition is not None
+    assert partition.range_start == date(2025, 12, 1)
+    assert partition.range_end == date(2026, 1, 1)
+    assert parse_partition_name("user_response_default") is None
+
+
+@pytest.mark.asyncio
+async def test_archive_partitions(tmp_path: Path) -> None:
+    """Test archive_partitions exports, detaches and drops expired partitions only."""
+    # Arrange
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    conn.fetch.return_value = [
+        {"partition_name": "user_response_2024_02"},
+        {"partition_name": "user_response_2024_01"},
+        {"partition_name": "user_response_default"},
+    ]
+
+    async def copy_from_table(
+        *_: object, output: Callable[[bytes], Awaitable[None]], **__: object
+    ) -> None:
+        await output(b"id,user_id\n1,1\n")
+
+    conn.copy_from_table.side_effect = copy_from_table
+
+    # Act
+    archived = await UserResponsePartitions.archive_partitions(
+        conn, older_than=date(2024, 2, 1), archive_dir=tmp_path
+    )
+
+    # Assert
+    assert archived == [tmp_path / "user_response_2024_01.csv.gz"]
+    with gzip.open(archived[0]) as archive:
+        assert archive.read() == b"id,user_id\n1,1\n"
+    statements = [call.args[0] for call in conn.execute.call_args_list]
+    assert any("DETACH PARTITION" in s and "2024_01" in s for s in statements)
+    assert not any("2024_02" in s for s in statements)
@@ -0,0 +1,88 @@
+"""
+Binary asyncpg codecs for the pgvector `vector` and `halfvec` types.
+
+Without them asyncpg exchanges vectors as text, so every query embedding is
+formatted into a 1536-number string and every fetched embedding is parsed back
+into Python floats. The binary format is a small header followed by the raw
+big-endian values, which maps directly onto array('f').
+"""
+
+import logging
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+from asyncpg import Connection
+
+from src.types.embeddings import to_float32_vector
+
+logger = logging.getLogger(__name__)
+
+# Dimensions (uint16) and an unused uint16
+_HEADER = struct.Struct(">HH")
+
+
+def encode_vector(value: Sequence[float] | array) -> bytes:
+    """Encode a vector in the pgvector `vector` binary format."""
+    vector = to_float32_vector(value)
+    if sys.byteorder == "little":
+        # Swap a copy, never the caller's array
+        vector = array("f", vector) if vector is value else vector
+        vector.byteswap()
+    return _HEADER.pack(len(vector), 0) + vector.tobytes()
+
+
+def decode_vector(data: bytes) -> array:
+    """Decode the pgvector `vector` binary format into array('f')."""
+    vector = array("f")
+    vector.frombytes(memoryview(data)[_HEADER.size :])
+    if sys.byteorder == "little":
+        vector.byteswap()
+    return vector
+
+
+def encode_halfvec(value: Sequence[float] | array) -> bytes:
+    """Encode a vector in the pgvector `halfvec` binary format."""
+    return _HEADER.pack(len(value), 0) + struct.pack(f">{len(value)}e", *value)
+
+
+def decode_halfvec(data: bytes) -> array:
+    """Decode the pgvector `halfvec` binary format into array('f')."""
+    (dimensions, _) = _HEADER.unpack_from(data)
+    return array("f", struct.unpack_from(f">{dimensions}e", data, _HEADER.size))
+
+
+VECTOR_CODECS = {
+    "vector": (encode_vector, decode_vector),
+    "halfvec": (encode_halfvec, decode_halfvec),
+}
+
+
+async def register_vector_codecs(connection: Connection) -> None:
+    """
+    Register the binary vector codecs on a new connection.
+
+    Used as the pool's connection init; types that do not exist yet (before the
+    schema is initialized, or halfvec on pgvector < 0.7) keep the text format.
+    """
+    rows = await connection.fetch(
+        """
+        SELECT t.typname, n.nspname
+        FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = ANY($1::text[])
+        """,
+        list(VECTOR_CODECS),
+    )
+    for row in rows:
+        encoder, decoder = VECTOR_CODECS[row["typname"]]
+        await connection.set_type_codec(
+            row["typname"],
+            schema=row["nspname"],
+            encoder=encoder,
+            decoder=decoder,
+            format="binary",
+        )
+    if "vector" not in {row["typname"] for row in rows}:
+        logger.warning("pgvector types not found, vectors are exchanged as text")
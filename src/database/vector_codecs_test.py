@@ -0,0 +1,73 @@
+import struct
+from array import array
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import ValidationError
+
+from src.database.vector_codecs import (
+    decode_halfvec,
+    decode_vector,
+    encode_halfvec,
+    encode_vector,
+    register_vector_codecs,
+)
+from src.types.embeddings import Embedding
+
+
+def test_encode_vector_matches_pgvector_binary_format() -> None:
+    """Test the header and big-endian float4 values of the vector format."""
+    # Arrange
+    vector = array("f", [1.0, -2.5])
+
+    # Act
+    data = encode_vector(vector)
+
+    # Assert
+    assert data == struct.pack(">HHff", 2, 0, 1.0, -2.5)
+    assert vector == array("f", [1.0, -2.5])  # The caller's array is untouched
+
+
+def test_vector_codecs_round_trip() -> None:
+    """Test that vector and halfvec values decode to the encoded float32 arrays."""
+    # Arrange
+    values = [0.5, -0.25, 3.0]
+
+    # Act & Assert
+    assert decode_vector(encode_vector(values)) == array("f", values)
+    assert decode_halfvec(encode_halfvec(values)) == array("f", values)
+
+
+def test_embedding_vector_validation() -> None:
+    """Test that embeddings become float32 arrays with their length checked once."""
+    # Act
+    embedding = Embedding(vector=[0.5] * 1536)
+
+    # Assert
+    assert embedding.vector == array("f", [0.5] * 1536)
+    assert Embedding(vector=embedding.vector).vector is embedding.vector
+    assert embedding.model_dump_json().startswith('{"vector":[0.5,0.5,')
+    with pytest.raises(ValidationError):
+        Embedding(vector=[0.5] * 3)
+    with pytest.raises(ValidationError):
+        Embedding(vector=["not a number"] * 1536)
+
+
+@pytest.mark.asyncio
+async def test_register_vector_codecs() -> None:
+    """Test that codecs are registered for the pgvector types found, in their schema."""
+    # Arrange
+    connection = AsyncMock()
+    connection.fetch.return_value = [{"typname": "vector", "nspname": "public"}]
+
+    # Act
+    await register_vector_codecs(connection)
+
+    # Assert
+    connection.set_type_codec.assert_called_once_with(
+        "vector",
+        schema="public",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
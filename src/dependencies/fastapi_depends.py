@@ -1,37 +1,88 @@
 from collections.abc import AsyncGenerator
-from typing import Annotated
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Annotated
 
 from asyncpg import Connection
 from fastapi import Depends
-from openai import OpenAI
 
 from src.application.ai_support_manager import AISupportManager
 from src.application.interfaces.ai_generation_interface import AIGenerationInterface
 from src.application.interfaces.ai_support_interface import AISupportInterface
-from src.database.connection import get_pool
+from src.config.settings import get_settings
+from src.database.connection import get_connection
 from src.infrastructure.ai_generation_repository import (
     AIGenerationRepository,
     get_ai_client,
+    get_openai_models,
 )
 from src.infrastructure.ai_support_repository import AISupportRepository
+from src.infrastructure.budget_guard import get_budget_guard
+from src.infrastructure.cached_ai_generation_repository import (
+    CachedAIGenerationRepository,
+)
+from src.infrastructure.conversation_store import get_conversation_store
+from src.infrastructure.embedding_slots import get_embedding_slots_cache
+from src.infrastructure.local_ai_generation_repository import (
+    get_local_ai_generation_repository,
+)
+from src.infrastructure.prompt_corpus import get_prompt_corpus_cache
+from src.infrastructure.shared_cache import get_shared_cache
+from src.types.ai_backend import AIBackend
+from src.types.embeddings import ActiveEmbeddings
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 async def get_connection_dependency() -> AsyncGenerator[Connection, None]:
-    pool = await get_pool()
-    async with pool.acquire() as connection:
+    async with get_connection() as connection:
         yield connection
 
 
+def get_active_embeddings_dependency() -> ActiveEmbeddings:
+    # Resolved once per request, so queries are embedded with the model of the
+    # slot they are searched in even if the active slot changes meanwhile
+    return get_embedding_slots_cache().current
+
+
 def get_ai_support_repository_dependency(
     connection: Annotated[Connection, Depends(get_connection_dependency)],
+    embeddings: Annotated[ActiveEmbeddings, Depends(get_active_embeddings_dependency)],
 ) -> AISupportInterface:
-    return AISupportRepository(connection)
+    return AISupportRepository(
+        connection,
+        embedding_storage=get_settings().USER_RESPONSE_EMBEDDING_STORAGE,
+        embeddings=embeddings,
+    )
 
 
 def get_ai_generation_repository_dependency(
-    client: Annotated[OpenAI, Depends(get_ai_client)],
+    client: Annotated["OpenAI", Depends(get_ai_client)],
+    embeddings: Annotated[ActiveEmbeddings, Depends(get_active_embeddings_dependency)],
 ) -> AIGenerationInterface:
-    return AIGenerationRepository(client=client)
+    settings = get_settings()
+    repository: AIGenerationInterface
+    prompt_corpus = None
+    if settings.AI_BACKEND == AIBackend.LOCAL:
+        repository = get_local_ai_generation_repository()
+    else:
+        prompt_corpus = get_prompt_corpus_cache().current
+        repository = AIGenerationRepository(
+            client=client,
+            budget_guard=get_budget_guard(),
+            models=get_openai_models(embeddings.model),
+            prompt_corpus=prompt_corpus,
+        )
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return repository
+    return CachedAIGenerationRepository(
+        repository,
+        shared_cache,
+        namespace=f"{settings.AI_BACKEND.value}:{embeddings.model}",
+        answer_ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+        corpus_version=prompt_corpus.version if prompt_corpus is not None else "",
+    )
 
 
 def get_ai_support_manager_dependency(
@@ -45,4 +96,28 @@ def get_ai_support_manager_dependency(
     return AISupportManager(
         ai_support_repository=ai_support_repository,
         ai_generation_repository=ai_generation_repository,
+        canonical_answer_max_distance=get_settings().CANONICAL_ANSWER_MAX_DISTANCE,
+        budget_guard=get_budget_guard(),
+        conversation_store=get_conversation_store(),
     )
+
+
+@asynccontextmanager
+async def ai_support_manager_context(
+    ai_generation_repository: AIGenerationInterface,
+    embeddings: ActiveEmbeddings,
+) -> AsyncGenerator[AISupportManager, None]:
+    """
+    Build an AISupportManager whose connection is held for the whole context.
+
+    Streaming endpoints use this instead of the dependency so the connection
+    outlives the request handler and is released once the stream is done;
+    embeddings is the slot the generation repository was resolved with.
+    """
+    async with get_connection() as connection:
+        yield get_ai_support_manager_dependency(
+            ai_support_repository=get_ai_support_repository_dependency(
+                connection, embeddings
+            ),
+            ai_generation_repository=ai_generation_repository,
+        )
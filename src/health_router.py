@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+
+from src.infrastructure.json_response import PydanticJSONResponse
+from src.infrastructure.warmup import warmup_state
+from src.types.readiness import ReadinessResponse
+
+router = APIRouter(tags=["health"], default_response_class=PydanticJSONResponse)
+
+
+@router.get("/health")
+async def health() -> dict[str, str]:
+    """Liveness probe: the worker is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse, "description": "Warming up"}},
+)
+async def ready() -> PydanticJSONResponse:
+    """
+    Readiness probe: 200 once the worker is warmed up, 503 until then.
+
+    Components that failed to warm up (e.g. the database was unreachable) are
+    retried in the background on every probe until they succeed.
+    """
+    if not warmup_state.ready:
+        warmup_state.start()
+    return PydanticJSONResponse(
+        warmup_state.to_response(), status_code=200 if warmup_state.ready else 503
+    )
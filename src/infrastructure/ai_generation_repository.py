@@ -1,16 +1,69 @@
+import asyncio
+import difflib
 import logging
+import re
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from functools import cache
+from typing import TYPE_CHECKING, TypeVar
 
-from langchain.output_parsers import PydanticOutputParser
-from langchain.prompts import ChatPromptTemplate
-from openai import OpenAI
 from pydantic import BaseModel, Field
 
 from src.application.interfaces.ai_generation_interface import AIGenerationInterface
 from src.application.interfaces.ai_support_interface import UserQueryHistory
 from src.config.settings import get_settings
-from src.types.documents import FaqDocument
-from src.types.embeddings import Embedding, EmbeddingResponse
+from src.infrastructure.budget_guard import BudgetGuard, get_budget_guard
+from src.infrastructure.prometheus_metrics import (
+    AI_CITATIONS_TOTAL,
+    record_cached_prompt_tokens,
+    record_openai_error,
+    record_openai_request,
+    record_output_parse,
+)
+from src.infrastructure.rate_limiter import record_generation
+from src.infrastructure.structured_output import (
+    format_instructions,
+    parse_model_output,
+    repair_json,
+)
+from src.infrastructure.tracing import span
+from src.types.ai_backend import AIBackend
+from src.types.conversation import ConversationTurn
+from src.types.documents import (
+    CanonicalQuestionAnswer,
+    FaqDocument,
+    FaqDocumentRecord,
+)
+from src.types.embeddings import (
+    DEFAULT_EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    Embedding,
+    EmbeddingResponse,
+    supports_embedding_dimensions,
+)
+
+if TYPE_CHECKING:
+    # The OpenAI SDK takes ~0.4s to import; it is loaded on first use instead
+    from openai import OpenAI
+    from openai.types import CreateEmbeddingResponse
+    from openai.types.chat import ChatCompletion
+
+    from src.infrastructure.prompt_corpus import PromptCorpus
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Chat models accepting response_format={"type": "json_object"}; older models
+# such as the original gpt-4 are only prompted for JSON
+JSON_MODE_MODEL_PREFIXES = ("gpt-4o", "gpt-4-turbo", "gpt-4.1", "gpt-3.5-turbo")
+
+# Citation of a context document by its number: 2, "2" or "[2]"
+CITATION_NUMBER_PATTERN = re.compile(r"^\[?(\d+)\]?$")
+# Minimum similarity for a cited title to match a context document's title
+TITLE_MATCH_CUTOFF = 0.8
+
+REFORMAT_SYSTEM_PROMPT = """You convert text into JSON. Keep the content of the text exactly as it is, only change its format.
+Answer with the JSON only."""
 
 
 class FormattedResponse(BaseModel):
@@ -19,17 +72,318 @@ class FormattedResponse(BaseModel):
     answer: str = Field(
         description="The main answer to the user's question. Should be detailed and well-structured, including examples, explanations, and best practices."
     )
-    used_documents: list[str] = Field(
-        description="List of document titles used to generate the answer"
+    used_documents: list[int | str] = Field(
+        description="Numbers of the context documents used to generate the answer, e.g. [1, 3]"
     )
 
 
+class CanonicalQuestionAnswerList(BaseModel):
+    """Model for the canonical questions generated for a document."""
+
+    questions: list[CanonicalQuestionAnswer] = Field(
+        description="Common user questions answered by the document, each with a complete answer"
+    )
+
+
+def supports_json_mode(model: str) -> bool:
+    return model.startswith(JSON_MODE_MODEL_PREFIXES)
+
+
+def _resolve_citation(
+    citation: int | str,
+    context_docs: list[FaqDocumentRecord],
+    docs_by_title: dict[str, FaqDocumentRecord],
+) -> tuple[FaqDocumentRecord | None, str]:
+    """Resolve one citation, returning the document and how it was matched."""
+    if isinstance(citation, str):
+        match = CITATION_NUMBER_PATTERN.match(citation.strip())
+        if match is not None:
+            citation = int(match.group(1))
+    if isinstance(citation, int):
+        if 1 <= citation <= len(context_docs):
+            return context_docs[citation - 1], "number"
+        citation = str(citation)
+    title = citation.strip().casefold()
+    if title in docs_by_title:
+        return docs_by_title[title], "title"
+    close_titles = difflib.get_close_matches(
+        title, docs_by_title, n=1, cutoff=TITLE_MATCH_CUTOFF
+    )
+    if close_titles:
+        return docs_by_title[close_titles[0]], "fuzzy_title"
+    return None, "unresolved"
+
+
+def resolve_used_documents(
+    citations: list[int | str], context_docs: list[FaqDocumentRecord]
+) -> list[FaqDocumentRecord]:
+    """
+    Resolve the citations of an answer to the context documents.
+
+    Citations are the numbers the documents were given in the context. Titles,
+    which models sometimes cite instead, are matched ignoring case and then
+    fuzzily. Unresolved citations are dropped; every citation is counted in
+    ai_citations_total by how it was resolved.
+
+    Args:
+        citations: The used_documents of the answer
+        context_docs: The documents in the order they were numbered
+
+    Returns:
+        The cited documents, in context order and without duplicates
+    """
+    docs_by_title = {doc.title.casefold(): doc for doc in context_docs}
+    used_ids = set()
+    for citation in citations:
+        doc, result = _resolve_citation(citation, context_docs, docs_by_title)
+        AI_CITATIONS_TOTAL.labels(result=result).inc()
+        if doc is not None:
+            used_ids.add(doc.id)
+    return [doc for doc in context_docs if doc.id in used_ids]
+
+
+# Prompts are built once at import instead of on every request
+ANSWER_SYSTEM_PROMPT = f"""You are a support assistant for the Shakers platform.
+Your task is to answer user questions using ONLY the provided context.
+If the answer is not in the context, say you don't have that information.
+
+Provide concise responses that:
+1. Start with a direct answer
+2. Include only essential examples
+3. Explain key terms briefly
+4. Add critical tips only
+5. Use bullet points for steps
+6. Use code blocks when necessary
+
+Keep the tone professional but friendly. Do not mention you are an AI.
+Be clear and to the point.
+Documents in the context are numbered like [1]; cite the ones you used by number.
+
+{format_instructions(FormattedResponse)}"""
+
+ANSWER_USER_PROMPT = """Context:
+{context}
+
+{conversation}User question: {query}"""
+
+# With the FAQ corpus in the system message, the system message is a prefix
+# shared by all requests and cached by the provider; only the user message varies
+ANSWER_CORPUS_SYSTEM_PROMPT = """{instructions}
+
+Context:
+{corpus}"""
+
+ANSWER_CORPUS_USER_PROMPT = """Documents retrieved for this question: {documents}
+
+{conversation}User question: {query}"""
+
+# Previous turns of a conversation, inserted before follow-up questions
+CONVERSATION_PROMPT = """Conversation so far:
+{turns}
+
+"""
+
+CANONICAL_QUESTIONS_FORMAT_INSTRUCTIONS = format_instructions(
+    CanonicalQuestionAnswerList
+)
+
+
+@dataclass(frozen=True, slots=True)
+class OpenAIModels:
+    """Models called by AIGenerationRepository."""
+
+    chat: str = "gpt-4"
+    # Cheap model turning unparseable outputs into JSON (None disables it)
+    reformat: str | None = "gpt-4o-mini"
+    # Model of the active embedding slot, which stored embeddings come from
+    embedding: str = DEFAULT_EMBEDDING_MODEL
+
+
 class AIGenerationRepository(AIGenerationInterface):
-    def __init__(self, client: OpenAI) -> None:
+    def __init__(
+        self,
+        client: "OpenAI",
+        budget_guard: BudgetGuard | None = None,
+        models: OpenAIModels = OpenAIModels(),
+        prompt_corpus: "PromptCorpus | None" = None,
+    ) -> None:
         self.logger = logging.getLogger(__name__)
-        self.model = "text-embedding-3-small"
-        self.chat_model = "gpt-4"
+        self.model = models.embedding
+        self.chat_model = models.chat
+        self.reformat_model = models.reformat
         self.client = client
+        self.budget_guard = budget_guard
+        # FAQ corpus prompted in the system message (None prompts the
+        # retrieved documents in the user message)
+        self.prompt_corpus = prompt_corpus
+
+    def _record_usage(
+        self,
+        operation: str,
+        model: str,
+        duration: float,
+        usage: tuple[int, int],
+    ) -> None:
+        """Record the (prompt, completion) tokens of an OpenAI call and its cost."""
+        prompt_tokens, completion_tokens = usage
+        cost = record_openai_request(
+            operation, model, duration, prompt_tokens, completion_tokens
+        )
+        if self.budget_guard is not None:
+            self.budget_guard.record(cost, prompt_tokens + completion_tokens)
+
+    async def _create_chat_completion(
+        self, operation: str, model: str, **kwargs: object
+    ) -> "ChatCompletion":
+        """Call the chat completions API, recording latency, tokens and cost."""
+        with span(f"llm.{operation}", model=model) as llm_span:
+            start = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(
+                    self.client.chat.completions.create,
+                    model=model,
+                    **kwargs,  # pyright: ignore
+                )
+            except Exception:
+                record_openai_error(operation, model, time.perf_counter() - start)
+                raise
+
+            usage = response.usage
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            # Only reported by models with prompt caching
+            details = usage.prompt_tokens_details if usage else None
+            cached_tokens = (details.cached_tokens if details else None) or 0
+            self._record_usage(
+                operation,
+                model,
+                time.perf_counter() - start,
+                (prompt_tokens, completion_tokens),
+            )
+            record_cached_prompt_tokens(operation, model, cached_tokens)
+            record_generation()
+            if llm_span is not None:
+                llm_span.set_attributes(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    cached_tokens=cached_tokens,
+                )
+            return response
+
+    @staticmethod
+    def _json_mode(model: str) -> dict[str, object]:
+        """Chat completion arguments constraining the output to JSON, if supported."""
+        if supports_json_mode(model):
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+    @staticmethod
+    def _embedding_dimensions(model: str) -> dict[str, object]:
+        """
+        Embeddings API arguments sizing the embeddings to the columns, if supported.
+
+        text-embedding-3-large embeds into 3072 dimensions unless asked otherwise.
+        """
+        if supports_embedding_dimensions(model):
+            return {"dimensions": EMBEDDING_DIMENSIONS}
+        return {}
+
+    async def _reformat_output(
+        self, operation: str, content: str, output_model: type[ModelT]
+    ) -> ModelT | None:
+        """Ask the reformat model to turn an unparseable output into JSON."""
+        if self.reformat_model is None or not content.strip():
+            return None
+        try:
+            response = await self._create_chat_completion(
+                f"{operation}_reformat",
+                model=self.reformat_model,
+                messages=[
+                    {"role": "system", "content": REFORMAT_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": f"{format_instructions(output_model)}\n\nText:\n{content}",
+                    },
+                ],
+                temperature=0,
+                max_tokens=2000,
+                **self._json_mode(self.reformat_model),
+            )
+            parsed, _ = parse_model_output(
+                response.choices[0].message.content, output_model
+            )
+            return parsed
+        except Exception as e:
+            self.logger.warning(f"Error reformatting {operation} output: {str(e)}")
+            return None
+
+    async def _parse_output(
+        self,
+        operation: str,
+        response: "ChatCompletion",
+        output_model: type[ModelT],
+        fallback: Callable[[str], ModelT] | None = None,
+    ) -> ModelT:
+        """
+        Parse the JSON output of a chat completion without generating it again.
+
+        Malformed JSON is repaired locally. Otherwise the reformat model converts
+        the output, which costs a fraction of a new generation, and as a last
+        resort the fallback builds the result from the raw text.
+
+        Raises:
+            ValueError: If the output cannot be recovered and there is no fallback
+        """
+        content = response.choices[0].message.content or ""
+        parsed: ModelT | None
+        try:
+            parsed, outcome = parse_model_output(content, output_model)
+        except ValueError as e:
+            self.logger.warning(f"Could not parse {operation} output: {str(e)}")
+            parsed, outcome = (
+                await self._reformat_output(operation, content, output_model),
+                "reformatted",
+            )
+            if parsed is None and fallback is not None:
+                parsed, outcome = fallback(content), "plain_text"
+        if parsed is None:
+            outcome = "failed"
+        completion_tokens = response.usage.completion_tokens if response.usage else 0
+        record_output_parse(operation, outcome, completion_tokens)
+        if parsed is None:
+            raise ValueError(f"Could not parse {operation} output")
+        return parsed
+
+    async def _create_embeddings(
+        self, input: str | list[str]
+    ) -> "CreateEmbeddingResponse":
+        """Call the embeddings API, recording latency, tokens and cost."""
+        inputs = 1 if isinstance(input, str) else len(input)
+        with span("llm.embedding", model=self.model, inputs=inputs) as llm_span:
+            start = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(
+                    self.client.embeddings.create,
+                    model=self.model,
+                    input=input,
+                    encoding_format="float",
+                    **self._embedding_dimensions(self.model),
+                )
+            except Exception:
+                record_openai_error(
+                    "embedding", self.model, time.perf_counter() - start
+                )
+                raise
+
+            self._record_usage(
+                "embedding",
+                self.model,
+                time.perf_counter() - start,
+                (response.usage.prompt_tokens, 0),
+            )
+            if llm_span is not None:
+                llm_span.set_attributes(prompt_tokens=response.usage.prompt_tokens)
+            return response
 
     async def generate_summary(self, text: str) -> str:
         """
@@ -55,14 +409,18 @@ class AIGenerationRepository(AIGenerationInterface):
             Summary:"""
 
             # Generate the summary using GPT-4
-            response = self.client.chat.completions.create(
+            response = await self._create_chat_completion(
+                "summary",
                 model=self.chat_model,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that creates extensive and informative summaries, it needs to capture all the infomation."},
-                    {"role": "user", "content": prompt}
+                    {
+                        "role": "system",
+                        "content": "You are a helpful assistant that creates extensive and informative summaries, it needs to capture all the infomation.",
+                    },
+                    {"role": "user", "content": prompt},
                 ],
                 temperature=0.3,  # Lower temperature for more focused summaries
-                max_tokens=150,   # Limit summary length
+                max_tokens=150,  # Limit summary length
             )
 
             summary = response.choices[0].message.content.strip()
@@ -75,9 +433,7 @@ class AIGenerationRepository(AIGenerationInterface):
 
     async def generate_embeddings(self, text: str) -> EmbeddingResponse:
         try:
-            response = self.client.embeddings.create(
-                model=self.model, input=text, encoding_format="float"
-            )
+            response = await self._create_embeddings(text)
             embedding_data = response.data[0]
 
             return EmbeddingResponse(
@@ -93,92 +449,175 @@ class AIGenerationRepository(AIGenerationInterface):
             self.logger.error(f"Error generating embedding: {str(e)}")
             raise
 
-    @staticmethod
-    def _create_prompt_template() -> ChatPromptTemplate:
-        """Create the prompt template for the chat."""
-        return ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    """You are a support assistant for the Shakers platform.
-                Your task is to answer user questions using ONLY the provided context.
-                If the answer is not in the context, say you don't have that information.
-
-                Provide concise responses that:
-                1. Start with a direct answer
-                2. Include only essential examples
-                3. Explain key terms briefly
-                4. Add critical tips only
-                5. Use bullet points for steps
-                6. Use code blocks when necessary
-
-                Keep the tone professional but friendly. Do not mention you are an AI.
-                Be clear and to the point.
-
-                {format_instructions}""",
-                ),
-                (
-                    "human",
-                    """Context:
-                {context}
+    async def generate_embeddings_batch(
+        self, texts: list[str]
+    ) -> list[EmbeddingResponse]:
+        """
+        Generate embeddings for several texts with a single API call.
 
-                User question: {query}""",
-                ),
+        Args:
+            texts: The texts to generate embeddings for
+
+        Returns:
+            One EmbeddingResponse per text, in the same order. The usage of each
+            response holds the totals of the whole batch call.
+
+        Raises:
+            Exception: If there's an error during the embedding generation process
+        """
+        try:
+            response = await self._create_embeddings(texts)
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "total_tokens": response.usage.total_tokens,
+            }
+            return [
+                EmbeddingResponse(
+                    embedding=Embedding(vector=embedding_data.embedding),
+                    model=response.model,
+                    usage=usage,
+                )
+                for embedding_data in sorted(response.data, key=lambda data: data.index)
+            ]
+        except Exception as e:
+            self.logger.error(f"Error generating batch embeddings: {str(e)}")
+            raise
+
+    @classmethod
+    def _create_messages(
+        cls,
+        query: str,
+        context_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+        corpus: "PromptCorpus | None" = None,
+    ) -> list[dict[str, str]]:
+        """
+        Create the chat messages answering a query from the documents.
+
+        Everything that is the same for all requests comes first, so that
+        providers can serve it from their prompt cache: the instructions and
+        output schema, then the corpus, if any. The context documents (or their
+        numbers in the corpus), the conversation and the query come last.
+        """
+        if corpus is not None:
+            return [
+                {
+                    "role": "system",
+                    "content": ANSWER_CORPUS_SYSTEM_PROMPT.format(
+                        instructions=ANSWER_SYSTEM_PROMPT, corpus=corpus.context
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": ANSWER_CORPUS_USER_PROMPT.format(
+                        documents=", ".join(
+                            f"[{corpus.numbers[doc.id]}]" for doc in context_docs
+                        ),
+                        conversation=cls._prepare_conversation(conversation),
+                        query=query,
+                    ),
+                },
             ]
+        return [
+            {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": ANSWER_USER_PROMPT.format(
+                    context=cls._prepare_context(context_docs),
+                    conversation=cls._prepare_conversation(conversation),
+                    query=query,
+                ),
+            },
+        ]
+
+    @staticmethod
+    def _prepare_conversation(conversation: Sequence[ConversationTurn]) -> str:
+        """Prepare the previous turns of a conversation, if any."""
+        if not conversation:
+            return ""
+        return CONVERSATION_PROMPT.format(
+            turns="\n".join(
+                f"User: {turn.query}\nAssistant: {turn.answer}" for turn in conversation
+            )
         )
 
     @staticmethod
-    def _prepare_context(context_docs: list[FaqDocument]) -> str:
+    def _prepare_context(context_docs: list[FaqDocumentRecord]) -> str:
         """Prepare the context string from the documents."""
         return "\n\n".join(
-            f"Document: {doc.title}\nContent: {doc.llm_summary}" for doc in context_docs
+            f"[{number}] Document: {doc.title}\nContent: {doc.llm_summary}"
+            for number, doc in enumerate(context_docs, start=1)
+        )
+
+    @staticmethod
+    def _plain_text_response(content: str) -> FormattedResponse:
+        """Use an unparseable output as the answer, citing no documents."""
+        try:
+            data = repair_json(content)
+        except ValueError:
+            data = None
+        answer = data.get("answer") if isinstance(data, dict) else None
+        return FormattedResponse(
+            answer=answer if isinstance(answer, str) else content.strip(),
+            used_documents=[],
         )
 
     @staticmethod
     def _get_used_documents(
-        parsed_response: FormattedResponse, context_docs: list[FaqDocument]
-    ) -> list[FaqDocument]:
+        parsed_response: FormattedResponse, context_docs: list[FaqDocumentRecord]
+    ) -> list[FaqDocumentRecord]:
         """Get the documents that were used in the response."""
-        return [
-            doc for doc in context_docs if doc.title in parsed_response.used_documents
-        ]
+        return resolve_used_documents(parsed_response.used_documents, context_docs)
 
     async def generate_response(
-        self, query: str, context_docs: list[FaqDocument]
-    ) -> tuple[str, list[FaqDocument]]:
+        self,
+        query: str,
+        context_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+    ) -> tuple[str, list[FaqDocumentRecord]]:
         try:
-            # Prepare the context from the documents
-            context = self._prepare_context(context_docs)
-
-            # Create the prompt template
-            prompt = self._create_prompt_template()
-
-            # Initialize the output parser
-            output_parser = PydanticOutputParser(pydantic_object=FormattedResponse)
-
-            # Format the prompt with the context and query
-            formatted_prompt = prompt.format_messages(
-                context=context,
-                query=query,
-                format_instructions=output_parser.get_format_instructions(),
+            # Queries retrieving documents outside the corpus (technical ones)
+            # are prompted with their own context
+            corpus = (
+                self.prompt_corpus
+                if self.prompt_corpus is not None
+                and self.prompt_corpus.covers(context_docs)
+                else None
             )
+            with span(
+                "prompt_build",
+                context_documents=len(context_docs),
+                previous_turns=len(conversation),
+                prompt_corpus=corpus is not None,
+            ):
+                messages = self._create_messages(
+                    query, context_docs, conversation, corpus
+                )
 
             # Generate the response using the existing client
-            response = self.client.chat.completions.create(
+            response = await self._create_chat_completion(
+                "answer",
                 model=self.chat_model,
-                messages=[  # pyright: ignore
-                    {"role": "system", "content": formatted_prompt[0].content},
-                    {"role": "user", "content": formatted_prompt[1].content},
-                ],
+                messages=messages,
                 temperature=0.8,
                 max_tokens=2000,
+                **self._json_mode(self.chat_model),
             )
 
             # Parse the response
-            parsed_response = output_parser.parse(response.choices[0].message.content)  # pyright: ignore
+            with span("output_parse"):
+                parsed_response = await self._parse_output(
+                    "answer",
+                    response,
+                    FormattedResponse,
+                    fallback=self._plain_text_response,
+                )
 
             # Find which documents were used
-            used_docs = self._get_used_documents(parsed_response, context_docs)
+            used_docs = self._get_used_documents(
+                parsed_response,
+                corpus.documents if corpus is not None else context_docs,
+            )
 
             return parsed_response.answer, used_docs
 
@@ -186,6 +625,59 @@ class AIGenerationRepository(AIGenerationInterface):
             self.logger.error(f"Error generating response: {str(e)}")
             raise
 
+    async def generate_canonical_questions(
+        self, document: FaqDocument, max_questions: int = 5
+    ) -> list[CanonicalQuestionAnswer]:
+        """
+        Generate canonical question/answer pairs that a FAQ document answers.
+
+        Args:
+            document: The FAQ document to derive questions from
+            max_questions: Maximum number of question/answer pairs to generate
+
+        Returns:
+            List of CanonicalQuestionAnswer, each answer based only on the document
+
+        Raises:
+            Exception: If there's an error during the generation process
+        """
+        try:
+            prompt = f"""List up to {max_questions} questions that users of the Shakers platform commonly ask and that the following document fully answers.
+For each question write the answer a support assistant should give, using ONLY the document.
+Phrase questions the way a user would type them.
+
+{CANONICAL_QUESTIONS_FORMAT_INSTRUCTIONS}
+
+Document: {document.title}
+{document.text}"""
+
+            response = await self._create_chat_completion(
+                "canonical_questions",
+                model=self.chat_model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a support assistant for the Shakers platform that writes vetted FAQ answers.",
+                    },
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=2000,
+                **self._json_mode(self.chat_model),
+            )
+
+            parsed_response = await self._parse_output(
+                "canonical_questions", response, CanonicalQuestionAnswerList
+            )
+            self.logger.debug(
+                f"Generated {len(parsed_response.questions)} canonical questions for {document.title}"
+            )
+            return parsed_response.questions[:max_questions]
+
+        except Exception as e:
+            self.logger.error(f"Error generating canonical questions: {str(e)}")
+            raise
+
     async def get_recommendations(
         self,
         user_history: list[UserQueryHistory],
@@ -227,8 +719,9 @@ Format each recommendation as:
 Focus on patterns in their interests and suggest related topics they haven't explored yet."""
 
             # Get recommendations from OpenAI
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            response = await self._create_chat_completion(
+                "recommendation",
+                model=self.chat_model,
                 messages=[
                     {
                         "role": "system",
@@ -248,7 +741,9 @@ Focus on patterns in their interests and suggest related topics they haven't exp
 
 
 @cache
-def get_ai_client() -> OpenAI:
+def get_ai_client() -> "OpenAI":
+    from openai import OpenAI
+
     logger = logging.getLogger(__name__)
     settings = get_settings()
     logger.info(
@@ -257,12 +752,39 @@ def get_ai_client() -> OpenAI:
     return OpenAI(api_key=settings.OPENAI_API_KEY)
 
 
-async def get_ai_generation_repository() -> AIGenerationInterface:
+def get_openai_models(embedding_model: str = DEFAULT_EMBEDDING_MODEL) -> OpenAIModels:
+    """Get the configured chat models, with the given embedding model."""
+    settings = get_settings()
+    return OpenAIModels(
+        chat=settings.OPENAI_CHAT_MODEL,
+        reformat=settings.OPENAI_REFORMAT_MODEL,
+        embedding=embedding_model,
+    )
+
+
+async def get_ai_generation_repository(
+    embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+) -> AIGenerationInterface:
     """
-    Get an instance of the AIGenerationRepository.
+    Get an instance of the AI generation repository for the configured backend.
+
+    Args:
+        embedding_model: Model to generate embeddings with (ignored by the
+            local backend)
 
     Returns:
         AIGenerationInterface: An instance of the repository for AI operations.
     """
-    client = get_ai_client()
-    return AIGenerationRepository(client)
+    if get_settings().AI_BACKEND == AIBackend.LOCAL:
+        # Imported here because the local repository reuses FormattedResponse
+        from src.infrastructure.local_ai_generation_repository import (
+            get_local_ai_generation_repository,
+        )
+
+        return get_local_ai_generation_repository()
+
+    return AIGenerationRepository(
+        get_ai_client(),
+        budget_guard=get_budget_guard(),
+        models=get_openai_models(embedding_model),
+    )
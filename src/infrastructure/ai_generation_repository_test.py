@@ -1,16 +1,27 @@
+from array import array
+from datetime import UTC, datetime
 from unittest.mock import MagicMock
 
 import pytest
 from openai import OpenAI
+from openai.types import CompletionUsage
 from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.completion_usage import PromptTokensDetails
 from openai.types.create_embedding_response import CreateEmbeddingResponse
 from openai.types.embedding import Embedding
+from prometheus_client import REGISTRY
 
+from src.application.interfaces.ai_support_interface import UserQueryHistory
 from src.infrastructure.ai_generation_repository import (
     AIGenerationRepository,
     FormattedResponse,
+    OpenAIModels,
+    resolve_used_documents,
 )
-from src.types.documents import FaqCategory, FaqDocument
+from src.infrastructure.budget_guard import BudgetGuard
+from src.infrastructure.prompt_corpus import PromptCorpus
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqCategory, FaqDocumentRecord
 from src.types.embeddings import EmbeddingResponse
 
 
@@ -28,26 +39,22 @@ def ai_repository(mock_openai_client: OpenAI) -> AIGenerationRepository:
 
 
 @pytest.fixture
-def sample_faq_documents() -> list[FaqDocument]:
+def sample_faq_documents() -> list[FaqDocumentRecord]:
     """Create sample FAQ documents for testing."""
     return [
-        FaqDocument(
+        FaqDocumentRecord(
             id=1,
             title="Test Document 1",
             link="http://test1.com",
-            text="This is test document 1",
-            llm_summary="Summary of test document 1",
             category=FaqCategory.PLATFORM_OVERVIEW,
-            embedding=[0.1, 0.2, 0.3],
+            llm_summary="Summary of test document 1",
         ),
-        FaqDocument(
+        FaqDocumentRecord(
             id=2,
             title="Test Document 2",
             link="http://test2.com",
-            text="This is test document 2",
-            llm_summary="Summary of test document 2",
             category=FaqCategory.PLATFORM_OVERVIEW,
-            embedding=[0.4, 0.5, 0.6],
+            llm_summary="Summary of test document 2",
         ),
     ]
 
@@ -73,11 +80,76 @@ async def test_generate_embeddings(
 
     # Assert
     assert isinstance(result, EmbeddingResponse)
-    assert result.embedding.vector == mock_embedding
+    assert result.embedding.vector == array("f", mock_embedding)
     assert result.model == "text-embedding-3-small"
     assert result.usage == {"prompt_tokens": 2, "total_tokens": 2}
     mock_openai_client.embeddings.create.assert_called_once_with(
-        model="text-embedding-3-small", input=test_text, encoding_format="float"
+        model="text-embedding-3-small",
+        input=test_text,
+        encoding_format="float",
+        dimensions=1536,
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_with_model_of_active_slot(
+    mock_openai_client: OpenAI,
+) -> None:
+    """Test that embeddings are generated with the configured model, in 1536 dimensions."""
+    # Arrange
+    ai_repository = AIGenerationRepository(
+        mock_openai_client, models=OpenAIModels(embedding="text-embedding-3-large")
+    )
+    mock_openai_client.embeddings.create.return_value = CreateEmbeddingResponse(
+        data=[Embedding(embedding=[0.1] * 1536, index=0, object="embedding")],
+        model="text-embedding-3-large",
+        object="list",
+        usage={"prompt_tokens": 2, "total_tokens": 2},
+    )
+
+    # Act
+    result = await ai_repository.generate_embeddings("Test text")
+
+    # Assert
+    assert result.model == "text-embedding-3-large"
+    mock_openai_client.embeddings.create.assert_called_once_with(
+        model="text-embedding-3-large",
+        input="Test text",
+        encoding_format="float",
+        dimensions=1536,
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch(
+    ai_repository: AIGenerationRepository, mock_openai_client: OpenAI
+) -> None:
+    """Test generate_embeddings_batch embeds all texts in one call, in input order."""
+    # Arrange
+    test_texts = ["First text", "Second text"]
+    mock_response = CreateEmbeddingResponse(
+        data=[
+            Embedding(embedding=[0.2] * 1536, index=1, object="embedding"),
+            Embedding(embedding=[0.1] * 1536, index=0, object="embedding"),
+        ],
+        model="text-embedding-3-small",
+        object="list",
+        usage={"prompt_tokens": 4, "total_tokens": 4},
+    )
+    mock_openai_client.embeddings.create.return_value = mock_response
+
+    # Act
+    result = await ai_repository.generate_embeddings_batch(test_texts)
+
+    # Assert
+    assert [response.embedding.vector[0] for response in result] == pytest.approx(
+        [0.1, 0.2]
+    )
+    mock_openai_client.embeddings.create.assert_called_once_with(
+        model="text-embedding-3-small",
+        input=test_texts,
+        encoding_format="float",
+        dimensions=1536,
     )
 
 
@@ -85,7 +157,7 @@ async def test_generate_embeddings(
 async def test_generate_response(
     ai_repository: AIGenerationRepository,
     mock_openai_client: OpenAI,
-    sample_faq_documents: list[FaqDocument],
+    sample_faq_documents: list[FaqDocumentRecord],
 ) -> None:
     """Test generate_response method."""
     # Arrange
@@ -120,43 +192,275 @@ async def test_generate_response(
     mock_openai_client.chat.completions.create.assert_called_once()
 
 
-def test_create_prompt_template() -> None:
-    """Test _create_prompt_template static method."""
+@pytest.mark.asyncio
+async def test_generate_response_records_usage(
+    mock_openai_client: OpenAI, sample_faq_documents: list[FaqDocumentRecord]
+) -> None:
+    """Test that chat completion usage is recorded in the metrics and budget."""
+    # Arrange
+    budget_guard = BudgetGuard()
+    ai_repository = AIGenerationRepository(
+        mock_openai_client, budget_guard=budget_guard
+    )
+    mock_openai_client.chat.completions.create.return_value = ChatCompletion(
+        id="test-id",
+        choices=[
+            {
+                "message": ChatCompletionMessage(
+                    content='{"answer": "Test answer", "used_documents": []}',
+                    role="assistant",
+                ),
+                "index": 0,
+                "finish_reason": "stop",
+            }
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+        usage=CompletionUsage(
+            prompt_tokens=1000, completion_tokens=500, total_tokens=1500
+        ),
+    )
+    labels = {"operation": "answer", "model": "gpt-4", "kind": "completion"}
+    tokens_before = REGISTRY.get_sample_value("openai_tokens_total", labels) or 0.0
+
     # Act
-    template = AIGenerationRepository._create_prompt_template()
+    await ai_repository.generate_response("Test question", sample_faq_documents)
 
     # Assert
-    assert template is not None
-    assert len(template.messages) == 2
-    assert (
-        template.messages[0].prompt.template
-        == """You are a support assistant for the Shakers platform.
-                Your task is to answer user questions using ONLY the provided context.
-                If the answer is not in the context, say you don't have that information.
+    tokens_after = REGISTRY.get_sample_value("openai_tokens_total", labels)
+    assert tokens_after == tokens_before + 500
+    assert budget_guard.tokens_per_minute() == 1500
+    # gpt-4: $30 per million prompt tokens and $60 per million completion tokens
+    assert budget_guard.window_cost() == pytest.approx(0.06)
 
-                Provide concise responses that:
-                1. Start with a direct answer
-                2. Include only essential examples
-                3. Explain key terms briefly
-                4. Add critical tips only
-                5. Use bullet points for steps
-                6. Use code blocks when necessary
 
-                Keep the tone professional but friendly. Do not mention you are an AI.
-                Be clear and to the point.
+def chat_completion(content: str, completion_tokens: int = 100) -> ChatCompletion:
+    return ChatCompletion(
+        id="test-id",
+        choices=[
+            {
+                "message": ChatCompletionMessage(content=content, role="assistant"),
+                "index": 0,
+                "finish_reason": "stop",
+            }
+        ],
+        created=1234567890,
+        model="gpt-4",
+        object="chat.completion",
+        usage=CompletionUsage(
+            prompt_tokens=10,
+            completion_tokens=completion_tokens,
+            total_tokens=10 + completion_tokens,
+        ),
+    )
 
-                {format_instructions}"""
+
+def parse_results(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "ai_output_parse_total", {"operation": "answer", "result": result}
+        )
+        or 0.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_response_reformats_unparseable_output(
+    ai_repository: AIGenerationRepository,
+    mock_openai_client: OpenAI,
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that an unparseable answer is reformatted by the cheap model."""
+    # Arrange
+    mock_openai_client.chat.completions.create.side_effect = [
+        chat_completion("Answer: Test answer\nSources: Test Document 1", 300),
+        chat_completion(
+            '{"answer": "Test answer", "used_documents": ["Test Document 1"]}'
+        ),
+    ]
+    wasted_before = (
+        REGISTRY.get_sample_value(
+            "ai_output_wasted_tokens_total", {"operation": "answer"}
+        )
+        or 0.0
+    )
+    reformatted_before = parse_results("reformatted")
+
+    # Act
+    answer, used_docs = await ai_repository.generate_response(
+        "Test question", sample_faq_documents
     )
+
+    # Assert
+    assert answer == "Test answer"
+    assert [doc.id for doc in used_docs] == [1]
+    reformat_call = mock_openai_client.chat.completions.create.call_args_list[1]
+    assert reformat_call.kwargs["model"] == "gpt-4o-mini"
+    assert reformat_call.kwargs["response_format"] == {"type": "json_object"}
+    assert parse_results("reformatted") == reformatted_before + 1
     assert (
-        template.messages[1].prompt.template
-        == """Context:
-                {context}
+        REGISTRY.get_sample_value(
+            "ai_output_wasted_tokens_total", {"operation": "answer"}
+        )
+        == wasted_before + 300
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_response_falls_back_to_plain_text(
+    mock_openai_client: OpenAI, sample_faq_documents: list[FaqDocumentRecord]
+) -> None:
+    """Test that without a reformat model the raw output is used as the answer."""
+    # Arrange
+    ai_repository = AIGenerationRepository(
+        mock_openai_client, models=OpenAIModels(reformat=None)
+    )
+    mock_openai_client.chat.completions.create.return_value = chat_completion(
+        "You can withdraw your earnings from the Payments page."
+    )
+    plain_text_before = parse_results("plain_text")
+
+    # Act
+    answer, used_docs = await ai_repository.generate_response(
+        "Test question", sample_faq_documents
+    )
+
+    # Assert
+    assert answer == "You can withdraw your earnings from the Payments page."
+    assert used_docs == []
+    mock_openai_client.chat.completions.create.assert_called_once()
+    assert "response_format" not in (
+        mock_openai_client.chat.completions.create.call_args.kwargs
+    )
+    assert parse_results("plain_text") == plain_text_before + 1
+
+
+def test_create_messages(sample_faq_documents: list[FaqDocumentRecord]) -> None:
+    """Test _create_messages builds the prompts without templating libraries."""
+    # Act
+    messages = AIGenerationRepository._create_messages(
+        "How do I get paid?", sample_faq_documents
+    )
+
+    # Assert
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert messages[0]["content"].startswith(
+        "You are a support assistant for the Shakers platform.\n"
+    )
+    assert '"used_documents"' in messages[0]["content"]
+    assert messages[1]["content"].startswith(
+        "Context:\n[1] Document: Test Document 1\nContent: Summary of test document 1"
+    )
+    assert messages[1]["content"].endswith("\n\nUser question: How do I get paid?")
+
+
+def test_create_messages_with_conversation(
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that follow-ups are prompted with the previous turns."""
+    # Arrange
+    conversation = [
+        ConversationTurn("How do I get paid?", "Payments are sent weekly.", (1,))
+    ]
+
+    # Act
+    messages = AIGenerationRepository._create_messages(
+        "And for freelancers?", sample_faq_documents, conversation
+    )
 
-                User question: {query}"""
+    # Assert
+    assert messages[1]["content"].endswith(
+        "\n\nConversation so far:\n"
+        "User: How do I get paid?\nAssistant: Payments are sent weekly.\n\n"
+        "User question: And for freelancers?"
     )
 
 
-def test_prepare_context(sample_faq_documents: list[FaqDocument]) -> None:
+def test_answer_prompt_prefix_is_stable(
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that only the end of answer prompts varies between requests."""
+    # Arrange
+    corpus = PromptCorpus.from_documents(
+        [
+            *sample_faq_documents,
+            FaqDocumentRecord(
+                id=3,
+                title="Test Document 3",
+                link="http://test3.com",
+                category=FaqCategory.PLATFORM_OVERVIEW,
+                llm_summary="Summary of test document 3",
+            ),
+        ]
+    )
+    requests = [
+        ("How do I get paid?", sample_faq_documents, []),
+        (
+            "And for freelancers?",
+            sample_faq_documents[1:],
+            [ConversationTurn("How do I get paid?", "Weekly.")],
+        ),
+    ]
+
+    # Act
+    plain = [AIGenerationRepository._create_messages(*request) for request in requests]
+    with_corpus = [
+        AIGenerationRepository._create_messages(*request, corpus)
+        for request in requests
+    ]
+
+    # Assert
+    # The system message is the same byte for byte and holds no request data
+    assert plain[0][0] == plain[1][0]
+    assert with_corpus[0][0] == with_corpus[1][0]
+    assert with_corpus[0][0]["content"].startswith(plain[0][0]["content"])
+    assert "[3] Document: Test Document 3" in with_corpus[0][0]["content"]
+    for messages in plain + with_corpus:
+        assert "How do I get paid?" not in messages[0]["content"]
+    assert with_corpus[1][1]["content"] == (
+        "Documents retrieved for this question: [2]\n\n"
+        "Conversation so far:\nUser: How do I get paid?\nAssistant: Weekly.\n\n"
+        "User question: And for freelancers?"
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_response_with_prompt_corpus(
+    mock_openai_client: OpenAI, sample_faq_documents: list[FaqDocumentRecord]
+) -> None:
+    """Test that answers cite the corpus and cached prompt tokens are counted."""
+    # Arrange
+    ai_repository = AIGenerationRepository(
+        mock_openai_client,
+        prompt_corpus=PromptCorpus.from_documents(sample_faq_documents),
+    )
+    response = chat_completion('{"answer": "Test answer", "used_documents": [2]}')
+    assert response.usage is not None
+    response.usage.prompt_tokens_details = PromptTokensDetails(cached_tokens=1024)
+    mock_openai_client.chat.completions.create.return_value = response
+    labels = {"operation": "answer", "model": "gpt-4"}
+    cached_before = (
+        REGISTRY.get_sample_value("openai_cached_prompt_tokens_total", labels) or 0.0
+    )
+
+    # Act
+    answer, used_docs = await ai_repository.generate_response(
+        "Test question", sample_faq_documents[1:]
+    )
+
+    # Assert
+    assert answer == "Test answer"
+    assert used_docs == sample_faq_documents[1:]
+    messages = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert "[1] Document: Test Document 1" in messages[0]["content"]
+    cached_after = REGISTRY.get_sample_value(
+        "openai_cached_prompt_tokens_total", labels
+    )
+    assert cached_after == cached_before + 1024
+
+
+def test_prepare_context(sample_faq_documents: list[FaqDocumentRecord]) -> None:
     """Test _prepare_context static method."""
     # Act
     context = AIGenerationRepository._prepare_context(sample_faq_documents)
@@ -168,7 +472,7 @@ def test_prepare_context(sample_faq_documents: list[FaqDocument]) -> None:
     assert "Summary of test document 2" in context
 
 
-def test_get_used_documents(sample_faq_documents: list[FaqDocument]) -> None:
+def test_get_used_documents(sample_faq_documents: list[FaqDocumentRecord]) -> None:
     """Test _get_used_documents static method."""
     # Arrange
     parsed_response = FormattedResponse(
@@ -186,6 +490,38 @@ def test_get_used_documents(sample_faq_documents: list[FaqDocument]) -> None:
     assert used_docs[0].title == "Test Document 1"
 
 
+@pytest.mark.parametrize(
+    ("citations", "expected_ids", "result"),
+    [
+        ([2, 1, 2], [1, 2], "number"),
+        (["[2]"], [2], "number"),
+        (["test document 2"], [2], "title"),
+        (["Test Documents 2"], [2], "fuzzy_title"),
+        ([3, "Pricing"], [], "unresolved"),
+    ],
+)
+def test_resolve_used_documents(
+    sample_faq_documents: list[FaqDocumentRecord],
+    citations: list[int | str],
+    expected_ids: list[int],
+    result: str,
+) -> None:
+    """Test citations are resolved by number, then by exact or similar title."""
+    # Arrange
+    count_before = (
+        REGISTRY.get_sample_value("ai_citations_total", {"result": result}) or 0.0
+    )
+
+    # Act
+    used_docs = resolve_used_documents(citations, sample_faq_documents)
+
+    # Assert
+    assert [doc.id for doc in used_docs] == expected_ids
+    assert REGISTRY.get_sample_value(
+        "ai_citations_total", {"result": result}
+    ) == count_before + len(citations)
+
+
 @pytest.mark.asyncio
 async def test_generate_embeddings_error_handling(
     ai_repository: AIGenerationRepository, mock_openai_client: OpenAI
@@ -204,7 +540,7 @@ async def test_generate_embeddings_error_handling(
 async def test_generate_response_error_handling(
     ai_repository: AIGenerationRepository,
     mock_openai_client: OpenAI,
-    sample_faq_documents: list[FaqDocument],
+    sample_faq_documents: list[FaqDocumentRecord],
 ) -> None:
     """Test error handling in generate_response method."""
     # Arrange
@@ -214,3 +550,33 @@ async def test_generate_response_error_handling(
     with pytest.raises(Exception) as exc_info:
         await ai_repository.generate_response("Test question", sample_faq_documents)
     assert str(exc_info.value) == "API Error"
+
+
+@pytest.mark.asyncio
+async def test_get_recommendations_uses_configured_chat_model(
+    mock_openai_client: OpenAI,
+) -> None:
+    """Test that recommendations are generated with the configured chat model."""
+    # Arrange
+    ai_repository = AIGenerationRepository(
+        mock_openai_client, models=OpenAIModels(chat="gpt-4o")
+    )
+    mock_openai_client.chat.completions.create.return_value = chat_completion(
+        "- Payments: you asked about invoices"
+    )
+    history = [
+        UserQueryHistory(
+            user_id=1,
+            user_question="How do I send an invoice?",
+            response="Use the billing page.",
+            created_at=datetime.now(UTC),
+        )
+    ]
+
+    # Act
+    result = await ai_repository.get_recommendations(history)
+
+    # Assert
+    assert result == "- Payments: you asked about invoices"
+    create_call = mock_openai_client.chat.completions.create.call_args
+    assert create_call.kwargs["model"] == "gpt-4o"
@@ -1,64 +1,234 @@
-import json
 import logging
+from array import array
+from collections.abc import Sequence
 from typing import Any
 
 from asyncpg import Connection
 
 from src.application.interfaces.ai_support_interface import (
     AISupportInterface,
+    CanonicalAnswerMatch,
+    HistoryCursor,
     UserQueryHistory,
+    UserQueryHistoryEntry,
+    UserQueryHistoryPage,
     UserResponse,
 )
-from src.types.documents import FaqDocument
+from src.infrastructure.tracing import set_span_attributes, traced
+from src.types.documents import FaqCategory, FaqDocument, FaqDocumentRecord
+from src.types.embeddings import (
+    ActiveEmbeddings,
+    EmbeddingStorage,
+    to_float32_vector,
+)
 
 
 class AISupportRepository(AISupportInterface):
-    def __init__(self, connection: Connection) -> None:
+    def __init__(
+        self,
+        connection: Connection,
+        embedding_storage: EmbeddingStorage = EmbeddingStorage.FULL,
+        embeddings: ActiveEmbeddings = ActiveEmbeddings(),
+    ) -> None:
         self.connection = connection
+        self.embedding_storage = embedding_storage
+        # FAQ searches use the columns of the active slot, and user interactions
+        # are stored with the model of its embeddings
+        self.embeddings = embeddings
         self.logger = logging.getLogger(__name__)
 
     @staticmethod
-    def _format_embeddings(embeddings: list[float]) -> str:
-        """Format embeddings list as a PostgreSQL array string."""
-        return f"[{', '.join(map(str, embeddings))}]"
+    def _convert_to_faq_document_record(row: dict[str, Any]) -> FaqDocumentRecord:
+        """Convert a database record to a FaqDocumentRecord instance."""
+        return FaqDocumentRecord(
+            id=row["id"],
+            title=row["title"],
+            link=row["link"],
+            category=FaqCategory(row["category"]),
+            llm_summary=row["llm_summary"],
+        )
 
     @staticmethod
-    def _convert_to_faq_document(doc: dict[str, Any]) -> FaqDocument:
-        """Convert a database record to a FaqDocument instance."""
-        doc_dict = dict(doc)
-        doc_dict["embedding"] = AISupportRepository._parse_embedding(
-            doc_dict["embedding"]
+    def _convert_to_canonical_answer_match(
+        row: dict[str, Any],
+    ) -> CanonicalAnswerMatch:
+        """Convert a database record to a CanonicalAnswerMatch instance."""
+        return CanonicalAnswerMatch(
+            faq_document_id=row["faq_document_id"],
+            title=row["title"],
+            link=row["link"],
+            answer=row["answer"],
+            answer_embedding=AISupportRepository._parse_embedding(
+                row["answer_embedding"]
+            )
+            if row["answer_embedding"] is not None
+            else None,
+            distance=row["distance"],
         )
-        return FaqDocument(**doc_dict)
 
     @staticmethod
-    def _parse_embedding(embedding: str | list[float]) -> list[float]:
-        """Parse embedding from database format to list of floats."""
-        if isinstance(embedding, str):
-            try:
-                return json.loads(embedding)
-            except json.JSONDecodeError:
-                return [float(x.strip()) for x in embedding.strip("[]").split(",")]
-        return embedding
+    def _parse_embedding(embedding: str | Sequence[float]) -> array:
+        """
+        Parse embedding from database format to a float32 array.
 
+        Connections with the binary vector codecs already return arrays; the
+        text format is only seen on connections opened before the schema existed.
+        """
+        return to_float32_vector(embedding)
+
+    @traced("db.faq_documents_by_similarity")
     async def get_faq_documents_by_similarity(
         self,
-        embeddings: list[float],
+        embeddings: Sequence[float],
         max_documents: int = 5,
         i_am_a_developer: bool = False,
-    ) -> list[FaqDocument]:
-        query = """
-        SELECT * FROM platform_information.faq_documents
+    ) -> list[FaqDocumentRecord]:
+        query = f"""
+        SELECT id, title, link, category, llm_summary
+        FROM platform_information.faq_documents
         WHERE ($3 = true OR category != 'technical')
-        ORDER BY embedding <=> $1::vector
+        ORDER BY {self.embeddings.slot.column("embedding")} <=> $1::vector
         LIMIT $2
         """
         faq_similar_documents = await self.connection.fetch(
-            query, self._format_embeddings(embeddings), max_documents, i_am_a_developer
+            query, embeddings, max_documents, i_am_a_developer
+        )
+
+        set_span_attributes(documents=len(faq_similar_documents))
+        return [
+            self._convert_to_faq_document_record(doc) for doc in faq_similar_documents
+        ]
+
+    @traced("db.faq_documents")
+    async def get_faq_documents(
+        self, i_am_a_developer: bool = False
+    ) -> list[FaqDocumentRecord]:
+        query = """
+        SELECT id, title, link, category, llm_summary
+        FROM platform_information.faq_documents
+        WHERE llm_summary IS NOT NULL
+        AND ($1 = true OR category != 'technical')
+        ORDER BY id
+        """
+        documents = await self.connection.fetch(query, i_am_a_developer)
+        return [self._convert_to_faq_document_record(doc) for doc in documents]
+
+    @traced("db.faq_documents_by_similarity_batch")
+    async def get_faq_documents_by_similarity_batch(
+        self,
+        embeddings: list[Sequence[float]],
+        i_am_a_developer: list[bool],
+        max_documents: int = 5,
+    ) -> list[list[FaqDocumentRecord]]:
+        """Retrieve similar FAQ documents for all query embeddings in one query."""
+        query = f"""
+        SELECT q.query_index, f.*
+        FROM unnest($1::vector[], $2::boolean[])
+            WITH ORDINALITY AS q(embedding, i_am_a_developer, query_index)
+        CROSS JOIN LATERAL (
+            SELECT id, title, link, category, llm_summary
+            FROM platform_information.faq_documents
+            WHERE (q.i_am_a_developer OR category != 'technical')
+            ORDER BY platform_information.faq_documents.{self.embeddings.slot.column("embedding")} <=> q.embedding
+            LIMIT $3
+        ) f
+        ORDER BY q.query_index
+        """
+        records = await self.connection.fetch(
+            query,
+            embeddings,
+            i_am_a_developer,
+            max_documents,
         )
 
-        return [self._convert_to_faq_document(doc) for doc in faq_similar_documents]
+        set_span_attributes(queries=len(embeddings), documents=len(records))
+        similar_documents: list[list[FaqDocumentRecord]] = [[] for _ in embeddings]
+        for record in records:
+            similar_documents[record["query_index"] - 1].append(
+                self._convert_to_faq_document_record(record)
+            )
+        return similar_documents
 
+    @traced("db.canonical_answer_by_similarity")
+    async def get_canonical_answer_by_similarity(
+        self,
+        embeddings: Sequence[float],
+        max_distance: float,
+        i_am_a_developer: bool = False,
+    ) -> CanonicalAnswerMatch | None:
+        """Retrieve the nearest canonical answer if it is within max_distance."""
+        question_embedding = self.embeddings.slot.column("question_embedding")
+        # Order by distance and filter afterwards so the HNSW index is used
+        query = f"""
+        SELECT
+            d.id AS faq_document_id,
+            d.title,
+            d.link,
+            ca.answer,
+            ca.{self.embeddings.slot.column("answer_embedding")} AS answer_embedding,
+            ca.{question_embedding} <=> $1::vector AS distance
+        FROM platform_information.faq_canonical_answers ca
+        JOIN platform_information.faq_documents d ON d.id = ca.faq_document_id
+        WHERE ($2 = true OR d.category != 'technical')
+        ORDER BY ca.{question_embedding} <=> $1::vector
+        LIMIT 1
+        """
+        try:
+            row = await self.connection.fetchrow(query, embeddings, i_am_a_developer)
+            if row is None or row["distance"] > max_distance:
+                return None
+
+            return self._convert_to_canonical_answer_match(row)
+        except Exception as e:
+            self.logger.error(f"Error retrieving canonical answer: {str(e)}")
+            raise
+
+    @traced("db.canonical_answers_by_similarity_batch")
+    async def get_canonical_answers_by_similarity_batch(
+        self,
+        embeddings: list[Sequence[float]],
+        max_distance: float,
+        i_am_a_developer: list[bool],
+    ) -> list[CanonicalAnswerMatch | None]:
+        """Retrieve the nearest canonical answer for each query embedding."""
+        question_embedding = self.embeddings.slot.column("question_embedding")
+        query = f"""
+        SELECT q.query_index, c.*
+        FROM unnest($1::vector[], $2::boolean[])
+            WITH ORDINALITY AS q(embedding, i_am_a_developer, query_index)
+        CROSS JOIN LATERAL (
+            SELECT
+                d.id AS faq_document_id,
+                d.title,
+                d.link,
+                ca.answer,
+                ca.{self.embeddings.slot.column("answer_embedding")} AS answer_embedding,
+                ca.{question_embedding} <=> q.embedding AS distance
+            FROM platform_information.faq_canonical_answers ca
+            JOIN platform_information.faq_documents d ON d.id = ca.faq_document_id
+            WHERE (q.i_am_a_developer OR d.category != 'technical')
+            ORDER BY ca.{question_embedding} <=> q.embedding
+            LIMIT 1
+        ) c
+        """
+        try:
+            records = await self.connection.fetch(
+                query,
+                embeddings,
+                i_am_a_developer,
+            )
+            matches: list[CanonicalAnswerMatch | None] = [None] * len(embeddings)
+            for record in records:
+                if record["distance"] <= max_distance:
+                    matches[record["query_index"] - 1] = (
+                        self._convert_to_canonical_answer_match(record)
+                    )
+            return matches
+        except Exception as e:
+            self.logger.error(f"Error retrieving canonical answers: {str(e)}")
+            raise
+
+    @traced("db.save_user_response")
     async def save_user_response(self, user_response: UserResponse) -> None:
         """
         Save a user question and its AI response to the database.
@@ -72,49 +242,140 @@ class AISupportRepository(AISupportInterface):
             Exception: For any other unexpected errors during save operation
         """
         try:
-            query = """
-            INSERT INTO user_management.user_response
-            (user_id, user_question, question_embedding, response, response_embedding)
-            VALUES ($1, $2, $3, $4, $5)
-            """
+            if self.embedding_storage == EmbeddingStorage.HALFVEC:
+                query = """
+                INSERT INTO user_management.user_response
+                (user_id, user_question, question_embedding_half, response, response_embedding_half, embedding_model)
+                VALUES ($1, $2, $3::halfvec, $4, $5::halfvec, $6)
+                """
+            else:
+                query = """
+                INSERT INTO user_management.user_response
+                (user_id, user_question, question_embedding, response, response_embedding, embedding_model)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                """
 
             await self.connection.execute(
                 query,
                 user_response.user_id,
                 user_response.user_question,
-                self._format_embeddings(user_response.question_embedding),
+                user_response.question_embedding,
                 user_response.response,
-                self._format_embeddings(user_response.response_embedding),
+                user_response.response_embedding,
+                self.embeddings.model,
             )
             self.logger.debug(f"Saved user response for user {user_response.user_id}")
         except Exception as e:
             self.logger.error(f"Error saving user response: {str(e)}")
             raise
 
-    async def get_user_query_history(self, user_id: int) -> list[UserQueryHistory]:
+    @traced("db.save_user_responses")
+    async def save_user_responses(self, user_responses: list[UserResponse]) -> None:
+        """Save several user interactions with one bulk insert."""
+        if self.embedding_storage == EmbeddingStorage.HALFVEC:
+            query = """
+            INSERT INTO user_management.user_response
+            (user_id, user_question, question_embedding_half, response, response_embedding_half, embedding_model)
+            SELECT *, $6 FROM unnest(
+                $1::integer[], $2::text[], $3::halfvec[], $4::text[], $5::halfvec[]
+            )
+            """
+        else:
+            query = """
+            INSERT INTO user_management.user_response
+            (user_id, user_question, question_embedding, response, response_embedding, embedding_model)
+            SELECT *, $6 FROM unnest(
+                $1::integer[], $2::text[], $3::vector[], $4::text[], $5::vector[]
+            )
+            """
+        try:
+            await self.connection.execute(
+                query,
+                [user_response.user_id for user_response in user_responses],
+                [user_response.user_question for user_response in user_responses],
+                [user_response.question_embedding for user_response in user_responses],
+                [user_response.response for user_response in user_responses],
+                [user_response.response_embedding for user_response in user_responses],
+                self.embeddings.model,
+            )
+            self.logger.debug(f"Saved {len(user_responses)} user responses")
+        except Exception as e:
+            self.logger.error(f"Error saving user responses: {str(e)}")
+            raise
+
+    @traced("db.user_query_history")
+    async def get_user_query_history(
+        self,
+        user_id: int,
+        limit: int = 10,
+        response_preview_chars: int | None = None,
+    ) -> list[UserQueryHistory]:
         """Retrieve the user's query history."""
-        query = """
+        page = await self.get_user_query_history_page(
+            user_id, limit=limit, response_preview_chars=response_preview_chars
+        )
+        return [
+            UserQueryHistory(
+                user_id=item.user_id,
+                user_question=item.user_question,
+                response=item.response,
+                created_at=item.created_at,
+            )
+            for item in page.items
+        ]
+
+    @traced("db.user_query_history_page")
+    async def get_user_query_history_page(
+        self,
+        user_id: int,
+        limit: int = 20,
+        cursor: HistoryCursor | None = None,
+        response_preview_chars: int | None = None,
+    ) -> UserQueryHistoryPage:
+        """
+        Retrieve one page of the user's query history, most recent first.
+
+        Pages are read with a keyset condition on (created_at, id) so each page is
+        an index range scan on idx_user_response_user_history, however deep it is.
+        One extra row is fetched to know whether another page follows.
+        """
+        keyset_condition = "AND (created_at, id) < ($4, $5)" if cursor else ""
+        query = f"""
         SELECT
+            id,
             user_id,
             user_question,
-            response,
+            CASE WHEN $3::integer IS NULL THEN response ELSE left(response, $3) END AS response,
             created_at
         FROM user_management.user_response
-        WHERE user_id = $1
-        ORDER BY created_at DESC
-        LIMIT 10
+        WHERE user_id = $1 {keyset_condition}
+        ORDER BY created_at DESC, id DESC
+        LIMIT $2
         """
+        args: list[Any] = [user_id, limit + 1, response_preview_chars]
+        if cursor:
+            args.extend([cursor.created_at, cursor.id])
         try:
-            history = await self.connection.fetch(query, user_id)
-            return [
-                UserQueryHistory(
+            records = await self.connection.fetch(query, *args)
+            items = [
+                UserQueryHistoryEntry(
+                    id=record["id"],
                     user_id=record["user_id"],
                     user_question=record["user_question"],
                     response=record["response"],
                     created_at=record["created_at"],
                 )
-                for record in history
+                for record in records[:limit]
             ]
+            next_cursor = (
+                HistoryCursor(
+                    created_at=records[limit - 1]["created_at"],
+                    id=records[limit - 1]["id"],
+                )
+                if len(records) > limit
+                else None
+            )
+            return UserQueryHistoryPage(items=items, next_cursor=next_cursor)
         except Exception as e:
             self.logger.error(f"Error retrieving user query history: {str(e)}")
             raise
@@ -132,8 +393,9 @@ class AISupportRepository(AISupportInterface):
         try:
             # Get the document from the database
             row = await self.connection.fetchrow(
-                """
-                SELECT id, title, text, link, category, embedding
+                f"""
+                SELECT id, title, text, link, category,
+                    {self.embeddings.slot.column("embedding")} AS embedding
                 FROM platform_information.faq_documents
                 WHERE id = $1
                 """,
@@ -1,12 +1,17 @@
-import json
+from array import array
+from dataclasses import FrozenInstanceError
 from datetime import UTC, datetime
 from unittest.mock import AsyncMock
 
 import pytest
 
-from src.application.interfaces.ai_support_interface import UserResponse
+from src.application.interfaces.ai_support_interface import (
+    HistoryCursor,
+    UserResponse,
+)
 from src.infrastructure.ai_support_repository import AISupportRepository
-from src.types.documents import FaqCategory, FaqDocument
+from src.types.documents import FaqCategory, FaqDocument, FaqDocumentRecord
+from src.types.embeddings import ActiveEmbeddings, EmbeddingSlot, EmbeddingStorage
 from src.types.user import User
 
 
@@ -84,37 +89,30 @@ async def test_save_user_response(
     mock_db.execute.assert_called_once()
 
 
-def test_format_embeddings() -> None:
-    """Test _format_embeddings static method."""
-    # Arrange
-    test_embedding = [0.1, 0.2, 0.3]
-
-    # Act
-    result = AISupportRepository._format_embeddings(test_embedding)
-
-    # Assert
-    assert result == "[0.1, 0.2, 0.3]"
-
-
-def test_convert_to_faq_document() -> None:
-    """Test _convert_to_faq_document static method."""
+def test_convert_to_faq_document_record() -> None:
+    """Test _convert_to_faq_document_record static method."""
     # Arrange
     test_doc = {
         "id": 1,
         "title": "Test Document",
         "link": "http://test.com",
-        "text": "Test text",
         "category": "platform_overview",
-        "embedding": json.dumps([0.1, 0.2, 0.3]),
+        "llm_summary": "Test summary",
     }
 
     # Act
-    result = AISupportRepository._convert_to_faq_document(test_doc)
+    result = AISupportRepository._convert_to_faq_document_record(test_doc)
 
     # Assert
-    assert isinstance(result, FaqDocument)
-    assert result.title == "Test Document"
-    assert result.embedding == [0.1, 0.2, 0.3]
+    assert result == FaqDocumentRecord(
+        id=1,
+        title="Test Document",
+        link="http://test.com",
+        category=FaqCategory.PLATFORM_OVERVIEW,
+        llm_summary="Test summary",
+    )
+    with pytest.raises(FrozenInstanceError):
+        result.title = "Changed"  # pyright: ignore
 
 
 def test_parse_embedding_string() -> None:
@@ -126,19 +124,19 @@ def test_parse_embedding_string() -> None:
     result = AISupportRepository._parse_embedding(test_embedding)
 
     # Assert
-    assert result == [0.1, 0.2, 0.3]
+    assert result == array("f", [0.1, 0.2, 0.3])
 
 
-def test_parse_embedding_list() -> None:
-    """Test _parse_embedding static method with list input."""
+def test_parse_embedding_array() -> None:
+    """Test _parse_embedding returns arrays from the binary codec unchanged."""
     # Arrange
-    test_embedding = [0.1, 0.2, 0.3]
+    test_embedding = array("f", [0.1, 0.2, 0.3])
 
     # Act
     result = AISupportRepository._parse_embedding(test_embedding)
 
     # Assert
-    assert result == [0.1, 0.2, 0.3]
+    assert result is test_embedding
 
 
 @pytest.mark.asyncio
@@ -160,3 +158,232 @@ async def test_save_user_response_error_handling(
     with pytest.raises(Exception) as exc_info:
         await ai_support_repository.save_user_response(user_response)
     assert str(exc_info.value) == "Database Error"
+
+
+@pytest.mark.asyncio
+async def test_get_canonical_answer_by_similarity(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test get_canonical_answer_by_similarity returns a match within the threshold."""
+    # Arrange
+    mock_db.fetchrow.return_value = {
+        "faq_document_id": 1,
+        "title": "Test Document",
+        "link": "http://test.com",
+        "answer": "Canonical answer",
+        "answer_embedding": "[0.4, 0.5, 0.6]",
+        "distance": 0.05,
+    }
+
+    # Act
+    result = await ai_support_repository.get_canonical_answer_by_similarity(
+        [0.1, 0.2, 0.3], max_distance=0.1
+    )
+
+    # Assert
+    assert result is not None
+    assert result.answer == "Canonical answer"
+    assert result.answer_embedding == array("f", [0.4, 0.5, 0.6])
+    assert result.distance == 0.05
+    mock_db.fetchrow.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_canonical_answer_by_similarity_above_threshold(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test get_canonical_answer_by_similarity ignores matches above the threshold."""
+    # Arrange
+    mock_db.fetchrow.return_value = {
+        "faq_document_id": 1,
+        "title": "Test Document",
+        "link": "http://test.com",
+        "answer": "Canonical answer",
+        "answer_embedding": None,
+        "distance": 0.3,
+    }
+
+    # Act
+    result = await ai_support_repository.get_canonical_answer_by_similarity(
+        [0.1, 0.2, 0.3], max_distance=0.1
+    )
+
+    # Assert
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_save_user_response_halfvec_storage(
+    mock_db: AsyncMock, sample_user: User
+) -> None:
+    """Test save_user_response writes half-precision columns in halfvec mode."""
+    # Arrange
+    repository = AISupportRepository(
+        mock_db, embedding_storage=EmbeddingStorage.HALFVEC
+    )
+    user_response = UserResponse(
+        user_id=sample_user.id,
+        user_question="Test question",
+        question_embedding=[0.1, 0.2, 0.3],
+        response="Test response",
+        response_embedding=[0.4, 0.5, 0.6],
+    )
+
+    # Act
+    await repository.save_user_response(user_response)
+
+    # Assert
+    query = mock_db.execute.call_args[0][0]
+    assert "question_embedding_half" in query
+    assert "$3::halfvec" in query
+
+
+@pytest.mark.asyncio
+async def test_secondary_embedding_slot(mock_db: AsyncMock, sample_user: User) -> None:
+    """Test that searches use the active slot's columns and responses its model."""
+    # Arrange
+    repository = AISupportRepository(
+        mock_db,
+        embeddings=ActiveEmbeddings(
+            slot=EmbeddingSlot.SECONDARY, model="text-embedding-3-large"
+        ),
+    )
+    mock_db.fetch.return_value = []
+    user_response = UserResponse(
+        user_id=sample_user.id,
+        user_question="Test question",
+        question_embedding=[0.1, 0.2, 0.3],
+        response="Test response",
+        response_embedding=[0.4, 0.5, 0.6],
+    )
+
+    # Act
+    await repository.get_faq_documents_by_similarity([0.1, 0.2, 0.3])
+    await repository.save_user_response(user_response)
+
+    # Assert
+    assert "ORDER BY embedding_secondary <=>" in mock_db.fetch.call_args[0][0]
+    assert mock_db.execute.call_args[0][-1] == "text-embedding-3-large"
+
+
+@pytest.mark.asyncio
+async def test_get_user_query_history_page(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test get_user_query_history_page uses the keyset cursor and detects more pages."""
+    # Arrange
+    created_at = datetime(2025, 1, 1, tzinfo=UTC)
+    mock_db.fetch.return_value = [
+        {
+            "id": record_id,
+            "user_id": 1,
+            "user_question": f"Question {record_id}",
+            "response": "Resp",
+            "created_at": created_at,
+        }
+        for record_id in (9, 8, 7)
+    ]
+    cursor = HistoryCursor(created_at=created_at, id=10)
+
+    # Act
+    page = await ai_support_repository.get_user_query_history_page(
+        1, limit=2, cursor=cursor, response_preview_chars=4
+    )
+
+    # Assert
+    assert [item.id for item in page.items] == [9, 8]
+    assert page.next_cursor == HistoryCursor(created_at=created_at, id=8)
+    query, *args = mock_db.fetch.call_args[0]
+    assert "(created_at, id) < ($4, $5)" in query
+    assert args == [1, 3, 4, created_at, 10]
+
+
+@pytest.mark.asyncio
+async def test_get_user_query_history_page_last_page(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test get_user_query_history_page returns no cursor on the last page."""
+    # Arrange
+    mock_db.fetch.return_value = [
+        {
+            "id": 1,
+            "user_id": 1,
+            "user_question": "Question",
+            "response": "Response",
+            "created_at": datetime.now(UTC),
+        }
+    ]
+
+    # Act
+    page = await ai_support_repository.get_user_query_history_page(1, limit=2)
+
+    # Assert
+    assert len(page.items) == 1
+    assert page.next_cursor is None
+    assert "(created_at, id) <" not in mock_db.fetch.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_get_faq_documents_by_similarity_batch(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test that batch search results are grouped by query index."""
+
+    # Arrange
+    def document_row(query_index: int, document_id: int) -> dict[str, object]:
+        return {
+            "query_index": query_index,
+            "id": document_id,
+            "title": f"Test Document {document_id}",
+            "link": f"http://test{document_id}.com",
+            "category": FaqCategory.PLATFORM_OVERVIEW.value,
+            "llm_summary": None,
+        }
+
+    mock_db.fetch.return_value = [
+        document_row(1, 1),
+        document_row(1, 2),
+        document_row(3, 2),
+    ]
+
+    # Act
+    result = await ai_support_repository.get_faq_documents_by_similarity_batch(
+        [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6], [0.7, 0.8, 0.9]],
+        i_am_a_developer=[False, False, True],
+    )
+
+    # Assert
+    assert [[doc.id for doc in docs] for docs in result] == [[1, 2], [], [2]]
+    call_args = mock_db.fetch.call_args[0]
+    assert call_args[1] == [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6], [0.7, 0.8, 0.9]]
+    assert call_args[2] == [False, False, True]
+    assert call_args[3] == 5
+
+
+@pytest.mark.asyncio
+async def test_save_user_responses(
+    ai_support_repository: AISupportRepository, mock_db: AsyncMock
+) -> None:
+    """Test that several user responses are saved with one bulk insert."""
+    # Arrange
+    user_responses = [
+        UserResponse(
+            user_id=user_id,
+            user_question=f"Question {user_id}",
+            question_embedding=[0.1, 0.2, 0.3],
+            response=f"Response {user_id}",
+            response_embedding=[0.4, 0.5, 0.6],
+        )
+        for user_id in (1, 2)
+    ]
+
+    # Act
+    await ai_support_repository.save_user_responses(user_responses)
+
+    # Assert
+    mock_db.execute.assert_called_once()
+    call_args = mock_db.execute.call_args[0]
+    assert "unnest" in call_args[0]
+    assert call_args[1] == [1, 2]
+    assert call_args[2] == ["Question 1", "Question 2"]
+    assert call_args[5] == [[0.4, 0.5, 0.6], [0.4, 0.5, 0.6]]
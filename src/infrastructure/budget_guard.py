@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from collections import deque
+from functools import cache
+
+from src.config.settings import get_settings
+from src.infrastructure.prometheus_metrics import (
+    AI_BUDGET_THROTTLED_TOTAL,
+    AI_BUDGET_WINDOW_COST,
+    OPENAI_TOKENS_PER_SECOND,
+    multiprocess_metrics_enabled,
+)
+
+# Window of the tokens-per-minute rate limit and of the throughput gauge
+RATE_WINDOW_SECONDS = 60.0
+# Interval between updates of the gauges of a worker in multiprocess mode
+METRICS_UPDATE_SECONDS = 15.0
+
+
+class BudgetExceededError(Exception):
+    """Raised when non-critical AI work is throttled by the budget guard."""
+
+    def __init__(self, operation: str, retry_after: float) -> None:
+        super().__init__(
+            f"AI budget nearly exhausted, {operation} throttled for {retry_after:.0f}s"
+        )
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+class BudgetGuard:
+    """
+    Rolling-window guard over OpenAI spend and token throughput.
+
+    Every OpenAI call is recorded. Once the spend within the window or the tokens
+    used in the last minute reach throttle_ratio of their limit, non-critical
+    operations (recommendations, ingestion) are throttled so that user-facing
+    answers keep the remaining budget.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600.0,
+        max_cost_usd: float | None = None,
+        max_tokens_per_minute: int | None = None,
+        throttle_ratio: float = 0.8,
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.window_seconds = window_seconds
+        self.max_cost_usd = max_cost_usd
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.throttle_ratio = throttle_ratio
+        # (timestamp, cost, tokens) per call, oldest first
+        self._events: deque[tuple[float, float, int]] = deque()
+        # Calls are recorded from the worker threads running the OpenAI client
+        self._lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def _prune(self, now: float) -> None:
+        horizon = now - max(self.window_seconds, RATE_WINDOW_SECONDS)
+        while self._events and self._events[0][0] < horizon:
+            self._events.popleft()
+
+    def record(self, cost: float, tokens: int) -> None:
+        """Record the cost and tokens of one OpenAI call."""
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, cost, tokens))
+            self._prune(now)
+
+    def window_cost(self) -> float:
+        """Estimated spend within the budget window."""
+        horizon = time.monotonic() - self.window_seconds
+        with self._lock:
+            return sum(cost for at, cost, _ in self._events if at >= horizon)
+
+    def tokens_per_minute(self) -> int:
+        """Tokens used in the last minute."""
+        horizon = time.monotonic() - RATE_WINDOW_SECONDS
+        with self._lock:
+            return sum(tokens for at, _, tokens in self._events if at >= horizon)
+
+    def tokens_per_second(self) -> float:
+        """Token throughput over the last minute."""
+        return self.tokens_per_minute() / RATE_WINDOW_SECONDS
+
+    def export_metrics(self) -> None:
+        """
+        Report the spend and throughput of this guard in the budget gauges.
+
+        The gauges are computed when scraped, so they fall back as calls leave
+        the windows. Multiprocess metrics are read from the files of the
+        workers instead, which start() updates periodically.
+        """
+        AI_BUDGET_WINDOW_COST.set_function(self.window_cost)
+        OPENAI_TOKENS_PER_SECOND.set_function(self.tokens_per_second)
+
+    def start(self) -> None:
+        """Update the budget gauges every METRICS_UPDATE_SECONDS in multiprocess mode."""
+        if multiprocess_metrics_enabled() and self._task is None:
+            self._task = asyncio.create_task(self._update_metrics_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _update_metrics_periodically(self) -> None:
+        while True:
+            AI_BUDGET_WINDOW_COST.set(self.window_cost())
+            OPENAI_TOKENS_PER_SECOND.set(self.tokens_per_second())
+            await asyncio.sleep(METRICS_UPDATE_SECONDS)
+
+    def retry_after(self) -> float:
+        """
+        Seconds until enough of the window has expired to stop throttling.
+
+        Returns 0 when non-critical work is currently allowed.
+        """
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            events = list(self._events)
+        for limit, window, index in (
+            (self.max_cost_usd, self.window_seconds, 1),
+            (self.max_tokens_per_minute, RATE_WINDOW_SECONDS, 2),
+        ):
+            if limit is None:
+                continue
+            in_window = [event for event in events if event[0] >= now - window]
+            used = sum(event[index] for event in in_window)
+            # Drop the oldest calls until usage is back under the threshold
+            for event in in_window:
+                if used < limit * self.throttle_ratio:
+                    break
+                used -= event[index]
+                wait = max(wait, event[0] + window - now)
+        return wait
+
+    def should_throttle(self) -> bool:
+        return self.retry_after() > 0
+
+    def check(self, operation: str) -> None:
+        """
+        Allow a non-critical operation or throttle it.
+
+        Raises:
+            BudgetExceededError: If the budget is close to its limits
+        """
+        retry_after = self.retry_after()
+        if retry_after > 0:
+            AI_BUDGET_THROTTLED_TOTAL.labels(operation=operation).inc()
+            raise BudgetExceededError(operation, retry_after)
+
+    async def wait_for_budget(self, operation: str) -> None:
+        """Wait until a non-critical operation fits within the budget."""
+        while (retry_after := self.retry_after()) > 0:
+            AI_BUDGET_THROTTLED_TOTAL.labels(operation=operation).inc()
+            self.logger.warning(
+                f"AI budget nearly exhausted, pausing {operation} for {retry_after:.0f}s"
+            )
+            await asyncio.sleep(retry_after)
+
+
+@cache
+def get_budget_guard() -> BudgetGuard:
+    settings = get_settings()
+    # Every worker process only sees its own calls, so each gets an equal share
+    workers = settings.APP_WORKERS
+    max_cost_usd = settings.AI_BUDGET_MAX_COST_USD
+    max_tokens_per_minute = settings.AI_BUDGET_MAX_TOKENS_PER_MINUTE
+    budget_guard = BudgetGuard(
+        window_seconds=settings.AI_BUDGET_WINDOW_SECONDS,
+        max_cost_usd=max_cost_usd / workers if max_cost_usd is not None else None,
+        max_tokens_per_minute=(
+            max_tokens_per_minute // workers
+            if max_tokens_per_minute is not None
+            else None
+        ),
+        throttle_ratio=settings.AI_BUDGET_THROTTLE_RATIO,
+    )
+    budget_guard.export_metrics()
+    return budget_guard
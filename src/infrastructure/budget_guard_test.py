@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.infrastructure.budget_guard import BudgetExceededError, BudgetGuard
+
+
+def test_budget_guard_allows_work_below_threshold() -> None:
+    """Test that work is allowed while spend stays below the throttle ratio."""
+    # Arrange
+    budget_guard = BudgetGuard(max_cost_usd=1.0, throttle_ratio=0.8)
+
+    # Act
+    budget_guard.record(cost=0.5, tokens=1000)
+
+    # Assert
+    assert budget_guard.window_cost() == pytest.approx(0.5)
+    assert budget_guard.should_throttle() is False
+    budget_guard.check("recommendation")
+
+
+def test_budget_guard_throttles_near_cost_limit() -> None:
+    """Test that work is throttled once spend reaches the throttle ratio."""
+    # Arrange
+    budget_guard = BudgetGuard(
+        window_seconds=60.0, max_cost_usd=1.0, throttle_ratio=0.8
+    )
+
+    # Act
+    budget_guard.record(cost=0.5, tokens=1000)
+    budget_guard.record(cost=0.4, tokens=1000)
+
+    # Assert
+    with pytest.raises(BudgetExceededError) as exc_info:
+        budget_guard.check("recommendation")
+    assert exc_info.value.operation == "recommendation"
+    assert 0 < exc_info.value.retry_after <= 60.0
+
+
+def test_budget_guard_throttles_near_token_rate_limit() -> None:
+    """Test that work is throttled when the tokens-per-minute limit is close."""
+    # Arrange
+    budget_guard = BudgetGuard(max_tokens_per_minute=10_000, throttle_ratio=0.5)
+
+    # Act
+    budget_guard.record(cost=0.0, tokens=6_000)
+
+    # Assert
+    assert budget_guard.tokens_per_minute() == 6_000
+    assert budget_guard.should_throttle() is True
+
+
+def test_budget_guard_without_limits_never_throttles() -> None:
+    """Test that a guard without limits only records usage."""
+    # Arrange
+    budget_guard = BudgetGuard()
+
+    # Act
+    budget_guard.record(cost=100.0, tokens=1_000_000)
+
+    # Assert
+    assert budget_guard.retry_after() == 0
+
+
+def test_budget_guard_metrics_expire_with_the_window() -> None:
+    """Test that the budget gauges fall back once calls leave the window."""
+    # Arrange
+    budget_guard = BudgetGuard(window_seconds=120.0)
+    budget_guard.export_metrics()
+    with patch("time.monotonic", return_value=1000.0):
+        budget_guard.record(cost=0.5, tokens=6_000)
+
+    # Act
+    with patch("time.monotonic", return_value=1030.0):
+        active = (
+            REGISTRY.get_sample_value("ai_budget_window_cost_usd"),
+            REGISTRY.get_sample_value("openai_tokens_per_second"),
+        )
+    with patch("time.monotonic", return_value=1200.0):
+        idle = (
+            REGISTRY.get_sample_value("ai_budget_window_cost_usd"),
+            REGISTRY.get_sample_value("openai_tokens_per_second"),
+        )
+
+    # Assert
+    assert active == (pytest.approx(0.5), pytest.approx(100.0))
+    assert idle == (0.0, 0.0)
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import Sequence
+
+from src.application.interfaces.ai_generation_interface import AIGenerationInterface
+from src.application.interfaces.ai_support_interface import UserQueryHistory
+from src.infrastructure.prometheus_metrics import SHARED_CACHE_REQUESTS_TOTAL
+from src.infrastructure.shared_cache import SharedCache
+from src.types.conversation import ConversationTurn
+from src.types.documents import (
+    CanonicalQuestionAnswer,
+    FaqCategory,
+    FaqDocument,
+    FaqDocumentRecord,
+)
+from src.types.embeddings import Embedding, EmbeddingResponse
+
+# Usage reported for embeddings served from the cache: no tokens were spent
+CACHED_USAGE = {"prompt_tokens": 0, "total_tokens": 0}
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _encode_embedding(response: EmbeddingResponse) -> bytes:
+    return response.model.encode() + b"\n" + response.embedding.vector.tobytes()
+
+
+def _decode_embedding(value: bytes) -> EmbeddingResponse:
+    model, _, vector = value.partition(b"\n")
+    return EmbeddingResponse(
+        embedding=Embedding(vector=vector),
+        model=model.decode(),
+        usage=CACHED_USAGE,
+    )
+
+
+def _encode_answer(answer: str, used_docs: list[FaqDocumentRecord]) -> bytes:
+    # Cited documents are stored with the answer: with the prompt corpus they
+    # need not be among the context documents of the query
+    entry = {
+        "answer": answer,
+        "used_documents": [
+            [doc.id, doc.title, doc.link, doc.category.value] for doc in used_docs
+        ],
+    }
+    return json.dumps(entry).encode()
+
+
+def _decode_answer(value: bytes) -> tuple[str, list[FaqDocumentRecord]]:
+    entry = json.loads(value)
+    return entry["answer"], [
+        FaqDocumentRecord(
+            id=document_id, title=title, link=link, category=FaqCategory(category)
+        )
+        for document_id, title, link, category in entry["used_documents"]
+    ]
+
+
+class CachedAIGenerationRepository(AIGenerationInterface):
+    """
+    AI generation repository serving embeddings, and optionally answers, from the
+    cache shared by all workers.
+
+    Embeddings are deterministic for a model, so they are kept until evicted.
+    Answers are only reused for answer_ttl_seconds, keyed on the query, the
+    exact context documents and the version of the prompt corpus the answers
+    were generated with. Cache failures are logged and treated as misses,
+    so the shared cache never makes a request fail.
+    """
+
+    def __init__(
+        self,
+        repository: AIGenerationInterface,
+        cache: SharedCache,
+        namespace: str,
+        answer_ttl_seconds: float = 0.0,
+        corpus_version: str = "",
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.repository = repository
+        self.cache = cache
+        self.namespace = namespace
+        self.answer_ttl_seconds = answer_ttl_seconds
+        self.corpus_version = corpus_version
+
+    def _embedding_key(self, text: str) -> str:
+        return f"embedding:{self.namespace}:{_digest(text)}"
+
+    def _answer_key(self, query: str, context_docs: list[FaqDocumentRecord]) -> str:
+        documents = [f"{doc.id}:{doc.llm_summary or doc.title}" for doc in context_docs]
+        digest = _digest(self.corpus_version, query, *documents)
+        return f"answer:{self.namespace}:{digest}"
+
+    async def _get_many(self, cache: str, keys: list[str]) -> dict[str, bytes]:
+        try:
+            values = await asyncio.to_thread(self.cache.get_many, keys)
+        except Exception as e:
+            self.logger.warning(f"Error reading the shared cache: {str(e)}")
+            SHARED_CACHE_REQUESTS_TOTAL.labels(cache=cache, result="error").inc(
+                len(keys)
+            )
+            return {}
+        hits = sum(key in values for key in keys)
+        SHARED_CACHE_REQUESTS_TOTAL.labels(cache=cache, result="hit").inc(hits)
+        SHARED_CACHE_REQUESTS_TOTAL.labels(cache=cache, result="miss").inc(
+            len(keys) - hits
+        )
+        return values
+
+    async def _set_many(
+        self, items: dict[str, bytes], ttl_seconds: float | None = None
+    ) -> None:
+        try:
+            await asyncio.to_thread(self.cache.set_many, items, ttl_seconds)
+        except Exception as e:
+            self.logger.warning(f"Error writing the shared cache: {str(e)}")
+
+    async def generate_summary(self, text: str) -> str:
+        return await self.repository.generate_summary(text)
+
+    async def generate_embeddings(self, text: str) -> EmbeddingResponse:
+        return (await self.generate_embeddings_batch([text]))[0]
+
+    async def generate_embeddings_batch(
+        self, texts: list[str]
+    ) -> list[EmbeddingResponse]:
+        keys = [self._embedding_key(text) for text in texts]
+        cached = await self._get_many("embedding", keys)
+        missing = list(
+            dict.fromkeys(text for text, key in zip(texts, keys) if key not in cached)
+        )
+        generated: dict[str, EmbeddingResponse] = {}
+        if len(missing) == 1:
+            generated[missing[0]] = await self.repository.generate_embeddings(
+                missing[0]
+            )
+        elif missing:
+            generated = dict(
+                zip(
+                    missing,
+                    await self.repository.generate_embeddings_batch(missing),
+                )
+            )
+        if generated:
+            await self._set_many(
+                {
+                    self._embedding_key(text): _encode_embedding(response)
+                    for text, response in generated.items()
+                }
+            )
+        return [
+            generated[text] if key not in cached else _decode_embedding(cached[key])
+            for text, key in zip(texts, keys)
+        ]
+
+    async def generate_response(
+        self,
+        query: str,
+        context_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+    ) -> tuple[str, list[FaqDocumentRecord]]:
+        # Follow-ups depend on the whole conversation, so they are not cached
+        if self.answer_ttl_seconds <= 0 or conversation:
+            return await self.repository.generate_response(
+                query, context_docs, conversation=conversation
+            )
+
+        key = self._answer_key(query, context_docs)
+        cached = (await self._get_many("answer", [key])).get(key)
+        if cached is not None:
+            return _decode_answer(cached)
+
+        answer, used_docs = await self.repository.generate_response(query, context_docs)
+        await self._set_many(
+            {key: _encode_answer(answer, used_docs)},
+            ttl_seconds=self.answer_ttl_seconds,
+        )
+        return answer, used_docs
+
+    async def generate_canonical_questions(
+        self, document: FaqDocument, max_questions: int = 5
+    ) -> list[CanonicalQuestionAnswer]:
+        return await self.repository.generate_canonical_questions(
+            document, max_questions
+        )
+
+    async def get_recommendations(
+        self,
+        user_history: list[UserQueryHistory],
+        max_recommendations: int = 5,
+    ) -> str:
+        return await self.repository.get_recommendations(
+            user_history, max_recommendations
+        )
@@ -0,0 +1,156 @@
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.application.interfaces.ai_generation_interface import AIGenerationInterface
+from src.infrastructure.cached_ai_generation_repository import (
+    CachedAIGenerationRepository,
+)
+from src.infrastructure.local_ai_generation_repository import (
+    LocalAIGenerationRepository,
+)
+from src.infrastructure.shared_cache import SharedCache
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqCategory, FaqDocumentRecord
+
+
+@pytest.fixture
+def shared_cache(tmp_path: Path) -> Iterator[SharedCache]:
+    """Create a SharedCache in a temporary directory."""
+    cache = SharedCache(str(tmp_path / "shared.sqlite3"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def inner_repository() -> AsyncMock:
+    """Create a mock repository delegating to the local backend."""
+    local_repository = LocalAIGenerationRepository()
+    repository = AsyncMock(spec=AIGenerationInterface)
+    repository.generate_embeddings.side_effect = local_repository.generate_embeddings
+    repository.generate_embeddings_batch.side_effect = (
+        local_repository.generate_embeddings_batch
+    )
+    repository.generate_response.side_effect = local_repository.generate_response
+    return repository
+
+
+def cache_requests(result: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "shared_cache_requests_total", {"cache": "embedding", "result": result}
+        )
+        or 0.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_embeddings_shared_between_workers(
+    shared_cache: SharedCache, inner_repository: AsyncMock
+) -> None:
+    """Test that an embedding generated by one worker is reused by another."""
+    # Arrange
+    first_worker = CachedAIGenerationRepository(inner_repository, shared_cache, "local")
+    second_worker = CachedAIGenerationRepository(
+        inner_repository, SharedCache(shared_cache.path), "local"
+    )
+    hits_before = cache_requests("hit")
+
+    # Act
+    generated = await first_worker.generate_embeddings("How do I get paid?")
+    cached = await second_worker.generate_embeddings_batch(
+        ["How do I get paid?", "Reset my password"]
+    )
+
+    # Assert
+    assert cached[0].embedding.vector == generated.embedding.vector
+    assert cached[0].model == generated.model
+    assert cached[0].usage == {"prompt_tokens": 0, "total_tokens": 0}
+    assert inner_repository.generate_embeddings.await_count == 2
+    inner_repository.generate_embeddings.assert_awaited_with("Reset my password")
+    assert cache_requests("hit") - hits_before == 1
+
+
+@pytest.mark.asyncio
+async def test_answers_cached_only_with_ttl(
+    shared_cache: SharedCache, inner_repository: AsyncMock
+) -> None:
+    """Test that answers are reused for the same query and context documents."""
+    # Arrange
+    docs = [
+        FaqDocumentRecord(
+            id=index,
+            title=f"Test Document {index}",
+            link=f"http://test{index}.com",
+            category=FaqCategory.PLATFORM_OVERVIEW,
+        )
+        for index in (1, 2)
+    ]
+    uncached = CachedAIGenerationRepository(inner_repository, shared_cache, "local")
+    cached = CachedAIGenerationRepository(
+        inner_repository, shared_cache, "local", answer_ttl_seconds=60
+    )
+
+    # Act
+    await uncached.generate_response("How do I get paid?", docs)
+    await uncached.generate_response("How do I get paid?", docs)
+    first = await cached.generate_response("How do I get paid?", docs)
+    second = await cached.generate_response("How do I get paid?", docs)
+    await cached.generate_response("How do I get paid?", docs[:1])
+    await cached.generate_response(
+        "How do I get paid?",
+        docs,
+        conversation=[ConversationTurn("Do you support PayPal?", "Yes.")],
+    )
+
+    # Assert
+    assert second == first
+    # Follow-ups depend on the conversation and are always generated
+    assert inner_repository.generate_response.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_cached_answers_keep_citations_outside_context(
+    shared_cache: SharedCache, inner_repository: AsyncMock
+) -> None:
+    """Test that cached answers keep their citations and follow the corpus version."""
+    # Arrange
+    context_doc, corpus_doc = (
+        FaqDocumentRecord(
+            id=index,
+            title=f"Test Document {index}",
+            link=f"http://test{index}.com",
+            category=FaqCategory.PAYMENTS,
+        )
+        for index in (1, 2)
+    )
+    # With the prompt corpus, answers can cite documents that were not retrieved
+    inner_repository.generate_response.side_effect = None
+    inner_repository.generate_response.return_value = ("Weekly.", [corpus_doc])
+    cached = CachedAIGenerationRepository(
+        inner_repository,
+        shared_cache,
+        "openai",
+        answer_ttl_seconds=60,
+        corpus_version="v1",
+    )
+    updated_corpus = CachedAIGenerationRepository(
+        inner_repository,
+        shared_cache,
+        "openai",
+        answer_ttl_seconds=60,
+        corpus_version="v2",
+    )
+
+    # Act
+    await cached.generate_response("How do I get paid?", [context_doc])
+    hit = await cached.generate_response("How do I get paid?", [context_doc])
+    await updated_corpus.generate_response("How do I get paid?", [context_doc])
+
+    # Assert
+    assert hit == ("Weekly.", [corpus_doc])
+    # A new corpus version does not reuse answers of the previous one
+    assert inner_repository.generate_response.await_count == 2
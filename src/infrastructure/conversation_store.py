@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import cache
+
+from src.config.settings import get_settings
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqDocumentRecord
+
+# Prompts only need the gist of previous answers
+ANSWER_PREVIEW_CHARS = 300
+
+
+def preview_answer(answer: str, max_chars: int = ANSWER_PREVIEW_CHARS) -> str:
+    """Shorten an answer to its first sentences within max_chars."""
+    answer = " ".join(answer.split())
+    if len(answer) <= max_chars:
+        return answer
+    cut = answer[:max_chars]
+    sentence_end = cut.rfind(". ")
+    return (cut[: sentence_end + 1] if sentence_end > 0 else cut.rstrip()) + "…"
+
+
+@dataclass(slots=True)
+class Conversation:
+    """Recent turns of a conversation and the documents retrieved for them."""
+
+    turns: deque[ConversationTurn]
+    # Retrieval set of the conversation, most recently retrieved first
+    documents: list[FaqDocumentRecord] = field(default_factory=list)
+    # Embedding the last retrieval was made with
+    query_vector: Sequence[float] | None = None
+    updated_at: float = 0.0
+
+
+class ConversationStore:
+    """
+    Bounded in-memory store of the conversations served by this process.
+
+    Holds the last max_turns turns of at most max_conversations conversations,
+    evicting the least recently used ones. Conversation ids come from clients,
+    so conversations are kept per user: a user sending the id of another user's
+    conversation starts a new one. Conversations idle for longer than
+    ttl_seconds are forgotten. Each conversation keeps up to max_documents
+    retrieved documents, which follow-ups embedded at least reuse_min_similarity
+    close to the last retrieval reuse instead of searching again.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = 10_000,
+        max_turns: int = 3,
+        max_documents: int = 8,
+        ttl_seconds: float = 1800.0,
+        reuse_min_similarity: float = 0.85,
+    ) -> None:
+        self.max_conversations = max_conversations
+        self.max_turns = max_turns
+        self.max_documents = max_documents
+        self.ttl_seconds = ttl_seconds
+        self.reuse_min_similarity = reuse_min_similarity
+        # (user id, conversation id) -> conversation
+        self._conversations: OrderedDict[tuple[int, str], Conversation] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def get(self, user_id: int, conversation_id: str) -> Conversation | None:
+        """
+        Get a conversation of a user, if it is known and has not expired.
+
+        Args:
+            user_id: The ID of the user the conversation belongs to
+            conversation_id: Client-provided conversation id
+
+        Returns:
+            The conversation, or None for a new conversation
+        """
+        key = (user_id, conversation_id)
+        now = time.monotonic()
+        with self._lock:
+            conversation = self._conversations.get(key)
+            if conversation is None:
+                return None
+            if now - conversation.updated_at > self.ttl_seconds:
+                del self._conversations[key]
+                return None
+            self._conversations.move_to_end(key)
+            return conversation
+
+    def record_turn(
+        self,
+        user_id: int,
+        conversation_id: str,
+        turn: ConversationTurn,
+        documents: list[FaqDocumentRecord],
+        query_vector: Sequence[float] | None = None,
+    ) -> None:
+        """
+        Add a turn to a conversation of a user, creating it if needed.
+
+        Args:
+            user_id: The ID of the user the conversation belongs to
+            conversation_id: Client-provided conversation id
+            turn: The question and answer of the turn
+            documents: Documents retrieved for the turn, most relevant first;
+                they replace the oldest documents of the retrieval set
+            query_vector: Embedding the documents were retrieved with
+                (None keeps the previous one)
+        """
+        key = (user_id, conversation_id)
+        now = time.monotonic()
+        with self._lock:
+            conversation = self._conversations.pop(key, None)
+            if conversation is None:
+                conversation = Conversation(turns=deque(maxlen=self.max_turns))
+            conversation.turns.append(turn)
+            new_ids = {doc.id for doc in documents}
+            conversation.documents = (
+                documents
+                + [doc for doc in conversation.documents if doc.id not in new_ids]
+            )[: self.max_documents]
+            if query_vector is not None:
+                conversation.query_vector = query_vector
+            conversation.updated_at = now
+            self._conversations[key] = conversation
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+
+@cache
+def get_conversation_store() -> ConversationStore:
+    """Get the conversation store of this process."""
+    settings = get_settings()
+    return ConversationStore(
+        max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+        max_turns=settings.CONVERSATION_MAX_TURNS,
+        max_documents=settings.CONVERSATION_MAX_DOCUMENTS,
+        ttl_seconds=settings.CONVERSATION_TTL_SECONDS,
+        reuse_min_similarity=settings.CONVERSATION_REUSE_MIN_SIMILARITY,
+    )
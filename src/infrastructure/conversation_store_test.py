@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+from src.infrastructure.conversation_store import ConversationStore, preview_answer
+from src.types.conversation import ConversationTurn
+from src.types.documents import FaqCategory, FaqDocumentRecord
+
+
+def document(document_id: int) -> FaqDocumentRecord:
+    return FaqDocumentRecord(
+        id=document_id,
+        title=f"Test Document {document_id}",
+        link=f"http://test{document_id}.com",
+        category=FaqCategory.PLATFORM_OVERVIEW,
+    )
+
+
+def test_conversation_store_bounds() -> None:
+    """Test that turns, documents and conversations are bounded."""
+    # Arrange
+    store = ConversationStore(max_conversations=2, max_turns=2, max_documents=3)
+
+    # Act
+    for number in range(3):
+        store.record_turn(
+            1,
+            "conversation-1",
+            ConversationTurn(f"Question {number}", "Answer"),
+            [document(number), document(number + 10)],
+            query_vector=[float(number)],
+        )
+    store.record_turn(1, "conversation-2", ConversationTurn("Question", "Answer"), [])
+    store.get(1, "conversation-1")
+    store.record_turn(1, "conversation-3", ConversationTurn("Question", "Answer"), [])
+
+    # Assert
+    conversation = store.get(1, "conversation-1")
+    assert conversation is not None
+    assert [turn.query for turn in conversation.turns] == ["Question 1", "Question 2"]
+    assert [doc.id for doc in conversation.documents] == [2, 12, 1]
+    assert conversation.query_vector == [2.0]
+    # The least recently used conversation is evicted
+    assert store.get(1, "conversation-2") is None
+    assert len(store) == 2
+
+
+def test_conversation_store_expiry() -> None:
+    """Test that idle conversations are forgotten."""
+    # Arrange
+    store = ConversationStore(ttl_seconds=60)
+    with patch("time.monotonic", return_value=1000.0):
+        store.record_turn(
+            1, "conversation-1", ConversationTurn("Question", "Answer"), []
+        )
+
+    # Act
+    with patch("time.monotonic", return_value=1030.0):
+        active = store.get(1, "conversation-1")
+    with patch("time.monotonic", return_value=1100.0):
+        expired = store.get(1, "conversation-1")
+
+    # Assert
+    assert active is not None
+    assert expired is None
+    assert len(store) == 0
+
+
+def test_preview_answer() -> None:
+    """Test that long answers are cut at a sentence boundary."""
+    # Arrange
+    answer = "Payments are sent weekly.\n\n" + "Details follow. " * 30
+
+    # Act
+    preview = preview_answer(answer, max_chars=50)
+
+    # Assert
+    assert preview_answer("Short answer.") == "Short answer."
+    assert preview == "Payments are sent weekly. Details follow.…"
+
+
+def test_conversation_store_keeps_conversations_per_user() -> None:
+    """Test that a user sending another user's conversation id gets no history."""
+    # Arrange
+    store = ConversationStore()
+    store.record_turn(
+        1, "conversation-1", ConversationTurn("Question", "Answer"), [document(1)]
+    )
+
+    # Act
+    other_user = store.get(2, "conversation-1")
+    store.record_turn(2, "conversation-1", ConversationTurn("Other", "Answer"), [])
+
+    # Assert
+    assert other_user is None
+    conversation = store.get(1, "conversation-1")
+    assert conversation is not None
+    assert [turn.query for turn in conversation.turns] == ["Question"]
+    assert [doc.id for doc in conversation.documents] == [1]
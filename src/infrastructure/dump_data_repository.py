@@ -1,14 +1,54 @@
 import logging
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterable
 from contextlib import asynccontextmanager
 
 from asyncpg import Connection
 
-from src.application.interfaces.dump_data_interface import DumpDataInterface
+from src.application.interfaces.ai_support_interface import UserResponse
+from src.application.interfaces.dump_data_interface import (
+    DumpDataInterface,
+    IngestionCheckpoint,
+    StagedDocument,
+)
+from src.database.bulk_load import StagingTable, copy_and_merge
 from src.database.connection import get_connection
 from src.types.documents import FaqDocument
+from src.types.embeddings import ActiveEmbeddings, EmbeddingStorage
 from src.types.user import User
 
+FAQ_DOCUMENTS_STAGING = StagingTable(
+    name="faq_documents_staging",
+    columns={
+        "title": "TEXT",
+        "link": "TEXT",
+        "text": "TEXT",
+        "llm_summary": "TEXT",
+        "category": "platform_information.faq_category",
+        "embedding": "vector(1536)",
+        "updated_at": "TIMESTAMP WITH TIME ZONE",
+    },
+)
+
+
+def _user_response_staging(vector_type: str) -> StagingTable:
+    return StagingTable(
+        name="user_response_staging",
+        columns={
+            "user_id": "INTEGER",
+            "user_question": "TEXT",
+            "question_embedding": f"{vector_type}(1536)",
+            "response": "TEXT",
+            "response_embedding": f"{vector_type}(1536)",
+            "created_at": "TIMESTAMP WITH TIME ZONE",
+        },
+    )
+
+
+USER_RESPONSE_STAGING = {
+    EmbeddingStorage.FULL: _user_response_staging("vector"),
+    EmbeddingStorage.HALFVEC: _user_response_staging("halfvec"),
+}
+
 
 class DumpDataRepository(DumpDataInterface):
     """
@@ -18,77 +58,329 @@ class DumpDataRepository(DumpDataInterface):
     into their respective database tables.
     """
 
-    def __init__(self, connection: Connection):
+    def __init__(
+        self,
+        connection: Connection,
+        embeddings: ActiveEmbeddings = ActiveEmbeddings(),
+        embedding_storage: EmbeddingStorage = EmbeddingStorage.FULL,
+    ):
         """
         Initialize the repository with a database connection.
 
         Args:
             connection: The database connection to use.
+            embeddings: Active embedding slot, which the embeddings are stored in
+                with their model; the other slot is left to refresh_embeddings.
+            embedding_storage: Storage mode of the user_response embeddings.
         """
         self.conn = connection
+        self.embeddings = embeddings
+        self.embedding_storage = embedding_storage
         self.logger = logging.getLogger(__name__)
 
-    async def dump_faq_documents(self, faq_documents: list[FaqDocument]) -> None:
+    async def _lock_active_embeddings(self) -> None:
         """
-        Dump FAQ documents into the database.
+        Hold off slot switches until the transaction ends.
+
+        A refresh activating another slot waits for the transaction, and then
+        finds the rows it wrote into the previous slot.
+
+        Raises:
+            ValueError: If the active slot is no longer the one written
+        """
+        row = await self.conn.fetchrow(
+            """
+            SELECT slot, model FROM platform_information.embedding_slots
+            WHERE active
+            FOR SHARE
+            """
+        )
+        if row is not None and (row["slot"], row["model"]) != (
+            self.embeddings.slot.value,
+            self.embeddings.model,
+        ):
+            raise ValueError(
+                f"The active embedding slot changed to {row['slot']} ({row['model']}) "
+                "during ingestion"
+            )
+
+    async def bulk_load_faq_documents(
+        self, faq_documents: Iterable[FaqDocument]
+    ) -> int:
+        """
+        Load FAQ documents through COPY, for corpora too large for one insert.
+
+        The documents are read lazily and stored in one transaction.
 
         Args:
-            faq_documents: List of FAQ documents to insert.
+            faq_documents: FAQ documents to insert, e.g. from a generator.
+
+        Returns:
+            The number of documents stored.
 
         Raises:
             Exception: If there's an error during the database operation.
         """
+        embedding = self.embeddings.slot.column("embedding")
+        embedding_model = self.embeddings.slot.column("embedding_model")
+        merge_query = f"""
+            INSERT INTO platform_information.faq_documents
+            (title, link, text, llm_summary, category, {embedding}, {embedding_model}, updated_at)
+            SELECT
+                title, link, text, llm_summary, category, embedding, $1,
+                COALESCE(updated_at, CURRENT_TIMESTAMP)
+            FROM {FAQ_DOCUMENTS_STAGING.name}
+        """
+        records = (
+            (
+                doc.title,
+                doc.link,
+                doc.text,
+                doc.llm_summary,
+                doc.category.value,
+                doc.embedding,
+                doc.updated_at,
+            )
+            for doc in faq_documents
+        )
         try:
-            # Prepare the insert statement using unnest
-            insert_query = """
-                INSERT INTO platform_information.faq_documents
-                (title, link, text, llm_summary, category, embedding, created_at, updated_at)
-                SELECT
-                    unnest($1::text[]) as title,
-                    unnest($2::text[]) as link,
-                    unnest($3::text[]) as text,
-                    unnest($4::text[]) as llm_summary,
-                    unnest($5::platform_information.faq_category[]) as category,
-                    unnest($6::vector[]) as embedding,
-                    unnest($7::timestamptz[]) as created_at,
-                    unnest($8::timestamptz[]) as updated_at
-                ON CONFLICT (id) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    link = EXCLUDED.link,
-                    text = EXCLUDED.text,
-                    llm_summary = EXCLUDED.llm_summary,
-                    category = EXCLUDED.category,
-                    embedding = EXCLUDED.embedding,
-                    updated_at = CURRENT_TIMESTAMP
-            """
+            async with self.conn.transaction():
+                await self._lock_active_embeddings()
+                loaded = await copy_and_merge(
+                    self.conn,
+                    FAQ_DOCUMENTS_STAGING,
+                    records,
+                    lambda: self.conn.execute(merge_query, self.embeddings.model),
+                )
+            self.logger.info(f"Successfully bulk loaded {loaded} FAQ documents")
+            return loaded
+        except Exception as e:
+            self.logger.error(f"Error bulk loading FAQ documents: {str(e)}")
+            raise
 
-            # Prepare the data for batch insert
-            titles = [doc.title for doc in faq_documents]
-            links = [doc.link for doc in faq_documents]
-            texts = [doc.text for doc in faq_documents]
-            summaries = [doc.llm_summary for doc in faq_documents]
-            categories = [doc.category.value for doc in faq_documents]
-            embeddings = [
-                f"[{', '.join(map(str, doc.embedding))}]" for doc in faq_documents
-            ]
-            created_ats = [doc.created_at for doc in faq_documents]
-            updated_ats = [doc.updated_at for doc in faq_documents]
-
-            # Execute the batch insert
+    async def bulk_load_user_responses(
+        self, user_responses: Iterable[UserResponse]
+    ) -> int:
+        """
+        Load user interactions through COPY, e.g. to backfill user_response.
+
+        Interactions keep their created_at when set, and the monthly partitions
+        they fall in are created first, so none land in the default partition.
+
+        Args:
+            user_responses: Interactions to insert, e.g. from a generator.
+
+        Returns:
+            The number of interactions stored.
+
+        Raises:
+            Exception: If there's an error during the database operation.
+        """
+        staging = USER_RESPONSE_STAGING[self.embedding_storage]
+        if self.embedding_storage == EmbeddingStorage.HALFVEC:
+            question_embedding = "question_embedding_half"
+            response_embedding = "response_embedding_half"
+        else:
+            question_embedding = "question_embedding"
+            response_embedding = "response_embedding"
+        merge_query = f"""
+            INSERT INTO user_management.user_response
+            (user_id, user_question, {question_embedding}, response, {response_embedding}, embedding_model, created_at)
+            SELECT
+                user_id, user_question, question_embedding, response, response_embedding, $1,
+                COALESCE(created_at, CURRENT_TIMESTAMP)
+            FROM {staging.name}
+        """
+
+        async def merge() -> None:
             await self.conn.execute(
-                insert_query,
-                titles,
-                links,
-                texts,
-                summaries,
-                categories,
-                embeddings,
-                created_ats,
-                updated_ats,
+                f"""
+                SELECT user_management.create_user_response_partition(month)
+                FROM (
+                    SELECT DISTINCT date_trunc('month', created_at)::date AS month
+                    FROM {staging.name}
+                    WHERE created_at IS NOT NULL
+                ) months
+                """
+            )
+            await self.conn.execute(merge_query, self.embeddings.model)
+
+        records = (
+            (
+                user_response.user_id,
+                user_response.user_question,
+                user_response.question_embedding,
+                user_response.response,
+                user_response.response_embedding,
+                user_response.created_at,
             )
-            self.logger.info(f"Successfully dumped {len(faq_documents)} FAQ documents")
+            for user_response in user_responses
+        )
+        try:
+            loaded = await copy_and_merge(self.conn, staging, records, merge)
+            self.logger.info(f"Successfully bulk loaded {loaded} user responses")
+            return loaded
         except Exception as e:
-            self.logger.error(f"Error dumping FAQ documents: {str(e)}")
+            self.logger.error(f"Error bulk loading user responses: {str(e)}")
+            raise
+
+    async def get_ingestion_checkpoints(
+        self, content_hashes: list[str]
+    ) -> dict[str, IngestionCheckpoint]:
+        """
+        Get the documents of a previous ingestion that can be resumed.
+
+        Staged documents whose embeddings are not from the active model are
+        left out, so that they are generated again.
+
+        Args:
+            content_hashes: Content hashes of the documents to look up.
+
+        Returns:
+            Checkpoints of the stored or reusable staged documents, by hash.
+        """
+        records = await self.conn.fetch(
+            """
+            SELECT content_hash, document_id
+            FROM platform_information.faq_ingestion_documents
+            WHERE content_hash = ANY($1::text[])
+            AND (document_id IS NOT NULL OR embedding_model = $2)
+            """,
+            content_hashes,
+            self.embeddings.model,
+        )
+        return {
+            record["content_hash"]: IngestionCheckpoint(
+                content_hash=record["content_hash"],
+                document_id=record["document_id"],
+            )
+            for record in records
+        }
+
+    async def stage_document(self, staged_document: StagedDocument) -> None:
+        """
+        Checkpoint a generated document and its canonical answers.
+
+        Args:
+            staged_document: The document, replacing any staged with its hash.
+
+        Raises:
+            Exception: If there's an error during the database operation.
+        """
+        document = staged_document.document
+        canonical_answers = staged_document.canonical_answers
+        try:
+            async with self.conn.transaction():
+                await self.conn.execute(
+                    """
+                    INSERT INTO platform_information.faq_ingestion_documents
+                    (content_hash, title, link, text, llm_summary, category, embedding, embedding_model)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    ON CONFLICT (content_hash) DO UPDATE SET
+                        llm_summary = EXCLUDED.llm_summary,
+                        embedding = EXCLUDED.embedding,
+                        embedding_model = EXCLUDED.embedding_model,
+                        created_at = CURRENT_TIMESTAMP
+                    """,
+                    staged_document.content_hash,
+                    document.title,
+                    document.link,
+                    document.text,
+                    document.llm_summary,
+                    document.category.value,
+                    document.embedding,
+                    self.embeddings.model,
+                )
+                await self.conn.execute(
+                    """
+                    DELETE FROM platform_information.faq_ingestion_canonical_answers
+                    WHERE content_hash = $1
+                    """,
+                    staged_document.content_hash,
+                )
+                await self.conn.execute(
+                    """
+                    INSERT INTO platform_information.faq_ingestion_canonical_answers
+                    (content_hash, position, question, question_embedding, answer, answer_embedding)
+                    SELECT $1, position - 1, question, question_embedding, answer, answer_embedding
+                    FROM unnest($2::text[], $3::vector[], $4::text[], $5::vector[])
+                        WITH ORDINALITY AS a(question, question_embedding, answer, answer_embedding, position)
+                    """,
+                    staged_document.content_hash,
+                    [answer.question for answer, _, _ in canonical_answers],
+                    [
+                        question_embedding
+                        for _, question_embedding, _ in canonical_answers
+                    ],
+                    [answer.answer for answer, _, _ in canonical_answers],
+                    [answer_embedding for _, _, answer_embedding in canonical_answers],
+                )
+        except Exception as e:
+            self.logger.error(f"Error staging FAQ document: {str(e)}")
+            raise
+
+    async def commit_staged_documents(self, content_hashes: list[str]) -> list[int]:
+        """
+        Move staged documents and their canonical answers to the live tables.
+
+        Document IDs are drawn from the faq_documents sequence and recorded in
+        the staging table in the same transaction as the inserts, so documents
+        are stored exactly once however often ingestion is resumed.
+
+        Args:
+            content_hashes: Content hashes of the staged documents to store.
+
+        Returns:
+            The IDs of the documents stored by this call.
+
+        Raises:
+            Exception: If there's an error during the database operation.
+        """
+        column = self.embeddings.slot.column
+        try:
+            async with self.conn.transaction():
+                await self._lock_active_embeddings()
+                records = await self.conn.fetch(
+                    """
+                    UPDATE platform_information.faq_ingestion_documents
+                    SET document_id = nextval(
+                        pg_get_serial_sequence('platform_information.faq_documents', 'id')
+                    )
+                    WHERE content_hash = ANY($1::text[])
+                    AND document_id IS NULL AND embedding_model = $2
+                    RETURNING content_hash, document_id
+                    """,
+                    content_hashes,
+                    self.embeddings.model,
+                )
+                committed_hashes = [record["content_hash"] for record in records]
+                await self.conn.execute(
+                    f"""
+                    INSERT INTO platform_information.faq_documents
+                    (id, title, link, text, llm_summary, category, {column("embedding")}, {column("embedding_model")})
+                    SELECT document_id, title, link, text, llm_summary, category, embedding, embedding_model
+                    FROM platform_information.faq_ingestion_documents
+                    WHERE content_hash = ANY($1::text[])
+                    ORDER BY document_id
+                    """,
+                    committed_hashes,
+                )
+                await self.conn.execute(
+                    f"""
+                    INSERT INTO platform_information.faq_canonical_answers
+                    (faq_document_id, question, {column("question_embedding")}, answer, {column("answer_embedding")}, {column("embedding_model")})
+                    SELECT d.document_id, a.question, a.question_embedding, a.answer, a.answer_embedding, d.embedding_model
+                    FROM platform_information.faq_ingestion_canonical_answers a
+                    JOIN platform_information.faq_ingestion_documents d USING (content_hash)
+                    WHERE a.content_hash = ANY($1::text[])
+                    ORDER BY d.document_id, a.position
+                    """,
+                    committed_hashes,
+                )
+            self.logger.info(f"Stored {len(records)} staged FAQ documents")
+            return [record["document_id"] for record in records]
+        except Exception as e:
+            self.logger.error(f"Error storing staged FAQ documents: {str(e)}")
             raise
 
     async def dump_user_data(self, user_data: list[User]) -> None:
@@ -142,13 +434,20 @@ class DumpDataRepository(DumpDataInterface):
 
 
 @asynccontextmanager
-async def get_dump_data_repository() -> AsyncGenerator[DumpDataInterface, None]:
+async def get_dump_data_repository(
+    embeddings: ActiveEmbeddings = ActiveEmbeddings(),
+    embedding_storage: EmbeddingStorage = EmbeddingStorage.FULL,
+) -> AsyncGenerator[DumpDataInterface, None]:
     """
     Get an instance of the DumpDataRepository as a context manager.
 
+    Args:
+        embeddings: Active embedding slot the embeddings are stored in.
+        embedding_storage: Storage mode of the user_response embeddings.
+
     Yields:
         DumpDataInterface: An instance of the repository for dumping data.
     """
     async with get_connection() as connection:
-        repository = DumpDataRepository(connection)
+        repository = DumpDataRepository(connection, embeddings, embedding_storage)
         yield repository
@@ -0,0 +1,245 @@
+import logging
+from collections.abc import Sequence
+
+from asyncpg import Connection
+
+from src.application.interfaces.embedding_refresh_interface import (
+    EmbeddedTable,
+    EmbeddingRefreshInterface,
+    EmbeddingRefreshRow,
+)
+from src.types.embeddings import EmbeddingSlot
+
+# Texts embedded into each table's embedding columns (primary slot names)
+EMBEDDED_COLUMNS: dict[EmbeddedTable, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    # Ingestion embeds the summary of documents
+    EmbeddedTable.FAQ_DOCUMENTS: (("coalesce(llm_summary, text)",), ("embedding",)),
+    EmbeddedTable.FAQ_CANONICAL_ANSWERS: (
+        ("question", "answer"),
+        ("question_embedding", "answer_embedding"),
+    ),
+}
+
+# Vector indexes of the slots, by primary slot name: (table, method and column)
+VECTOR_INDEXES = {
+    "idx_faq_documents_embedding": (
+        EmbeddedTable.FAQ_DOCUMENTS,
+        "ivfflat ({column} vector_cosine_ops) WITH (lists = 100)",
+        "embedding",
+    ),
+    "idx_faq_canonical_answers_question_embedding": (
+        EmbeddedTable.FAQ_CANONICAL_ANSWERS,
+        "hnsw ({column} vector_cosine_ops)",
+        "question_embedding",
+    ),
+}
+
+
+class EmbeddingRefreshRepository(EmbeddingRefreshInterface):
+    """
+    Repository backfilling the embeddings of a model into an embedding slot.
+
+    Indexes are created and dropped concurrently, so the connection must not be
+    in a transaction.
+    """
+
+    def __init__(self, connection: Connection) -> None:
+        self.conn = connection
+        self.logger = logging.getLogger(__name__)
+
+    async def prepare_slot(
+        self, model: str, min_retired_seconds: float
+    ) -> EmbeddingSlot:
+        """
+        Assign the inactive slot to a model, or resume a refresh already assigned.
+
+        A slot retired by a previous refresh is only reused min_retired_seconds
+        after the switch, once every worker has stopped searching it. Its indexes
+        are dropped, since index maintenance slows the backfill down and ivfflat
+        lists trained on the previous embeddings would not fit the new ones; they
+        are rebuilt once the slot is backfilled.
+
+        Returns:
+            The slot to backfill
+
+        Raises:
+            ValueError: If the model is already active, or the inactive slot was
+                retired too recently
+        """
+        async with self.conn.transaction():
+            rows = await self.conn.fetch(
+                """
+                SELECT slot, model, active,
+                    extract(epoch FROM CURRENT_TIMESTAMP - updated_at) AS idle_seconds
+                FROM platform_information.embedding_slots
+                FOR UPDATE
+                """
+            )
+            active = next(row for row in rows if row["active"])
+            inactive = next(row for row in rows if not row["active"])
+            slot = EmbeddingSlot(inactive["slot"])
+            if active["model"] == model:
+                raise ValueError(f"Embeddings of {model} are already active")
+            if inactive["model"] == model:
+                self.logger.info(f"Resuming the refresh of the {slot.value} slot")
+            elif inactive["idle_seconds"] < min_retired_seconds:
+                raise ValueError(
+                    f"The {slot.value} slot was retired "
+                    f"{inactive['idle_seconds']:.0f}s ago and may still be "
+                    f"searched; retry in {min_retired_seconds:.0f}s"
+                )
+            else:
+                await self.conn.execute(
+                    """
+                    UPDATE platform_information.embedding_slots
+                    SET model = $2, updated_at = CURRENT_TIMESTAMP
+                    WHERE slot = $1
+                    """,
+                    slot.value,
+                    model,
+                )
+
+        for index_name in VECTOR_INDEXES:
+            await self.conn.execute(
+                "DROP INDEX CONCURRENTLY IF EXISTS "
+                f"platform_information.{slot.column(index_name)}"
+            )
+        self.logger.info(f"Refreshing the {slot.value} slot with {model}")
+        return slot
+
+    async def fetch_rows_to_refresh(
+        self,
+        table: EmbeddedTable,
+        slot: EmbeddingSlot,
+        model: str,
+        after_id: int,
+        limit: int,
+    ) -> list[EmbeddingRefreshRow]:
+        """
+        Fetch the next rows, by ID, whose slot embeddings are not from the model.
+
+        Pages are read with a keyset condition on the primary key, and rows
+        refreshed by an interrupted run are skipped, so refreshes resume where
+        they stopped.
+        """
+        texts, _ = EMBEDDED_COLUMNS[table]
+        query = f"""
+        SELECT id, {", ".join(f"{text} AS text_{index}" for index, text in enumerate(texts))}
+        FROM platform_information.{table.value}
+        WHERE id > $1 AND {slot.column("embedding_model")} IS DISTINCT FROM $2
+        ORDER BY id
+        LIMIT $3
+        """
+        records = await self.conn.fetch(query, after_id, model, limit)
+        return [
+            EmbeddingRefreshRow(
+                id=record["id"],
+                texts=[record[f"text_{index}"] for index in range(len(texts))],
+            )
+            for record in records
+        ]
+
+    async def save_refreshed_embeddings(
+        self,
+        table: EmbeddedTable,
+        slot: EmbeddingSlot,
+        model: str,
+        embeddings: dict[int, list[Sequence[float]]],
+    ) -> None:
+        """Store the embeddings of rows, by ID, in a slot with one bulk update."""
+        _, columns = EMBEDDED_COLUMNS[table]
+        assignments = ", ".join(
+            f"{slot.column(column)} = u.embedding_{index}"
+            for index, column in enumerate(columns)
+        )
+        query = f"""
+        UPDATE platform_information.{table.value} t
+        SET {assignments}, {slot.column("embedding_model")} = $1
+        FROM unnest(
+            $2::integer[], {", ".join(f"${index + 3}::vector[]" for index in range(len(columns)))}
+        ) AS u(id, {", ".join(f"embedding_{index}" for index in range(len(columns)))})
+        WHERE t.id = u.id
+        """
+        await self.conn.execute(
+            query,
+            model,
+            list(embeddings),
+            *(
+                [row_embeddings[index] for row_embeddings in embeddings.values()]
+                for index in range(len(columns))
+            ),
+        )
+
+    async def build_indexes(self, slot: EmbeddingSlot) -> None:
+        """
+        Build the vector indexes of a slot without blocking writes.
+
+        Invalid indexes left by an interrupted build are dropped and rebuilt.
+        """
+        for index_name, (table, method, column) in VECTOR_INDEXES.items():
+            name = slot.column(index_name)
+            is_valid = await self.conn.fetchval(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)",
+                f"platform_information.{name}",
+            )
+            if is_valid:
+                continue
+            if is_valid is not None:
+                await self.conn.execute(
+                    f"DROP INDEX CONCURRENTLY platform_information.{name}"
+                )
+            self.logger.info(f"Building index {name}")
+            await self.conn.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY {name}
+                ON platform_information.{table.value}
+                USING {method.format(column=slot.column(column))}
+                """
+            )
+
+    async def activate_slot(self, slot: EmbeddingSlot, model: str) -> bool:
+        """
+        Make a backfilled slot the one searches and ingestion use.
+
+        The slot rows are locked first, which waits for ingestion still writing
+        into the active slot and holds off new ingestion until the switch is
+        committed; rows written meanwhile are then checked for.
+
+        Returns:
+            Whether the slot was activated (False if rows still need embeddings)
+
+        Raises:
+            ValueError: If the slot is assigned to another model
+        """
+        async with self.conn.transaction():
+            rows = await self.conn.fetch(
+                """
+                SELECT slot, model FROM platform_information.embedding_slots
+                FOR UPDATE
+                """
+            )
+            slot_model = next(row["model"] for row in rows if row["slot"] == slot)
+            if slot_model != model:
+                raise ValueError(
+                    f"The {slot.value} slot is being refreshed with {slot_model}"
+                )
+            for table in EmbeddedTable:
+                missing = await self.conn.fetchval(
+                    f"""
+                    SELECT count(*) FROM platform_information.{table.value}
+                    WHERE {slot.column("embedding_model")} IS DISTINCT FROM $1
+                    """,
+                    model,
+                )
+                if missing:
+                    self.logger.info(f"{missing} rows of {table.value} to refresh")
+                    return False
+            await self.conn.execute(
+                """
+                UPDATE platform_information.embedding_slots
+                SET active = (slot = $1), updated_at = CURRENT_TIMESTAMP
+                """,
+                slot.value,
+            )
+        self.logger.info(f"Activated the {slot.value} slot ({model})")
+        return True
@@ -0,0 +1,84 @@
+"""
+Active embedding slot of the FAQ tables.
+
+Each worker embeds queries with the model of the active slot and searches that
+slot's columns. The slot is reloaded periodically, so after a model migration
+switches it, workers follow within refresh_seconds; until then they keep using
+the previous slot, whose embeddings are left in place.
+"""
+
+import asyncio
+import contextlib
+import logging
+from functools import cache
+
+from asyncpg import Connection
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.types.embeddings import ActiveEmbeddings, EmbeddingSlot
+
+logger = logging.getLogger(__name__)
+
+
+async def fetch_active_embeddings(connection: Connection) -> ActiveEmbeddings:
+    """Read the active slot and its model from the database."""
+    row = await connection.fetchrow(
+        """
+        SELECT slot, model FROM platform_information.embedding_slots
+        WHERE active
+        """
+    )
+    if row is None:
+        # Databases created before embedding models were recorded
+        return ActiveEmbeddings()
+    return ActiveEmbeddings(slot=EmbeddingSlot(row["slot"]), model=row["model"])
+
+
+class EmbeddingSlotsCache:
+    """Active embedding slot of this process, reloaded periodically."""
+
+    def __init__(self, refresh_seconds: float = 30.0) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.current = ActiveEmbeddings()
+        self._task: asyncio.Task[None] | None = None
+
+    async def refresh(self) -> ActiveEmbeddings:
+        """Load the active slot from the database."""
+        async with get_connection() as connection:
+            active = await fetch_active_embeddings(connection)
+        if active != self.current:
+            logger.info(
+                f"Using the {active.slot.value} embedding slot ({active.model})"
+            )
+            self.current = active
+        return self.current
+
+    def start(self) -> None:
+        """Reload the active slot every refresh_seconds in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # The previous slot stays in use until a refresh succeeds
+                logger.error(f"Error refreshing the embedding slot: {str(e)}")
+
+
+@cache
+def get_embedding_slots_cache() -> EmbeddingSlotsCache:
+    """Get the embedding slot cache of this process."""
+    return EmbeddingSlotsCache(
+        refresh_seconds=get_settings().EMBEDDING_SLOTS_REFRESH_SECONDS
+    )
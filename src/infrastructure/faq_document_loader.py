@@ -0,0 +1,198 @@
+"""
+Loading and preprocessing of the base FAQ Markdown documents.
+
+Everything here runs before ingestion makes its first paid API call: the files
+are read concurrently in worker threads, normalized, deduplicated by the hash
+of their normalized text, and checked against the token limit of ingestion, so
+that oversized documents are split or rejected instead of failing (or costing)
+halfway through a run.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from src.infrastructure.token_count import approximate_tokens
+from src.types.documents import OversizedDocumentPolicy
+
+READ_CONCURRENCY = 8
+# Files read and normalized per worker thread call; one call per file costs
+# more in thread hand-offs than the reading itself
+READ_BATCH_SIZE = 64
+
+FRONT_MATTER_PATTERN = re.compile(r"\A---\n.*?\n---[ \t]*(?:\n|\Z)", re.DOTALL)
+# [text](url), keeping the text; images are turned into links first, as a
+# leading optional "!" would keep re from scanning for the "[" quickly
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+AUTOLINK_PATTERN = re.compile(r"<(https?://[^>\s]+)>")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PreprocessedDocument:
+    """FAQ document ready for ingestion."""
+
+    title: str
+    link: str
+    text: str
+    category: str
+    # SHA-256 of the normalized text, which duplicates share
+    text_hash: str
+    tokens: int
+
+    def as_base_data(self) -> dict[str, Any]:
+        """The document in the format DumpDataManager ingests."""
+        return {
+            "title": self.title,
+            "link": self.link,
+            "text": self.text,
+            "category": self.category,
+        }
+
+
+@dataclass
+class PreprocessingReport:
+    """Documents kept by preprocessing, and what happened to the others."""
+
+    documents: list[PreprocessedDocument] = field(default_factory=list)
+    # Titles of the documents left out
+    duplicates: list[str] = field(default_factory=list)
+    rejected: list[str] = field(default_factory=list)
+    # Number of documents split into parts
+    split: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return sum(doc.tokens for doc in self.documents)
+
+
+def normalize_markdown(text: str) -> str:
+    """
+    Normalize a Markdown document before it is summarized and embedded.
+
+    Removes the YAML front matter, keeps only the text of links and images,
+    unifies line endings and Unicode forms, and collapses runs of whitespace
+    within lines and of blank lines; indentation is kept, as it nests Markdown
+    lists.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = FRONT_MATTER_PATTERN.sub("", text)
+    text = LINK_PATTERN.sub(r"\1", text.replace("![", "["))
+    text = AUTOLINK_PATTERN.sub(r"\1", text)
+    # str methods rather than regular expressions, several times faster
+    lines: list[str] = []
+    for line in text.split("\n"):
+        words = line.split()
+        if words:
+            indentation = line[: len(line) - len(line.lstrip())]
+            lines.append(indentation + " ".join(words))
+        elif lines and lines[-1]:
+            lines.append("")
+    return "\n".join(lines).strip()
+
+
+def split_markdown(text: str, max_tokens: int) -> list[str]:
+    """
+    Split a Markdown document into parts of at most max_tokens.
+
+    Parts are made of whole paragraphs where possible; a paragraph too large on
+    its own is cut into pieces.
+    """
+    # approximate_tokens counts about 4 characters per token
+    max_chars = max_tokens * 4
+    paragraphs = [
+        paragraph[start : start + max_chars]
+        for paragraph in text.split("\n\n")
+        for start in range(0, len(paragraph), max_chars)
+    ]
+    parts: list[str] = []
+    for paragraph in paragraphs:
+        candidate = f"{parts[-1]}\n\n{paragraph}" if parts else paragraph
+        if parts and approximate_tokens(candidate) <= max_tokens:
+            parts[-1] = candidate
+        else:
+            parts.append(paragraph)
+    return parts
+
+
+def _read_markdown(paths: list[Path]) -> list[str]:
+    return [normalize_markdown(path.read_text(encoding="utf-8")) for path in paths]
+
+
+async def load_faq_documents(
+    entries: list[dict[str, Any]],
+    max_tokens: int,
+    oversized_policy: OversizedDocumentPolicy = OversizedDocumentPolicy.SPLIT,
+    read_concurrency: int = READ_CONCURRENCY,
+) -> PreprocessingReport:
+    """
+    Read and preprocess the FAQ documents listed in base data.
+
+    Args:
+        entries: Documents from faq_documents_list.json. Each dict should have:
+            title, link, text_path, category
+        max_tokens: Largest document sent to the API during ingestion
+        oversized_policy: Whether larger documents are split or rejected
+        read_concurrency: Batches of files read and normalized at the same time
+
+    Returns:
+        The documents to ingest, in the order of entries, with the ones left out.
+    """
+    semaphore = asyncio.Semaphore(read_concurrency)
+
+    async def read(paths: list[Path]) -> list[str]:
+        async with semaphore:
+            return await asyncio.to_thread(_read_markdown, paths)
+
+    paths = [Path(entry["text_path"]) for entry in entries]
+    batches = await asyncio.gather(
+        *(
+            read(paths[start : start + READ_BATCH_SIZE])
+            for start in range(0, len(paths), READ_BATCH_SIZE)
+        )
+    )
+    texts = [text for batch in batches for text in batch]
+
+    report = PreprocessingReport()
+    seen_hashes: set[str] = set()
+    for entry, text in zip(entries, texts, strict=True):
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        if text_hash in seen_hashes:
+            logger.warning(f"Skipping duplicate FAQ document: {entry['title']}")
+            report.duplicates.append(entry["title"])
+            continue
+        seen_hashes.add(text_hash)
+
+        tokens = approximate_tokens(text)
+        if not text or (
+            tokens > max_tokens and oversized_policy == OversizedDocumentPolicy.REJECT
+        ):
+            logger.warning(f"Rejecting FAQ document {entry['title']} ({tokens} tokens)")
+            report.rejected.append(entry["title"])
+            continue
+
+        parts = [text] if tokens <= max_tokens else split_markdown(text, max_tokens)
+        if len(parts) > 1:
+            report.split += 1
+        for number, part in enumerate(parts, start=1):
+            title, link = entry["title"], entry["link"]
+            if len(parts) > 1:
+                title = f"{title} ({number}/{len(parts)})"
+                link = f"{link}#part-{number}"
+            report.documents.append(
+                PreprocessedDocument(
+                    title=title,
+                    link=link,
+                    text=part,
+                    category=entry["category"],
+                    text_hash=hashlib.sha256(part.encode()).hexdigest(),
+                    tokens=approximate_tokens(part),
+                )
+            )
+    return report
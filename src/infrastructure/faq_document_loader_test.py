@@ -0,0 +1,114 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src.infrastructure.faq_document_loader import (
+    load_faq_documents,
+    normalize_markdown,
+    split_markdown,
+)
+from src.infrastructure.token_count import approximate_tokens
+from src.types.documents import OversizedDocumentPolicy
+
+
+def write_entry(tmp_path: Path, name: str, text: str) -> dict[str, Any]:
+    path = tmp_path / f"{name}.md"
+    path.write_text(text, encoding="utf-8")
+    return {
+        "title": name.title(),
+        "link": f"/faq/{name}",
+        "text_path": str(path),
+        "category": "general",
+    }
+
+
+def test_normalize_markdown() -> None:
+    """Test front matter, links and extra whitespace are removed."""
+    # Arrange
+    text = (
+        "---\ntitle: Payments\ntags: [billing]\n---\r\n"
+        "# Payments  \r\n\r\n\r\n\r\n"
+        "See   the [payment guide](https://example.com/guide) and "
+        "![diagram](img.png) or <https://example.com>.\n"
+        "  - nested\titem\n"
+    )
+
+    # Act
+    result = normalize_markdown(text)
+
+    # Assert
+    assert result == (
+        "# Payments\n\n"
+        "See the payment guide and diagram or https://example.com.\n"
+        "  - nested item"
+    )
+
+
+def test_split_markdown_keeps_paragraphs_together() -> None:
+    """Test parts are packed from whole paragraphs under the token limit."""
+    # Arrange
+    paragraphs = ["a" * 100, "b" * 100, "c" * 100, "d" * 900]
+
+    # Act
+    parts = split_markdown("\n\n".join(paragraphs), max_tokens=60)
+
+    # Assert
+    assert parts[0] == f"{'a' * 100}\n\n{'b' * 100}"
+    assert parts[1] == "c" * 100
+    # The oversized paragraph is cut into pieces
+    assert "".join(parts[2:]) == "d" * 900
+    assert all(approximate_tokens(part) <= 60 for part in parts)
+
+
+@pytest.mark.asyncio
+async def test_load_faq_documents(tmp_path: Path) -> None:
+    """Test documents are deduplicated and oversized ones split, in order."""
+    # Arrange
+    entries = [
+        write_entry(tmp_path, "first", "# First\n\nSome text."),
+        write_entry(tmp_path, "copy", "# First  \n\n\nSome text.\n"),
+        write_entry(tmp_path, "large", "\n\n".join(["x" * 300] * 3)),
+        write_entry(tmp_path, "empty", "---\ntitle: Empty\n---\n"),
+    ]
+
+    # Act
+    report = await load_faq_documents(entries, max_tokens=100, read_concurrency=2)
+
+    # Assert
+    assert [doc.title for doc in report.documents] == [
+        "First",
+        "Large (1/3)",
+        "Large (2/3)",
+        "Large (3/3)",
+    ]
+    assert report.documents[1].link == "/faq/large#part-1"
+    assert report.documents[0].as_base_data() == {
+        "title": "First",
+        "link": "/faq/first",
+        "text": "# First\n\nSome text.",
+        "category": "general",
+    }
+    assert report.duplicates == ["Copy"]
+    assert report.rejected == ["Empty"]
+    assert report.split == 1
+    assert report.tokens == sum(doc.tokens for doc in report.documents)
+
+
+@pytest.mark.asyncio
+async def test_load_faq_documents_rejects_oversized(tmp_path: Path) -> None:
+    """Test oversized documents are left out with the reject policy."""
+    # Arrange
+    entries = [
+        write_entry(tmp_path, "small", "Small text."),
+        write_entry(tmp_path, "large", "x" * 1000),
+    ]
+
+    # Act
+    report = await load_faq_documents(
+        entries, max_tokens=100, oversized_policy=OversizedDocumentPolicy.REJECT
+    )
+
+    # Assert
+    assert [doc.title for doc in report.documents] == ["Small"]
+    assert report.rejected == ["Large"]
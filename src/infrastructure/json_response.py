@@ -0,0 +1,27 @@
+"""
+JSON responses serialized directly by pydantic-core.
+
+FastAPI validates a returned model against the route's response_model again and
+then serializes it (through jsonable_encoder and json.dumps on older versions).
+The managers already return validated response models, so routes return a
+PydanticJSONResponse instead: FastAPI passes Response instances through
+untouched and the model is serialized to JSON bytes in a single Rust pass.
+"""
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+def model_to_json(model: BaseModel) -> bytes:
+    """Serialize a pydantic model to JSON bytes without revalidating it."""
+    return model.__pydantic_serializer__.to_json(model)
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSONResponse rendering pydantic models (or any content) with pydantic-core."""
+
+    def render(self, content: object) -> bytes:
+        if isinstance(content, BaseModel):
+            return model_to_json(content)
+        return to_json(content)
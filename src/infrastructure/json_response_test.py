@@ -0,0 +1,39 @@
+import json
+from datetime import UTC, datetime
+
+from src.infrastructure.json_response import PydanticJSONResponse
+from src.types.history import UserQueryHistoryItem, UserQueryHistoryResponse
+
+
+def test_pydantic_json_response_renders_models() -> None:
+    """Test that models are rendered like model_dump_json, without revalidation."""
+    # Arrange
+    page = UserQueryHistoryResponse(
+        items=[
+            UserQueryHistoryItem(
+                id=1,
+                user_question="¿Cómo cobro?",
+                response="Respuesta",
+                created_at=datetime(2025, 1, 1, tzinfo=UTC),
+            )
+        ],
+        next_cursor=None,
+    )
+
+    # Act
+    response = PydanticJSONResponse(page)
+
+    # Assert
+    assert response.body == page.model_dump_json().encode()
+    assert response.media_type == "application/json"
+    assert json.loads(response.body)["items"][0]["user_question"] == "¿Cómo cobro?"
+
+
+def test_pydantic_json_response_renders_plain_content() -> None:
+    """Test that non-model content is still rendered as JSON."""
+    # Act
+    response = PydanticJSONResponse({"message": "Hola Mundo!"}, status_code=201)
+
+    # Assert
+    assert json.loads(response.body) == {"message": "Hola Mundo!"}
+    assert response.status_code == 201
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import math
+import random
+import re
+from collections.abc import Sequence
+from functools import cache
+
+from src.application.interfaces.ai_generation_interface import AIGenerationInterface
+from src.application.interfaces.ai_support_interface import UserQueryHistory
+from src.config.settings import get_settings
+from src.infrastructure.ai_generation_repository import (
+    FormattedResponse,
+    resolve_used_documents,
+)
+from src.infrastructure.token_count import approximate_tokens
+from src.types.conversation import ConversationTurn
+from src.types.documents import (
+    CanonicalQuestionAnswer,
+    FaqDocument,
+    FaqDocumentRecord,
+)
+from src.types.embeddings import EMBEDDING_DIMENSIONS, Embedding, EmbeddingResponse
+
+# Dimensions each token contributes to; texts sharing words get similar vectors
+DIMENSIONS_PER_TOKEN = 8
+TOKEN_PATTERN = re.compile(r"\w+")
+
+ANSWER_TEMPLATE = """Here is what the documentation says about "{query}".
+
+{summaries}
+
+See {titles} for details."""
+
+CANONICAL_QUESTION_TEMPLATES = (
+    "What is {title}?",
+    "How does {title} work?",
+    "Where can I find information about {title}?",
+    "Can you explain {title}?",
+    "What should I know about {title}?",
+)
+
+
+class InjectedAIError(Exception):
+    """Error raised on purpose by the local backend to exercise error handling."""
+
+
+def deterministic_embedding(text: str) -> list[float]:
+    """
+    Hash-seeded unit-length embedding of a text.
+
+    Each token adds signed weights to a few hash-selected dimensions, so equal
+    texts always get equal vectors and texts sharing words end up close.
+    """
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    for token in TOKEN_PATTERN.findall(text.lower()) or [text]:
+        digest = hashlib.blake2b(
+            token.encode(), digest_size=DIMENSIONS_PER_TOKEN * 4
+        ).digest()
+        for offset in range(0, len(digest), 4):
+            value = int.from_bytes(digest[offset : offset + 4], "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % EMBEDDING_DIMENSIONS] += sign
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class LocalAIGenerationRepository(AIGenerationInterface):
+    """
+    Offline stand-in for AIGenerationRepository.
+
+    Produces deterministic embeddings and templated answers without any network
+    access, with optional artificial latency and random error injection, so the
+    database, caching and concurrency layers can be benchmarked in isolation.
+    """
+
+    def __init__(
+        self,
+        embedding_latency_ms: float = 0.0,
+        generation_latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.model = "local-embedding"
+        self.chat_model = "local-template"
+        self.embedding_latency_ms = embedding_latency_ms
+        self.generation_latency_ms = generation_latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    async def _simulate_call(self, latency_ms: float, operation: str) -> None:
+        """Wait like a remote call would and fail at the configured error rate."""
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        if self.error_rate > 0 and self.rng.random() < self.error_rate:
+            self.logger.error(f"Injected error in {operation}")
+            raise InjectedAIError(f"Injected error in {operation}")
+
+    async def generate_summary(self, text: str) -> str:
+        await self._simulate_call(self.generation_latency_ms, "generate_summary")
+        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+        return " ".join(sentences[:3])
+
+    async def generate_embeddings(self, text: str) -> EmbeddingResponse:
+        return (await self.generate_embeddings_batch([text]))[0]
+
+    async def generate_embeddings_batch(
+        self, texts: list[str]
+    ) -> list[EmbeddingResponse]:
+        await self._simulate_call(self.embedding_latency_ms, "generate_embeddings")
+        tokens = sum(approximate_tokens(text) for text in texts)
+        return [
+            EmbeddingResponse(
+                embedding=Embedding(vector=deterministic_embedding(text)),
+                model=self.model,
+                usage={"prompt_tokens": tokens, "total_tokens": tokens},
+            )
+            for text in texts
+        ]
+
+    async def generate_response(
+        self,
+        query: str,
+        context_docs: list[FaqDocumentRecord],
+        conversation: Sequence[ConversationTurn] = (),
+    ) -> tuple[str, list[FaqDocumentRecord]]:
+        await self._simulate_call(self.generation_latency_ms, "generate_response")
+        cited_docs = context_docs[:2]
+        parsed_response = FormattedResponse(
+            answer=ANSWER_TEMPLATE.format(
+                # Follow-ups are answered together with the question they follow
+                query=f"{conversation[-1].query} {query}" if conversation else query,
+                summaries="\n".join(
+                    f"- {doc.llm_summary or doc.title}" for doc in cited_docs
+                )
+                or "- I don't have that information.",
+                titles=", ".join(doc.title for doc in cited_docs) or "the FAQ",
+            ),
+            used_documents=list(range(1, len(cited_docs) + 1)),
+        )
+        used_docs = resolve_used_documents(parsed_response.used_documents, context_docs)
+        return parsed_response.answer, used_docs
+
+    async def generate_canonical_questions(
+        self, document: FaqDocument, max_questions: int = 5
+    ) -> list[CanonicalQuestionAnswer]:
+        await self._simulate_call(
+            self.generation_latency_ms, "generate_canonical_questions"
+        )
+        answer = document.llm_summary or document.text
+        return [
+            CanonicalQuestionAnswer(
+                question=template.format(title=document.title), answer=answer
+            )
+            for template in CANONICAL_QUESTION_TEMPLATES[:max_questions]
+        ]
+
+    async def get_recommendations(
+        self,
+        user_history: list[UserQueryHistory],
+        max_recommendations: int = 5,
+    ) -> str:
+        await self._simulate_call(self.generation_latency_ms, "get_recommendations")
+        return "\n".join(
+            f"- {history.user_question}: Follow-up to a question you asked before"
+            for history in user_history[:max_recommendations]
+        )
+
+
+@cache
+def get_local_ai_generation_repository() -> LocalAIGenerationRepository:
+    settings = get_settings()
+    return LocalAIGenerationRepository(
+        embedding_latency_ms=settings.LOCAL_AI_EMBEDDING_LATENCY_MS,
+        generation_latency_ms=settings.LOCAL_AI_GENERATION_LATENCY_MS,
+        error_rate=settings.LOCAL_AI_ERROR_RATE,
+        seed=settings.LOCAL_AI_SEED,
+    )
@@ -0,0 +1,149 @@
+import math
+from array import array
+from datetime import UTC, datetime
+
+import pytest
+
+from src.application.interfaces.ai_support_interface import UserQueryHistory
+from src.infrastructure.local_ai_generation_repository import (
+    EMBEDDING_DIMENSIONS,
+    InjectedAIError,
+    LocalAIGenerationRepository,
+    deterministic_embedding,
+)
+from src.types.documents import FaqCategory, FaqDocument, FaqDocumentRecord
+
+
+@pytest.fixture
+def local_repository() -> LocalAIGenerationRepository:
+    """Create a LocalAIGenerationRepository without latency or errors."""
+    return LocalAIGenerationRepository()
+
+
+@pytest.fixture
+def sample_faq_documents() -> list[FaqDocumentRecord]:
+    """Create sample FAQ documents for testing."""
+    return [
+        FaqDocumentRecord(
+            id=index,
+            title=f"Test Document {index}",
+            link=f"http://test{index}.com",
+            category=FaqCategory.PLATFORM_OVERVIEW,
+            llm_summary=f"Summary of test document {index}",
+        )
+        for index in (1, 2, 3)
+    ]
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    return sum(x * y for x, y in zip(a, b, strict=True))
+
+
+def test_deterministic_embedding() -> None:
+    """Test that embeddings are deterministic, unit length and keep word overlap."""
+    # Act
+    embedding = deterministic_embedding("How do I get paid?")
+    same = deterministic_embedding("How do I get paid?")
+    related = deterministic_embedding("How do I get paid for a project?")
+    unrelated = deterministic_embedding("Reset my password")
+
+    # Assert
+    assert embedding == same
+    assert len(embedding) == EMBEDDING_DIMENSIONS
+    assert math.isclose(sum(value * value for value in embedding), 1.0)
+    assert cosine_similarity(embedding, related) > cosine_similarity(
+        embedding, unrelated
+    )
+
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_batch(
+    local_repository: LocalAIGenerationRepository,
+) -> None:
+    """Test that batch embeddings match single embeddings, in input order."""
+    # Act
+    result = await local_repository.generate_embeddings_batch(["first", "second"])
+    single = await local_repository.generate_embeddings("second")
+
+    # Assert
+    assert [response.embedding.vector for response in result] == [
+        array("f", deterministic_embedding("first")),
+        array("f", deterministic_embedding("second")),
+    ]
+    assert single.embedding.vector == result[1].embedding.vector
+
+
+@pytest.mark.asyncio
+async def test_generate_response(
+    local_repository: LocalAIGenerationRepository,
+    sample_faq_documents: list[FaqDocumentRecord],
+) -> None:
+    """Test that the templated answer cites the leading context documents."""
+    # Act
+    response, used_docs = await local_repository.generate_response(
+        "How do I get paid?", sample_faq_documents
+    )
+
+    # Assert
+    assert "How do I get paid?" in response
+    assert "Summary of test document 1" in response
+    assert [doc.id for doc in used_docs] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_generate_canonical_questions(
+    local_repository: LocalAIGenerationRepository,
+) -> None:
+    """Test that canonical questions are templated from the document."""
+    # Arrange
+    document = FaqDocument(
+        id=1,
+        title="Test Document 1",
+        link="http://test1.com",
+        text="This is test document 1",
+        llm_summary="Summary of test document 1",
+        category=FaqCategory.PLATFORM_OVERVIEW,
+    )
+
+    # Act
+    result = await local_repository.generate_canonical_questions(
+        document, max_questions=2
+    )
+
+    # Assert
+    assert len(result) == 2
+    assert all("Test Document 1" in pair.question for pair in result)
+    assert all(pair.answer == "Summary of test document 1" for pair in result)
+
+
+@pytest.mark.asyncio
+async def test_get_recommendations(
+    local_repository: LocalAIGenerationRepository,
+) -> None:
+    """Test that recommendations follow the '- topic: explanation' format."""
+    # Arrange
+    user_history = [
+        UserQueryHistory(
+            user_id=1,
+            user_question="How do I get paid?",
+            response="Payments are sent monthly.",
+            created_at=datetime.now(UTC),
+        )
+    ]
+
+    # Act
+    result = await local_repository.get_recommendations(user_history)
+
+    # Assert
+    assert result.startswith("- How do I get paid?: ")
+
+
+@pytest.mark.asyncio
+async def test_error_injection() -> None:
+    """Test that calls fail when the error rate is 1."""
+    # Arrange
+    local_repository = LocalAIGenerationRepository(error_rate=1.0, seed=0)
+
+    # Act & Assert
+    with pytest.raises(InjectedAIError):
+        await local_repository.generate_embeddings("Test text")
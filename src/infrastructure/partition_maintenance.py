@@ -0,0 +1,68 @@
+"""
+Creation of the upcoming monthly user_response partitions.
+
+init_db creates the partitions of the next months, but a long-running
+deployment would outlive them: interactions would then land in the default
+partition. Each worker checks the partitions when it starts and every
+interval_seconds; creating them is idempotent and serialized in the database,
+so workers and replicas can all run it.
+"""
+
+import asyncio
+import contextlib
+import logging
+from functools import cache
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.database.user_response_partitions import UserResponsePartitions
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintenance:
+    """Keeps the user_response partitions of the next months created."""
+
+    def __init__(self, interval_seconds: float = 3600.0, months_ahead: int = 3) -> None:
+        self.interval_seconds = interval_seconds
+        self.months_ahead = months_ahead
+        self._task: asyncio.Task[None] | None = None
+
+    async def run(self) -> list[str]:
+        """Create the partitions of the current month and the next months_ahead."""
+        async with get_connection() as connection:
+            return await UserResponsePartitions.ensure_future_partitions(
+                connection, months_ahead=self.months_ahead
+            )
+
+    def start(self) -> None:
+        """Run now and every interval_seconds in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                # Retried on the next run; months ahead are created well before
+                # they are needed
+                logger.error(f"Error creating user_response partitions: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+@cache
+def get_partition_maintenance() -> PartitionMaintenance:
+    """Get the partition maintenance of this process."""
+    settings = get_settings()
+    return PartitionMaintenance(
+        interval_seconds=settings.USER_RESPONSE_PARTITION_MAINTENANCE_SECONDS,
+        months_ahead=settings.USER_RESPONSE_PARTITIONS_AHEAD,
+    )
@@ -0,0 +1,153 @@
+"""
+In-process profiling: on-demand sampling profiles and event loop monitoring.
+
+The sampling profiler periodically captures the stack of every thread and
+aggregates them in the collapsed format understood by flamegraph.pl and
+speedscope. The event loop monitor measures how late the loop wakes up from a
+short sleep (exported as a histogram) and a watchdog thread logs the stack of
+the loop thread whenever a single step blocks it longer than a threshold.
+"""
+
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+
+from src.infrastructure.prometheus_metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+
+def _format_frame(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _collapse_stack(thread_name: str, frame: FrameType | None) -> str:
+    stack: list[str] = []
+    while frame is not None:
+        stack.append(_format_frame(frame))
+        frame = frame.f_back
+    return ";".join([thread_name, *reversed(stack)])
+
+
+def sample_stacks(duration: float, interval: float = 0.005) -> Counter[str]:
+    """
+    Sample the stacks of all other threads for `duration` seconds.
+
+    Args:
+        duration: Sampling duration in seconds
+        interval: Time between samples in seconds
+
+    Returns:
+        Number of samples per collapsed stack (thread;outermost;...;innermost)
+    """
+    own_thread_id = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            thread_name = thread_names.get(thread_id, str(thread_id))
+            stacks[_collapse_stack(thread_name, frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks: Counter[str]) -> str:
+    """Render sampled stacks in the collapsed flamegraph format."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """Runs one sampling profile at a time without blocking the event loop."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, duration: float, interval: float = 0.005) -> str:
+        """Sample all threads for `duration` seconds and return collapsed stacks."""
+        async with self._lock:
+            logger.info(f"Sampling profile for {duration:.1f}s")
+            stacks = await asyncio.to_thread(sample_stacks, duration, interval)
+            return format_collapsed(stacks)
+
+
+class EventLoopMonitor:
+    """
+    Measures event loop lag and reports steps that block the loop.
+
+    A task sleeps for `interval` in a loop, records how late it woke up and
+    leaves a heartbeat. A watchdog thread logs the loop thread's stack when the
+    heartbeat is older than `interval + stall_threshold`, once per stall.
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.2) -> None:
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure_lag())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._heartbeat = time.monotonic()
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - self.interval))
+
+    def _watch(self) -> None:
+        reported = False
+        while not self._stopped.wait(self.stall_threshold / 2):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.stall_threshold:
+                reported = False
+                continue
+            if reported:
+                continue
+
+            reported = True
+            EVENT_LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id or 0)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logger.warning(
+                f"Event loop blocked for more than {blocked * 1000:.0f} ms, "
+                f"loop thread stack:\n{stack}"
+            )
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.infrastructure.profiling import (
+    EventLoopMonitor,
+    SamplingProfiler,
+    format_collapsed,
+    sample_stacks,
+)
+
+
+def busy_worker(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_collapses_thread_stacks() -> None:
+    """Test that the stacks of other threads are sampled outermost first."""
+    # Arrange
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+
+    # Act
+    try:
+        stacks = sample_stacks(duration=0.1, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    # Assert
+    busy_stacks = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy_stacks
+    assert all("busy_worker (" in stack for stack in busy_stacks)
+    assert all(
+        stack.index("run (") < stack.index("busy_worker (") for stack in busy_stacks
+    )
+    assert format_collapsed(stacks).splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+
+@pytest.mark.asyncio
+async def test_sampling_profiler_does_not_block_the_loop() -> None:
+    """Test that the loop keeps running while a profile is being sampled."""
+    # Arrange
+    profiler = SamplingProfiler()
+    ticks = 0
+
+    async def tick() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+
+    # Act
+    output = await profiler.profile(0.2, interval=0.01)
+    ticker.cancel()
+
+    # Assert
+    assert ticks > 5
+    assert "MainThread;" in output
+    assert not profiler.running
+
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor_logs_blocking_step(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """Test that a blocking call is reported with the loop thread's stack."""
+    # Arrange
+    monitor = EventLoopMonitor(interval=0.01, stall_threshold=0.05)
+    stalls_before = REGISTRY.get_sample_value("event_loop_stalls_total") or 0.0
+
+    def blocking_call() -> None:
+        time.sleep(0.3)
+
+    # Act
+    with caplog.at_level(logging.WARNING):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_call()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    # Assert
+    assert "Event loop blocked" in caplog.text
+    assert "blocking_call" in caplog.text
+    assert REGISTRY.get_sample_value("event_loop_stalls_total") == stalls_before + 1
+    assert (REGISTRY.get_sample_value("event_loop_lag_seconds_count") or 0) > 0
@@ -1,9 +1,12 @@
+import os
+import shutil
 from collections.abc import Awaitable, Callable
 from functools import wraps
+from pathlib import Path
 from typing import ParamSpec, TypeVar, cast
 
 from fastapi import FastAPI
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
 P = ParamSpec("P")
@@ -34,6 +37,114 @@ AI_DOCUMENT_SEARCH_TIME = Histogram(
     buckets=(0.1, 0.5, 1.0, 2.0, 5.0, float("inf")),
 )
 
+AI_CANONICAL_ANSWER_LOOKUPS = Counter(
+    "ai_canonical_answer_lookups_total",
+    "Total number of canonical answer lookups",
+    ["result"],  # hit, miss
+)
+
+OPENAI_REQUEST_TIME = Histogram(
+    "openai_request_duration_seconds",
+    "Upstream latency of OpenAI API calls",
+    ["operation", "model"],  # operation: summary, embedding, answer, ...
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, float("inf")),
+)
+
+OPENAI_REQUESTS_TOTAL = Counter(
+    "openai_requests_total",
+    "Total number of OpenAI API calls",
+    ["operation", "model", "status"],  # success, error
+)
+
+OPENAI_TOKENS_TOTAL = Counter(
+    "openai_tokens_total",
+    "Total number of tokens used by OpenAI API calls",
+    ["operation", "model", "kind"],  # prompt, completion
+)
+
+OPENAI_CACHED_PROMPT_TOKENS_TOTAL = Counter(
+    "openai_cached_prompt_tokens_total",
+    "Prompt tokens served from the provider's prompt cache",
+    ["operation", "model"],
+)
+
+OPENAI_COST_TOTAL = Counter(
+    "openai_estimated_cost_usd_total",
+    "Estimated cost of OpenAI API calls in USD",
+    ["operation", "model"],
+)
+
+OPENAI_TOKENS_PER_SECOND = Gauge(
+    "openai_tokens_per_second",
+    "Tokens processed by OpenAI API calls per second over the last minute",
+    multiprocess_mode="livesum",
+)
+
+AI_BUDGET_WINDOW_COST = Gauge(
+    "ai_budget_window_cost_usd",
+    "Estimated OpenAI spend within the rolling budget window",
+    multiprocess_mode="livesum",
+)
+
+AI_BUDGET_THROTTLED_TOTAL = Counter(
+    "ai_budget_throttled_total",
+    "Total number of non-critical operations throttled by the budget guard",
+    ["operation"],  # recommendation, ingestion
+)
+
+RATE_LIMIT_THROTTLED_TOTAL = Counter(
+    "ai_rate_limit_throttled_total",
+    "Total number of requests to the AI endpoints throttled by the rate limiter",
+    ["endpoint", "scope"],  # scope: user, endpoint
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled event loop wake-up and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf")),
+)
+
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Total number of event loop steps blocking longer than the stall threshold",
+)
+
+AI_BATCH_ITEMS_TOTAL = Counter(
+    "ai_support_batch_items_total",
+    "Total number of queries answered through the batch endpoint",
+    ["status"],  # canonical, generated, error
+)
+
+AI_OUTPUT_PARSE_TOTAL = Counter(
+    "ai_output_parse_total",
+    "Total number of chat model outputs parsed, by how they were recovered",
+    ["operation", "result"],  # parsed, repaired, reformatted, plain_text, failed
+)
+
+AI_OUTPUT_WASTED_TOKENS = Counter(
+    "ai_output_wasted_tokens_total",
+    "Completion tokens of outputs that could not be parsed as generated",
+    ["operation"],
+)
+
+AI_CITATIONS_TOTAL = Counter(
+    "ai_citations_total",
+    "Total number of document citations in answers, by how they were resolved",
+    ["result"],  # number, title, fuzzy_title, unresolved
+)
+
+CONVERSATION_RETRIEVALS_TOTAL = Counter(
+    "ai_conversation_retrievals_total",
+    "Total number of document retrievals for conversation follow-ups",
+    ["result"],  # reused, searched
+)
+
+SHARED_CACHE_REQUESTS_TOTAL = Counter(
+    "shared_cache_requests_total",
+    "Total number of lookups in the cache shared by all workers",
+    ["cache", "result"],  # embedding/answer, hit/miss/error
+)
+
 
 def track_embedding_time(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
     """Decorator to track embedding generation time.
@@ -73,6 +184,29 @@ def track_document_search_time(
     return cast(Callable[P, Awaitable[T]], wrapper)
 
 
+def track_canonical_answer_lookup(
+    func: Callable[P, Awaitable[T | None]],
+) -> Callable[P, Awaitable[T | None]]:
+    """Decorator to count canonical answer lookup hits and misses.
+
+    Args:
+        func: Async function to track, returning None on a miss
+
+    Returns:
+        Wrapped function that counts hits and misses
+    """
+
+    @wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T | None:
+        result = await func(*args, **kwargs)
+        AI_CANONICAL_ANSWER_LOOKUPS.labels(
+            result="miss" if result is None else "hit"
+        ).inc()
+        return result
+
+    return cast(Callable[P, Awaitable[T | None]], wrapper)
+
+
 def track_response_time(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
     """Decorator to track total response time and success/error counts.
 
@@ -97,6 +231,144 @@ def track_response_time(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitabl
     return cast(Callable[P, Awaitable[T]], wrapper)
 
 
+def record_batch_item(status: str) -> None:
+    """Count one batch query result.
+
+    Args:
+        status: Outcome of the query (canonical, generated or error)
+    """
+    AI_BATCH_ITEMS_TOTAL.labels(status=status).inc()
+
+
+# USD per million (prompt, completion) tokens, used to estimate spend
+OPENAI_PRICES_PER_MILLION_TOKENS: dict[str, tuple[float, float]] = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+
+def estimate_openai_cost(
+    model: str, prompt_tokens: int, completion_tokens: int = 0
+) -> float:
+    """Estimate the cost in USD of an OpenAI call (0 for unknown models).
+
+    Args:
+        model: Model used by the call
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+
+    Returns:
+        Estimated cost in USD
+    """
+    prompt_price, completion_price = OPENAI_PRICES_PER_MILLION_TOKENS.get(
+        model, (0.0, 0.0)
+    )
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def record_openai_request(
+    operation: str,
+    model: str,
+    duration: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+) -> float:
+    """Record latency, token usage and estimated cost of a successful OpenAI call.
+
+    Args:
+        operation: Operation the call served (summary, embedding, answer, ...)
+        model: Model used by the call
+        duration: Upstream latency in seconds
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+
+    Returns:
+        Estimated cost of the call in USD
+    """
+    OPENAI_REQUEST_TIME.labels(operation=operation, model=model).observe(duration)
+    OPENAI_REQUESTS_TOTAL.labels(
+        operation=operation, model=model, status="success"
+    ).inc()
+    OPENAI_TOKENS_TOTAL.labels(operation=operation, model=model, kind="prompt").inc(
+        prompt_tokens
+    )
+    OPENAI_TOKENS_TOTAL.labels(operation=operation, model=model, kind="completion").inc(
+        completion_tokens
+    )
+    cost = estimate_openai_cost(model, prompt_tokens, completion_tokens)
+    OPENAI_COST_TOTAL.labels(operation=operation, model=model).inc(cost)
+    return cost
+
+
+def record_cached_prompt_tokens(operation: str, model: str, cached_tokens: int) -> None:
+    """Record the prompt tokens of an OpenAI call read from the prompt cache.
+
+    Args:
+        operation: Operation the call served (answer, summary, ...)
+        model: Model used by the call
+        cached_tokens: Cached prompt tokens reported in the usage
+    """
+    OPENAI_CACHED_PROMPT_TOKENS_TOTAL.labels(operation=operation, model=model).inc(
+        cached_tokens
+    )
+
+
+def record_output_parse(operation: str, result: str, completion_tokens: int) -> None:
+    """Record how a chat model output was parsed.
+
+    Args:
+        operation: Operation the output belongs to (answer, canonical_questions)
+        result: parsed, repaired (locally), reformatted (by another model),
+            plain_text (used as is) or failed
+        completion_tokens: Output tokens, wasted unless parsed or repaired
+    """
+    AI_OUTPUT_PARSE_TOTAL.labels(operation=operation, result=result).inc()
+    if result not in ("parsed", "repaired"):
+        AI_OUTPUT_WASTED_TOKENS.labels(operation=operation).inc(completion_tokens)
+
+
+def record_openai_error(operation: str, model: str, duration: float) -> None:
+    """Record latency and failure of an OpenAI call.
+
+    Args:
+        operation: Operation the call served (summary, embedding, answer, ...)
+        model: Model used by the call
+        duration: Time until the call failed, in seconds
+    """
+    OPENAI_REQUEST_TIME.labels(operation=operation, model=model).observe(duration)
+    OPENAI_REQUESTS_TOTAL.labels(operation=operation, model=model, status="error").inc()
+
+
+def setup_multiprocess_metrics(directory: str) -> None:
+    """Prepare Prometheus multiprocess mode before worker processes start.
+
+    Every worker writes its samples to files in the directory and /metrics
+    aggregates them, so counters and histograms cover all workers. Must be
+    called before the workers import prometheus_client.
+
+    Args:
+        directory: Directory for the metric files, emptied of previous runs
+    """
+    path = Path(directory)
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path.resolve())
+
+
+def multiprocess_metrics_enabled() -> bool:
+    """Whether metrics are aggregated from the files of several workers."""
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def mark_worker_stopped() -> None:
+    """Drop the live gauges of this worker from the multiprocess metrics."""
+    if multiprocess_metrics_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+
 def setup_prometheus_metrics(app: FastAPI) -> None:
     """Configure Prometheus metrics for the application.
 
@@ -0,0 +1,124 @@
+"""
+FAQ corpus included in the static prefix of answer prompts.
+
+Providers cache the prompt prefixes they have recently seen (OpenAI from 1024
+tokens on), which cuts the latency to the first token and the price of the
+cached tokens. When the summaries of the whole FAQ are small enough, they are
+part of the system message, which then stays byte-identical across requests
+until the corpus changes; requests only add the numbers of the documents
+retrieved for them and the question.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import cache
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.infrastructure.ai_generation_repository import AIGenerationRepository
+from src.infrastructure.ai_support_repository import AISupportRepository
+from src.infrastructure.token_count import approximate_tokens
+from src.types.documents import FaqDocumentRecord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PromptCorpus:
+    """Documents of the prompt prefix, with the text they are prompted as."""
+
+    documents: list[FaqDocumentRecord]
+    context: str
+    # Number of each document in the context, by document ID
+    numbers: dict[int, int]
+    # Digest of the context, changing whenever the corpus does
+    version: str
+
+    @classmethod
+    def from_documents(cls, documents: list[FaqDocumentRecord]) -> "PromptCorpus":
+        context = AIGenerationRepository._prepare_context(documents)
+        return cls(
+            documents=documents,
+            context=context,
+            numbers={doc.id: number for number, doc in enumerate(documents, start=1)},
+            version=hashlib.sha256(context.encode()).hexdigest()[:16],
+        )
+
+    def covers(self, documents: Sequence[FaqDocumentRecord]) -> bool:
+        """Whether all the documents are part of the corpus."""
+        return all(doc.id in self.numbers for doc in documents)
+
+
+class PromptCorpusCache:
+    """
+    Corpus of the prompt prefix of this process, reloaded periodically.
+
+    Only documents shown to every user are included, so queries that retrieve
+    technical documents are prompted with their own context instead. No corpus
+    is used when it is larger than max_tokens.
+    """
+
+    def __init__(self, max_tokens: int, refresh_seconds: float = 300.0) -> None:
+        self.max_tokens = max_tokens
+        self.refresh_seconds = refresh_seconds
+        self.current: PromptCorpus | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_tokens > 0
+
+    async def refresh(self) -> PromptCorpus | None:
+        """Load the corpus from the database, dropping it if too large."""
+        async with get_connection() as connection:
+            documents = await AISupportRepository(connection).get_faq_documents()
+        corpus = PromptCorpus.from_documents(documents)
+        tokens = approximate_tokens(corpus.context)
+        if tokens > self.max_tokens:
+            logger.debug(
+                f"FAQ corpus (~{tokens} tokens) exceeds PROMPT_CORPUS_MAX_TOKENS, "
+                "prompting with the retrieved documents only"
+            )
+            self.current = None
+        elif self.current is None or self.current.context != corpus.context:
+            logger.info(
+                f"Loaded {len(documents)} documents (~{tokens} tokens) "
+                "in the prompt prefix"
+            )
+            self.current = corpus
+        return self.current
+
+    def start(self) -> None:
+        """Reload the corpus every refresh_seconds in the background."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # The previous corpus is kept until a refresh succeeds
+                logger.error(f"Error refreshing the prompt corpus: {str(e)}")
+
+
+@cache
+def get_prompt_corpus_cache() -> PromptCorpusCache:
+    """Get the prompt corpus cache of this process."""
+    settings = get_settings()
+    return PromptCorpusCache(
+        max_tokens=settings.PROMPT_CORPUS_MAX_TOKENS,
+        refresh_seconds=settings.PROMPT_CORPUS_REFRESH_SECONDS,
+    )
@@ -0,0 +1,348 @@
+"""
+Token-bucket rate limiting of the AI endpoints.
+
+Every request takes tokens from two buckets: the bucket of its user and the
+bucket of its endpoint, shared by all users. Buckets hold up to capacity tokens
+and refill continuously; a request is admitted only if both buckets hold its
+cost, and is otherwise answered with the time until they will.
+
+Requests are weighted by what they cost upstream: admission takes the base
+request cost, and each chat completion the request ends up making is charged
+once it is done. Canonical and cached answers only pay the base cost, while a
+full generation may leave the buckets in debt, which later requests wait out.
+A batch of queries is admitted as one request per query, charged to the user
+of each query.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Mapping, Sequence
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import cache
+
+from asyncpg import Connection
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.infrastructure.prometheus_metrics import RATE_LIMIT_THROTTLED_TOTAL
+from src.types.rate_limits import RateLimitBackend
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """Size and refill rate of a token bucket."""
+
+    capacity: float
+    refill_per_second: float
+
+    def refill(self, tokens: float, elapsed: float) -> float:
+        """Tokens held after elapsed seconds, starting from tokens."""
+        return min(self.capacity, tokens + elapsed * self.refill_per_second)
+
+    def wait(self, tokens: float, cost: float) -> float:
+        """
+        Seconds until a bucket holding tokens can pay cost.
+
+        A full bucket pays any cost, going into debt, so that batches costing
+        more than the capacity are admitted once the bucket has refilled.
+        """
+        return max(0.0, (min(cost, self.capacity) - tokens) / self.refill_per_second)
+
+
+@dataclass(frozen=True, slots=True)
+class BucketCharge:
+    """Cost taken from a token bucket."""
+
+    key: str
+    limit: RateLimit
+    cost: float
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a request is throttled by the rate limiter."""
+
+    def __init__(self, endpoint: str, scope: str, retry_after: float) -> None:
+        super().__init__(
+            f"Rate limit exceeded for {endpoint} ({scope}), retry in {retry_after:.0f}s"
+        )
+        self.endpoint = endpoint
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class RequestUsage:
+    """Chat completions made while serving a rate limited request."""
+
+    generations: int = 0
+
+
+_request_usage: ContextVar[RequestUsage | None] = ContextVar(
+    "rate_limited_request_usage", default=None
+)
+
+
+def record_generation() -> None:
+    """Count a chat completion against the rate limited request being served."""
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.generations += 1
+
+
+class RateLimitStore(ABC):
+    """Storage of the token buckets."""
+
+    @abstractmethod
+    async def acquire(self, charges: Sequence[BucketCharge]) -> dict[str, float]:
+        """
+        Take the cost of every charge from its bucket, if all of them can pay.
+
+        Returns:
+            Seconds to wait per bucket too low to pay its cost; empty if admitted.
+        """
+
+    @abstractmethod
+    async def charge(self, charges: Sequence[BucketCharge]) -> None:
+        """Take the cost of every charge from its bucket, possibly into debt."""
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Token buckets of this process.
+
+    Holds at most max_buckets buckets, evicting the least recently used ones;
+    an evicted bucket starts full again.
+    """
+
+    def __init__(self, max_buckets: int = 100_000) -> None:
+        self.max_buckets = max_buckets
+        # key -> (tokens, monotonic time of tokens)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refill(self, key: str, limit: RateLimit, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        return limit.refill(tokens, now - updated_at)
+
+    def _take(self, key: str, tokens: float, now: float) -> None:
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+
+    async def acquire(self, charges: Sequence[BucketCharge]) -> dict[str, float]:
+        # Runs on the event loop without awaiting, so buckets are checked and
+        # taken from atomically
+        now = time.monotonic()
+        tokens = {
+            charge.key: self._refill(charge.key, charge.limit, now)
+            for charge in charges
+        }
+        waits = {
+            charge.key: wait
+            for charge in charges
+            if (wait := charge.limit.wait(tokens[charge.key], charge.cost)) > 0
+        }
+        if not waits:
+            for charge in charges:
+                self._take(charge.key, tokens[charge.key] - charge.cost, now)
+        return waits
+
+    async def charge(self, charges: Sequence[BucketCharge]) -> None:
+        now = time.monotonic()
+        for charge in charges:
+            tokens = self._refill(charge.key, charge.limit, now)
+            self._take(charge.key, tokens - charge.cost, now)
+
+
+class PostgresRateLimitStore(RateLimitStore):
+    """
+    Token buckets in PostgreSQL, shared by every worker and replica.
+
+    Buckets are refilled and locked by a single upsert in the transaction that
+    takes from them, with the database clock, so workers never disagree on the
+    time. Rows are locked in key order, so concurrent requests cannot deadlock.
+    """
+
+    async def acquire(self, charges: Sequence[BucketCharge]) -> dict[str, float]:
+        by_key = {charge.key: charge for charge in charges}
+        keys = sorted(by_key)
+        async with get_connection() as conn, conn.transaction():
+            records = await conn.fetch(
+                """
+                INSERT INTO platform_information.rate_limit_buckets AS b
+                    (key, tokens, capacity, refill_per_second)
+                SELECT key, capacity, capacity, refill_per_second
+                FROM unnest($1::varchar[], $2::float8[], $3::float8[])
+                    AS r(key, capacity, refill_per_second)
+                ORDER BY key
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = LEAST(
+                        EXCLUDED.capacity,
+                        b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at)
+                            * EXCLUDED.refill_per_second
+                    ),
+                    capacity = EXCLUDED.capacity,
+                    refill_per_second = EXCLUDED.refill_per_second,
+                    updated_at = now()
+                RETURNING key, tokens
+                """,
+                keys,
+                [by_key[key].limit.capacity for key in keys],
+                [by_key[key].limit.refill_per_second for key in keys],
+            )
+            tokens = {record["key"]: record["tokens"] for record in records}
+            waits = {
+                charge.key: wait
+                for charge in charges
+                if (wait := charge.limit.wait(tokens[charge.key], charge.cost)) > 0
+            }
+            if not waits:
+                await self._take(conn, charges)
+        return waits
+
+    async def charge(self, charges: Sequence[BucketCharge]) -> None:
+        # Refills are computed from updated_at, which is left as is
+        async with get_connection() as conn:
+            await self._take(conn, charges)
+
+    @staticmethod
+    async def _take(conn: Connection, charges: Sequence[BucketCharge]) -> None:
+        charges = sorted(charges, key=lambda charge: charge.key)
+        await conn.execute(
+            """
+            UPDATE platform_information.rate_limit_buckets AS b
+            SET tokens = b.tokens - c.cost
+            FROM unnest($1::varchar[], $2::float8[]) AS c(key, cost)
+            WHERE b.key = c.key
+            """,
+            [charge.key for charge in charges],
+            [charge.cost for charge in charges],
+        )
+
+
+class RateLimiter:
+    """
+    Per-user and per-endpoint rate limiter of the AI endpoints.
+
+    Admission costs request_cost, and every chat completion made for the
+    request adds generation_cost once the request is done.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        user_limit: RateLimit,
+        endpoint_limit: RateLimit,
+        request_cost: float = 1.0,
+        generation_cost: float = 4.0,
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.user_limit = user_limit
+        self.endpoint_limit = endpoint_limit
+        self.request_cost = request_cost
+        self.generation_cost = generation_cost
+
+    def _charges(
+        self, endpoint: str, requests_per_user: Mapping[int, int], cost: float
+    ) -> list[BucketCharge]:
+        """Charge cost per request to the user making it and to the endpoint."""
+        return [
+            *(
+                BucketCharge(f"user:{user_id}", self.user_limit, requests * cost)
+                for user_id, requests in requests_per_user.items()
+            ),
+            BucketCharge(
+                f"endpoint:{endpoint}",
+                self.endpoint_limit,
+                sum(requests_per_user.values()) * cost,
+            ),
+        ]
+
+    @asynccontextmanager
+    async def limit(self, endpoint: str, user_id: int) -> AsyncGenerator[None, None]:
+        """
+        Admit a request of a user to an endpoint for the duration of the context.
+
+        Raises:
+            RateLimitExceededError: If the user or the endpoint is over its limit
+        """
+        async with self.limit_batch(endpoint, {user_id: 1}):
+            yield
+
+    @asynccontextmanager
+    async def limit_batch(
+        self, endpoint: str, requests_per_user: Mapping[int, int]
+    ) -> AsyncGenerator[None, None]:
+        """
+        Admit a batch of requests to an endpoint for the duration of the context.
+
+        Each user is charged for their number of requests in the batch, and the
+        chat completions of the batch are shared between the users in the same
+        proportion.
+
+        Raises:
+            RateLimitExceededError: If a user or the endpoint is over its limit
+        """
+        waits = await self.store.acquire(
+            self._charges(endpoint, requests_per_user, self.request_cost)
+        )
+        if waits:
+            key = max(waits, key=waits.__getitem__)
+            scope = key.split(":", 1)[0]
+            RATE_LIMIT_THROTTLED_TOTAL.labels(endpoint=endpoint, scope=scope).inc()
+            raise RateLimitExceededError(endpoint, scope, waits[key])
+
+        usage = RequestUsage()
+        token = _request_usage.set(usage)
+        try:
+            yield
+        finally:
+            _request_usage.reset(token)
+            # Generations are paid for even if the request failed afterwards
+            if usage.generations:
+                requests = sum(requests_per_user.values())
+                await self.store.charge(
+                    self._charges(
+                        endpoint,
+                        requests_per_user,
+                        usage.generations * self.generation_cost / requests,
+                    )
+                )
+
+
+@cache
+def get_rate_limiter() -> RateLimiter | None:
+    """Get the rate limiter of this process, or None if disabled."""
+    settings = get_settings()
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    store: RateLimitStore
+    # Buckets of the memory store only see this worker's requests, so each
+    # worker gets an equal share of the limits
+    workers = 1
+    if settings.RATE_LIMIT_BACKEND == RateLimitBackend.POSTGRES:
+        store = PostgresRateLimitStore()
+    else:
+        store = InMemoryRateLimitStore(max_buckets=settings.RATE_LIMIT_MAX_BUCKETS)
+        workers = settings.APP_WORKERS
+    return RateLimiter(
+        store,
+        user_limit=RateLimit(
+            capacity=settings.RATE_LIMIT_USER_CAPACITY / workers,
+            refill_per_second=settings.RATE_LIMIT_USER_REFILL_PER_SECOND / workers,
+        ),
+        endpoint_limit=RateLimit(
+            capacity=settings.RATE_LIMIT_ENDPOINT_CAPACITY / workers,
+            refill_per_second=settings.RATE_LIMIT_ENDPOINT_REFILL_PER_SECOND / workers,
+        ),
+        request_cost=settings.RATE_LIMIT_REQUEST_COST,
+        generation_cost=settings.RATE_LIMIT_GENERATION_COST,
+    )
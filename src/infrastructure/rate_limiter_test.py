@@ -0,0 +1,187 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.infrastructure.rate_limiter import (
+    BucketCharge,
+    InMemoryRateLimitStore,
+    PostgresRateLimitStore,
+    RateLimit,
+    RateLimiter,
+    RateLimitExceededError,
+    record_generation,
+)
+
+
+def make_rate_limiter(
+    store: InMemoryRateLimitStore,
+    user_capacity: float = 10.0,
+    endpoint_capacity: float = 100.0,
+) -> RateLimiter:
+    return RateLimiter(
+        store,
+        user_limit=RateLimit(capacity=user_capacity, refill_per_second=1.0),
+        endpoint_limit=RateLimit(capacity=endpoint_capacity, refill_per_second=10.0),
+        request_cost=1.0,
+        generation_cost=4.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_throttles_user_over_limit() -> None:
+    """Test a user is throttled once their bucket is empty, not other users."""
+    # Arrange
+    rate_limiter = make_rate_limiter(InMemoryRateLimitStore(), user_capacity=2.0)
+
+    # Act
+    for _ in range(2):
+        async with rate_limiter.limit("ai_faq_search", user_id=1):
+            pass
+
+    # Assert
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        async with rate_limiter.limit("ai_faq_search", user_id=1):
+            pass
+    assert exc_info.value.scope == "user"
+    assert 0 < exc_info.value.retry_after <= 1.0
+    async with rate_limiter.limit("ai_faq_search", user_id=2):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_throttles_endpoint_over_limit() -> None:
+    """Test the endpoint bucket throttles all users without charging the user."""
+    # Arrange
+    store = InMemoryRateLimitStore()
+    rate_limiter = make_rate_limiter(store, endpoint_capacity=1.0)
+    async with rate_limiter.limit("recommendations", user_id=1):
+        pass
+
+    # Act
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        async with rate_limiter.limit("recommendations", user_id=2):
+            pass
+
+    # Assert
+    assert exc_info.value.scope == "endpoint"
+    # A throttled request takes nothing from the buckets it would pass
+    assert (
+        await store.acquire([BucketCharge("user:2", rate_limiter.user_limit, 10.0)])
+        == {}
+    )
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_charges_generations() -> None:
+    """Test chat completions are charged once the request is done."""
+    # Arrange
+    rate_limiter = make_rate_limiter(InMemoryRateLimitStore(), user_capacity=10.0)
+
+    # Act
+    async with rate_limiter.limit("ai_faq_search", user_id=1):
+        record_generation()
+        record_generation()
+
+    # Assert
+    # 1 for admission and 2 * 4 for the generations leave 1 token, which the
+    # next request takes before its generation leaves the bucket in debt
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        async with rate_limiter.limit("ai_faq_search", user_id=1):
+            record_generation()
+        async with rate_limiter.limit("ai_faq_search", user_id=1):
+            pass
+    assert exc_info.value.retry_after == pytest.approx(5.0, abs=0.1)
+    # Generations outside a rate limited request are not counted
+    record_generation()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_charges_batch_per_user_and_query() -> None:
+    """Test each user of a batch pays for their queries and share of generations."""
+    # Arrange
+    store = InMemoryRateLimitStore()
+    rate_limiter = make_rate_limiter(store, user_capacity=10.0)
+
+    # Act
+    async with rate_limiter.limit_batch("ai_faq_search_batch", {1: 3, 2: 1}):
+        for _ in range(2):
+            record_generation()
+
+    # Assert
+    # User 1 paid 3 for admission and 3/4 of the 8 for generations, user 2 paid
+    # 1 and the remaining 2
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        async with rate_limiter.limit_batch("ai_faq_search_batch", {1: 2}):
+            pass
+    assert exc_info.value.retry_after == pytest.approx(1.0, abs=0.1)
+    async with rate_limiter.limit_batch("ai_faq_search_batch", {2: 7}):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_admits_batch_over_capacity_into_debt() -> None:
+    """Test a batch costing more than a full bucket holds is still admitted."""
+    # Arrange
+    rate_limiter = make_rate_limiter(InMemoryRateLimitStore(), user_capacity=2.0)
+
+    # Act
+    async with rate_limiter.limit_batch("ai_faq_search_batch", {1: 5}):
+        pass
+
+    # Assert
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        async with rate_limiter.limit("ai_faq_search_batch", user_id=1):
+            pass
+    # The 3 tokens of debt and the next request's 1 are refilled at 1 per second
+    assert exc_info.value.retry_after == pytest.approx(4.0, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_evicts_least_recently_used() -> None:
+    """Test the store keeps at most max_buckets buckets."""
+    # Arrange
+    store = InMemoryRateLimitStore(max_buckets=2)
+    limit = RateLimit(capacity=1.0, refill_per_second=0.001)
+
+    # Act
+    for key in ("a", "b", "a", "c"):
+        await store.acquire([BucketCharge(key, limit, 0.5)])
+
+    # Assert
+    assert len(store) == 2
+    # "a" was kept, "b" was evicted and starts full again
+    assert "a" in await store.acquire([BucketCharge("a", limit, 1.0)])
+    assert await store.acquire([BucketCharge("b", limit, 1.0)]) == {}
+
+
+@pytest.mark.asyncio
+async def test_postgres_store_takes_tokens_if_all_buckets_hold_them() -> None:
+    """Test buckets are refilled in one upsert and only taken from if admitted."""
+    # Arrange
+    limit = RateLimit(capacity=10.0, refill_per_second=2.0)
+    conn = AsyncMock()
+    conn.transaction = MagicMock()
+    conn.fetch.side_effect = [
+        [{"key": "endpoint:x", "tokens": 5.0}, {"key": "user:1", "tokens": 3.0}],
+        [{"key": "endpoint:x", "tokens": 5.0}, {"key": "user:1", "tokens": 0.0}],
+    ]
+    get_connection = MagicMock()
+    get_connection.return_value.__aenter__.return_value = conn
+    store = PostgresRateLimitStore()
+    charges = [
+        BucketCharge("user:1", limit, 1.0),
+        BucketCharge("endpoint:x", limit, 2.0),
+    ]
+
+    # Act
+    with patch("src.infrastructure.rate_limiter.get_connection", get_connection):
+        admitted = await store.acquire(charges)
+        throttled = await store.acquire(charges)
+
+    # Assert
+    assert admitted == {}
+    assert throttled == {"user:1": pytest.approx(0.5)}
+    # Keys are locked in order
+    assert conn.fetch.call_args.args[1] == ["endpoint:x", "user:1"]
+    conn.execute.assert_called_once()
+    assert conn.execute.call_args.args[1:] == (["endpoint:x", "user:1"], [2.0, 1.0])
@@ -0,0 +1,175 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+
+from src.config.settings import get_settings
+
+# Writes between two prunings of expired and excess entries
+PRUNE_EVERY_WRITES = 1000
+# SQLite limits the number of host parameters of a single statement
+MAX_KEYS_PER_QUERY = 500
+
+
+class SharedCache:
+    """
+    Key/value cache shared by all worker processes on a host.
+
+    Entries live in a SQLite database in WAL mode, so every worker reads the
+    entries written by the others without a cache server; readers never block
+    the writer. Values are bytes with an optional expiry. Once the cache holds
+    more than max_entries, the oldest entries are evicted.
+
+    Methods are blocking; async callers run them in a worker thread.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        # One connection per process, used by the event loop's worker threads
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_created_at ON cache (created_at)"
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Run statements in one write transaction.
+
+        The connection is in autocommit mode (isolation_level=None), in which
+        `with connection` does not open a transaction.
+        """
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Get the value of a key.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        """
+        Get the values of several keys.
+
+        Args:
+            keys: The cache keys
+
+        Returns:
+            Dictionary with the value of every key found and not expired
+        """
+        keys = list(dict.fromkeys(keys))
+        values: dict[str, bytes] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), MAX_KEYS_PER_QUERY):
+                chunk = keys[start : start + MAX_KEYS_PER_QUERY]
+                rows = self._connection.execute(
+                    f"""
+                    SELECT key, value FROM cache
+                    WHERE key IN ({", ".join("?" * len(chunk))})
+                    AND (expires_at IS NULL OR expires_at > ?)
+                    """,
+                    (*chunk, now),
+                )
+                values.update(rows)
+        return values
+
+    def set(self, key: str, value: bytes, ttl_seconds: float | None = None) -> None:
+        """
+        Store the value of a key, replacing any previous one.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            ttl_seconds: Seconds until the entry expires (None keeps it until evicted)
+        """
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(
+        self, items: dict[str, bytes], ttl_seconds: float | None = None
+    ) -> None:
+        """
+        Store several values in a single transaction.
+
+        Args:
+            items: Values by cache key
+            ttl_seconds: Seconds until the entries expire (None keeps them until evicted)
+        """
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            with self._transaction():
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                    [(key, value, expires_at, now) for key, value in items.items()],
+                )
+            self._writes += len(items)
+            if self._writes >= PRUNE_EVERY_WRITES:
+                self._writes = 0
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        with self._transaction():
+            self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            self._connection.execute(
+                """
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM cache ORDER BY created_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+@cache
+def get_shared_cache() -> SharedCache | None:
+    """Get this process's handle on the shared cache, or None if disabled."""
+    settings = get_settings()
+    if settings.SHARED_CACHE_PATH is None:
+        return None
+    return SharedCache(
+        settings.SHARED_CACHE_PATH, max_entries=settings.SHARED_CACHE_MAX_ENTRIES
+    )
@@ -0,0 +1,85 @@
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from src.infrastructure.shared_cache import SharedCache
+
+
+@pytest.fixture
+def shared_cache(tmp_path: Path) -> Iterator[SharedCache]:
+    """Create a SharedCache in a temporary directory."""
+    cache = SharedCache(str(tmp_path / "cache" / "shared.sqlite3"), max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_shared_cache_visible_across_connections(
+    shared_cache: SharedCache,
+) -> None:
+    """Test that entries written by one process are read by another."""
+    # Arrange
+    other_worker = SharedCache(shared_cache.path)
+
+    # Act
+    shared_cache.set_many({"a": b"1", "b": b"2"})
+    values = other_worker.get_many(["a", "b", "c"])
+    other_worker.close()
+
+    # Assert
+    assert values == {"a": b"1", "b": b"2"}
+    assert shared_cache.get("c") is None
+
+
+def test_shared_cache_set_many_is_atomic(shared_cache: SharedCache) -> None:
+    """Test that no entry of a batch is stored if one of them fails."""
+    # Arrange
+    # A NULL value violates the NOT NULL constraint of the second row
+    items: dict[str, Any] = {"a": b"1", "b": None}
+
+    # Act & Assert
+    with pytest.raises(sqlite3.IntegrityError):
+        shared_cache.set_many(items)
+    assert shared_cache.get_many(["a", "b"]) == {}
+    shared_cache.set("c", b"3")
+    assert shared_cache.get("c") == b"3"
+
+
+def test_shared_cache_expires_entries(shared_cache: SharedCache) -> None:
+    """Test that expired entries are not returned."""
+    # Arrange
+    with patch("src.infrastructure.shared_cache.time.time", return_value=1000.0):
+        shared_cache.set("answer", b"cached", ttl_seconds=60)
+
+    # Act
+    with patch("src.infrastructure.shared_cache.time.time", return_value=1059.0):
+        fresh = shared_cache.get("answer")
+    with patch("src.infrastructure.shared_cache.time.time", return_value=1061.0):
+        expired = shared_cache.get("answer")
+
+    # Assert
+    assert fresh == b"cached"
+    assert expired is None
+
+
+def test_shared_cache_evicts_oldest_entries(shared_cache: SharedCache) -> None:
+    """Test that pruning keeps only the newest max_entries entries."""
+    # Arrange
+    for index in range(5):
+        with patch(
+            "src.infrastructure.shared_cache.time.time", return_value=float(index)
+        ):
+            shared_cache.set(f"key{index}", b"value")
+
+    # Act
+    shared_cache._prune(now=5.0)
+
+    # Assert
+    assert shared_cache.get_many(f"key{index}" for index in range(5)).keys() == {
+        "key2",
+        "key3",
+        "key4",
+    }
@@ -0,0 +1,159 @@
+"""
+Prompting for and parsing JSON outputs of chat models.
+
+Outputs are parsed by pydantic-core directly when they are well-formed. Models
+occasionally wrap the JSON in a Markdown code block, add prose around it, leave
+trailing commas or stop mid-output (max_tokens); those outputs are repaired
+locally instead of being thrown away.
+"""
+
+import json
+import re
+from functools import cache
+from typing import TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Same wording as langchain's PydanticOutputParser, which the prompts used to be
+# built with
+FORMAT_INSTRUCTIONS_TEMPLATE = """The output should be formatted as a JSON instance that conforms to the JSON schema below.
+
+As an example, for the schema {{"properties": {{"foo": {{"title": "Foo", "description": "a list of strings", "type": "array", "items": {{"type": "string"}}}}}}, "required": ["foo"]}}
+the object {{"foo": ["bar", "baz"]}} is a well-formatted instance of the schema. The object {{"properties": {{"foo": ["bar", "baz"]}}}} is not well-formatted.
+
+Here is the output schema:
+```
+{schema}
+```"""
+
+JSON_MARKDOWN_PATTERN = re.compile(r"```(?:json)?(.*)```", re.DOTALL)
+
+# Truncation points tried, from the end, when repairing an incomplete output
+MAX_REPAIR_ATTEMPTS = 20
+
+# Outcomes of parse_model_output
+PARSED = "parsed"
+REPAIRED = "repaired"
+
+
+@cache
+def format_instructions(model: type[BaseModel]) -> str:
+    """Instructions asking for a JSON instance of the model's schema."""
+    schema = model.model_json_schema()
+    schema.pop("title", None)
+    schema.pop("type", None)
+    return FORMAT_INSTRUCTIONS_TEMPLATE.format(
+        schema=json.dumps(schema, ensure_ascii=False)
+    )
+
+
+def _drop_trailing_comma(output: list[str]) -> None:
+    while output and output[-1].isspace():
+        output.pop()
+    if output and output[-1] == ",":
+        output.pop()
+
+
+def _close_json(text: str) -> str | None:
+    """
+    Close the strings, arrays and objects left open in a JSON prefix.
+
+    Text after the top-level value is dropped and trailing commas removed.
+    Returns None if the brackets do not match.
+    """
+    closers: list[str] = []
+    output: list[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not closers or closers.pop() != char:
+                return None
+            _drop_trailing_comma(output)
+        output.append(char)
+        if not closers and not in_string:
+            break
+    if escaped:
+        output.pop()
+    if in_string:
+        output.append('"')
+    return "".join(output) + "".join(reversed(closers))
+
+
+def repair_json(text: str) -> object:
+    """
+    Load the JSON value in an LLM output, repairing it if needed.
+
+    Handles surrounding prose, trailing commas and outputs cut off before the
+    end; an incomplete trailing member is dropped.
+
+    Raises:
+        ValueError: If no JSON value can be recovered
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise ValueError("No JSON value in the output")
+    text = text[min(starts) :]
+    cut_points = [len(text)]
+    cut_points += [
+        index for index in range(len(text) - 1, 0, -1) if text[index] == ","
+    ][:MAX_REPAIR_ATTEMPTS]
+    for end in cut_points:
+        candidate = _close_json(text[:end])
+        if candidate is None:
+            continue
+        try:
+            return json.loads(candidate, strict=False)
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Could not repair the JSON output")
+
+
+def _load_json(text: str) -> object:
+    try:
+        return json.loads(text.strip("`"), strict=False)
+    except json.JSONDecodeError:
+        match = JSON_MARKDOWN_PATTERN.search(text)
+        if match is None:
+            raise
+        return json.loads(match.group(1).strip(), strict=False)
+
+
+def parse_model_output(content: str | None, model: type[ModelT]) -> tuple[ModelT, str]:
+    """
+    Parse a model from an LLM output holding its JSON.
+
+    Args:
+        content: The output of the chat model
+        model: The model the output should be an instance of
+
+    Returns:
+        Tuple of the parsed model and how it was obtained: PARSED for valid JSON
+        (possibly in a code block), REPAIRED for JSON that had to be repaired
+
+    Raises:
+        ValueError: If the output cannot be parsed or does not match the model
+    """
+    text = (content or "").strip()
+    try:
+        return model.model_validate_json(text), PARSED
+    except ValidationError:
+        pass
+    try:
+        data, outcome = _load_json(text), PARSED
+    except json.JSONDecodeError:
+        match = JSON_MARKDOWN_PATTERN.search(text)
+        data, outcome = repair_json(match.group(1) if match else text), REPAIRED
+    return model.model_validate(data), outcome
@@ -0,0 +1,65 @@
+import pytest
+
+from src.infrastructure.ai_generation_repository import FormattedResponse
+from src.infrastructure.structured_output import (
+    PARSED,
+    REPAIRED,
+    parse_model_output,
+    repair_json,
+)
+
+
+def test_parse_model_output_from_code_block() -> None:
+    """Test parse_model_output reads JSON wrapped in a Markdown code block."""
+    # Arrange
+    content = """Here is the answer:
+```json
+{"answer": "Use ```pip install```\\n to install", "used_documents": ["Doc"]}
+```"""
+
+    # Act
+    parsed, outcome = parse_model_output(content, FormattedResponse)
+
+    # Assert
+    assert parsed.answer == "Use ```pip install```\n to install"
+    assert parsed.used_documents == ["Doc"]
+    assert outcome == PARSED
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        # Trailing commas and prose after the JSON
+        (
+            '{"answer": "Hi", "used_documents": ["Doc",],} Hope it helps!',
+            {"answer": "Hi", "used_documents": ["Doc"]},
+        ),
+        # Cut off inside a string (max_tokens reached)
+        (
+            '{"used_documents": ["Doc"], "answer": "To get paid, open the',
+            {"used_documents": ["Doc"], "answer": "To get paid, open the"},
+        ),
+        # Cut off inside a key: the incomplete member is dropped
+        (
+            '{"answer": "Hi", "used_documents": ["Doc"], "extr',
+            {"answer": "Hi", "used_documents": ["Doc"]},
+        ),
+    ],
+)
+def test_repair_json(content: str, expected: dict[str, object]) -> None:
+    """Test repair_json recovers malformed and truncated outputs."""
+    # Act
+    repaired = repair_json(content)
+    parsed, outcome = parse_model_output(content, FormattedResponse)
+
+    # Assert
+    assert repaired == expected
+    assert parsed == FormattedResponse.model_validate(expected)
+    assert outcome == REPAIRED
+
+
+def test_parse_model_output_rejects_plain_text() -> None:
+    """Test parse_model_output raises ValueError for outputs without JSON."""
+    # Act / Assert
+    with pytest.raises(ValueError):
+        parse_model_output("I could not find that information.", FormattedResponse)
@@ -0,0 +1,398 @@
+"""
+Lightweight per-request tracing with OpenTelemetry-style spans.
+
+Spans are propagated through a context variable, so every span opened while
+handling a request (in the manager, the repositories or the database layer,
+including tasks and worker threads started from it) becomes part of the
+request's span tree. Finished traces are exported from a background thread to
+a JSONL file and/or an OTLP/HTTP collector, and traces slower than a threshold
+are logged as a full span tree.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar, cast
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config.settings import get_settings
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    # Every span of the trace, shared by all its spans and filled as they end
+    trace_spans: list["Span"] = field(default_factory=list, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1_000_000
+
+    def set_attributes(self, **attributes: object) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(ABC):
+    """Base class for trace exporters."""
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Export the spans of a finished trace."""
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """Append spans to a JSONL file, one span per line."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: list[Span]) -> None:
+        with self.path.open("a") as export_file:
+            for span in spans:
+                export_file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Send spans to an OpenTelemetry collector using OTLP/HTTP with JSON."""
+
+    def __init__(self, endpoint: str, service_name: str = "ai-support-system") -> None:
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+
+    @staticmethod
+    def _attribute(key: str, value: object) -> dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _payload(self, spans: list[Span]) -> dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            self._attribute("service.name", self.service_name)
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(span.start_ns),
+                                    "endTimeUnixNano": str(span.end_ns),
+                                    "attributes": [
+                                        self._attribute(key, value)
+                                        for key, value in span.attributes.items()
+                                    ],
+                                    "status": {"code": 2, "message": span.error}
+                                    if span.error
+                                    else {"code": 1},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self._payload(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+
+
+class Tracer:
+    """
+    Creates spans and hands finished traces to the exporters.
+
+    Disabled by default; span() and traced() are then close to free.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.exporters: list[SpanExporter] = []
+        self.sample_rate = 1.0
+        self.slow_request_ms: float | None = None
+        self.slow_request_sample_rate = 1.0
+        self._queue: queue.Queue[list[Span] | None] = queue.Queue(maxsize=10_000)
+        self._worker: threading.Thread | None = None
+
+    def configure(
+        self,
+        exporters: list[SpanExporter],
+        sample_rate: float = 1.0,
+        slow_request_ms: float | None = None,
+        slow_request_sample_rate: float = 1.0,
+    ) -> None:
+        self.enabled = True
+        self.exporters = exporters
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.slow_request_sample_rate = slow_request_sample_rate
+        if exporters and self._worker is None:
+            self._worker = threading.Thread(
+                target=self._export_loop, name="span-exporter", daemon=True
+            )
+            self._worker.start()
+            atexit.register(self.shutdown)
+
+    def _export_loop(self) -> None:
+        while (spans := self._queue.get()) is not None:
+            for exporter in self.exporters:
+                try:
+                    exporter.export(spans)
+                except Exception as e:
+                    logger.warning(
+                        f"Error exporting spans with {type(exporter).__name__}: {str(e)}"
+                    )
+
+    def shutdown(self) -> None:
+        """Flush the pending traces and stop the export thread."""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._worker = None
+
+    def _finish_trace(self, root: Span) -> None:
+        if self.exporters and random.random() < self.sample_rate:
+            try:
+                self._queue.put_nowait(root.trace_spans)
+            except queue.Full:
+                logger.warning("Span export queue is full, dropping trace")
+
+        if (
+            self.slow_request_ms is not None
+            and root.duration_ms >= self.slow_request_ms
+            and random.random() < self.slow_request_sample_rate
+        ):
+            logger.warning(
+                f"Slow request {root.name} took {root.duration_ms:.1f} ms\n"
+                + format_span_tree(root.trace_spans)
+            )
+
+    @contextmanager
+    def span(self, name: str, **attributes: object) -> Iterator[Span | None]:
+        """Open a span as a child of the current one (or a new trace root)."""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        current = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+            trace_spans=parent.trace_spans if parent else [],
+        )
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {str(e)}"
+            raise
+        finally:
+            current.end_ns = time.time_ns()
+            current.trace_spans.append(current)
+            _current_span.reset(token)
+            if parent is None:
+                self._finish_trace(current)
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attributes: object) -> AbstractContextManager[Span | None]:
+    """Open a span as a child of the current one; see Tracer.span."""
+    return tracer.span(name, **attributes)
+
+
+def set_span_attributes(**attributes: object) -> None:
+    """Add attributes to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attributes(**attributes)
+
+
+def current_trace_id() -> str | None:
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """Decorator to run an async function inside a span.
+
+    Args:
+        name: Name of the span
+
+    Returns:
+        Decorator wrapping the function in the span
+    """
+
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            if not tracer.enabled:
+                return await func(*args, **kwargs)
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+
+        return cast(Callable[P, Awaitable[T]], wrapper)
+
+    return decorator
+
+
+def format_span_tree(spans: list[Span]) -> str:
+    """Render the spans of a trace as an indented tree with offsets and durations."""
+    children: dict[str | None, list[Span]] = {}
+    for trace_span in spans:
+        children.setdefault(trace_span.parent_id, []).append(trace_span)
+    roots = children.get(None) or spans[:1]
+    trace_start = min(trace_span.start_ns for trace_span in spans)
+
+    lines: list[str] = []
+
+    def render(trace_span: Span, depth: int) -> None:
+        offset_ms = (trace_span.start_ns - trace_start) / 1_000_000
+        attributes = " ".join(
+            f"{key}={value}" for key, value in trace_span.attributes.items()
+        )
+        error = f" ERROR {trace_span.error}" if trace_span.error else ""
+        lines.append(
+            f"{'  ' * depth}{trace_span.name} +{offset_ms:.1f}ms "
+            f"{trace_span.duration_ms:.1f}ms {attributes}{error}".rstrip()
+        )
+        for child in sorted(
+            children.get(trace_span.span_id, []), key=lambda s: s.start_ns
+        ):
+            render(child, depth + 1)
+
+    for root in roots:
+        render(root, 0)
+    return "\n".join(lines)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of every HTTP request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with tracer.span(
+            f"{scope['method']} {scope['path']}",
+            **{"http.method": scope["method"], "http.path": scope["path"]},
+        ) as root:
+
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start" and root is not None:
+                    root.set_attributes(**{"http.status_code": message["status"]})
+                    message.setdefault("headers", [])
+                    message["headers"] = [
+                        *message["headers"],
+                        (b"x-trace-id", root.trace_id.encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace_id)
+
+
+def setup_tracing(app: FastAPI) -> None:
+    """Configure tracing from the settings and instrument the application.
+
+    Args:
+        app: FastAPI application instance
+    """
+    settings = get_settings()
+    if not settings.TRACING_ENABLED:
+        return
+
+    exporters: list[SpanExporter] = []
+    if settings.TRACING_EXPORT_PATH:
+        # One file per process so concurrent workers never interleave lines
+        path = Path(settings.TRACING_EXPORT_PATH)
+        exporters.append(
+            JsonlFileSpanExporter(path.with_stem(f"{path.stem}-{os.getpid()}"))
+        )
+    if settings.TRACING_OTLP_ENDPOINT:
+        exporters.append(OtlpHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT))
+
+    tracer.configure(
+        exporters,
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+        slow_request_ms=settings.TRACING_SLOW_REQUEST_MS,
+        slow_request_sample_rate=settings.TRACING_SLOW_REQUEST_SAMPLE_RATE,
+    )
+    app.add_middleware(TracingMiddleware)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from src.infrastructure.tracing import (
+    JsonlFileSpanExporter,
+    Span,
+    SpanExporter,
+    format_span_tree,
+    set_span_attributes,
+    span,
+    traced,
+    tracer,
+)
+
+
+class CollectingExporter(SpanExporter):
+    """Exporter keeping the exported traces in memory."""
+
+    def __init__(self) -> None:
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+@pytest.fixture
+def exporter() -> Iterator[CollectingExporter]:
+    """Enable tracing with an in-memory exporter, disabling it afterwards."""
+    collecting_exporter = CollectingExporter()
+    tracer.configure([collecting_exporter], slow_request_ms=None)
+    yield collecting_exporter
+    tracer.shutdown()
+    tracer.enabled = False
+    tracer.exporters = []
+
+
+@pytest.mark.asyncio
+async def test_spans_form_a_tree_across_tasks(exporter: CollectingExporter) -> None:
+    """Test that child spans, including those in tasks, share the root's trace."""
+
+    # Arrange
+    @traced("child")
+    async def child(index: int) -> None:
+        set_span_attributes(index=index)
+
+    # Act
+    with span("root", user_id=1):
+        await asyncio.gather(child(0), child(1))
+    tracer.shutdown()
+
+    # Assert
+    assert len(exporter.traces) == 1
+    spans = {trace_span.name: trace_span for trace_span in exporter.traces[0]}
+    root = spans["root"]
+    children = [s for s in exporter.traces[0] if s.name == "child"]
+    assert root.parent_id is None
+    assert root.attributes == {"user_id": 1}
+    assert len(children) == 2
+    assert all(child.parent_id == root.span_id for child in children)
+    assert all(child.trace_id == root.trace_id for child in children)
+    assert sorted(child.attributes["index"] for child in children) == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_traced_records_errors(exporter: CollectingExporter) -> None:
+    """Test that an exception marks the span as failed and is re-raised."""
+
+    # Arrange
+    @traced("failing")
+    async def failing() -> None:
+        raise ValueError("Boom")
+
+    # Act
+    with pytest.raises(ValueError), span("root"):
+        await failing()
+    tracer.shutdown()
+
+    # Assert
+    failed = next(s for s in exporter.traces[0] if s.name == "failing")
+    assert failed.error == "ValueError: Boom"
+
+
+@pytest.mark.usefixtures("exporter")
+def test_slow_request_logs_span_tree(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that traces above the threshold are logged with their span tree."""
+    # Arrange
+    tracer.slow_request_ms = 0.0
+
+    # Act
+    with caplog.at_level(logging.WARNING), span("root"), span("db.query", rows=3):
+        pass
+
+    # Assert
+    assert "Slow request root" in caplog.text
+    assert "  db.query" in caplog.text
+    assert "rows=3" in caplog.text
+
+
+def test_span_is_noop_when_disabled() -> None:
+    """Test that span() yields nothing when tracing is disabled."""
+    # Act
+    with span("root") as root:
+        set_span_attributes(ignored=True)
+
+    # Assert
+    assert root is None
+
+
+def test_jsonl_file_span_exporter(tmp_path: Path) -> None:
+    """Test that spans are appended to the file, one JSON object per line."""
+    # Arrange
+    export_path = tmp_path / "spans.jsonl"
+    root = Span(
+        name="root", trace_id="t", span_id="a", parent_id=None, start_ns=0, end_ns=2
+    )
+    child = Span(
+        name="child", trace_id="t", span_id="b", parent_id="a", start_ns=1, end_ns=2
+    )
+
+    # Act
+    JsonlFileSpanExporter(export_path).export([child, root])
+
+    # Assert
+    lines = [json.loads(line) for line in export_path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "root"]
+    assert lines[0]["parent_id"] == "a"
+    assert format_span_tree([child, root]).splitlines()[1].startswith("  child")
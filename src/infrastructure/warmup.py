@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from src.config.settings import get_settings
+from src.database.connection import get_connection
+from src.infrastructure.ai_generation_repository import get_ai_client
+from src.infrastructure.embedding_slots import get_embedding_slots_cache
+from src.infrastructure.local_ai_generation_repository import (
+    get_local_ai_generation_repository,
+)
+from src.infrastructure.prompt_corpus import get_prompt_corpus_cache
+from src.infrastructure.shared_cache import get_shared_cache
+from src.types.ai_backend import AIBackend
+from src.types.readiness import ComponentStatus, ReadinessResponse
+
+logger = logging.getLogger(__name__)
+
+# Vector indexes loaded into shared buffers by pg_prewarm, when it is installed
+PREWARM_VECTOR_INDEXES_QUERY = """
+SELECT index_class.oid::regclass::text AS index_name,
+       pg_prewarm(index_class.oid) AS blocks
+FROM pg_index
+JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+JOIN pg_am ON pg_am.oid = index_class.relam
+WHERE pg_am.amname IN ('ivfflat', 'hnsw')
+"""
+
+# Without pg_prewarm, one search per table reads the index metadata and lists
+# (of the active embedding slot)
+VECTOR_SEARCH_WARMUP_QUERIES = (
+    """
+    SELECT id FROM platform_information.faq_documents
+    ORDER BY {embedding} <=> (SELECT {embedding} FROM platform_information.faq_documents
+                              WHERE {embedding} IS NOT NULL LIMIT 1)
+    LIMIT 1
+    """,
+    """
+    SELECT id FROM platform_information.faq_canonical_answers
+    ORDER BY {question_embedding} <=> (
+        SELECT {question_embedding} FROM platform_information.faq_canonical_answers
+        WHERE {question_embedding} IS NOT NULL LIMIT 1
+    )
+    LIMIT 1
+    """,
+)
+
+
+class WarmupState:
+    """
+    Readiness of the components warmed up when a worker starts.
+
+    The worker accepts requests right away, but reports itself as not ready
+    until the database pool, the active embedding slot, the vector indexes,
+    the prompt corpus, the AI client and the shared cache are loaded, so the
+    first requests do not pay for cold starts (nor embed queries with the
+    model of another slot).
+    """
+
+    COMPONENTS = (
+        "database_pool",
+        "embedding_slots",
+        "vector_indexes",
+        "prompt_corpus",
+        "ai_client",
+        "shared_cache",
+    )
+
+    def __init__(self) -> None:
+        self.components = dict.fromkeys(self.COMPONENTS, ComponentStatus.PENDING)
+        self.duration_seconds: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return all(
+            status in (ComponentStatus.READY, ComponentStatus.DISABLED)
+            for status in self.components.values()
+        )
+
+    def start(self) -> None:
+        """Warm up in the background, retrying the components that failed."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._warm_up())
+
+    def to_response(self) -> ReadinessResponse:
+        return ReadinessResponse(
+            ready=self.ready,
+            components=dict(self.components),
+            warmup_seconds=self.duration_seconds,
+        )
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await self._task
+
+    async def stop(self) -> None:
+        """Cancel a warm-up still running at shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(
+        self, component: str, step: Callable[[], Awaitable[ComponentStatus]]
+    ) -> None:
+        if self.components[component] in (
+            ComponentStatus.READY,
+            ComponentStatus.DISABLED,
+        ):
+            return
+        try:
+            self.components[component] = await step()
+        except Exception as e:
+            logger.error(f"Error warming up {component}: {str(e)}")
+            self.components[component] = ComponentStatus.FAILED
+
+    async def _warm_up(self) -> None:
+        start = time.perf_counter()
+        await asyncio.gather(
+            self._run("ai_client", _load_ai_client),
+            self._run("shared_cache", _open_shared_cache),
+            self._warm_up_database(),
+        )
+        self.duration_seconds = time.perf_counter() - start
+        logger.info(
+            f"Warm-up finished in {self.duration_seconds:.2f}s: "
+            + ", ".join(
+                f"{name}={status.value}" for name, status in self.components.items()
+            )
+        )
+
+    async def _warm_up_database(self) -> None:
+        await self._run("database_pool", _open_database_pool)
+        if self.components["database_pool"] == ComponentStatus.READY:
+            await self._run("embedding_slots", _load_embedding_slots)
+            await self._run("vector_indexes", _load_vector_indexes)
+            await self._run("prompt_corpus", _load_prompt_corpus)
+
+
+async def _open_database_pool() -> ComponentStatus:
+    async with get_connection() as connection:
+        await connection.fetchval("SELECT 1")
+    return ComponentStatus.READY
+
+
+async def _load_embedding_slots() -> ComponentStatus:
+    embedding_slots_cache = get_embedding_slots_cache()
+    await embedding_slots_cache.refresh()
+    embedding_slots_cache.start()
+    return ComponentStatus.READY
+
+
+async def _load_vector_indexes() -> ComponentStatus:
+    async with get_connection() as connection:
+        has_prewarm = await connection.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm')"
+        )
+        if has_prewarm:
+            rows = await connection.fetch(PREWARM_VECTOR_INDEXES_QUERY)
+            logger.info(
+                "Prewarmed vector indexes: "
+                + ", ".join(
+                    f"{row['index_name']} ({row['blocks']} blocks)" for row in rows
+                )
+            )
+        else:
+            slot = get_embedding_slots_cache().current.slot
+            for query in VECTOR_SEARCH_WARMUP_QUERIES:
+                await connection.fetch(
+                    query.format(
+                        embedding=slot.column("embedding"),
+                        question_embedding=slot.column("question_embedding"),
+                    )
+                )
+    return ComponentStatus.READY
+
+
+async def _load_prompt_corpus() -> ComponentStatus:
+    prompt_corpus_cache = get_prompt_corpus_cache()
+    # The local backend does not prompt a model
+    if get_settings().AI_BACKEND == AIBackend.LOCAL or not prompt_corpus_cache.enabled:
+        return ComponentStatus.DISABLED
+    corpus = await prompt_corpus_cache.refresh()
+    prompt_corpus_cache.start()
+    return ComponentStatus.READY if corpus is not None else ComponentStatus.DISABLED
+
+
+async def _load_ai_client() -> ComponentStatus:
+    # Requests resolve the OpenAI client dependency, and importing the SDK takes
+    # a while, so it is loaded here, off the event loop
+    await asyncio.to_thread(get_ai_client)
+    if get_settings().AI_BACKEND == AIBackend.LOCAL:
+        get_local_ai_generation_repository()
+    return ComponentStatus.READY
+
+
+async def _open_shared_cache() -> ComponentStatus:
+    shared_cache = await asyncio.to_thread(get_shared_cache)
+    return ComponentStatus.DISABLED if shared_cache is None else ComponentStatus.READY
+
+
+warmup_state = WarmupState()
@@ -0,0 +1,52 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.infrastructure.warmup import WarmupState
+from src.types.readiness import ComponentStatus
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_failed_components() -> None:
+    """Test that readiness waits for every component and retries failures."""
+    # Arrange
+    state = WarmupState()
+    open_pool = AsyncMock(side_effect=[OSError("unreachable"), ComponentStatus.READY])
+    load_slots = AsyncMock(return_value=ComponentStatus.READY)
+    load_indexes = AsyncMock(return_value=ComponentStatus.READY)
+    load_corpus = AsyncMock(return_value=ComponentStatus.READY)
+    load_ai_client = AsyncMock(return_value=ComponentStatus.READY)
+    open_cache = AsyncMock(return_value=ComponentStatus.DISABLED)
+
+    with (
+        patch("src.infrastructure.warmup._open_database_pool", open_pool),
+        patch("src.infrastructure.warmup._load_embedding_slots", load_slots),
+        patch("src.infrastructure.warmup._load_vector_indexes", load_indexes),
+        patch("src.infrastructure.warmup._load_prompt_corpus", load_corpus),
+        patch("src.infrastructure.warmup._load_ai_client", load_ai_client),
+        patch("src.infrastructure.warmup._open_shared_cache", open_cache),
+    ):
+        # Act
+        state.start()
+        await state.wait()
+        failed = state.to_response()
+        state.start()
+        await state.wait()
+        warmed_up = state.to_response()
+
+    # Assert
+    assert not failed.ready
+    assert failed.components["database_pool"] == ComponentStatus.FAILED
+    assert failed.components["vector_indexes"] == ComponentStatus.PENDING
+    assert warmed_up.ready
+    assert warmed_up.components == {
+        "database_pool": ComponentStatus.READY,
+        "embedding_slots": ComponentStatus.READY,
+        "vector_indexes": ComponentStatus.READY,
+        "prompt_corpus": ComponentStatus.READY,
+        "ai_client": ComponentStatus.READY,
+        "shared_cache": ComponentStatus.DISABLED,
+    }
+    assert warmed_up.warmup_seconds is not None
+    assert open_pool.await_count == 2
+    load_ai_client.assert_awaited_once()
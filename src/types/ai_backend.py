@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class AIBackend(str, Enum):
+    """Implementations available for AI generation operations."""
+
+    OPENAI = "openai"  # OpenAI API (requires OPENAI_API_KEY)
+    LOCAL = "local"  # Deterministic offline stand-ins for benchmarks and offline runs
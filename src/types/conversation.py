@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ConversationTurn:
+    """A previous question of a conversation, with a preview of its answer."""
+
+    query: str
+    answer: str
+    document_ids: tuple[int, ...] = ()
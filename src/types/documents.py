@@ -1,9 +1,13 @@
+from array import array
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
+from src.types.embeddings import EmbeddingVector, Float32Vector
+
 
 class FaqCategory(str, Enum):
     """Categories for FAQ documents."""
@@ -21,6 +25,13 @@ class FaqCategory(str, Enum):
     BEST_PRACTICES = "best_practices"
 
 
+class OversizedDocumentPolicy(str, Enum):
+    """Handling of FAQ documents too large to ingest in one piece."""
+
+    SPLIT = "split"  # Split into parts at paragraph boundaries
+    REJECT = "reject"  # Leave the document out of ingestion
+
+
 class FaqDocumentBaseData(BaseModel):
     """Base data model for FAQ documents used in responses."""
 
@@ -28,6 +39,23 @@ class FaqDocumentBaseData(BaseModel):
     link: str
 
 
+@dataclass(frozen=True, slots=True)
+class FaqDocumentRecord:
+    """
+    Compact, immutable FAQ document used on the query hot path.
+
+    Built straight from database rows without validation and carrying only the
+    fields answer generation needs; pydantic models are only built for the API
+    response.
+    """
+
+    id: int
+    title: str
+    link: str
+    category: FaqCategory
+    llm_summary: str | None = None
+
+
 class FaqDocument(BaseModel):
     """
     Model for FAQ documents stored in the database.
@@ -40,9 +68,11 @@ class FaqDocument(BaseModel):
     title: str = Field(..., description="Title of the FAQ document")
     link: str = Field(..., description="URL or reference link to the original document")
     text: str = Field(..., description="Full text content of the FAQ document")
-    llm_summary: Optional[str] = Field(None, description="AI-generated summary of the document content")
+    llm_summary: Optional[str] = Field(
+        None, description="AI-generated summary of the document content"
+    )
     category: FaqCategory = Field(..., description="Category of the FAQ document")
-    embedding: Optional[List[float]] = None
+    embedding: Optional[Annotated[array, Float32Vector()]] = None
     created_at: Optional[str] = None
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(),
@@ -53,3 +83,32 @@ class FaqDocument(BaseModel):
         """Pydantic config."""
 
         from_attributes = True  # For ORM compatibility
+
+
+class CanonicalQuestionAnswer(BaseModel):
+    """A canonical user question and its vetted answer derived from a FAQ document."""
+
+    question: str = Field(
+        ..., description="A common question users ask about the document"
+    )
+    answer: str = Field(..., description="A complete answer based only on the document")
+
+
+class FaqCanonicalAnswer(BaseModel):
+    """
+    Model for canonical answers stored in the database.
+
+    Canonical answers are generated offline during ingestion so that common
+    questions can be answered without a live generation call.
+    """
+
+    id: int | None = None
+    faq_document_id: int = Field(..., description="ID of the source FAQ document")
+    question: str = Field(..., description="Canonical form of a common user question")
+    question_embedding: EmbeddingVector = Field(
+        ..., description="Embedding of the question"
+    )
+    answer: str = Field(..., description="Vetted answer for the canonical question")
+    answer_embedding: EmbeddingVector | None = Field(
+        None, description="Embedding of the answer"
+    )
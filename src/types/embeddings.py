@@ -1,16 +1,155 @@
-from typing import Any
+import json
+import math
+import operator
+import struct
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Annotated, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import CoreSchema, core_schema
+
+EMBEDDING_DIMENSIONS = 1536
+# Model of the embeddings stored before the model was recorded with them
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+# Models whose embeddings the API shortens to the requested dimensions
+SHORTENABLE_EMBEDDING_MODEL_PREFIXES = ("text-embedding-3-",)
+
+
+def supports_embedding_dimensions(model: str) -> bool:
+    return model.startswith(SHORTENABLE_EMBEDDING_MODEL_PREFIXES)
+
+
+class EmbeddingStorage(str, Enum):
+    """Storage modes for user interaction embeddings."""
+
+    FULL = "full"  # vector(1536), 4 bytes per dimension
+    HALFVEC = "halfvec"  # halfvec(1536), 2 bytes per dimension
+
+
+class EmbeddingSlot(str, Enum):
+    """
+    Sets of embedding columns of the FAQ tables.
+
+    Searches use the active slot while the embeddings of another model are
+    backfilled into the other one, which then becomes active in one step.
+    """
+
+    PRIMARY = "primary"  # embedding, question_embedding, ...
+    SECONDARY = "secondary"  # embedding_secondary, question_embedding_secondary, ...
+
+    @property
+    def other(self) -> "EmbeddingSlot":
+        return (
+            EmbeddingSlot.SECONDARY
+            if self == EmbeddingSlot.PRIMARY
+            else EmbeddingSlot.PRIMARY
+        )
+
+    def column(self, name: str) -> str:
+        """Name of a column (or index) of this slot, given its primary name."""
+        return name if self == EmbeddingSlot.PRIMARY else f"{name}_secondary"
+
+
+@dataclass(frozen=True, slots=True)
+class ActiveEmbeddings:
+    """Slot that searches use and the model its embeddings were generated with."""
+
+    slot: EmbeddingSlot = EmbeddingSlot.PRIMARY
+    model: str = DEFAULT_EMBEDDING_MODEL
+
+
+@lru_cache(maxsize=8)
+def _float32_struct(length: int) -> struct.Struct:
+    return struct.Struct(f"{length}f")
+
+
+def to_float32_vector(value: object) -> array:
+    """
+    Convert a vector to a compact float32 array.
+
+    Accepts float32 arrays (returned as is), sequences of numbers, raw native
+    float32 bytes and the pgvector text format ("[0.1,0.2,...]").
+    """
+    if isinstance(value, array) and value.typecode == "f":
+        return value
+    try:
+        if isinstance(value, str):
+            value = json.loads(value)
+        vector = array("f")
+        if isinstance(value, list | tuple):
+            # Packing with a precompiled struct is ~3x faster than array("f", list)
+            vector.frombytes(_float32_struct(len(value)).pack(*value))
+        elif isinstance(value, bytes | bytearray | memoryview):
+            vector.frombytes(value)
+        else:
+            vector.extend(value)  # pyright: ignore
+        return vector
+    except (TypeError, ValueError, OverflowError, struct.error) as e:
+        raise ValueError(f"Invalid vector: {str(e)}") from e
+
+
+@dataclass(frozen=True)
+class Float32Vector:
+    """
+    Pydantic annotation storing a vector as array('f').
+
+    The vector is converted in one C-level pass and its length checked once,
+    instead of validating every element as a Python float. It stays an array
+    in Python mode dumps and is serialized as a list of floats in JSON.
+    """
+
+    dimensions: int | None = None
+
+    def _validate(self, value: object) -> array:
+        vector = to_float32_vector(value)
+        if self.dimensions is not None and len(vector) != self.dimensions:
+            raise ValueError(
+                f"Expected {self.dimensions} dimensions, got {len(vector)}"
+            )
+        return vector
+
+    def __get_pydantic_core_schema__(
+        self, _source: type[Any], _handler: GetCoreSchemaHandler
+    ) -> CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            self._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                array.tolist, when_used="json"
+            ),
+        )
+
+    def __get_pydantic_json_schema__(
+        self, _core_schema: CoreSchema, handler: GetJsonSchemaHandler
+    ) -> JsonSchemaValue:
+        return handler(
+            core_schema.list_schema(
+                core_schema.float_schema(),
+                min_length=self.dimensions,
+                max_length=self.dimensions,
+            )
+        )
+
+
+def cosine_similarity(first: Sequence[float], second: Sequence[float]) -> float:
+    """Cosine similarity of two vectors (0.0 if either is all zeros)."""
+    norms = math.hypot(*first) * math.hypot(*second)
+    return math.fsum(map(operator.mul, first, second)) / norms if norms else 0.0
+
+
+# Embedding vector of the embedding model, as a float32 array
+EmbeddingVector = Annotated[array, Float32Vector(EMBEDDING_DIMENSIONS)]
 
 
 class Embedding(BaseModel):
     """Type for a single embedding vector."""
 
-    vector: list[float] = Field(
-        ...,
-        description="Vector of floats representing the embedding",
-        min_length=1536,
-        max_length=1536,
+    vector: EmbeddingVector = Field(
+        ..., description="Vector of floats representing the embedding"
     )
 
 
@@ -31,6 +170,6 @@ class EmbeddingRequest(BaseModel):
         ..., description="The text to generate an embedding for", min_length=1
     )
     model: str = Field(
-        default="text-embedding-3-small",
+        default=DEFAULT_EMBEDDING_MODEL,
         description="The model to use for embedding generation",
     )
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class UserQueryHistoryItem(BaseModel):
+    """Model for a single past interaction of a user."""
+
+    id: int
+    user_question: str
+    response: str
+    created_at: datetime
+
+
+class UserQueryHistoryResponse(BaseModel):
+    """Response model containing a page of a user's query history."""
+
+    items: list[UserQueryHistoryItem]
+    next_cursor: str | None = None
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class RateLimitBackend(str, Enum):
+    """Stores of the rate limiting token buckets."""
+
+    MEMORY = "memory"  # Per-process buckets, each worker gets a share of the limits
+    POSTGRES = "postgres"  # Buckets shared by all workers and replicas
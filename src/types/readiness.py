@@ -0,0 +1,24 @@
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class ComponentStatus(str, Enum):
+    """Warm-up status of a component."""
+
+    PENDING = "pending"
+    READY = "ready"
+    DISABLED = "disabled"  # Not used with the current settings
+    FAILED = "failed"
+
+
+class ReadinessResponse(BaseModel):
+    """Response model of the readiness endpoint."""
+
+    ready: bool = Field(..., description="Whether every component is warmed up")
+    components: dict[str, ComponentStatus] = Field(
+        ..., description="Warm-up status of each component"
+    )
+    warmup_seconds: float | None = Field(
+        default=None, description="Duration of the last warm-up, once finished"
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.types.documents import FaqDocument
 
@@ -9,6 +9,14 @@ class QueryRequest(BaseModel):
     query: str
     user_id: int
     i_am_a_developer: bool = False
+    # Follow-ups of a conversation share its id (ignored by the batch endpoint)
+    conversation_id: str | None = Field(default=None, max_length=128)
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for a batch of AI support queries."""
+
+    queries: list[QueryRequest] = Field(min_length=1, max_length=100)
 
 
 class SupportResponse(BaseModel):